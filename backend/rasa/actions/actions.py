@@ -7,6 +7,9 @@ import pytz
 import sqlite3
 import os
 import logging
+import threading
+
+from .db_router import DatabaseRouter
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -47,6 +50,18 @@ def get_db_connection():
         logger.error(f"Database connection error: {e}")
         return None
 
+# Per-store database routing; configured from the environment on first use
+_db_router = None
+_db_router_lock = threading.Lock()
+
+def get_db_router():
+    global _db_router
+    if _db_router is None:
+        with _db_router_lock:
+            if _db_router is None:
+                _db_router = DatabaseRouter.from_env(DB_PATH)
+    return _db_router
+
 class ActionGetTime(Action):
     def name(self) -> Text:
         return "action_get_time"
@@ -126,27 +141,14 @@ class ActionTrackOrder(Action):
             dispatcher.utter_message(json_message={"custom": {"suggested_replies": suggested_replies}})
             return []
     
-        # Get the connection to the database
-        conn = get_db_connection()
-        if not conn:
-            dispatcher.utter_message(text="I'm sorry, but I'm having trouble accessing our order database right now. Please try again later.")
-            return []
-    
         try:
-            # Use a cursor to query the database
-            cursor = conn.cursor()
-        
-            # Query for order information from SalesOrderHeader
-            query = """
-            SELECT OrderDate, Status, TotalDue
-            FROM SalesOrderHeader
-            WHERE SalesOrderID = ?
-            """
-        
-            cursor.execute(query, (order_id,))
-            result = cursor.fetchone()
-        
-            if result:
+            # Route the lookup to the conversation's store; unknown stores fan out to all shards
+            router = get_db_router()
+            store = router.resolve_store(tracker)
+            found = router.find_order(order_id, store)
+
+            if found:
+                _, result = found
                 order_date = result["OrderDate"]
                 status = result["Status"]
                 total = result["TotalDue"]
@@ -164,14 +166,11 @@ class ActionTrackOrder(Action):
                 dispatcher.utter_message(text=f"I couldn't find any order with the number {order_id}. Please check and try again.")
                 return []
             
-        except sqlite3.Error as e:
+        except (sqlite3.Error, ValueError) as e:
+            # ValueError: malformed ADVENTURE_WORKS_* shard settings
             dispatcher.utter_message(text="I encountered an error while retrieving your order information. Please try again later.")
             logger.error(f"Database error in action_track_order: {e}")
             return []
-        finally:
-            # Always close the connection when done
-            if conn:
-                conn.close()
 
 
 class ActionLogComplaint(Action):
@@ -0,0 +1,307 @@
+"""Routing of database access to per-store AdventureWorks shards.
+
+Every storefront has its own AdventureWorks-style SQLite database. A
+:class:`DatabaseRouter` maps a store key to a :class:`Shard`, which owns the
+database file, a small connection pool and an order cache. The store of a
+conversation is taken from the ``store_id`` slot, from the ``store_id`` /
+``store`` / ``tenant`` metadata of the latest user message or from the input
+channel. Lookups for a conversation whose store is unknown fan out to all
+shards in parallel.
+
+Shards are configured with ``ADVENTURE_WORKS_DB_SHARDS``, either as JSON
+(``{"eu": "/app/db/eu.db", "us": "/app/db/us.db"}``) or as a comma separated
+``store=path`` list. ``ADVENTURE_WORKS_CHANNEL_STORES`` optionally maps input
+channels to stores in the same syntax. Without any configuration a single
+``default`` shard serves ``DB_PATH``. ``ADVENTURE_WORKS_ORDER_CHANGE_FEED``
+sets the interval in seconds at which every shard polls its order change feed
+to evict changed orders from its cache; unset or ``0`` leaves the cache to
+``ADVENTURE_WORKS_ORDER_CACHE_TTL`` alone.
+"""
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Text, Tuple
+
+from .order_changes import INDEX_NAMES, OrderChangeFeed, OrderStatusCache, missing_indexes
+from .order_lookup import KEY_ID, PURCHASE_ORDER_INDEX, OrderKey, fetch_orders, group_keys
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE = "default"
+STORE_SLOT = "store_id"
+STORE_METADATA_KEYS = ("store_id", "store", "tenant")
+
+
+def parse_mapping(value: Optional[Text]) -> Dict[Text, Text]:
+    """Parse a JSON object or ``key=value,key=value`` string into a dict."""
+    if not value or not value.strip():
+        return {}
+    value = value.strip()
+    if value.startswith("{"):
+        return {str(k): str(v) for k, v in json.loads(value).items()}
+    mapping = {}
+    for item in value.split(","):
+        if "=" in item:
+            key, _, path = item.partition("=")
+            mapping[key.strip()] = path.strip()
+    return mapping
+
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections to one database file."""
+
+    def __init__(self, db_path: Text, size: int = 4, timeout: float = 10.0) -> None:
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return self._connect()
+                except sqlite3.Error:
+                    self._created -= 1
+                    raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(f"Timed out waiting for a connection to {self.db_path}")
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._created = 0
+
+
+class Shard:
+    """One store's database file with its own connection pool and caches."""
+
+    def __init__(
+        self,
+        name: Text,
+        db_path: Text,
+        pool_size: int = 4,
+        cache_size: int = 10000,
+        cache_ttl: Optional[float] = 5.0,
+    ) -> None:
+        self.name = name
+        self.db_path = db_path
+        self.pool = ConnectionPool(db_path, size=pool_size)
+        self.orders = OrderStatusCache(maxsize=cache_size, ttl=cache_ttl)
+        self.feed: Optional[OrderChangeFeed] = None
+
+    def get_order(self, order_id: Any) -> Optional[Dict[Text, Any]]:
+        """Return the order header for ``order_id`` in this store, or ``None``."""
+        hit, value = self.orders.lookup(order_id)
+        if hit:
+            return value
+        with self.pool.connection() as conn:
+            return self.orders.get(conn, order_id)
+
+    def get_orders(self, keys: Sequence[OrderKey]) -> Dict[OrderKey, Optional[Dict[Text, Any]]]:
+        """Resolve many parsed order keys with set-based queries.
+
+        Numeric ids are served from the order cache where possible; every
+        kind of key is then looked up with one chunked query per kind.
+        """
+        results: Dict[OrderKey, Optional[Dict[Text, Any]]] = {}
+        pending = []
+        for key in keys:
+            if key[0] == KEY_ID:
+                hit, value = self.orders.lookup(key[1])
+                if hit:
+                    results[key] = value
+                    continue
+            pending.append(key)
+        if not pending:
+            return results
+        groups = group_keys(pending)
+        with self.pool.connection() as conn:
+            for kind, values in groups.items():
+                found = fetch_orders(conn, kind, values)
+                for value in values:
+                    order = found.get(value)
+                    results[(kind, value)] = order
+                    if order is not None:
+                        self.orders.store(order["SalesOrderID"], order)
+                    elif kind == KEY_ID:
+                        self.orders.store(value, None)
+        return results
+
+    def watch_changes(self, interval: float = 2.0) -> OrderChangeFeed:
+        """Invalidate this shard's caches from an order change feed."""
+        if self.feed is None:
+            self.feed = OrderChangeFeed(db_path=self.db_path, tables=("SalesOrderHeader",))
+            self.feed.subscribe(self.orders.invalidate)
+            self.feed.start(interval)
+        return self.feed
+
+    def missing_indexes(self) -> List[Text]:
+        """Indexes the order lookups and the running change feed need but this database lacks."""
+        names = [PURCHASE_ORDER_INDEX]
+        if self.feed is not None:
+            names.extend(INDEX_NAMES[table] for table in self.feed.tables)
+        with self.pool.connection() as conn:
+            return missing_indexes(conn, names)
+
+    def close(self) -> None:
+        if self.feed is not None:
+            self.feed.stop()
+            self.feed = None
+        self.pool.close()
+
+
+class DatabaseRouter:
+    """Maps stores to shards and fans out lookups across them."""
+
+    def __init__(
+        self,
+        shards: Dict[Text, Text],
+        channel_stores: Optional[Dict[Text, Text]] = None,
+        pool_size: int = 4,
+        cache_ttl: Optional[float] = 5.0,
+    ) -> None:
+        if not shards:
+            raise ValueError("At least one database shard is required")
+        self.shards: Dict[Text, Shard] = {
+            name: Shard(name, path, pool_size=pool_size, cache_ttl=cache_ttl)
+            for name, path in shards.items()
+        }
+        self.channel_stores = channel_stores or {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(self.shards), thread_name_prefix="db-fanout"
+        )
+
+    @classmethod
+    def from_env(cls, default_path: Text) -> "DatabaseRouter":
+        shards = parse_mapping(os.environ.get("ADVENTURE_WORKS_DB_SHARDS")) or {DEFAULT_STORE: default_path}
+        channel_stores = parse_mapping(os.environ.get("ADVENTURE_WORKS_CHANNEL_STORES"))
+        ttl = os.environ.get("ADVENTURE_WORKS_ORDER_CACHE_TTL")
+        interval = float(os.environ.get("ADVENTURE_WORKS_ORDER_CHANGE_FEED") or 0)
+        logger.info(f"Database router configured with shards: {sorted(shards)}")
+        router = cls(shards, channel_stores, cache_ttl=float(ttl) if ttl else 5.0)
+        for shard in router.shards.values():
+            try:
+                if interval > 0:
+                    shard.watch_changes(interval)
+                missing = shard.missing_indexes()
+            except sqlite3.Error as e:
+                logger.error(f"Could not open the database of store {shard.name}: {e}")
+                continue
+            if missing:
+                logger.warning(
+                    f"Store {shard.name} has no {', '.join(missing)}; queries that need them will scan "
+                    f"whole tables (create them with python -m actions.order_changes {shard.db_path})"
+                )
+        return router
+
+    def resolve_store(self, tracker: Any) -> Optional[Text]:
+        """Work out which store a conversation belongs to, if any."""
+        candidates = [tracker.get_slot(STORE_SLOT)]
+        metadata = (tracker.latest_message or {}).get("metadata") or {}
+        candidates.extend(metadata.get(key) for key in STORE_METADATA_KEYS)
+        channel = getattr(tracker, "get_latest_input_channel", lambda: None)()
+        candidates.append(self.channel_stores.get(channel) if channel else None)
+        for store in candidates:
+            if store and str(store) in self.shards:
+                return str(store)
+        return None
+
+    def shard(self, store: Optional[Text]) -> Optional[Shard]:
+        if store is None and len(self.shards) == 1:
+            return next(iter(self.shards.values()))
+        return self.shards.get(store) if store else None
+
+    def fan_out(self, fn: Callable[[Shard], Any]) -> List[Tuple[Text, Any]]:
+        """Run ``fn`` on every shard in parallel; results keep shard order.
+
+        A shard whose database fails is logged and left out, so one broken
+        store does not hide the others; the error is raised only when every
+        shard failed.
+        """
+        names = list(self.shards)
+        futures = [self._executor.submit(fn, self.shards[name]) for name in names]
+        results: List[Tuple[Text, Any]] = []
+        error: Optional[sqlite3.Error] = None
+        for name, future in zip(names, futures):
+            try:
+                results.append((name, future.result()))
+            except sqlite3.Error as e:
+                logger.error(f"Lookup in store {name} failed: {e}")
+                error = error or e
+        if error is not None and not results:
+            raise error
+        return results
+
+    def find_order(
+        self, order_id: Any, store: Optional[Text] = None
+    ) -> Optional[Tuple[Text, Dict[Text, Any]]]:
+        """Look an order up in ``store`` or, if unknown, in every shard.
+
+        Returns ``(store, order)`` for the first shard holding the order.
+        """
+        shard = self.shard(store)
+        if shard is not None:
+            order = shard.get_order(order_id)
+            return (shard.name, order) if order else None
+        for name, order in self.fan_out(lambda s: s.get_order(order_id)):
+            if order:
+                return name, order
+        return None
+
+    def find_orders(
+        self, keys: Sequence[OrderKey], store: Optional[Text] = None
+    ) -> Dict[OrderKey, Optional[Tuple[Text, Dict[Text, Any]]]]:
+        """Bulk :meth:`find_order`: ``(store, order)`` or ``None`` per parsed key."""
+        shard = self.shard(store)
+        if shard is not None:
+            return {
+                key: (shard.name, order) if order else None
+                for key, order in shard.get_orders(keys).items()
+            }
+        results: Dict[OrderKey, Optional[Tuple[Text, Dict[Text, Any]]]] = {key: None for key in keys}
+        for name, orders in self.fan_out(lambda s: s.get_orders(keys)):
+            for key, order in orders.items():
+                if order and results[key] is None:
+                    results[key] = (name, order)
+        return results
+
+    def close(self) -> None:
+        for shard in self.shards.values():
+            shard.close()
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,348 @@
+"""Change feed over the order tables for cache invalidation and notifications.
+
+``SalesOrderHeader`` and ``SalesOrderDetail`` are polled with a
+``(ModifiedDate, rowid)`` watermark. With an index on ``ModifiedDate``
+(SQLite appends the rowid to every index entry) each poll is a single index
+range scan that starts right after the watermark: its cost depends on the
+number of changed rows, not on the size of the table. The feed never changes
+the schema itself; create its indexes, along with the purchase order index of
+:mod:`.order_lookup`, once per database as a setup step:
+
+    python -m actions.order_changes /app/db/AdventureWorks.db
+
+Writers must bump ``ModifiedDate`` whenever they touch a row - the same
+contract AdventureWorks already follows - for the change to be picked up.
+
+Changed rows are turned into compact :class:`OrderChange` events and handed
+to in-process subscribers (caches, precomputed views, "your order shipped"
+notifications, ...):
+
+    feed = OrderChangeFeed()
+    feed.subscribe(notify_shipped, table=HEADER_TABLE, status=STATUS_SHIPPED)
+    feed.start(interval=2.0)
+"""
+
+import argparse
+import logging
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Text, Tuple
+
+logger = logging.getLogger(__name__)
+
+HEADER_TABLE = "SalesOrderHeader"
+DETAIL_TABLE = "SalesOrderDetail"
+
+# SalesOrderHeader.Status values used by AdventureWorks
+STATUS_IN_PROCESS = 1
+STATUS_APPROVED = 2
+STATUS_BACKORDERED = 3
+STATUS_REJECTED = 4
+STATUS_SHIPPED = 5
+STATUS_CANCELLED = 6
+
+STATUS_NAMES = {
+    STATUS_IN_PROCESS: "in_process",
+    STATUS_APPROVED: "approved",
+    STATUS_BACKORDERED: "backordered",
+    STATUS_REJECTED: "rejected",
+    STATUS_SHIPPED: "shipped",
+    STATUS_CANCELLED: "cancelled",
+}
+
+# A watermark is the (ModifiedDate, rowid) of the last row delivered
+Watermark = Tuple[Text, int]
+
+INDEX_NAMES = {
+    HEADER_TABLE: "IX_SalesOrderHeader_ModifiedDate",
+    DETAIL_TABLE: "IX_SalesOrderDetail_ModifiedDate",
+}
+
+_INDEXES = {
+    table: f"CREATE INDEX IF NOT EXISTS [{name}] ON [{table}]([ModifiedDate])"
+    for table, name in INDEX_NAMES.items()
+}
+
+_QUERIES = {
+    HEADER_TABLE: """
+        SELECT rowid, SalesOrderID, NULL AS SalesOrderDetailID, Status, ShipDate,
+               NULL AS ProductID, NULL AS OrderQty, ModifiedDate
+        FROM SalesOrderHeader
+        WHERE (ModifiedDate, rowid) > (?, ?)
+        ORDER BY ModifiedDate, rowid
+        LIMIT ?
+    """,
+    DETAIL_TABLE: """
+        SELECT rowid, SalesOrderID, SalesOrderDetailID, NULL AS Status, NULL AS ShipDate,
+               ProductID, OrderQty, ModifiedDate
+        FROM SalesOrderDetail
+        WHERE (ModifiedDate, rowid) > (?, ?)
+        ORDER BY ModifiedDate, rowid
+        LIMIT ?
+    """,
+}
+
+
+def ensure_change_indexes(
+    conn: sqlite3.Connection, tables: Sequence[Text] = (HEADER_TABLE, DETAIL_TABLE)
+) -> None:
+    """Index ``ModifiedDate`` of ``tables`` so polls are index range scans."""
+    for table in tables:
+        conn.execute(_INDEXES[table])
+    conn.commit()
+
+
+def missing_indexes(conn: sqlite3.Connection, names: Sequence[Text]) -> List[Text]:
+    """The indexes among ``names`` that the database of ``conn`` does not have."""
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    return [name for name in names if name not in existing]
+
+
+class OrderChange(NamedTuple):
+    """A changed order header or order line."""
+
+    table: Text
+    order_id: int
+    detail_id: Optional[int]
+    status: Optional[int]
+    ship_date: Optional[Text]
+    product_id: Optional[int]
+    quantity: Optional[int]
+    modified_date: Text
+    row_id: int
+
+
+Subscriber = Callable[[OrderChange], Any]
+
+
+class OrderChangeFeed:
+    """Polls the order tables and fans change events out to subscribers.
+
+    Args:
+        db_path: SQLite database to watch; defaults to the actions' ``DB_PATH``.
+        tables: Tables to watch.
+        start_at: ``"now"`` to only report changes made after the feed was
+            created, ``"beginning"`` to replay every row first.
+        watermarks: Explicit per-table watermarks, e.g. restored from a
+            previous run; they take precedence over ``start_at``.
+        batch_size: Maximum rows fetched per query.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[Text] = None,
+        tables: Tuple[Text, ...] = (HEADER_TABLE, DETAIL_TABLE),
+        start_at: Text = "now",
+        watermarks: Optional[Dict[Text, Watermark]] = None,
+        batch_size: int = 500,
+    ) -> None:
+        if db_path is None:
+            from .actions import DB_PATH
+
+            db_path = DB_PATH
+        self.db_path = db_path
+        self.tables = tuple(tables)
+        self.batch_size = batch_size
+        self._subscribers: List[Tuple[Subscriber, Optional[Text], Optional[int]]] = []
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        conn = self._connection()
+        self.watermarks: Dict[Text, Watermark] = {}
+        for table in self.tables:
+            if watermarks and table in watermarks:
+                self.watermarks[table] = tuple(watermarks[table])  # type: ignore
+            elif start_at == "beginning":
+                self.watermarks[table] = ("", 0)
+            else:
+                row = conn.execute(
+                    f"SELECT ModifiedDate, rowid FROM [{table}] "
+                    f"ORDER BY ModifiedDate DESC, rowid DESC LIMIT 1"
+                ).fetchone()
+                self.watermarks[table] = (row[0], row[1]) if row else ("", 0)
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        return self._conn
+
+    def subscribe(
+        self,
+        callback: Subscriber,
+        table: Optional[Text] = None,
+        status: Optional[int] = None,
+    ) -> Callable[[], None]:
+        """Register ``callback`` for changes, optionally filtered by table and status.
+
+        Returns a function that removes the subscription again.
+        """
+        entry = (callback, table, status)
+        with self._lock:
+            self._subscribers.append(entry)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if entry in self._subscribers:
+                    self._subscribers.remove(entry)
+
+        return unsubscribe
+
+    def _publish(self, change: OrderChange) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback, table, status in subscribers:
+            if table is not None and change.table != table:
+                continue
+            if status is not None and change.status != status:
+                continue
+            try:
+                callback(change)
+            except Exception as e:
+                logger.error(f"Order change subscriber {callback!r} failed: {e}")
+
+    def poll(self) -> List[OrderChange]:
+        """Fetch every change since the watermarks and publish it, batch by batch."""
+        changes: List[OrderChange] = []
+        with self._poll_lock:
+            conn = self._connection()
+            for table in self.tables:
+                while True:
+                    modified, row_id = self.watermarks[table]
+                    rows = conn.execute(_QUERIES[table], (modified, row_id, self.batch_size)).fetchall()
+                    batch = [
+                        OrderChange(
+                            table=table,
+                            order_id=row[1],
+                            detail_id=row[2],
+                            status=row[3],
+                            ship_date=row[4],
+                            product_id=row[5],
+                            quantity=row[6],
+                            modified_date=row[7],
+                            row_id=row[0],
+                        )
+                        for row in rows
+                    ]
+                    if batch:
+                        self.watermarks[table] = (batch[-1].modified_date, batch[-1].row_id)
+                    for change in batch:
+                        self._publish(change)
+                    changes.extend(batch)
+                    if len(rows) < self.batch_size:
+                        break
+        return changes
+
+    def start(self, interval: float = 5.0) -> None:
+        """Poll every ``interval`` seconds on a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def run() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    self.poll()
+                except sqlite3.Error as e:
+                    logger.error(f"Order change feed poll failed: {e}")
+
+        self._thread = threading.Thread(target=run, name="order-change-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and close the connection."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._poll_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class OrderStatusCache:
+    """Read-through LRU cache of order headers kept fresh by a change feed.
+
+    Subscribe :meth:`invalidate` to an :class:`OrderChangeFeed`; every change
+    to an order evicts its cached row so the next lookup reads it again. When
+    no feed is running, ``ttl`` bounds how stale an entry may get.
+    """
+
+    COLUMNS = ("SalesOrderID", "OrderDate", "Status", "ShipDate", "TotalDue")
+
+    def __init__(self, maxsize: int = 10000, ttl: Optional[float] = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Any, Tuple[float, Optional[Dict[Text, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, order_id: Any) -> Tuple[bool, Optional[Dict[Text, Any]]]:
+        """Return ``(hit, row)`` without touching the database."""
+        with self._lock:
+            entry = self._entries.get(order_id)
+            if entry is None:
+                return False, None
+            if self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[order_id]
+                return False, None
+            self._entries.move_to_end(order_id)
+            return True, entry[1]
+
+    def store(self, order_id: Any, value: Optional[Dict[Text, Any]]) -> None:
+        with self._lock:
+            self._entries[order_id] = (time.monotonic(), value)
+            self._entries.move_to_end(order_id)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get(self, conn: sqlite3.Connection, order_id: Any) -> Optional[Dict[Text, Any]]:
+        hit, value = self.lookup(order_id)
+        if hit:
+            return value
+        row = conn.execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM SalesOrderHeader WHERE SalesOrderID = ?",
+            (order_id,),
+        ).fetchone()
+        value = dict(zip(self.COLUMNS, row)) if row else None
+        self.store(order_id, value)
+        return value
+
+    def invalidate(self, change: OrderChange) -> None:
+        with self._lock:
+            for key in (change.order_id, str(change.order_id)):
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def main(argv: Optional[List[Text]] = None) -> int:
+    from .order_lookup import ensure_lookup_indexes
+
+    parser = argparse.ArgumentParser(description="Create the indexes the order change feed and order lookups use.")
+    parser.add_argument("paths", nargs="+", help="AdventureWorks SQLite databases")
+    args = parser.parse_args(argv)
+
+    for path in args.paths:
+        conn = sqlite3.connect(path)
+        try:
+            ensure_change_indexes(conn)
+            ensure_lookup_indexes(conn)
+        finally:
+            conn.close()
+        print(f"Order indexes ready in {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
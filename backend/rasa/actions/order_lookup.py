@@ -0,0 +1,137 @@
+"""Set-based lookup of many orders given in mixed formats.
+
+Agents paste order references in whatever form the customer used: the
+numeric ``SalesOrderID`` (``71774``), the ``SalesOrderNumber`` (``SO71774``,
+``so-71774``, ``#SO71774``) or the customer's ``PurchaseOrderNumber``
+(``PO348186287``). :func:`parse_order_key` normalises a key to a
+``(kind, value)`` pair, and :func:`fetch_orders` resolves all values of one
+kind with a handful of queries instead of one query per order:
+
+* up to ``temp_table_threshold`` values are looked up with ``IN (...)``
+  queries of at most ``chunk_size`` bound parameters each, staying below
+  SQLite's variable limit;
+* larger batches are written to a temporary table on the connection and
+  joined in a single query, which keeps statements small and cacheable.
+
+SQLite turns an ``IN`` list into a transient index, so both cost about the
+same per order - roughly half of one query per order (see
+``benchmarks/bench_order_status.py``).
+"""
+
+import logging
+import re
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Text, Tuple
+
+from .order_changes import OrderStatusCache
+
+logger = logging.getLogger(__name__)
+
+KEY_ID = "id"
+KEY_NUMBER = "number"
+KEY_PURCHASE_ORDER = "purchase_order"
+
+KEY_COLUMNS = {
+    KEY_ID: "SalesOrderID",
+    KEY_NUMBER: "SalesOrderNumber",
+    KEY_PURCHASE_ORDER: "PurchaseOrderNumber",
+}
+
+IN_CHUNK_SIZE = 500
+# Order ids are SQLite INTEGERs; larger ones cannot be bound as parameters
+MAX_ORDER_ID = 2 ** 63 - 1
+TEMP_TABLE_THRESHOLD = 5000
+
+_ID_RE = re.compile(r"^#?\s*(\d+)$")
+_PREFIXED_RE = re.compile(r"^#?\s*(SO|PO)[-\s#]?(\d+)$", re.IGNORECASE)
+
+PURCHASE_ORDER_INDEX = "IX_SalesOrderHeader_PurchaseOrderNumber"
+_PURCHASE_ORDER_INDEX = (
+    f"CREATE INDEX IF NOT EXISTS [{PURCHASE_ORDER_INDEX}] ON [SalesOrderHeader]([PurchaseOrderNumber])"
+)
+
+OrderKey = Tuple[Text, Any]
+
+
+def parse_order_key(key: Any) -> Optional[OrderKey]:
+    """Normalise an order reference to ``(kind, value)``, or ``None`` if unusable."""
+    if isinstance(key, bool):
+        return None
+    if isinstance(key, int):
+        return (KEY_ID, key) if 0 < key <= MAX_ORDER_ID else None
+    if not isinstance(key, str):
+        return None
+    text = key.strip()
+    match = _ID_RE.match(text)
+    if match:
+        order_id = int(match.group(1))
+        return (KEY_ID, order_id) if 0 < order_id <= MAX_ORDER_ID else None
+    match = _PREFIXED_RE.match(text)
+    if match:
+        prefix = match.group(1).upper()
+        kind = KEY_NUMBER if prefix == "SO" else KEY_PURCHASE_ORDER
+        return kind, prefix + match.group(2)
+    return None
+
+
+def ensure_lookup_indexes(conn: sqlite3.Connection) -> None:
+    """Index ``PurchaseOrderNumber``; ids and order numbers are already unique keys.
+
+    A setup step, run by ``python -m actions.order_changes``.
+    """
+    conn.execute(_PURCHASE_ORDER_INDEX)
+    conn.commit()
+
+
+def _chunks(values: Sequence[Any], size: int) -> Iterable[Sequence[Any]]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def fetch_orders(
+    conn: sqlite3.Connection,
+    kind: Text,
+    values: Iterable[Any],
+    chunk_size: int = IN_CHUNK_SIZE,
+    temp_table_threshold: int = TEMP_TABLE_THRESHOLD,
+) -> Dict[Any, Dict[Text, Any]]:
+    """Order headers for ``values`` of one key kind, keyed by the value.
+
+    Values that match no order are missing from the result.
+    """
+    column = KEY_COLUMNS[kind]
+    unique = list(dict.fromkeys(values))
+    if not unique:
+        return {}
+    columns = ", ".join(OrderStatusCache.COLUMNS)
+    select = f"SELECT [{column}], {columns} FROM SalesOrderHeader"
+    found: Dict[Any, Dict[Text, Any]] = {}
+
+    def collect(rows: Iterable[Sequence[Any]]) -> None:
+        for row in rows:
+            found[row[0]] = dict(zip(OrderStatusCache.COLUMNS, row[1:]))
+
+    if len(unique) < temp_table_threshold:
+        for chunk in _chunks(unique, chunk_size):
+            placeholders = ",".join("?" * len(chunk))
+            collect(conn.execute(f"{select} WHERE [{column}] IN ({placeholders})", chunk))
+        return found
+
+    # The temp table lives in the connection's private temp database, so
+    # pooled connections never see each other's keys
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS bulk_order_keys (k PRIMARY KEY) WITHOUT ROWID")
+    try:
+        conn.executemany("INSERT OR IGNORE INTO bulk_order_keys (k) VALUES (?)", ((v,) for v in unique))
+        collect(conn.execute(f"{select} WHERE [{column}] IN (SELECT k FROM bulk_order_keys)"))
+    finally:
+        conn.execute("DELETE FROM bulk_order_keys")
+        conn.commit()
+    return found
+
+
+def group_keys(keys: Iterable[OrderKey]) -> Dict[Text, List[Any]]:
+    """Values per key kind, preserving first-seen order."""
+    groups: Dict[Text, List[Any]] = {}
+    for kind, value in keys:
+        groups.setdefault(kind, []).append(value)
+    return groups
@@ -0,0 +1,487 @@
+"""Offline replay of recorded conversations through the custom actions.
+
+Recorded conversations - either the ``{"conversations": [...]}`` export or a
+tracker-store dump whose values carry an ``events`` list - are turned into
+Rasa-style event streams. Every time a recorded action is one of our custom
+actions, a tracker is reconstructed from the events that preceded it and the
+action is executed in-process, without a Rasa or action server. The messages
+it dispatches are compared against the bot utterances that were recorded right
+after it, and the time spent in each action is collected for profiling.
+
+Work is sharded across a process pool so thousands of conversations replay in
+seconds. Run it from ``backend/rasa``:
+
+    python -m actions.replay tests/rasa_conversations.json --domain domain.yml
+"""
+
+import argparse
+import asyncio
+import importlib
+import inspect
+import json
+import logging
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Text
+
+from rasa_sdk import Action, Tracker
+from rasa_sdk.executor import CollectingDispatcher
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of mismatch/error details kept in a report
+MAX_DETAILS = 50
+
+_DIGITS = re.compile(r"\d")
+_CALENDAR_WORDS = re.compile(
+    r"\b(?:Mon|Tues|Wednes|Thurs|Fri|Satur|Sun)day\b|"
+    r"\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\b"
+)
+_SPACES = re.compile(r"\s+")
+
+
+# ---------------------------------------------------------------------------
+# Loading recordings
+# ---------------------------------------------------------------------------
+def conversation_to_events(conversation: Dict[Text, Any]) -> List[Dict[Text, Any]]:
+    """Convert a ``conversations`` export entry into Rasa-style events."""
+    events: List[Dict[Text, Any]] = []
+    for msg in conversation.get("messages", []):
+        timestamp = msg.get("timestamp")
+        msg_type = msg.get("type")
+        if msg_type == "user":
+            text = msg.get("text", "")
+            events.append({
+                "event": "user",
+                "timestamp": timestamp,
+                "text": text,
+                "parse_data": {
+                    "intent": {
+                        "name": msg.get("intent"),
+                        "confidence": msg.get("confidence", 1.0),
+                    },
+                    "entities": msg.get("entities", []),
+                    "text": text,
+                },
+            })
+        elif msg_type == "bot":
+            if msg.get("action"):
+                events.append({"event": "action", "timestamp": timestamp, "name": msg["action"]})
+            events.append({"event": "bot", "timestamp": timestamp, "text": msg.get("text")})
+        elif msg_type == "action":
+            name = msg.get("action") or msg.get("text")
+            events.append({"event": "action", "timestamp": timestamp, "name": name})
+    return events
+
+
+def load_recordings(path: Text) -> List[Dict[Text, Any]]:
+    """Load every recorded conversation in ``path`` as ``{"sender_id", "events"}``.
+
+    Both the ``conversations`` array and tracker-store entries (top level or
+    nested one level deep, as in TinyDB's ``_default`` table) are collected.
+    """
+    with open(path, "r") as f:
+        data = json.load(f)
+
+    recordings: List[Dict[Text, Any]] = []
+    if isinstance(data, list):
+        data = {"conversations": data}
+    if not isinstance(data, dict):
+        return recordings
+
+    for i, conv in enumerate(data.get("conversations", [])):
+        recordings.append({
+            "sender_id": conv.get("user_id", conv.get("sender_id", f"conversation_{i}")),
+            "events": conversation_to_events(conv),
+        })
+
+    def collect_trackers(table: Dict[Text, Any]) -> None:
+        for key, tracker in table.items():
+            if isinstance(tracker, dict) and isinstance(tracker.get("events"), list):
+                recordings.append({
+                    "sender_id": tracker.get("sender_id", key),
+                    "events": tracker["events"],
+                })
+
+    collect_trackers(data)
+    for value in data.values():
+        if isinstance(value, dict):
+            collect_trackers(value)
+    return recordings
+
+
+# ---------------------------------------------------------------------------
+# Tracker reconstruction
+# ---------------------------------------------------------------------------
+def build_tracker_state(sender_id: Text, events: List[Dict[Text, Any]]) -> Dict[Text, Any]:
+    """Rebuild the tracker payload an action server would receive after ``events``."""
+    slots: Dict[Text, Any] = {}
+    latest_message: Dict[Text, Any] = {}
+    latest_action_name = None
+    latest_event_time = None
+    for event in events:
+        latest_event_time = event.get("timestamp") or latest_event_time
+        event_type = event.get("event")
+        if event_type == "slot":
+            slots[event.get("name")] = event.get("value")
+        elif event_type == "reset_slots":
+            slots = {}
+        elif event_type == "user":
+            latest_message = dict(event.get("parse_data") or {})
+            latest_message.setdefault("intent", {})
+            latest_message.setdefault("entities", [])
+            latest_message["text"] = event.get("text")
+        elif event_type == "action":
+            latest_action_name = event.get("name")
+    return {
+        "sender_id": sender_id,
+        "slots": slots,
+        "latest_message": latest_message,
+        "latest_event_time": latest_event_time,
+        "followup_action": None,
+        "paused": False,
+        "events": events,
+        "latest_input_channel": None,
+        "active_loop": {},
+        "latest_action_name": latest_action_name,
+    }
+
+
+def load_registry(package: Text = "actions") -> Dict[Text, Action]:
+    """Instantiate every custom action exported by ``package``, keyed by name."""
+    module = importlib.import_module(package)
+    registry: Dict[Text, Action] = {}
+    for obj in vars(module).values():
+        if inspect.isclass(obj) and issubclass(obj, Action) and obj is not Action:
+            action = obj()
+            registry[action.name()] = action
+    return registry
+
+
+def load_domain(path: Optional[Text]) -> Dict[Text, Any]:
+    """Load ``domain.yml`` so response templates can be verified; ``{}`` if unset."""
+    if not path:
+        return {}
+    from ruamel.yaml import YAML
+
+    with open(path, "r") as f:
+        return YAML(typ="safe", pure=True).load(f) or {}
+
+
+# ---------------------------------------------------------------------------
+# Verification
+# ---------------------------------------------------------------------------
+def normalize_text(text: Optional[Text], strict: bool = False) -> Text:
+    """Normalize an utterance for comparison.
+
+    Unless ``strict`` is set, digits and weekday/month names are masked so
+    time- and date-dependent replies still compare equal to their recording.
+    """
+    text = _SPACES.sub(" ", (text or "").strip())
+    if strict:
+        return text
+    return _DIGITS.sub("#", _CALENDAR_WORDS.sub("@", text))
+
+
+def _candidates(
+    message: Dict[Text, Any], domain: Dict[Text, Any], strict: bool
+) -> Optional[List[Text]]:
+    """Return the texts a dispatched message may have rendered as, or ``None``."""
+    if message.get("text"):
+        return [normalize_text(message["text"], strict)]
+    response = message.get("response") or message.get("template")
+    if not response:
+        return None
+    variants = (domain.get("responses") or {}).get(response) or []
+    texts = [normalize_text(v.get("text"), strict) for v in variants if v.get("text")]
+    # Without the domain the rendered text is unknown, so accept anything
+    return texts or ["*"]
+
+
+def verify_messages(
+    messages: List[Dict[Text, Any]],
+    expected: List[Text],
+    domain: Dict[Text, Any],
+    strict: bool = False,
+) -> bool:
+    """Check dispatched text messages against the recorded bot utterances."""
+    produced = [c for c in (_candidates(m, domain, strict) for m in messages) if c is not None]
+    if len(produced) != len(expected):
+        return False
+    for options, text in zip(produced, expected):
+        if "*" not in options and normalize_text(text, strict) not in options:
+            return False
+    return True
+
+
+def _recorded_replies(events: List[Dict[Text, Any]], index: int) -> List[Text]:
+    """Collect the bot texts recorded after the action event at ``index``."""
+    replies = []
+    for event in events[index + 1:]:
+        event_type = event.get("event")
+        if event_type in ("action", "user"):
+            break
+        if event_type == "bot" and event.get("text"):
+            replies.append(event["text"])
+    return replies
+
+
+# ---------------------------------------------------------------------------
+# Results
+# ---------------------------------------------------------------------------
+@dataclass
+class ActionStats:
+    """Call counts, verification outcomes and timings for one action."""
+
+    calls: int = 0
+    mismatches: int = 0
+    errors: int = 0
+    durations: List[float] = field(default_factory=list)
+
+    def merge(self, other: "ActionStats") -> None:
+        self.calls += other.calls
+        self.mismatches += other.mismatches
+        self.errors += other.errors
+        self.durations.extend(other.durations)
+
+    def summary(self) -> Dict[Text, Any]:
+        durations = sorted(self.durations)
+        total = sum(durations)
+        p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))] if durations else 0.0
+        return {
+            "calls": self.calls,
+            "mismatches": self.mismatches,
+            "errors": self.errors,
+            "total_ms": round(total * 1000, 3),
+            "mean_ms": round(total / len(durations) * 1000, 4) if durations else 0.0,
+            "p95_ms": round(p95 * 1000, 4),
+            "max_ms": round(durations[-1] * 1000, 4) if durations else 0.0,
+        }
+
+
+@dataclass
+class ReplayReport:
+    """Aggregated outcome of replaying a batch of recordings."""
+
+    conversations: int = 0
+    calls: int = 0
+    skipped_actions: int = 0
+    mismatches: int = 0
+    errors: int = 0
+    wall_seconds: float = 0.0
+    actions: Dict[Text, ActionStats] = field(default_factory=dict)
+    details: List[Dict[Text, Any]] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.mismatches == 0 and self.errors == 0
+
+    def merge(self, other: "ReplayReport") -> None:
+        self.conversations += other.conversations
+        self.calls += other.calls
+        self.skipped_actions += other.skipped_actions
+        self.mismatches += other.mismatches
+        self.errors += other.errors
+        for name, stats in other.actions.items():
+            self.actions.setdefault(name, ActionStats()).merge(stats)
+        self.details.extend(other.details[: max(0, MAX_DETAILS - len(self.details))])
+
+    def to_dict(self) -> Dict[Text, Any]:
+        return {
+            "conversations": self.conversations,
+            "calls": self.calls,
+            "skipped_actions": self.skipped_actions,
+            "mismatches": self.mismatches,
+            "errors": self.errors,
+            "wall_seconds": round(self.wall_seconds, 4),
+            "conversations_per_second": (
+                round(self.conversations / self.wall_seconds, 1) if self.wall_seconds else None
+            ),
+            "actions": {name: s.summary() for name, s in sorted(self.actions.items())},
+            "details": self.details,
+        }
+
+    def format_table(self) -> Text:
+        lines = [
+            f"{'action':<36}{'calls':>8}{'mismatch':>10}{'errors':>8}"
+            f"{'mean ms':>10}{'p95 ms':>10}{'max ms':>10}"
+        ]
+        for name, stats in sorted(self.actions.items()):
+            s = stats.summary()
+            lines.append(
+                f"{name:<36}{s['calls']:>8}{s['mismatches']:>10}{s['errors']:>8}"
+                f"{s['mean_ms']:>10.3f}{s['p95_ms']:>10.3f}{s['max_ms']:>10.3f}"
+            )
+        rate = self.conversations / self.wall_seconds if self.wall_seconds else 0.0
+        lines.append(
+            f"{self.conversations} conversations, {self.calls} action calls, "
+            f"{self.skipped_actions} non-custom actions skipped, {self.mismatches} mismatches, "
+            f"{self.errors} errors in {self.wall_seconds:.2f}s ({rate:.0f} conversations/s)"
+        )
+        return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# Replay
+# ---------------------------------------------------------------------------
+class Replayer:
+    """Replays recordings against an in-process registry of custom actions."""
+
+    def __init__(
+        self,
+        registry: Dict[Text, Action],
+        domain: Optional[Dict[Text, Any]] = None,
+        strict: bool = False,
+    ) -> None:
+        self.registry = registry
+        self.domain = domain or {}
+        self.strict = strict
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _call(self, action: Action, dispatcher: CollectingDispatcher, tracker: Tracker) -> Any:
+        result = action.run(dispatcher, tracker, self.domain)
+        if inspect.isawaitable(result):
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+            result = self._loop.run_until_complete(result)
+        return result
+
+    def replay_recording(self, recording: Dict[Text, Any], report: ReplayReport) -> None:
+        sender_id = recording.get("sender_id", "replay")
+        events = recording.get("events", [])
+        report.conversations += 1
+        for index, event in enumerate(events):
+            if event.get("event") != "action":
+                continue
+            name = event.get("name")
+            action = self.registry.get(name)
+            if action is None:
+                report.skipped_actions += 1
+                continue
+
+            stats = report.actions.setdefault(name, ActionStats())
+            tracker = Tracker.from_dict(build_tracker_state(sender_id, events[:index]))
+            dispatcher = CollectingDispatcher()
+            stats.calls += 1
+            report.calls += 1
+            start = time.perf_counter()
+            try:
+                self._call(action, dispatcher, tracker)
+            except Exception as e:
+                stats.durations.append(time.perf_counter() - start)
+                stats.errors += 1
+                report.errors += 1
+                if len(report.details) < MAX_DETAILS:
+                    report.details.append({
+                        "sender_id": sender_id, "action": name, "event_index": index,
+                        "error": repr(e),
+                    })
+                continue
+            stats.durations.append(time.perf_counter() - start)
+
+            expected = _recorded_replies(events, index)
+            if not verify_messages(dispatcher.messages, expected, self.domain, self.strict):
+                stats.mismatches += 1
+                report.mismatches += 1
+                if len(report.details) < MAX_DETAILS:
+                    report.details.append({
+                        "sender_id": sender_id, "action": name, "event_index": index,
+                        "expected": expected,
+                        "produced": [m.get("text") or m.get("response") for m in dispatcher.messages],
+                    })
+
+    def replay(self, recordings: Iterable[Dict[Text, Any]]) -> ReplayReport:
+        report = ReplayReport()
+        start = time.perf_counter()
+        for recording in recordings:
+            self.replay_recording(recording, report)
+        report.wall_seconds = time.perf_counter() - start
+        return report
+
+
+# Per-process replayer, created once by the pool initializer
+_worker_replayer: Optional[Replayer] = None
+
+
+def _init_worker(package: Text, domain: Dict[Text, Any], strict: bool) -> None:
+    global _worker_replayer
+    _worker_replayer = Replayer(load_registry(package), domain, strict)
+
+
+def _replay_shard(shard: List[Dict[Text, Any]]) -> ReplayReport:
+    assert _worker_replayer is not None, "worker was not initialised"
+    return _worker_replayer.replay(shard)
+
+
+def shard(items: List[Any], shards: int) -> List[List[Any]]:
+    """Split ``items`` into at most ``shards`` contiguous, similarly sized chunks."""
+    shards = max(1, min(shards, len(items)))
+    size, extra = divmod(len(items), shards)
+    chunks, start = [], 0
+    for i in range(shards):
+        end = start + size + (1 if i < extra else 0)
+        chunks.append(items[start:end])
+        start = end
+    return chunks
+
+
+def replay(
+    recordings: List[Dict[Text, Any]],
+    workers: Optional[int] = None,
+    package: Text = "actions",
+    domain: Optional[Dict[Text, Any]] = None,
+    strict: bool = False,
+    shards_per_worker: int = 4,
+) -> ReplayReport:
+    """Replay ``recordings``, sharded over ``workers`` processes.
+
+    With ``workers`` of 1 (or a single recording) everything runs in the
+    calling process. ``None`` uses one worker per CPU.
+    """
+    domain = domain or {}
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(recordings) <= 1:
+        return Replayer(load_registry(package), domain, strict).replay(recordings)
+
+    report = ReplayReport()
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(package, domain, strict)
+    ) as pool:
+        for partial in pool.map(_replay_shard, shard(recordings, workers * shards_per_worker)):
+            report.merge(partial)
+    report.wall_seconds = time.perf_counter() - start
+    return report
+
+
+def main(argv: Optional[List[Text]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay recorded conversations through the custom actions.")
+    parser.add_argument("paths", nargs="+", help="Conversation exports or tracker-store dumps (JSON)")
+    parser.add_argument("--domain", help="domain.yml used to verify response templates")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay every recording N times")
+    parser.add_argument("--strict", action="store_true", help="Do not mask digits when comparing replies")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    recordings: List[Dict[Text, Any]] = []
+    for path in args.paths:
+        recordings.extend(load_recordings(path))
+    recordings = recordings * max(1, args.repeat)
+
+    report = replay(recordings, workers=args.workers, domain=load_domain(args.domain), strict=args.strict)
+    if args.json:
+        print(json.dumps(report.to_dict(), indent=2, default=str))
+    else:
+        print(report.format_table())
+        for detail in report.details[:10]:
+            print(json.dumps(detail, default=str))
+    return 0 if report.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,5 @@
+import sqlite3
+
 import pytest
 from typing import Dict, Text, Any, List
 from unittest.mock import Mock
@@ -34,3 +36,34 @@ def mock_dispatcher():
 def mock_tracker():
     """Create a mock tracker for testing."""
     return MockTracker(slots={"some_slot": "some_value"})
+
+
+@pytest.fixture
+def make_store():
+    """``make(path, orders)`` writes an order database and returns its path.
+
+    ``orders`` are ``(SalesOrderID, Status, TotalDue)`` tuples; order ``i`` gets
+    the order number ``SO<i>`` and the purchase order number ``PO<7 * i>``.
+    ``SalesOrderDetail`` is created empty.
+    """
+    def make(path, orders):
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "CREATE TABLE SalesOrderHeader (SalesOrderID INTEGER PRIMARY KEY, OrderDate TEXT, Status INTEGER, "
+            "ShipDate TEXT, TotalDue REAL, SalesOrderNumber TEXT UNIQUE, PurchaseOrderNumber INTEGER, "
+            "ModifiedDate TEXT, rowguid TEXT UNIQUE)"
+        )
+        conn.execute(
+            "CREATE TABLE SalesOrderDetail (SalesOrderDetailID INTEGER PRIMARY KEY, SalesOrderID INTEGER, "
+            "OrderQty INTEGER, ProductID INTEGER, ModifiedDate TEXT)"
+        )
+        conn.executemany(
+            "INSERT INTO SalesOrderHeader VALUES (?, '2024-01-01', ?, NULL, ?, ?, ?, '2024-01-01', ?)",
+            [(order_id, status, total, f"SO{order_id}", f"PO{order_id * 7}", f"guid-{order_id}")
+             for order_id, status, total in orders],
+        )
+        conn.commit()
+        conn.close()
+        return str(path)
+
+    return make
@@ -0,0 +1,140 @@
+import sqlite3
+import time
+
+import pytest
+from rasa_sdk import Tracker
+from rasa_sdk.executor import CollectingDispatcher
+
+from actions import actions as core_actions
+from actions.db_router import DatabaseRouter, parse_mapping
+from actions.order_lookup import KEY_ID
+
+
+@pytest.fixture
+def router(tmp_path, make_store):
+    shards = {
+        "eu": make_store(tmp_path / "eu.db", [(1, 5, 10.0), (2, 1, 20.0)]),
+        "us": make_store(tmp_path / "us.db", [(3, 2, 30.0)]),
+        "apac": make_store(tmp_path / "apac.db", [(4, 5, 40.0), (1, 4, 99.0)]),
+    }
+    router = DatabaseRouter(shards, channel_stores={"mobile_app": "us"}, pool_size=2)
+    yield router
+    router.close()
+
+
+def _tracker(slots=None, metadata=None, channel=None):
+    return Tracker.from_dict({
+        "sender_id": "u1",
+        "slots": slots or {},
+        "latest_message": {"intent": {}, "entities": [], "text": "", "metadata": metadata or {}},
+        "events": [{"event": "user", "text": "", "input_channel": channel}] if channel else [],
+        "latest_input_channel": channel,
+    })
+
+
+def test_parse_mapping_accepts_json_and_pairs():
+    assert parse_mapping('{"eu": "/a.db"}') == {"eu": "/a.db"}
+    assert parse_mapping("eu=/a.db, us=/b.db") == {"eu": "/a.db", "us": "/b.db"}
+    assert parse_mapping(None) == {}
+
+
+def test_resolve_store_from_slot_metadata_and_channel(router):
+    assert router.resolve_store(_tracker(slots={"store_id": "apac"})) == "apac"
+    assert router.resolve_store(_tracker(metadata={"tenant": "eu"})) == "eu"
+    assert router.resolve_store(_tracker(channel="mobile_app")) == "us"
+    assert router.resolve_store(_tracker(metadata={"store": "unknown"})) is None
+
+
+def test_known_store_only_queries_its_shard(router):
+    assert router.find_order(1, "eu")[1]["TotalDue"] == 10.0
+    assert router.find_order(1, "apac")[1]["TotalDue"] == 99.0
+    assert router.find_order(3, "eu") is None
+
+
+def test_unknown_store_fans_out_in_shard_order(router):
+    store, order = router.find_order(3)
+    assert store == "us" and order["Status"] == 2
+    # Order 1 exists in two shards; the first configured shard wins
+    assert router.find_order(1)[0] == "eu"
+    assert router.find_order(404) is None
+
+
+def test_each_shard_has_its_own_pool_and_cache(router):
+    router.find_order(1, "eu")
+    router.find_order(1, "eu")
+    assert len(router.shards["eu"].orders) == 1
+    assert len(router.shards["us"].orders) == 0
+    assert router.shards["eu"].pool is not router.shards["us"].pool
+
+
+def test_pool_reuses_connections(router):
+    pool = router.shards["eu"].pool
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        assert second is first
+
+
+def test_from_env_starts_change_feeds_when_enabled(tmp_path, monkeypatch, make_store):
+    shards = f"eu={make_store(tmp_path / 'eu.db', [(1, 5, 10.0)])},us={make_store(tmp_path / 'us.db', [])}"
+    monkeypatch.setenv("ADVENTURE_WORKS_DB_SHARDS", shards)
+    monkeypatch.delenv("ADVENTURE_WORKS_ORDER_CHANGE_FEED", raising=False)
+    router = DatabaseRouter.from_env("unused.db")
+    assert all(shard.feed is None for shard in router.shards.values())
+    router.close()
+
+    monkeypatch.setenv("ADVENTURE_WORKS_ORDER_CHANGE_FEED", "0.05")
+    router = DatabaseRouter.from_env("unused.db")
+    try:
+        eu = router.shards["eu"]
+        assert all(shard.feed is not None for shard in router.shards.values())
+        assert eu.get_order(1)["Status"] == 5
+        conn = sqlite3.connect(eu.db_path)
+        conn.execute("UPDATE SalesOrderHeader SET Status = 1, ModifiedDate = '2030-01-01' WHERE SalesOrderID = 1")
+        conn.commit()
+        conn.close()
+        deadline = time.monotonic() + 5
+        while eu.orders.lookup(1)[0] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert eu.get_order(1)["Status"] == 1
+    finally:
+        router.close()
+    assert all(shard.feed is None for shard in router.shards.values())
+
+
+def test_track_order_action_uses_router(router, monkeypatch):
+    monkeypatch.setattr(core_actions, "_db_router", router)
+    dispatcher = CollectingDispatcher()
+    tracker = _tracker(slots={"order_number": "4"}, metadata={"store_id": "apac"})
+    core_actions.ActionTrackOrder().run(dispatcher, tracker, {})
+    assert dispatcher.messages[0]["text"].startswith("Order #4 was placed on 2024-01-01. Status: 5.")
+
+    dispatcher = CollectingDispatcher()
+    tracker = _tracker(slots={"order_number": "4", "store_id": "eu"})
+    core_actions.ActionTrackOrder().run(dispatcher, tracker, {})
+    assert "couldn't find any order" in dispatcher.messages[0]["text"]
+
+
+def test_a_broken_shard_does_not_hide_the_others(tmp_path, make_store):
+    broken = str(tmp_path / "missing" / "broken.db")
+    router = DatabaseRouter({"broken": broken, "eu": make_store(tmp_path / "eu.db", [(1, 5, 10.0)])})
+    try:
+        assert router.find_order(1)[0] == "eu"
+        assert router.find_orders([(KEY_ID, 1), (KEY_ID, 2)]) == {(KEY_ID, 1): ("eu", router.find_order(1)[1]),
+                                                                  (KEY_ID, 2): None}
+    finally:
+        router.close()
+    router = DatabaseRouter({"broken": broken})
+    try:
+        with pytest.raises(sqlite3.Error):
+            router.find_order(1)
+    finally:
+        router.close()
+
+
+def test_track_order_action_replies_when_the_router_cannot_be_set_up(monkeypatch):
+    monkeypatch.setattr(core_actions, "_db_router", None)
+    monkeypatch.setenv("ADVENTURE_WORKS_DB_SHARDS", "{not json")
+    dispatcher = CollectingDispatcher()
+    core_actions.ActionTrackOrder().run(dispatcher, _tracker(slots={"order_number": "4"}), {})
+    assert "error while retrieving your order" in dispatcher.messages[0]["text"]
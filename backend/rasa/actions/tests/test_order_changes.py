@@ -0,0 +1,133 @@
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from actions.order_changes import (
+    DETAIL_TABLE,
+    HEADER_TABLE,
+    STATUS_SHIPPED,
+    OrderChangeFeed,
+    OrderStatusCache,
+    _QUERIES,
+    main,
+)
+
+SOURCE_DB = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "..", "..", "db", "AdventureWorks.db")
+)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "AdventureWorks.db"
+    shutil.copy(SOURCE_DB, path)
+    return str(path)
+
+
+@pytest.fixture
+def feed(db_path):
+    feed = OrderChangeFeed(db_path=db_path)
+    yield feed
+    feed.stop()
+
+
+def _touch_order(db_path, order_id, status, modified="2030-01-01 00:00:00.000"):
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "UPDATE SalesOrderHeader SET Status = ?, ModifiedDate = ? WHERE SalesOrderID = ?",
+        (status, modified, order_id),
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_starts_at_current_watermark(feed):
+    assert feed.poll() == []
+
+
+def test_reports_header_changes_to_subscribers(feed, db_path):
+    received = []
+    feed.subscribe(received.append)
+    _touch_order(db_path, 71774, STATUS_SHIPPED)
+
+    changes = feed.poll()
+    assert [(c.table, c.order_id, c.status) for c in changes] == [(HEADER_TABLE, 71774, STATUS_SHIPPED)]
+    assert received == changes
+    # The watermark moved past the change, so it is not reported twice
+    assert feed.poll() == []
+
+
+def test_subscribers_can_filter_by_table_and_status(feed, db_path):
+    shipped, lines = [], []
+    feed.subscribe(shipped.append, table=HEADER_TABLE, status=STATUS_SHIPPED)
+    feed.subscribe(lines.append, table=DETAIL_TABLE)
+    _touch_order(db_path, 71774, 2, modified="2030-01-01 00:00:00.000")
+    _touch_order(db_path, 71776, STATUS_SHIPPED, modified="2030-01-01 00:00:01.000")
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE SalesOrderDetail SET OrderQty = 3, ModifiedDate = '2030-01-02' WHERE SalesOrderDetailID = 110562")
+    conn.commit()
+    conn.close()
+
+    feed.poll()
+    assert [c.order_id for c in shipped] == [71776]
+    assert [(c.detail_id, c.quantity) for c in lines] == [(110562, 3)]
+
+
+def test_failing_subscriber_does_not_stop_delivery(feed, db_path):
+    received = []
+
+    def broken(change):
+        raise RuntimeError("boom")
+
+    feed.subscribe(broken)
+    feed.subscribe(received.append)
+    _touch_order(db_path, 71774, STATUS_SHIPPED)
+    feed.poll()
+    assert len(received) == 1
+
+
+def test_batches_replay_whole_table_from_beginning(db_path):
+    feed = OrderChangeFeed(db_path=db_path, tables=(HEADER_TABLE,), start_at="beginning", batch_size=7)
+    try:
+        changes = feed.poll()
+    finally:
+        feed.stop()
+    assert len(changes) == 32
+    assert len({c.order_id for c in changes}) == 32
+
+
+def _index_names(db_path):
+    conn = sqlite3.connect(db_path)
+    names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    conn.close()
+    return names
+
+
+def test_feed_does_not_change_the_schema(feed):
+    assert not {f"IX_{table}_ModifiedDate" for table in _QUERIES} & _index_names(feed.db_path)
+
+
+def test_poll_query_uses_modified_date_index(db_path):
+    assert main([db_path]) == 0
+    assert {f"IX_{table}_ModifiedDate" for table in _QUERIES} <= _index_names(db_path)
+    conn = sqlite3.connect(db_path)
+    for table, query in _QUERIES.items():
+        plan = " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query, ("", 0, 10)))
+        assert f"USING INDEX IX_{table}_ModifiedDate" in plan
+        assert "TEMP B-TREE" not in plan
+    conn.close()
+
+
+def test_status_cache_is_invalidated_by_changes(feed, db_path):
+    cache = OrderStatusCache()
+    feed.subscribe(cache.invalidate, table=HEADER_TABLE)
+    conn = sqlite3.connect(db_path)
+    assert cache.get(conn, 71774)["Status"] == 5
+
+    _touch_order(db_path, 71774, 1)
+    assert cache.get(conn, 71774)["Status"] == 5  # still cached
+    feed.poll()
+    assert cache.get(conn, 71774)["Status"] == 1
+    conn.close()
@@ -0,0 +1,98 @@
+
+import logging
+
+import pytest
+
+from actions.db_router import DatabaseRouter
+from actions.order_changes import main
+from actions.order_lookup import (
+    KEY_ID,
+    KEY_NUMBER,
+    KEY_PURCHASE_ORDER,
+    PURCHASE_ORDER_INDEX,
+    fetch_orders,
+    parse_order_key,
+)
+
+
+@pytest.fixture
+def router(tmp_path, make_store):
+    shards = {
+        "eu": make_store(tmp_path / "eu.db", [(i, 5, 10.0) for i in range(1, 3000)]),
+        "us": make_store(tmp_path / "us.db", [(5000, 5, 10.0), (1, 5, 10.0)]),
+    }
+    router = DatabaseRouter(shards, pool_size=2)
+    yield router
+    router.close()
+
+
+@pytest.mark.parametrize("raw,expected", [
+    (71774, (KEY_ID, 71774)),
+    (" 71774 ", (KEY_ID, 71774)),
+    ("#71774", (KEY_ID, 71774)),
+    ("SO71774", (KEY_NUMBER, "SO71774")),
+    ("so-71774", (KEY_NUMBER, "SO71774")),
+    ("#SO 71774", (KEY_NUMBER, "SO71774")),
+    ("po348186287", (KEY_PURCHASE_ORDER, "PO348186287")),
+    ("order 5", None),
+    (True, None),
+    (-3, None),
+    (2 ** 63 - 1, (KEY_ID, 2 ** 63 - 1)),
+    (2 ** 63, None),
+    ("99999999999999999999", None),
+    ("0", None),
+    (None, None),
+])
+def test_parse_order_key(raw, expected):
+    assert parse_order_key(raw) == expected
+
+
+@pytest.mark.parametrize("threshold", [10_000, 10])
+def test_fetch_orders_in_chunks_and_via_temp_table(router, threshold):
+    values = list(range(1, 1500, 3)) + [999_999]
+    with router.shards["eu"].pool.connection() as conn:
+        found = fetch_orders(conn, KEY_ID, values, chunk_size=100, temp_table_threshold=threshold)
+        assert set(found) == set(values[:-1])
+        assert found[4]["TotalDue"] == 10.0
+        numbers = fetch_orders(conn, KEY_NUMBER, ["SO7", "SO8", "SO0"], temp_table_threshold=threshold)
+        assert sorted(numbers) == ["SO7", "SO8"]
+        # The temp table is emptied after each batch
+        assert fetch_orders(conn, KEY_ID, [999_999], temp_table_threshold=1) == {}
+
+
+def test_find_orders_fans_out_and_resolves_mixed_keys(router):
+    keys = [(KEY_ID, 1), (KEY_ID, 5000), (KEY_NUMBER, "SO2"), (KEY_PURCHASE_ORDER, "PO21"), (KEY_ID, 424242)]
+    results = router.find_orders(keys)
+    assert results[(KEY_ID, 1)][0] == "eu"  # first shard in order wins, as with find_order
+    assert results[(KEY_ID, 5000)][0] == "us"
+    assert results[(KEY_NUMBER, "SO2")][1]["SalesOrderID"] == 2
+    assert results[(KEY_PURCHASE_ORDER, "PO21")][1]["SalesOrderID"] == 3
+    assert results[(KEY_ID, 424242)] is None
+    assert router.find_orders([(KEY_ID, 1)], store="us") == {(KEY_ID, 1): ("us", router.shards["us"].get_order(1))}
+
+
+def test_get_orders_uses_the_order_cache(router):
+    shard = router.shards["eu"]
+    shard.get_orders([(KEY_NUMBER, "SO9"), (KEY_ID, 10)])
+    assert shard.orders.lookup(9)[0] and shard.orders.lookup(10)[0]
+    shard.pool.close()
+    shard.pool.acquire = None  # any database access would now fail
+    assert shard.get_orders([(KEY_ID, 9), (KEY_ID, 10)])[(KEY_ID, 9)]["SalesOrderID"] == 9
+
+
+def test_lookups_do_not_create_indexes_and_startup_warns(router, monkeypatch, caplog):
+    path = router.shards["us"].db_path
+    router.find_orders([(KEY_PURCHASE_ORDER, "PO7")])
+    assert router.shards["us"].missing_indexes() == [PURCHASE_ORDER_INDEX]
+
+    monkeypatch.setenv("ADVENTURE_WORKS_DB_SHARDS", f"us={path}")
+    monkeypatch.delenv("ADVENTURE_WORKS_ORDER_CHANGE_FEED", raising=False)
+    with caplog.at_level(logging.WARNING, logger="actions.db_router"):
+        DatabaseRouter.from_env("unused.db").close()
+    assert PURCHASE_ORDER_INDEX in caplog.text
+
+    caplog.clear()
+    assert main([path]) == 0
+    with caplog.at_level(logging.WARNING, logger="actions.db_router"):
+        DatabaseRouter.from_env("unused.db").close()
+    assert caplog.text == ""
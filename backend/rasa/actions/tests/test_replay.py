@@ -0,0 +1,107 @@
+import os
+
+import pytest
+
+from actions.replay import (
+    build_tracker_state,
+    conversation_to_events,
+    load_domain,
+    load_recordings,
+    normalize_text,
+    replay,
+    shard,
+    verify_messages,
+)
+
+RASA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+CONVERSATIONS_PATH = os.path.join(RASA_DIR, "tests", "rasa_conversations.json")
+DOMAIN_PATH = os.path.join(RASA_DIR, "domain.yml")
+
+
+@pytest.fixture(scope="module")
+def recordings():
+    return load_recordings(CONVERSATIONS_PATH)
+
+
+@pytest.fixture(scope="module")
+def domain():
+    return load_domain(DOMAIN_PATH)
+
+
+def test_load_recordings_reads_both_formats(recordings):
+    senders = {r["sender_id"] for r in recordings}
+    # Five exported conversations plus four tracker-store entries
+    assert len(recordings) == 9
+    assert "user_001" in senders
+
+
+def test_conversation_to_events_emits_action_before_bot_text():
+    events = conversation_to_events({
+        "messages": [
+            {"type": "user", "text": "hi", "intent": "greet", "timestamp": 1.0},
+            {"type": "bot", "text": "hello", "action": "utter_greet", "timestamp": 2.0},
+        ]
+    })
+    assert [e["event"] for e in events] == ["user", "action", "bot"]
+    assert events[0]["parse_data"]["intent"]["name"] == "greet"
+
+
+def test_build_tracker_state_tracks_slots_and_latest_message():
+    state = build_tracker_state("u1", [
+        {"event": "user", "text": "track SO1", "parse_data": {"intent": {"name": "check_order_status"}}},
+        {"event": "slot", "name": "order_number", "value": "SO1"},
+    ])
+    assert state["slots"] == {"order_number": "SO1"}
+    assert state["latest_message"]["text"] == "track SO1"
+    assert state["latest_message"]["entities"] == []
+
+
+def test_normalize_masks_dates_and_times():
+    assert normalize_text("Monday, October 19, 2026 at 03:39") == normalize_text(
+        "Tuesday, June 24, 2025 at 14:22"
+    )
+    assert normalize_text("at 03:39", strict=True) != normalize_text("at 14:22", strict=True)
+
+
+def test_verify_messages_expands_domain_responses(domain):
+    messages = [{"response": "utter_default"}]
+    assert verify_messages(messages, ["I'm not sure I follow. Could you explain that differently?"], domain)
+    assert not verify_messages(messages, ["Goodbye!"], domain)
+    assert not verify_messages(messages, [], domain)
+
+
+def test_replay_reports_per_action_timing(recordings, domain):
+    report = replay(recordings, workers=1, domain=domain)
+    assert report.conversations == 9
+    assert report.calls > 0
+    assert report.errors == 0
+    fallback = report.actions["action_default_fallback"]
+    assert fallback.calls == 4 and fallback.mismatches == 0
+    assert len(fallback.durations) == fallback.calls
+    summary = report.to_dict()["actions"]["action_tell_date"]
+    assert summary["calls"] == 1 and summary["mean_ms"] >= 0
+
+
+def test_replay_detects_mismatches(recordings, domain):
+    report = replay(recordings, workers=1, domain=domain)
+    # The placeholder order status action does not say what was recorded
+    assert report.actions["action_check_order_status"].mismatches == 1
+    assert not report.ok
+    assert any(d["action"] == "action_check_order_status" for d in report.details)
+
+
+def test_process_pool_matches_inline_replay(recordings, domain):
+    inline = replay(recordings * 3, workers=1, domain=domain)
+    pooled = replay(recordings * 3, workers=2, domain=domain)
+    assert pooled.conversations == inline.conversations
+    assert pooled.calls == inline.calls
+    assert pooled.mismatches == inline.mismatches
+    assert {n: s.calls for n, s in pooled.actions.items()} == {
+        n: s.calls for n, s in inline.actions.items()
+    }
+
+
+def test_shard_covers_all_items():
+    chunks = shard(list(range(10)), 3)
+    assert [len(c) for c in chunks] == [4, 3, 3]
+    assert sum(chunks, []) == list(range(10))
@@ -0,0 +1,53 @@
+"""Read-only product catalog backed by the AdventureWorks ``Product`` tables."""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from ..actions.db_router import ConnectionPool
+
+_SELECT = """
+    SELECT p.ProductID, p.Name, p.ProductNumber, p.Color, p.ListPrice, p.Size, p.Weight,
+           c.Name AS Category, m.Name AS Model, p.SellStartDate, p.SellEndDate, p.ModifiedDate
+    FROM Product p
+    LEFT JOIN ProductCategory c ON c.ProductCategoryID = p.ProductCategoryID
+    LEFT JOIN ProductModel m ON m.ProductModelID = p.ProductModelID
+"""
+
+
+def _product(row) -> Dict[str, Any]:
+    product = dict(row)
+    product["thumbnail_url"] = f"/products/{product['ProductID']}/thumbnail"
+    return product
+
+
+class Catalog:
+    """Product listings and details; the thumbnail BLOBs are never selected."""
+
+    def __init__(self, db_path: str, pool_size: int = 4) -> None:
+        self.pool = ConnectionPool(db_path, size=pool_size)
+
+    def products(
+        self, category: Optional[str] = None, limit: int = 100, offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        where, params = "", []
+        if category:
+            where = "WHERE c.Name = ? COLLATE NOCASE"
+            params.append(category)
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                f"{_SELECT} {where} ORDER BY p.ProductID LIMIT ? OFFSET ?", params + [limit, offset]
+            ).fetchall()
+        return [_product(row) for row in rows]
+
+    def product(self, product_id: int) -> Optional[Dict[str, Any]]:
+        with self.pool.connection() as conn:
+            row = conn.execute(f"{_SELECT} WHERE p.ProductID = ?", (product_id,)).fetchone()
+        return _product(row) if row else None
+
+    def categories(self) -> List[Dict[str, Any]]:
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT ProductCategoryID, ParentProductCategoryID, Name FROM ProductCategory ORDER BY Name"
+            ).fetchall()
+        return [dict(row) for row in rows]
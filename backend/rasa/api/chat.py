@@ -0,0 +1,185 @@
+"""Chat gateway forwarding user messages to Rasa's REST webhook.
+
+All requests share one pooled ``httpx.AsyncClient`` per event loop, so
+connections to Rasa are kept alive and reused instead of paying a TCP
+handshake per message as ``web-interface/server.js`` does. Each call has
+connect/read timeouts, and a semaphore bounds the number of messages in
+flight; callers that cannot get a slot within ``queue_timeout`` are turned
+away with :class:`RasaOverloaded` rather than piling up behind a slow bot.
+
+:meth:`RasaClient.stream` uses the REST channel's ``stream=true`` mode, in
+which Rasa writes each bot message as a JSON line as soon as it has been
+uttered, so multi-message actions can be relayed message by message.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import socket
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+DEFAULT_RASA_URL = "http://localhost:5005"
+WEBHOOK_PATH = "/webhooks/rest/webhook"
+
+
+class RasaError(Exception):
+    """Rasa could not be reached or returned an unusable response."""
+
+
+class RasaTimeout(RasaError):
+    """Rasa did not answer within the configured timeout."""
+
+
+class RasaOverloaded(RasaError):
+    """Too many messages are already waiting for Rasa."""
+
+
+class RasaClient:
+    """Pooled keep-alive client for the Rasa REST channel.
+
+    Args:
+        base_url: Rasa server URL, e.g. ``http://rasa:5005``.
+        max_connections: Upper bound on open connections to Rasa.
+        max_keepalive: Idle connections kept open for reuse.
+        max_concurrency: Messages forwarded at once.
+        timeout: Seconds to wait for Rasa's reply.
+        connect_timeout: Seconds to wait for a new connection.
+        queue_timeout: Seconds to wait for a concurrency slot.
+        pool_shards: Independent connection pools the connections are split
+            over. httpx scans every pooled connection whenever a request
+            starts or finishes, so several small pools cost less CPU under
+            high concurrency than one large pool.
+    """
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_RASA_URL,
+        max_connections: int = 100,
+        max_keepalive: int = 20,
+        max_concurrency: int = 64,
+        timeout: float = 30.0,
+        connect_timeout: float = 5.0,
+        queue_timeout: float = 5.0,
+        pool_shards: int = 4,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.pool_shards = max(1, pool_shards)
+        self.limits = httpx.Limits(
+            max_connections=max(1, max_connections // self.pool_shards),
+            max_keepalive_connections=max_keepalive // self.pool_shards,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self._clients: List[httpx.AsyncClient] = []
+        self._next = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def from_env(cls) -> "RasaClient":
+        return cls(
+            base_url=os.getenv("RASA_URL", DEFAULT_RASA_URL),
+            max_connections=int(os.getenv("RASA_MAX_CONNECTIONS", "100")),
+            max_keepalive=int(os.getenv("RASA_MAX_KEEPALIVE", "20")),
+            max_concurrency=int(os.getenv("RASA_MAX_CONCURRENCY", "64")),
+            timeout=float(os.getenv("RASA_TIMEOUT", "30")),
+            connect_timeout=float(os.getenv("RASA_CONNECT_TIMEOUT", "5")),
+            queue_timeout=float(os.getenv("RASA_QUEUE_TIMEOUT", "5")),
+            pool_shards=int(os.getenv("RASA_POOL_SHARDS", "4")),
+        )
+
+    def _bind(self) -> httpx.AsyncClient:
+        # Pools and semaphores belong to one event loop; rebuild them if the
+        # app is driven by another (e.g. successive test clients)
+        loop = asyncio.get_running_loop()
+        if not self._clients or self._loop is not loop:
+            self._clients = [self._new_client() for _ in range(self.pool_shards)]
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        self._next = (self._next + 1) % len(self._clients)
+        return self._clients[self._next]
+
+    def _new_client(self) -> httpx.AsyncClient:
+        # Requests are written as separate header and body segments; without
+        # TCP_NODELAY a kept-alive connection can stall on delayed ACKs
+        transport = httpx.AsyncHTTPTransport(
+            limits=self.limits, socket_options=[(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)]
+        )
+        return httpx.AsyncClient(base_url=self.base_url, transport=transport, timeout=self.timeout)
+
+    async def _acquire(self) -> httpx.AsyncClient:
+        client = self._bind()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise RasaOverloaded("No free slot to forward the message.")
+        return client
+
+    @staticmethod
+    def _payload(sender: str, message: str, metadata: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {"sender": sender, "message": message}
+        if metadata:
+            payload["metadata"] = metadata
+        return payload
+
+    async def send(self, sender: str, message: str, metadata: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Forward one message and return the bot's replies."""
+        client = await self._acquire()
+        try:
+            response = await client.post(WEBHOOK_PATH, json=self._payload(sender, message, metadata))
+        except httpx.TimeoutException as exc:
+            raise RasaTimeout(f"Rasa did not respond in time: {exc!r}")
+        except httpx.HTTPError as exc:
+            raise RasaError(f"Could not reach Rasa: {exc!r}")
+        finally:
+            self._slots.release()
+        if response.status_code >= 300:
+            raise RasaError(f"Rasa returned status {response.status_code}.")
+        try:
+            replies = response.json()
+        except ValueError:
+            raise RasaError("Rasa returned invalid JSON.")
+        if not isinstance(replies, list):
+            raise RasaError("Rasa returned an unexpected payload.")
+        return replies
+
+    async def stream(
+        self, sender: str, message: str, metadata: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Forward one message and yield each bot reply as Rasa produces it.
+
+        Replies are read only as fast as the caller consumes them, so a slow
+        consumer pushes back on Rasa through TCP flow control instead of
+        being buffered here. The read timeout applies between replies.
+        """
+        client = await self._acquire()
+        try:
+            async with client.stream(
+                "POST", WEBHOOK_PATH, params={"stream": "true"}, json=self._payload(sender, message, metadata)
+            ) as response:
+                if response.status_code >= 300:
+                    raise RasaError(f"Rasa returned status {response.status_code}.")
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    try:
+                        reply = json.loads(line)
+                    except ValueError:
+                        raise RasaError("Rasa returned invalid JSON.")
+                    yield reply
+        except httpx.TimeoutException as exc:
+            raise RasaTimeout(f"Rasa did not respond in time: {exc!r}")
+        except httpx.HTTPError as exc:
+            raise RasaError(f"Could not reach Rasa: {exc!r}")
+        finally:
+            self._slots.release()
+
+    async def aclose(self) -> None:
+        clients, self._clients = self._clients, []
+        for client in clients:
+            await client.aclose()
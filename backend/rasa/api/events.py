@@ -0,0 +1,384 @@
+"""Append-only conversation event store partitioned by day.
+
+Rasa tracker events (``{"event": "user", "sender_id": ..., "timestamp":
+...}``) are appended to one SQLite file per UTC day, ``events-YYYY-MM-DD.db``
+in the store directory. Every partition runs in WAL mode, so readers never
+block the writer, and old days can be archived or dropped by moving a file
+instead of deleting rows.
+
+Ingestion is batched: :meth:`EventStore.append_lines` parses a batch of
+NDJSON lines, groups them by day and inserts each group with a single
+``executemany`` in one transaction. The original JSON text is stored as-is
+next to the indexed columns, so events are never re-serialised, and reads
+can splice the stored text straight into a response.
+
+An event may carry an idempotency key (its ``idempotency_key`` field, or the
+request's ``Idempotency-Key`` header plus its line number). Keys are unique
+within a partition and retried events have the same timestamp, so replaying
+a batch after a timeout inserts nothing twice.
+
+Reads go through the ``(timestamp)`` and ``(sender_id, timestamp)`` indexes
+of the partitions overlapping the requested range and are paginated with a
+``<timestamp>:<seq>`` cursor.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_MAX_LINE_BYTES = 1024 * 1024
+DEFAULT_OPEN_PARTITIONS = 8
+
+_PARTITION_PREFIX = "events-"
+_PARTITION_SUFFIX = ".db"
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS events (
+        seq INTEGER PRIMARY KEY,
+        timestamp REAL NOT NULL,
+        sender_id TEXT NOT NULL,
+        event TEXT NOT NULL,
+        idempotency_key TEXT,
+        data TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events (timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_events_sender ON events (sender_id, timestamp)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_events_key ON events (idempotency_key) WHERE idempotency_key IS NOT NULL",
+)
+
+_EPOCH_DAY = date(1970, 1, 1)
+_decode = json.JSONDecoder().raw_decode
+
+_INSERT = "INSERT OR IGNORE INTO events (timestamp, sender_id, event, idempotency_key, data) VALUES (?, ?, ?, ?, ?)"
+
+
+class InvalidCursor(ValueError):
+    """Raised for a pagination cursor that was not produced by the store."""
+
+
+class IngestResult(NamedTuple):
+    accepted: int
+    duplicates: int
+    rejected: List[Dict[str, Any]]
+
+
+class EventPage(NamedTuple):
+    events: List[str]  # stored JSON text of each event
+    next_cursor: Optional[str]
+
+
+def partition_day(timestamp: float) -> date:
+    return datetime.fromtimestamp(timestamp, timezone.utc).date()
+
+
+def _day_start(day: date) -> float:
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp()
+
+
+# Timestamps whose day has a partition name; the last representable day is
+# left out so that rounding to microseconds cannot overflow
+_MIN_TIMESTAMP = _day_start(date.min)
+_END_TIMESTAMP = _day_start(date.max)
+
+
+def encode_cursor(timestamp: float, seq: int) -> str:
+    return f"{timestamp!r}:{seq}"
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        timestamp, seq = cursor.split(":")
+        return float(timestamp), int(seq)
+    except ValueError:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}")
+
+
+class LineBatcher:
+    """Split a byte stream into batches of complete NDJSON lines.
+
+    Feed request body chunks as they arrive; :meth:`feed` returns a batch
+    whenever ``batch_size`` lines have accumulated, so a large upload is
+    inserted while it is still being received.
+    """
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        self.batch_size = batch_size
+        self.lines_seen = 0
+        self._partial = b""
+        self._lines: List[str] = []
+
+    def _take(self) -> List[str]:
+        batch, self._lines = self._lines, []
+        self.lines_seen += len(batch)
+        return batch
+
+    def feed(self, chunk: bytes) -> Optional[List[str]]:
+        data = self._partial + chunk
+        pieces = data.split(b"\n")
+        self._partial = pieces.pop()
+        self._lines.extend(piece.decode("utf-8", "replace") for piece in pieces)
+        return self._take() if len(self._lines) >= self.batch_size else None
+
+    def flush(self) -> List[str]:
+        if self._partial:
+            self._lines.append(self._partial.decode("utf-8", "replace"))
+            self._partial = b""
+        return self._take()
+
+
+class EventStore:
+    """Day-partitioned SQLite event log.
+
+    Args:
+        root: Directory holding the partition files.
+        max_line_bytes: Longest accepted NDJSON line.
+        open_partitions: Writer connections kept open, most recently used
+            days first; ingestion usually touches only today's partition.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        max_line_bytes: int = DEFAULT_MAX_LINE_BYTES,
+        open_partitions: int = DEFAULT_OPEN_PARTITIONS,
+    ) -> None:
+        self.root = root
+        self.max_line_bytes = max_line_bytes
+        self.open_partitions = open_partitions
+        os.makedirs(root, exist_ok=True)
+        self._writers: "OrderedDict[date, sqlite3.Connection]" = OrderedDict()
+        self._write_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, default_root: str) -> "EventStore":
+        return cls(os.getenv("EVENT_STORE_DIR", default_root))
+
+    # -- partitions ----------------------------------------------------------
+    def partition_path(self, day: date) -> str:
+        return os.path.join(self.root, f"{_PARTITION_PREFIX}{day.isoformat()}{_PARTITION_SUFFIX}")
+
+    def partitions(self) -> List[date]:
+        days = []
+        for name in os.listdir(self.root):
+            if name.startswith(_PARTITION_PREFIX) and name.endswith(_PARTITION_SUFFIX):
+                try:
+                    days.append(date.fromisoformat(name[len(_PARTITION_PREFIX):-len(_PARTITION_SUFFIX)]))
+                except ValueError:
+                    continue
+        return sorted(days)
+
+    def _writer(self, day: date) -> sqlite3.Connection:
+        conn = self._writers.pop(day, None)
+        if conn is None:
+            conn = sqlite3.connect(self.partition_path(day), isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # WAL with synchronous=NORMAL survives process crashes; only a
+            # power loss can roll back the most recent transactions
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in _SCHEMA:
+                conn.execute(statement)
+        self._writers[day] = conn
+        while len(self._writers) > self.open_partitions:
+            _, oldest = self._writers.popitem(last=False)
+            oldest.close()
+        return conn
+
+    def _reader(self, day: date) -> Optional[sqlite3.Connection]:
+        path = self.partition_path(day)
+        if not os.path.exists(path):
+            return None
+        return sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+
+    def drop_before(self, day: date) -> List[date]:
+        """Delete partitions older than ``day``; returns the dropped days."""
+        dropped = []
+        with self._write_lock:
+            for old in self.partitions():
+                if old >= day:
+                    break
+                conn = self._writers.pop(old, None)
+                if conn is not None:
+                    conn.close()
+                for suffix in ("", "-wal", "-shm"):
+                    try:
+                        os.remove(self.partition_path(old) + suffix)
+                    except FileNotFoundError:
+                        pass
+                dropped.append(old)
+        return dropped
+
+    def close(self) -> None:
+        with self._write_lock:
+            while self._writers:
+                self._writers.popitem()[1].close()
+
+    # -- ingestion -----------------------------------------------------------
+    def _parse(self, line: str, line_no: int, key_prefix: Optional[str], now: float) -> Tuple[int, tuple]:
+        if len(line) > self.max_line_bytes:
+            raise ValueError("Line too long.")
+        # raw_decode skips json.loads' whitespace regex; lines are stripped
+        event, end = _decode(line)
+        if end != len(line):
+            raise ValueError("Extra data after the event.")
+        if not isinstance(event, dict):
+            raise ValueError("Event must be a JSON object.")
+        kind = event.get("event")
+        sender_id = event.get("sender_id")
+        if not isinstance(kind, str) or not isinstance(sender_id, str):
+            raise ValueError("Event needs string 'event' and 'sender_id' fields.")
+        timestamp = event.get("timestamp", now)
+        if not isinstance(timestamp, (int, float)) or isinstance(timestamp, bool):
+            raise ValueError("'timestamp' must be seconds since the epoch.")
+        # Also rejects NaN and infinities
+        if not _MIN_TIMESTAMP <= timestamp < _END_TIMESTAMP:
+            raise ValueError("'timestamp' is out of range.")
+        key = event.get("idempotency_key")
+        if key is None and key_prefix is not None:
+            key = f"{key_prefix}:{line_no}"
+        elif key is not None:
+            key = str(key)
+        # Days since the epoch; cheaper to group by than date objects
+        return int(timestamp // 86400), (timestamp, sender_id, kind, key, line)
+
+    def append_lines(
+        self,
+        lines: Iterable[str],
+        key_prefix: Optional[str] = None,
+        first_line: int = 1,
+        now: Optional[float] = None,
+    ) -> IngestResult:
+        """Append NDJSON event lines in one transaction per day.
+
+        Blank lines are skipped; invalid lines are reported in ``rejected``
+        with their 1-based line number (offset by ``first_line``) and do not
+        affect the rest of the batch.
+        """
+        now = time.time() if now is None else now
+        by_day: Dict[int, List[tuple]] = {}
+        rejected = []
+        for line_no, line in enumerate(lines, first_line):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                day, row = self._parse(line, line_no, key_prefix, now)
+            except ValueError as exc:
+                rejected.append({"line": line_no, "error": str(exc)})
+                continue
+            rows = by_day.get(day)
+            if rows is None:
+                rows = by_day[day] = []
+            rows.append(row)
+        accepted = duplicates = 0
+        with self._write_lock:
+            for day, rows in by_day.items():
+                conn = self._writer(_EPOCH_DAY + timedelta(days=day))
+                before = conn.total_changes
+                conn.execute("BEGIN")
+                try:
+                    conn.executemany(_INSERT, rows)
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+                inserted = conn.total_changes - before
+                accepted += inserted
+                duplicates += len(rows) - inserted
+        return IngestResult(accepted, duplicates, rejected)
+
+    def append(self, events: Iterable[Dict[str, Any]], key_prefix: Optional[str] = None) -> IngestResult:
+        return self.append_lines((json.dumps(e, separators=(",", ":")) for e in events), key_prefix)
+
+    # -- reads ---------------------------------------------------------------
+    def _days(self, start: Optional[float], end: Optional[float]) -> List[date]:
+        days = self.partitions()
+        if start is not None:
+            days = [d for d in days if d >= partition_day(start)]
+        if end is not None:
+            days = [d for d in days if _day_start(d) < end]
+        return days
+
+    def query(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        sender_id: Optional[str] = None,
+        event: Optional[str] = None,
+        limit: int = 1000,
+        cursor: Optional[str] = None,
+    ) -> EventPage:
+        """Events with ``start <= timestamp < end`` in time order.
+
+        Pass the returned ``next_cursor`` back to read the following page.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        if after is not None:
+            start = after[0] if start is None else max(start, after[0])
+        rows: List[Tuple[float, int, str]] = []
+        for day in self._days(start, end):
+            conn = self._reader(day)
+            if conn is None:
+                continue
+            try:
+                rows.extend(self._query_partition(conn, start, end, sender_id, event, after, limit - len(rows)))
+            finally:
+                conn.close()
+            if len(rows) >= limit:
+                break
+        next_cursor = encode_cursor(rows[-1][0], rows[-1][1]) if len(rows) >= limit else None
+        return EventPage([row[2] for row in rows], next_cursor)
+
+    @staticmethod
+    def _query_partition(conn, start, end, sender_id, event, after, limit) -> List[Tuple[float, int, str]]:
+        clauses, params = [], []
+        if sender_id is not None:
+            clauses.append("sender_id = ?")
+            params.append(sender_id)
+        if after is not None:
+            # A timestamp always maps to the same partition, so seq only
+            # breaks ties within it
+            clauses.append("(timestamp > ? OR (timestamp = ? AND seq > ?))")
+            params.extend([after[0], after[0], after[1]])
+        elif start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("timestamp < ?")
+            params.append(end)
+        if event is not None:
+            clauses.append("event = ?")
+            params.append(event)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT timestamp, seq, data FROM events {where} ORDER BY timestamp, seq LIMIT ?"
+        return conn.execute(sql, params + [limit]).fetchall()
+
+    def count(self, start: Optional[float] = None, end: Optional[float] = None) -> int:
+        total = 0
+        for day in self._days(start, end):
+            conn = self._reader(day)
+            if conn is None:
+                continue
+            try:
+                clauses, params = [], []
+                if start is not None:
+                    clauses.append("timestamp >= ?")
+                    params.append(start)
+                if end is not None:
+                    clauses.append("timestamp < ?")
+                    params.append(end)
+                where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+                total += conn.execute(f"SELECT COUNT(*) FROM events {where}", params).fetchone()[0]
+            finally:
+                conn.close()
+        return total
+
@@ -0,0 +1,371 @@
+"""Event-loop lag monitor and blocking-call detector.
+
+:class:`LoopMonitor` runs a probe task that sleeps ``interval`` seconds in a
+loop and records how late it wakes up in a lag histogram. A watchdog thread
+watches the probe's next expected wake-up; once the loop is overdue by more
+than ``block_threshold`` seconds it captures the loop thread's current stack
+(the code that is hogging the loop), logs it and keeps it in a bounded list
+of :class:`BlockReport` objects. When the loop resumes, the total blocked time
+goes into a second histogram.
+
+In debug mode a :class:`BlockingCallDetector` additionally flags synchronous
+I/O made on the loop thread while a loop is running there: ``open()``,
+blocking socket calls, DNS lookups, ``time.sleep`` and ``sqlite3`` queries.
+It uses an audit hook (``sys.addaudithook``) plus wrappers around
+``sqlite3.connect`` (injecting a checking connection factory) and
+``time.sleep``, costs a few microseconds per audited call and is meant for
+development and staging, not production.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STACK_LIMIT = 30
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, buckets: Sequence[float] = LAG_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bucket bound below which a ``q`` share of observations fall."""
+        with self._lock:
+            target, seen = q * self.count, 0
+            for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+                seen += count
+                if seen >= target and self.count:
+                    return bound if bound != float("inf") else self.max
+        return 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            cumulative, total = {}, 0
+            for bound, count in zip(self.buckets, self.counts):
+                total += count
+                cumulative[str(bound)] = total
+            cumulative["+Inf"] = self.count
+            return {"count": self.count, "sum": self.sum, "max": self.max, "buckets": cumulative}
+
+    def prometheus(self, name: str, help_text: str) -> str:
+        snapshot = self.snapshot()
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        lines += [f'{name}_bucket{{le="{le}"}} {count}' for le, count in snapshot["buckets"].items()]
+        lines += [f"{name}_sum {snapshot['sum']}", f"{name}_count {snapshot['count']}"]
+        return "\n".join(lines) + "\n"
+
+
+class BlockReport(NamedTuple):
+    started_at: float  # wall-clock time the loop was first seen blocked
+    blocked_for: float  # seconds; final once the loop has resumed
+    stack: List[str]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"started_at": self.started_at, "blocked_for": self.blocked_for, "stack": self.stack}
+
+
+def _thread_stack(thread_id: int) -> List[str]:
+    frame = sys._current_frames().get(thread_id)
+    if frame is None:
+        return []
+    return [line.rstrip("\n") for line in traceback.format_stack(frame)[-STACK_LIMIT:]]
+
+
+class LoopMonitor:
+    """Measures event-loop lag and reports what blocks the loop.
+
+    Args:
+        interval: Seconds between lag probes.
+        block_threshold: Lag in seconds after which the loop counts as
+            blocked and its stack is captured.
+        max_reports: Most recent block reports kept.
+    """
+
+    def __init__(self, interval: float = 0.1, block_threshold: float = 0.25, max_reports: int = 20) -> None:
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.lag = Histogram()
+        self.blocked = Histogram()
+        self.reports: Deque[BlockReport] = deque(maxlen=max_reports)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._expected = 0.0  # monotonic time the probe should wake up
+        self._pending: Optional[BlockReport] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start probing the running loop; call from within it (e.g. at startup)."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._stop.clear()
+        self._expected = time.monotonic() + self.interval
+        self._task = self._loop.create_task(self._probe())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1.0)
+            self._watchdog = None
+
+    async def _probe(self) -> None:
+        while True:
+            self._expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - self._expected)
+            self.lag.observe(lag)
+            if lag > self.block_threshold:
+                self._resumed(lag)
+
+    def _resumed(self, lag: float) -> None:
+        self.blocked.observe(lag)
+        with self._lock:
+            report, self._pending = self._pending, None
+            if report is not None:
+                self.reports.append(report._replace(blocked_for=lag))
+        if report is not None:
+            logger.warning("Event loop was blocked for %.3fs by:\n%s", lag, "\n".join(report.stack))
+        else:
+            logger.warning("Event loop was blocked for %.3fs", lag)
+
+    def _watch(self) -> None:
+        check = min(self.interval, self.block_threshold) / 4
+        while not self._stop.wait(check):
+            overdue = time.monotonic() - self._expected
+            if overdue <= self.block_threshold:
+                continue
+            with self._lock:
+                if self._pending is None:
+                    # First sighting of this block: the stack shows the culprit
+                    self._pending = BlockReport(time.time() - overdue, overdue, _thread_stack(self._loop_thread))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            reports = [r.as_dict() for r in self.reports]
+            if self._pending is not None:
+                reports.append(dict(self._pending.as_dict(), ongoing=True))
+        return {
+            "interval": self.interval,
+            "block_threshold": self.block_threshold,
+            "lag_seconds": dict(self.lag.snapshot(), p50=self.lag.quantile(0.5), p99=self.lag.quantile(0.99)),
+            "blocked_seconds": self.blocked.snapshot(),
+            "blocks": reports,
+        }
+
+    def prometheus(self) -> str:
+        return self.lag.prometheus(
+            "event_loop_lag_seconds", "Delay of the event-loop probe beyond its scheduled wake-up."
+        ) + self.blocked.prometheus(
+            "event_loop_blocked_seconds", "Duration of event-loop stalls longer than the block threshold."
+        )
+
+
+# ---------------------------------------------------------------------------
+# Blocking-call detector (debug mode)
+# ---------------------------------------------------------------------------
+_AUDITED_EVENTS = {
+    "open",
+    "socket.connect",
+    "socket.sendto",
+    "socket.getaddrinfo",
+    "socket.gethostbyname",
+    "socket.gethostbyaddr",
+    "sqlite3.connect",
+}
+
+# Reading modules during a lazy import is blocking too, but it is not
+# something a handler can fix
+_IMPORT_SUFFIXES = (".py", ".pyc", ".so", ".pyd", ".pth")
+
+_detector: Optional["BlockingCallDetector"] = None
+_hook_installed = False
+_original_connect = sqlite3.connect
+_original_sleep = time.sleep
+
+
+class BlockingCall(Exception):
+    """Raised in ``raise`` mode when blocking I/O runs on the event loop."""
+
+
+class _CheckedCursor(sqlite3.Cursor):
+    def execute(self, *args, **kwargs):
+        _check("sqlite3.execute")
+        return super().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        _check("sqlite3.executemany")
+        return super().executemany(*args, **kwargs)
+
+
+class _CheckedConnection(sqlite3.Connection):
+    """sqlite3 connection that reports queries made on the loop thread."""
+
+    def cursor(self, factory=_CheckedCursor):
+        return super().cursor(factory)
+
+    def execute(self, *args, **kwargs):
+        _check("sqlite3.execute")
+        return super().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        _check("sqlite3.executemany")
+        return super().executemany(*args, **kwargs)
+
+    def executescript(self, *args, **kwargs):
+        _check("sqlite3.executescript")
+        return super().executescript(*args, **kwargs)
+
+    def commit(self):
+        _check("sqlite3.commit")
+        return super().commit()
+
+
+def _checked_connect(*args, **kwargs):
+    if "factory" not in kwargs and len(args) < 6:
+        kwargs["factory"] = _CheckedConnection
+    return _original_connect(*args, **kwargs)
+
+
+def _checked_sleep(seconds):
+    # time.sleep only raises an audit event from Python 3.12 on
+    _check("time.sleep")
+    return _original_sleep(seconds)
+
+
+def _on_loop_thread() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _check(event: str, args: Tuple = ()) -> None:
+    detector = _detector
+    if detector is not None and _on_loop_thread():
+        detector.report(event, args)
+
+
+def _audit(event: str, args: Tuple) -> None:
+    if _detector is None or event not in _AUDITED_EVENTS:
+        return
+    if event == "open" and isinstance(args[0], str) and args[0].endswith(_IMPORT_SUFFIXES):
+        return
+    if event.startswith("socket.") and event not in ("socket.getaddrinfo", "socket.gethostbyname", "socket.gethostbyaddr"):
+        sock = args[0]
+        # asyncio itself drives non-blocking sockets from the loop thread
+        if hasattr(sock, "getblocking") and not sock.getblocking():
+            return
+    _check(event, args)
+
+
+class BlockingCallDetector:
+    """Flags synchronous I/O executed on a thread that is running an event loop.
+
+    Args:
+        mode: ``"warn"`` logs each call site once with its stack,
+            ``"raise"`` raises :class:`BlockingCall` (useful in tests).
+        max_sites: Distinct call sites remembered.
+    """
+
+    def __init__(self, mode: str = "warn", max_sites: int = 200) -> None:
+        if mode not in ("warn", "raise"):
+            raise ValueError(f"Unknown blocking-call mode: {mode}")
+        self.mode = mode
+        self.max_sites = max_sites
+        self.sites: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def install(self) -> "BlockingCallDetector":
+        global _detector, _hook_installed
+        _detector = self
+        # Audit hooks cannot be removed, so one hook is installed for good
+        # and consults the active detector
+        if not _hook_installed:
+            sys.addaudithook(_audit)
+            _hook_installed = True
+        sqlite3.connect = _checked_connect
+        time.sleep = _checked_sleep
+        return self
+
+    def uninstall(self) -> None:
+        global _detector
+        if _detector is self:
+            _detector = None
+            sqlite3.connect = _original_connect
+            time.sleep = _original_sleep
+
+    def report(self, event: str, args: Tuple = ()) -> None:
+        # The first frame outside this module is the offending call site;
+        # the stack is only formatted the first time a site is seen
+        frame = sys._getframe(1)
+        while frame.f_back is not None and frame.f_code.co_filename == __file__:
+            frame = frame.f_back
+        site = f"{frame.f_code.co_filename}:{frame.f_lineno} in {frame.f_code.co_name}"
+        with self._lock:
+            entry = self.sites.get((event, site))
+            first = entry is None
+            if first:
+                stack = traceback.format_stack(frame)[-STACK_LIMIT:]
+                entry = self.sites[(event, site)] = {"event": event, "site": site, "count": 0, "stack": stack}
+                while len(self.sites) > self.max_sites:
+                    self.sites.popitem(last=False)
+            entry["count"] += 1
+        if self.mode == "raise":
+            raise BlockingCall(f"Blocking call {event} on the event loop at {site}")
+        if first:
+            logger.warning("Blocking call %s on the event loop:\n%s", event, "".join(entry["stack"]).rstrip())
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {"event": e["event"], "site": e["site"], "count": e["count"]}
+                for e in sorted(self.sites.values(), key=lambda e: e["count"], reverse=True)
+            ]
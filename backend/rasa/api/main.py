@@ -1,23 +1,62 @@
 from __future__ import annotations
 
+import hmac
+import json
 import os
-from typing import Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
 
-from fastapi import Depends, FastAPI, Header, HTTPException, status
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-# JWT auth disabled – removing dependency on jose
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from pydantic import BaseModel, EmailStr
 
+from ..actions.actions import DB_PATH, get_db_router
+from ..actions.db_router import DatabaseRouter
+from .catalog import Catalog
+from .chat import RasaClient, RasaError, RasaOverloaded, RasaTimeout
+from .events import EventStore, InvalidCursor, LineBatcher
+from .loopmonitor import BlockingCallDetector, LoopMonitor
+from .orders import MAX_BATCH as MAX_ORDER_BATCH, NDJSON, order_status_lines
+from .passwords import HashingRateLimited, PasswordHasher
+from .ratelimit import RateLimitMiddleware, backend_from_env, rules_from_env
+from .responses import (
+    CompressionMiddleware,
+    FastJSONResponse,
+    HTTPCacheMiddleware,
+    ResponseCache,
+    parse_cache_routes,
+)
+from .streaming import SSE_HEADERS, SlowConsumer, error_status, relay, sse_events
+from .thumbnails import ThumbnailStore, etag_matches
+from .tokens import KeyRing, TokenError, TokenManager, bearer_token
+from .users import UserExistsError, UserStore
 
 
 # ---------------------------------------------------------------------------
 # Configuration
 # ---------------------------------------------------------------------------
 JWT_SECRET = os.getenv("JWT_SECRET")
-# Auth disabled – no secret validation required
-JWT_ALGORITHM = "HS256"
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_SECONDS = int(os.getenv("JWT_EXPIRE", "3600"))
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+THUMBNAIL_CACHE_BYTES = int(os.getenv("THUMBNAIL_CACHE_BYTES", str(16 * 1024 * 1024)))
+USER_DB_PATH = os.getenv("USER_DB_PATH", os.path.join(os.path.dirname(DB_PATH), "users.db"))
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") != "0"
+CHAT_SEND_TIMEOUT = float(os.getenv("CHAT_SEND_TIMEOUT", "10"))
+EVENT_STORE_DIR = os.getenv("EVENT_STORE_DIR", os.path.join(os.path.dirname(DB_PATH), "events"))
+EVENT_BATCH_SIZE = int(os.getenv("EVENT_BATCH_SIZE", "5000"))
+EVENTS_API_KEY = os.getenv("EVENTS_API_KEY")
+RESPONSE_CACHE_ROUTES = parse_cache_routes(os.getenv("RESPONSE_CACHE_ROUTES", "/products=60,/categories=300"))
+RESPONSE_CACHE_BYTES = int(os.getenv("RESPONSE_CACHE_BYTES", str(32 * 1024 * 1024)))
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR", "1") != "0"
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.1"))
+LOOP_BLOCK_THRESHOLD = float(os.getenv("LOOP_BLOCK_THRESHOLD", "0.25"))
+# "1"/"warn" logs synchronous I/O on the event loop, "raise" makes it fail
+LOOP_DEBUG = os.getenv("LOOP_DEBUG", "0")
+METRICS_API_KEY = os.getenv("METRICS_API_KEY")
 
 origins = [
     "http://localhost",
@@ -25,7 +64,18 @@ origins = [
     
 ]
 
-app = FastAPI(title="Customer-Care AI Auth API", version="1.0.0")
+app = FastAPI(title="Customer-Care AI Auth API", version="1.0.0", default_response_class=FastJSONResponse)
+# Innermost: ETags and cached bodies cover the compressed bytes actually sent
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MINIMUM_SIZE)
+response_cache = ResponseCache(RESPONSE_CACHE_BYTES)
+app.add_middleware(HTTPCacheMiddleware, routes=RESPONSE_CACHE_ROUTES, cache=response_cache)
+# Added before CORS so CORS wraps it and 429 responses stay readable by the browser
+app.add_middleware(
+    RateLimitMiddleware,
+    rules=rules_from_env(),
+    backend=backend_from_env(),
+    enabled=RATE_LIMIT_ENABLED,
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -34,6 +84,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+thumbnails = ThumbnailStore(DB_PATH, cache_bytes=THUMBNAIL_CACHE_BYTES)
+catalog = Catalog(DB_PATH)
+
+loop_monitor = LoopMonitor(interval=LOOP_LAG_INTERVAL, block_threshold=LOOP_BLOCK_THRESHOLD)
+blocking_calls: Optional[BlockingCallDetector] = None
+
+tokens = TokenManager(
+    KeyRing.from_env(),
+    algorithm=JWT_ALGORITHM,
+    expire_seconds=ACCESS_TOKEN_EXPIRE_SECONDS,
+    cache_size=JWT_CACHE_SIZE,
+)
+
+# Created on first use so importing the app has no side effects
+_user_store: Optional[UserStore] = None
+_password_hasher: Optional[PasswordHasher] = None
+_rasa_client: Optional[RasaClient] = None
+_event_store: Optional[EventStore] = None
+
 
 # ---------------------------------------------------------------------------
 # Schemas
@@ -54,6 +123,28 @@ class TokenOut(BaseModel):
     token_type: str = "bearer"
 
 
+class ChatIn(BaseModel):
+    message: str
+    sender: Optional[str] = None
+    metadata: Optional[Dict[str, Any]] = None
+
+
+class ChatOut(BaseModel):
+    sender: str
+    messages: List[Dict[str, Any]]
+
+
+class IngestOut(BaseModel):
+    accepted: int
+    duplicates: int
+    rejected: List[Dict[str, Any]]
+
+
+class OrderStatusIn(BaseModel):
+    orders: List[Union[int, str]]
+    store: Optional[str] = None
+
+
 class UserOut(BaseModel):
     id: str
     email: EmailStr
@@ -67,32 +158,411 @@ class UserOut(BaseModel):
 
 
 def _create_jwt(user: dict) -> str:
-    """Auth disabled – return static token placeholder."""
-    return "auth-disabled"
+    return tokens.issue(user)
+
+
+def get_user_store() -> UserStore:
+    global _user_store
+    if _user_store is None:
+        _user_store = UserStore(USER_DB_PATH)
+    return _user_store
+
+
+def get_password_hasher() -> PasswordHasher:
+    global _password_hasher
+    if _password_hasher is None:
+        _password_hasher = PasswordHasher.from_env()
+    return _password_hasher
+
+
+def get_rasa_client() -> RasaClient:
+    global _rasa_client
+    if _rasa_client is None:
+        _rasa_client = RasaClient.from_env()
+    return _rasa_client
+
+
+def get_event_store() -> EventStore:
+    global _event_store
+    if _event_store is None:
+        _event_store = EventStore(EVENT_STORE_DIR)
+    return _event_store
+
+
+def get_order_router() -> DatabaseRouter:
+    return get_db_router()
+
+
+def _require_api_key(setting: str, expected: Optional[str], given: Optional[str]) -> None:
+    # Fail closed: without a configured key the routes are not served at all
+    if not expected:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=f"{setting} is not configured.")
+    if not (given and hmac.compare_digest(given, expected)):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API key.")
+
+
+def require_events_key(x_api_key: Optional[str] = Header(None)) -> None:
+    """Guard the event log with ``EVENTS_API_KEY``; refused while it is unset."""
+    _require_api_key("EVENTS_API_KEY", EVENTS_API_KEY, x_api_key)
+
 
+def require_metrics_key(x_api_key: Optional[str] = Header(None)) -> None:
+    """Guard runtime metrics with ``METRICS_API_KEY``; refused while it is unset."""
+    _require_api_key("METRICS_API_KEY", METRICS_API_KEY, x_api_key)
 
-async def get_current_user(*_args, **_kwargs) -> dict:
-    """Auth disabled – always returns an anonymous user object."""
-    return {"id": "anonymous", "email": "anonymous@example.com", "role": "anonymous"}
+
+def _client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+@app.exception_handler(HashingRateLimited)
+async def hashing_rate_limited(request: Request, exc: HashingRateLimited) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": "Too many concurrent authentication attempts."},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.on_event("startup")
+async def start_loop_monitor() -> None:
+    global blocking_calls
+    if LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    if LOOP_DEBUG != "0":
+        blocking_calls = BlockingCallDetector("raise" if LOOP_DEBUG == "raise" else "warn").install()
+
+
+@app.on_event("shutdown")
+async def stop_loop_monitor() -> None:
+    await loop_monitor.stop()
+    if blocking_calls is not None:
+        blocking_calls.uninstall()
+
+
+@app.on_event("shutdown")
+def shutdown_password_hasher() -> None:
+    if _password_hasher is not None:
+        _password_hasher.shutdown()
+
+
+@app.on_event("shutdown")
+def close_event_store() -> None:
+    if _event_store is not None:
+        _event_store.close()
+
+
+@app.on_event("shutdown")
+async def close_rasa_client() -> None:
+    if _rasa_client is not None:
+        await _rasa_client.aclose()
+
+
+def _user_from_token(token: Optional[str]) -> dict:
+    """Resolve a raw token to a user; raises ``TokenError`` when invalid."""
+    if token is None:
+        return {"id": "anonymous", "email": "anonymous@example.com", "role": "anonymous"}
+    claims = tokens.verify(token)
+    return {"id": claims["sub"], "email": claims["email"], "name": claims.get("name"), "role": claims["role"]}
+
+
+async def get_current_user(authorization: Optional[str] = Header(None)) -> dict:
+    """User described by the bearer token; anonymous when no token is sent.
+
+    Claims come from the verified-token cache on repeat requests, so the hot
+    path does no signature check and no database lookup.
+    """
+    try:
+        return _user_from_token(bearer_token(authorization))
+    except TokenError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(exc),
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+async def require_user(user: dict = Depends(get_current_user)) -> dict:
+    if user["role"] == "anonymous":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication required.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
+
+
+def require_role(*roles: str) -> Callable[..., Awaitable[dict]]:
+    """Dependency admitting authenticated users whose role is one of ``roles``."""
+    async def check(user: dict = Depends(require_user)) -> dict:
+        if user["role"] not in roles:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed for this account.")
+        return user
+
+    return check
+
+
+# Agent-console routes; self-registered accounts have the role "user"
+require_agent = require_role("agent", "admin")
+
+
+def _chat_sender(user: dict, requested: Optional[str]) -> str:
+    # Authenticated users always talk as themselves
+    return user["id"] if user["role"] != "anonymous" else requested or "default"
 
 
 # ---------------------------------------------------------------------------
 # Endpoints
 # ---------------------------------------------------------------------------
 @app.post("/register", response_model=TokenOut, status_code=status.HTTP_201_CREATED)
-async def register(data: RegisterIn):
-
-    raise HTTPException(status_code=501, detail="User registration is not implemented.")
-
+async def register(
+    data: RegisterIn,
+    request: Request,
+    users: UserStore = Depends(get_user_store),
+    hasher: PasswordHasher = Depends(get_password_hasher),
+):
+    # Cheap duplicate check before spending CPU on the hash
+    if await run_in_threadpool(users.get_by_email, data.email):
+        raise HTTPException(status_code=409, detail="Email is already registered.")
+    password_hash = await hasher.hash(data.password, _client_ip(request))
+    try:
+        user = await run_in_threadpool(users.create, data.name, data.email, password_hash)
+    except UserExistsError:
+        raise HTTPException(status_code=409, detail="Email is already registered.")
+    return TokenOut(access_token=_create_jwt(user))
 
 
 @app.post("/login", response_model=TokenOut)
-async def login(data: LoginIn):
-
-    raise HTTPException(status_code=501, detail="User login is not implemented.")
-
+async def login(
+    data: LoginIn,
+    request: Request,
+    users: UserStore = Depends(get_user_store),
+    hasher: PasswordHasher = Depends(get_password_hasher),
+):
+    user = await run_in_threadpool(users.get_by_email, data.email)
+    encoded = user["password_hash"] if user else None
+    if not await hasher.verify(data.password, encoded, _client_ip(request)):
+        raise HTTPException(status_code=401, detail="Invalid email or password.")
+    return TokenOut(access_token=_create_jwt(user))
 
 
 @app.get("/me", response_model=UserOut)
-async def me() -> UserOut:
-    return UserOut(id="anonymous", email="anonymous@example.com", role="anonymous")
+async def me(user: dict = Depends(get_current_user)) -> UserOut:
+    return UserOut(**user)
+
+
+@app.post("/chat", response_model=ChatOut)
+async def chat(
+    data: ChatIn,
+    user: dict = Depends(get_current_user),
+    rasa: RasaClient = Depends(get_rasa_client),
+):
+    if not data.message.strip():
+        raise HTTPException(status_code=400, detail="Message is required.")
+    sender = _chat_sender(user, data.sender)
+    try:
+        messages = await rasa.send(sender, data.message, data.metadata)
+    except RasaOverloaded as exc:
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "1"})
+    except RasaTimeout as exc:
+        raise HTTPException(status_code=504, detail=str(exc))
+    except RasaError as exc:
+        raise HTTPException(status_code=502, detail=str(exc))
+    return ChatOut(sender=sender, messages=messages)
+
+
+@app.post("/chat/stream")
+async def chat_stream(
+    data: ChatIn,
+    user: dict = Depends(get_current_user),
+    rasa: RasaClient = Depends(get_rasa_client),
+) -> StreamingResponse:
+    """Server-Sent Events: one ``message`` event per bot reply, then ``done``."""
+    if not data.message.strip():
+        raise HTTPException(status_code=400, detail="Message is required.")
+    replies = rasa.stream(_chat_sender(user, data.sender), data.message, data.metadata)
+    return StreamingResponse(sse_events(replies), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@app.websocket("/chat/ws")
+async def chat_websocket(
+    websocket: WebSocket,
+    token: Optional[str] = None,
+    rasa: RasaClient = Depends(get_rasa_client),
+) -> None:
+    """Chat over one WebSocket.
+
+    The client sends ``{"message": ..., "sender": ..., "metadata": ...}``
+    frames and receives ``{"type": "message", "message": {...}}`` for every
+    bot reply as it is produced, followed by ``{"type": "done"}`` (or
+    ``{"type": "error"}``). Browsers cannot set headers on WebSockets, so the
+    access token may be passed as the ``token`` query parameter.
+    """
+    try:
+        user = _user_from_token(bearer_token(websocket.headers.get("authorization")) or token)
+    except TokenError:
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+
+    async def send_reply(reply: Dict[str, Any]) -> None:
+        await websocket.send_json({"type": "message", "message": reply})
+
+    try:
+        while True:
+            data = await websocket.receive_json()
+            message = data.get("message") if isinstance(data, dict) else None
+            if not isinstance(message, str) or not message.strip():
+                await websocket.send_json({"type": "error", "status": 400, "detail": "Message is required."})
+                continue
+            sender = _chat_sender(user, data.get("sender"))
+            try:
+                metadata = data.get("metadata") if isinstance(data.get("metadata"), dict) else None
+                count = await relay(rasa.stream(sender, message, metadata), send_reply, CHAT_SEND_TIMEOUT)
+            except RasaError as exc:
+                await websocket.send_json({"type": "error", "status": error_status(exc), "detail": str(exc)})
+                continue
+            await websocket.send_json({"type": "done", "count": count})
+    except SlowConsumer:
+        await websocket.close(code=1013)
+    except ValueError:
+        # Frames must be JSON
+        await websocket.close(code=1003)
+    except WebSocketDisconnect:
+        pass
+
+
+@app.get("/categories")
+def list_categories() -> Response:
+    return FastJSONResponse(catalog.categories())
+
+
+@app.get("/products")
+def list_products(
+    category: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+) -> Response:
+    return FastJSONResponse(catalog.products(category, limit, offset))
+
+
+@app.get("/products/{product_id}")
+def get_product(product_id: int) -> Response:
+    product = catalog.product(product_id)
+    if product is None:
+        raise HTTPException(status_code=404, detail="Product not found.")
+    return FastJSONResponse(product)
+
+
+@app.get("/products/{product_id}/thumbnail")
+def product_thumbnail(product_id: int, if_none_match: Optional[str] = Header(None)) -> Response:
+    info = thumbnails.info(product_id)
+    if info is None:
+        raise HTTPException(status_code=404, detail="Thumbnail not found.")
+    headers = thumbnails.headers(info)
+    if etag_matches(if_none_match, info.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    data = thumbnails.cached(info)
+    if data is not None:
+        return Response(content=data, media_type=info.content_type, headers=headers)
+    headers["Content-Length"] = str(info.content_length)
+    return StreamingResponse(thumbnails.stream(info), media_type=info.content_type, headers=headers)
+
+
+@app.post("/orders/status")
+def orders_status(
+    payload: OrderStatusIn,
+    user: dict = Depends(require_agent),
+    router: DatabaseRouter = Depends(get_order_router),
+) -> StreamingResponse:
+    """Status of a batch of orders as NDJSON, one line per reference in request order."""
+    if len(payload.orders) > MAX_ORDER_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {MAX_ORDER_BATCH} orders per request.",
+        )
+    return StreamingResponse(order_status_lines(router, payload.orders, payload.store), media_type=NDJSON)
+
+
+@app.post("/events", response_model=IngestOut, dependencies=[Depends(require_events_key)])
+async def ingest_events(
+    request: Request,
+    idempotency_key: Optional[str] = Header(None),
+    store: EventStore = Depends(get_event_store),
+) -> IngestOut:
+    """Append newline-delimited JSON events, inserting while the body streams in."""
+    batcher = LineBatcher(EVENT_BATCH_SIZE)
+    result = IngestOut(accepted=0, duplicates=0, rejected=[])
+
+    async def append(batch: List[str]) -> None:
+        first_line = batcher.lines_seen - len(batch) + 1
+        ingested = await run_in_threadpool(store.append_lines, batch, idempotency_key, first_line)
+        result.accepted += ingested.accepted
+        result.duplicates += ingested.duplicates
+        result.rejected.extend(ingested.rejected)
+
+    async for chunk in request.stream():
+        batch = batcher.feed(chunk)
+        if batch:
+            await append(batch)
+    await append(batcher.flush())
+    # Keep the response small when a client sends garbage
+    del result.rejected[100:]
+    return result
+
+
+def _events_response(
+    store: EventStore,
+    start: Optional[float],
+    end: Optional[float],
+    sender_id: Optional[str],
+    event: Optional[str],
+    limit: int,
+    cursor: Optional[str],
+) -> Response:
+    try:
+        page = store.query(start, end, sender_id=sender_id, event=event, limit=limit, cursor=cursor)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    # Events are stored as JSON text; splice them in instead of re-encoding
+    body = '{"events":[' + ",".join(page.events) + '],"next_cursor":' + json.dumps(page.next_cursor) + "}"
+    return Response(content=body, media_type="application/json")
+
+
+@app.get("/events", dependencies=[Depends(require_events_key)])
+def list_events(
+    start: Optional[float] = Query(None, description="Earliest timestamp (epoch seconds), inclusive"),
+    end: Optional[float] = Query(None, description="Latest timestamp (epoch seconds), exclusive"),
+    sender_id: Optional[str] = None,
+    event: Optional[str] = Query(None, description="Event type, e.g. user or bot"),
+    limit: int = Query(1000, ge=1, le=10000),
+    cursor: Optional[str] = None,
+    store: EventStore = Depends(get_event_store),
+) -> Response:
+    return _events_response(store, start, end, sender_id, event, limit, cursor)
+
+
+@app.get("/conversations/{sender_id}/events", dependencies=[Depends(require_events_key)])
+def conversation_events(
+    sender_id: str,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    event: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=10000),
+    cursor: Optional[str] = None,
+    store: EventStore = Depends(get_event_store),
+) -> Response:
+    return _events_response(store, start, end, sender_id, event, limit, cursor)
+
+
+@app.get("/metrics/loop", dependencies=[Depends(require_metrics_key)])
+async def loop_metrics(format: str = "json") -> Response:
+    """Event-loop lag histograms, recent stalls with their stacks and, in debug mode, blocking call sites."""
+    if format not in ("json", "prometheus"):
+        raise HTTPException(status_code=400, detail="format must be json or prometheus.")
+    if format == "prometheus":
+        return Response(loop_monitor.prometheus(), media_type="text/plain; version=0.0.4")
+    report = loop_monitor.snapshot()
+    report["running"] = loop_monitor.running
+    report["blocking_calls"] = blocking_calls.snapshot() if blocking_calls is not None else None
+    return FastJSONResponse(report)
@@ -0,0 +1,63 @@
+"""Bulk order status lookups for agent consoles.
+
+``POST /orders/status`` accepts up to :data:`MAX_BATCH` order references in
+any format understood by :func:`actions.order_lookup.parse_order_key` and
+answers with newline-delimited JSON, one line per reference in request
+order. References are resolved :data:`STREAM_CHUNK` at a time through the
+actions' :class:`~actions.db_router.DatabaseRouter`, i.e. with the same
+shards, connection pools and order cache the bot uses, so the first lines
+reach the agent before the whole batch has been looked up. Only accounts
+with the ``agent`` or ``admin`` role may call it.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Iterator, Optional, Sequence
+
+from ..actions.db_router import DatabaseRouter
+from ..actions.order_changes import STATUS_NAMES
+from ..actions.order_lookup import parse_order_key
+
+MAX_BATCH = 10_000
+STREAM_CHUNK = 1000
+
+NDJSON = "application/x-ndjson"
+
+# json.dumps with non-default options builds a new encoder on every call
+_encode = json.JSONEncoder(separators=(",", ":"), default=str).encode
+
+
+def _line(payload: Dict[str, Any]) -> bytes:
+    return (_encode(payload) + "\n").encode("utf-8")
+
+
+def order_status_lines(
+    router: DatabaseRouter,
+    keys: Sequence[Any],
+    store: Optional[str] = None,
+    chunk_size: int = STREAM_CHUNK,
+) -> Iterator[bytes]:
+    """Yield one NDJSON line per key, looking keys up ``chunk_size`` at a time."""
+    for start in range(0, len(keys), chunk_size):
+        chunk = keys[start:start + chunk_size]
+        parsed = [parse_order_key(key) for key in chunk]
+        found = router.find_orders([key for key in parsed if key is not None], store)
+        lines = []
+        for raw, key in zip(chunk, parsed):
+            if key is None:
+                lines.append(_line({"key": raw, "found": False, "error": "Unrecognised order reference."}))
+                continue
+            match = found.get(key)
+            if match is None:
+                lines.append(_line({"key": raw, "found": False}))
+                continue
+            shard, order = match
+            lines.append(_line({
+                "key": raw,
+                "found": True,
+                "store": shard,
+                "status": STATUS_NAMES.get(order["Status"], "unknown"),
+                "order": order,
+            }))
+        yield b"".join(lines)
@@ -0,0 +1,177 @@
+"""Password hashing offloaded to a bounded process pool.
+
+Hashes use scrypt (default) or PBKDF2-SHA256 with production work factors,
+which costs tens of milliseconds of CPU per call. Running that on the event
+loop would stall every other request on the worker during a login burst, so
+:class:`PasswordHasher` runs it in a ``ProcessPoolExecutor`` instead.
+
+Two limits keep the pool from being monopolised:
+
+* a global semaphore bounds the number of hashing jobs queued or running;
+* a per-client limit caps concurrent jobs per IP address, rejecting extra
+  attempts with :class:`HashingRateLimited` instead of queueing them.
+
+Encoded hashes are self-describing, e.g.
+``scrypt$16384$8$1$<salt>$<hash>`` or ``pbkdf2_sha256$600000$<salt>$<hash>``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+SCHEME_SCRYPT = "scrypt"
+SCHEME_PBKDF2 = "pbkdf2_sha256"
+
+DEFAULT_SCRYPT_N = 2 ** 14
+DEFAULT_SCRYPT_R = 8
+DEFAULT_SCRYPT_P = 1
+DEFAULT_PBKDF2_ITERATIONS = 600_000
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+
+class HashingRateLimited(Exception):
+    """Raised when a client already has too many hashing jobs in flight."""
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii")
+
+
+def hash_password(
+    password: str,
+    scheme: str = SCHEME_SCRYPT,
+    scrypt_n: int = DEFAULT_SCRYPT_N,
+    pbkdf2_iterations: int = DEFAULT_PBKDF2_ITERATIONS,
+    salt: Optional[bytes] = None,
+) -> str:
+    """Hash ``password`` and return the encoded hash (CPU heavy)."""
+    salt = salt or os.urandom(SALT_BYTES)
+    secret = password.encode("utf-8")
+    if scheme == SCHEME_SCRYPT:
+        key = hashlib.scrypt(
+            secret, salt=salt, n=scrypt_n, r=DEFAULT_SCRYPT_R, p=DEFAULT_SCRYPT_P,
+            maxmem=256 * scrypt_n * DEFAULT_SCRYPT_R, dklen=KEY_BYTES,
+        )
+        return f"{SCHEME_SCRYPT}${scrypt_n}${DEFAULT_SCRYPT_R}${DEFAULT_SCRYPT_P}${_b64(salt)}${_b64(key)}"
+    if scheme == SCHEME_PBKDF2:
+        key = hashlib.pbkdf2_hmac("sha256", secret, salt, pbkdf2_iterations, dklen=KEY_BYTES)
+        return f"{SCHEME_PBKDF2}${pbkdf2_iterations}${_b64(salt)}${_b64(key)}"
+    raise ValueError(f"Unknown password hash scheme: {scheme}")
+
+
+def verify_password(password: str, encoded: str) -> bool:
+    """Check ``password`` against an encoded hash in constant time (CPU heavy)."""
+    parts = encoded.split("$")
+    secret = password.encode("utf-8")
+    try:
+        if parts[0] == SCHEME_SCRYPT and len(parts) == 6:
+            n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            salt, expected = base64.b64decode(parts[4]), base64.b64decode(parts[5])
+            key = hashlib.scrypt(secret, salt=salt, n=n, r=r, p=p, maxmem=256 * n * r, dklen=len(expected))
+        elif parts[0] == SCHEME_PBKDF2 and len(parts) == 4:
+            salt, expected = base64.b64decode(parts[2]), base64.b64decode(parts[3])
+            key = hashlib.pbkdf2_hmac("sha256", secret, salt, int(parts[1]), dklen=len(expected))
+        else:
+            return False
+    except (ValueError, TypeError):
+        return False
+    return hmac.compare_digest(key, expected)
+
+
+class PasswordHasher:
+    """Runs password hashing in a bounded process pool with per-client limits.
+
+    Args:
+        workers: Worker processes; ``0`` hashes inline on the event loop
+            (only meant for tests and benchmarks).
+        max_pending: Maximum hashing jobs queued or running at once.
+        max_per_client: Maximum concurrent jobs per client address.
+        scheme: ``"scrypt"`` or ``"pbkdf2_sha256"`` for new hashes.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        max_per_client: int = 2,
+        scheme: str = SCHEME_SCRYPT,
+        scrypt_n: int = DEFAULT_SCRYPT_N,
+        pbkdf2_iterations: int = DEFAULT_PBKDF2_ITERATIONS,
+    ) -> None:
+        self.workers = max(1, (os.cpu_count() or 2) // 2) if workers is None else workers
+        self.max_pending = max_pending or max(1, self.workers) * 4
+        self.max_per_client = max_per_client
+        self.scheme = scheme
+        self.scrypt_n = scrypt_n
+        self.pbkdf2_iterations = pbkdf2_iterations
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._pending: Optional[asyncio.Semaphore] = None
+        self._pending_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._per_client: Dict[str, int] = {}
+        # Verified against when the user does not exist, to equalise timing
+        self._dummy_hash = hash_password("dummy-password", scheme, scrypt_n, pbkdf2_iterations)
+
+    @classmethod
+    def from_env(cls) -> "PasswordHasher":
+        workers = os.getenv("PASSWORD_HASH_WORKERS")
+        return cls(
+            workers=int(workers) if workers else None,
+            max_per_client=int(os.getenv("PASSWORD_HASH_MAX_PER_CLIENT", "2")),
+            scheme=os.getenv("PASSWORD_HASH_SCHEME", SCHEME_SCRYPT),
+            scrypt_n=int(os.getenv("PASSWORD_HASH_SCRYPT_N", str(DEFAULT_SCRYPT_N))),
+            pbkdf2_iterations=int(os.getenv("PASSWORD_HASH_PBKDF2_ITERATIONS", str(DEFAULT_PBKDF2_ITERATIONS))),
+        )
+
+    def _executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers <= 0:
+            return None
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    async def _run(self, client: str, fn, *args):
+        if self._per_client.get(client, 0) >= self.max_per_client:
+            raise HashingRateLimited(client)
+        loop = asyncio.get_running_loop()
+        if self._pending is None or self._pending_loop is not loop:
+            self._pending = asyncio.Semaphore(self.max_pending)
+            self._pending_loop = loop
+        self._per_client[client] = self._per_client.get(client, 0) + 1
+        try:
+            async with self._pending:
+                pool = self._executor()
+                if pool is None:
+                    return fn(*args)
+                return await loop.run_in_executor(pool, fn, *args)
+        finally:
+            remaining = self._per_client[client] - 1
+            if remaining:
+                self._per_client[client] = remaining
+            else:
+                del self._per_client[client]
+
+    async def hash(self, password: str, client: str = "") -> str:
+        return await self._run(
+            client, hash_password, password, self.scheme, self.scrypt_n, self.pbkdf2_iterations
+        )
+
+    async def verify(self, password: str, encoded: Optional[str], client: str = "") -> bool:
+        """Verify ``password``; a missing hash still costs one verification."""
+        result = await self._run(client, verify_password, password, encoded or self._dummy_hash)
+        return bool(result) and encoded is not None
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
@@ -0,0 +1,333 @@
+"""Token-bucket rate limiting as pure ASGI middleware.
+
+Every request and WebSocket handshake is checked against a list of
+:class:`RateLimitRule` objects, each keyed by client IP, authenticated user
+or route (method and path per client). A bucket holds up to ``burst`` tokens
+and refills at ``rate`` tokens per second; a request takes one token or is
+answered with ``429 Too Many Requests`` and a ``Retry-After`` header. A
+refused handshake is closed with code 1008 before it is accepted, which
+servers answer with ``403``; messages on an open WebSocket are not limited.
+
+Buckets are refilled lazily when they are touched, so idle keys cost nothing
+but memory. :class:`LocalBackend` spreads them over lock-protected shards;
+each shard is a dict kept in least-recently-used order, which lets the oldest
+keys be evicted in O(1) once they have been idle long enough to be full
+again (each bucket by its own rule), or when the shard exceeds its size
+bound. Memory therefore stays bounded no matter how many distinct keys pass
+through.
+
+Backends are pluggable: :class:`LocalBackend` limits a single worker process,
+while :class:`SQLiteBackend` keeps the buckets in a SQLite file shared by all
+workers on the host. Backends that may block, waiting for the SQLite write
+lock, are called from the thread pool rather than on the event loop.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+_PERIODS = {"s": 1.0, "sec": 1.0, "m": 60.0, "min": 60.0, "h": 3600.0, "hour": 3600.0}
+
+SCOPES = ("ip", "user", "route")
+
+
+def parse_rate(value: str) -> Tuple[float, float]:
+    """Parse ``"<count>/<period>[:<burst>]"``, e.g. ``"20/s:40"`` or ``"100/m"``.
+
+    Returns ``(tokens per second, burst)``; the burst defaults to the count.
+    """
+    spec, _, burst = value.strip().partition(":")
+    count, _, period = spec.partition("/")
+    try:
+        seconds = _PERIODS[period.strip().lower() or "s"]
+        rate = float(count) / seconds
+        capacity = float(burst) if burst else float(count)
+    except (KeyError, ValueError):
+        raise ValueError(f"Invalid rate limit: {value!r}")
+    if rate <= 0 or capacity < 1:
+        raise ValueError(f"Invalid rate limit: {value!r}")
+    return rate, capacity
+
+
+class RateLimitBackend:
+    """Stores token buckets; subclasses implement :meth:`acquire`."""
+
+    #: ``acquire`` may wait on I/O or locks, so it must not run on the event loop
+    blocking = False
+
+    def acquire(self, key: str, rate: float, burst: float, now: Optional[float] = None) -> float:
+        """Take one token from ``key``'s bucket.
+
+        Returns ``0.0`` when allowed, otherwise the seconds until a token is
+        available.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class LocalBackend(RateLimitBackend):
+    """In-process buckets in lock-sharded, LRU-ordered dictionaries.
+
+    Args:
+        shards: Number of independently locked dictionaries.
+        max_keys: Upper bound on buckets kept across all shards.
+        idle_ttl: Seconds after which an untouched bucket may be evicted
+            even below ``max_keys``; ``None`` derives it from each bucket's
+            rule (the time it takes to refill completely), which never
+            changes a decision.
+    """
+
+    def __init__(self, shards: int = 64, max_keys: int = 1_000_000, idle_ttl: Optional[float] = None) -> None:
+        self.max_keys_per_shard = max(1, max_keys // shards)
+        self.idle_ttl = idle_ttl
+        # key -> [tokens, updated, time after which the bucket may be evicted]
+        self._shards: List[Tuple[threading.Lock, Dict[str, List[float]]]] = [
+            (threading.Lock(), {}) for _ in range(shards)
+        ]
+
+    def _shard(self, key: str) -> Tuple[threading.Lock, Dict[str, List[float]]]:
+        return self._shards[zlib.crc32(key.encode("utf-8")) % len(self._shards)]
+
+    def acquire(self, key: str, rate: float, burst: float, now: Optional[float] = None) -> float:
+        now = time.monotonic() if now is None else now
+        idle_ttl = self.idle_ttl if self.idle_ttl is not None else burst / rate
+        lock, buckets = self._shard(key)
+        with lock:
+            # Re-inserting moves the key to the end, keeping the dict in LRU order
+            bucket = buckets.pop(key, None)
+            if bucket is None:
+                tokens = burst
+            else:
+                tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            if tokens >= 1.0:
+                tokens -= 1.0
+                wait = 0.0
+            else:
+                wait = (1.0 - tokens) / rate
+            buckets[key] = [tokens, now, now + idle_ttl]
+            self._evict(buckets, now)
+        return wait
+
+    def _evict(self, buckets: Dict[str, List[float]], now: float) -> None:
+        # Buckets of slower rules expire later, so an expired bucket may wait
+        # behind a live one until it is touched or pushed out by the size bound
+        while buckets:
+            oldest = next(iter(buckets))
+            if len(buckets) <= self.max_keys_per_shard and now < buckets[oldest][2]:
+                return
+            del buckets[oldest]
+
+    def __len__(self) -> int:
+        return sum(len(buckets) for _, buckets in self._shards)
+
+
+class SQLiteBackend(RateLimitBackend):
+    """Buckets in a SQLite file shared by every worker process on the host.
+
+    Each acquisition is one short ``BEGIN IMMEDIATE`` transaction; buckets
+    idle for longer than ``idle_ttl`` are purged every ``purge_every``
+    acquisitions.
+    """
+
+    blocking = True
+
+    def __init__(self, db_path: str, idle_ttl: float = 3600.0, purge_every: int = 10_000) -> None:
+        self.db_path = db_path
+        self.idle_ttl = idle_ttl
+        self.purge_every = purge_every
+        self._count = 0
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_buckets "
+            "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL) WITHOUT ROWID"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_rate_limit_updated ON rate_limit_buckets (updated)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def acquire(self, key: str, rate: float, burst: float, now: Optional[float] = None) -> float:
+        # Wall-clock time, as monotonic clocks are not comparable across processes
+        now = time.time() if now is None else now
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM rate_limit_buckets WHERE key = ?", (key,)).fetchone()
+            tokens = burst if row is None else min(burst, row[0] + max(0.0, now - row[1]) * rate)
+            if tokens >= 1.0:
+                tokens -= 1.0
+                wait = 0.0
+            else:
+                wait = (1.0 - tokens) / rate
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                (key, tokens, now),
+            )
+            self._count += 1
+            if self._count % self.purge_every == 0:
+                conn.execute("DELETE FROM rate_limit_buckets WHERE updated < ?", (now - self.idle_ttl,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def _client_ip(scope: dict) -> str:
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _bearer_key(scope: dict) -> Optional[str]:
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                # The signature segment identifies the token without verifying it
+                return token.rsplit(".", 1)[-1]
+    return None
+
+
+class RateLimitRule:
+    """One bucket per key produced by ``scope``: ``ip``, ``user`` or ``route``."""
+
+    def __init__(self, scope: str, rate: float, burst: float, paths: Sequence[str] = ()) -> None:
+        if scope not in SCOPES:
+            raise ValueError(f"Unknown rate limit scope: {scope}")
+        self.scope = scope
+        self.rate = rate
+        self.burst = burst
+        self.paths = tuple(paths)
+        self._key: Callable[[dict], Optional[str]] = getattr(self, f"_{scope}_key")
+
+    @classmethod
+    def parse(cls, scope: str, value: str, paths: Sequence[str] = ()) -> "RateLimitRule":
+        rate, burst = parse_rate(value)
+        return cls(scope, rate, burst, paths)
+
+    def _ip_key(self, scope: dict) -> Optional[str]:
+        return "ip:" + _client_ip(scope)
+
+    def _user_key(self, scope: dict) -> Optional[str]:
+        token = _bearer_key(scope)
+        return "user:" + token if token else None
+
+    def _route_key(self, scope: dict) -> Optional[str]:
+        method = scope["method"] if scope["type"] == "http" else "WEBSOCKET"
+        return f"route:{_client_ip(scope)}:{method}:{scope['path']}"
+
+    def key(self, scope: dict) -> Optional[str]:
+        if self.paths and not scope["path"].startswith(self.paths):
+            return None
+        return self._key(scope)
+
+
+def rules_from_env(environ: Optional[Dict[str, str]] = None) -> List[RateLimitRule]:
+    """Rules from ``RATE_LIMIT_IP``, ``RATE_LIMIT_USER`` and ``RATE_LIMIT_ROUTE``.
+
+    ``RATE_LIMIT_ROUTE_PATHS`` restricts the route rule to comma separated
+    path prefixes; an empty value disables a rule.
+    """
+    environ = os.environ if environ is None else environ
+    defaults = {"ip": "100/s:200", "user": "50/s:100", "route": "5/s:10"}
+    route_paths = [p.strip() for p in environ.get("RATE_LIMIT_ROUTE_PATHS", "/login,/register").split(",") if p.strip()]
+    rules = []
+    for scope in SCOPES:
+        value = environ.get(f"RATE_LIMIT_{scope.upper()}", defaults[scope])
+        if value:
+            rules.append(RateLimitRule.parse(scope, value, route_paths if scope == "route" else ()))
+    return rules
+
+
+def backend_from_env(environ: Optional[Dict[str, str]] = None) -> RateLimitBackend:
+    """``RATE_LIMIT_BACKEND`` is ``local`` (default) or ``sqlite:<path>``."""
+    environ = os.environ if environ is None else environ
+    spec = environ.get("RATE_LIMIT_BACKEND", "local")
+    if spec == "local":
+        return LocalBackend(max_keys=int(environ.get("RATE_LIMIT_MAX_KEYS", "1000000")))
+    if spec.startswith("sqlite:"):
+        return SQLiteBackend(spec[len("sqlite:"):])
+    raise ValueError(f"Unknown rate limit backend: {spec}")
+
+
+class RateLimitMiddleware:
+    """ASGI middleware rejecting requests that exceed any rule with 429.
+
+    WebSocket handshakes count like requests and are refused by closing them.
+    """
+
+    def __init__(
+        self,
+        app,
+        rules: Optional[Iterable[RateLimitRule]] = None,
+        backend: Optional[RateLimitBackend] = None,
+        enabled: bool = True,
+    ) -> None:
+        self.app = app
+        self.rules = list(rules_from_env() if rules is None else rules)
+        self.backend = backend or LocalBackend()
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] not in ("http", "websocket") or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+        if self.backend.blocking:
+            wait = await run_in_threadpool(self._acquire, scope)
+        else:
+            wait = self._acquire(scope)
+        if wait > 0:
+            if scope["type"] == "websocket":
+                await send({"type": "websocket.close", "code": 1008})
+            else:
+                await self._reject(send, wait)
+            return
+        await self.app(scope, receive, send)
+
+    def _acquire(self, scope) -> float:
+        wait = 0.0
+        for rule in self.rules:
+            key = rule.key(scope)
+            if key is not None:
+                wait = max(wait, self.backend.acquire(key, rule.rate, rule.burst))
+        return wait
+
+    @staticmethod
+    async def _reject(send, wait: float) -> None:
+        body = json.dumps({"detail": "Too many requests."}).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("ascii")),
+                    (b"retry-after", str(max(1, math.ceil(wait))).encode("ascii")),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,390 @@
+"""Response layer: fast JSON, negotiated compression, ETags and a TTL cache.
+
+* :class:`FastJSONResponse` renders with ``orjson`` when it is installed and
+  falls back to compact standard-library JSON.
+* :class:`CompressionMiddleware` compresses bodies of at least
+  ``minimum_size`` bytes with brotli (if the ``brotli`` package is
+  installed) or gzip, whichever the client prefers. Streamed responses such
+  as NDJSON are compressed chunk by chunk and flushed after every chunk, so
+  compression never delays a line. Images and Server-Sent Events are left
+  alone.
+* :class:`HTTPCacheMiddleware` sits outside compression. It gives every
+  complete ``GET`` response a strong ETag over the bytes actually sent, so
+  gzip and brotli variants get different tags. It answers matching
+  ``If-None-Match`` requests with ``304`` and keeps responses of configured
+  routes in a :class:`ResponseCache` for a TTL. The cache key is the path,
+  the query string, the negotiated encoding and a digest of the credentials,
+  so cached bodies are already compressed and never shared between users.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional speed-up
+    brotli = None
+
+DEFAULT_MINIMUM_SIZE = 1024
+DEFAULT_CACHE_BYTES = 32 * 1024 * 1024
+
+# Already compressed, or latency-sensitive streams proxies must not buffer
+EXCLUDED_CONTENT_TYPES = ("image/", "video/", "audio/", "text/event-stream", "application/zip", "application/gzip")
+
+# Headers whose values make a response specific to one client
+CREDENTIAL_HEADERS = (b"authorization", b"x-api-key", b"cookie")
+
+Headers = List[Tuple[bytes, bytes]]
+
+# Describe a body, so they are left out of 304 responses
+_BODY_HEADERS = (b"content-length", b"content-type", b"content-encoding")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialise to compact UTF-8 JSON."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), allow_nan=False, default=str).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _header(headers: Headers, name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key == name:
+            return value
+    return None
+
+
+def _set_header(headers: Headers, name: bytes, value: bytes) -> Headers:
+    return [(k, v) for k, v in headers if k != name] + [(name, value)]
+
+
+def _add_vary(headers: Headers, field: bytes) -> Headers:
+    vary = _header(headers, b"vary")
+    if vary is None:
+        return headers + [(b"vary", field)]
+    if field.lower() in [v.strip().lower() for v in vary.split(b",")]:
+        return headers
+    return _set_header(headers, b"vary", vary + b", " + field)
+
+
+def negotiate_encoding(accept_encoding: Optional[bytes]) -> Optional[str]:
+    """Pick ``br`` or ``gzip`` from an ``Accept-Encoding`` header, honouring q-values."""
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.decode("latin-1").split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip().lower()] = q
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    best, best_q = None, 0.0
+    for coding in candidates:
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class _Compressor:
+    """Incremental gzip/brotli compressor with deterministic output."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int) -> None:
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31 writes a gzip header with a zero mtime, so equal bodies
+            # compress to equal bytes and keep their ETag
+            self._gz = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        if self.encoding == "br":
+            out = self._br.process(data)
+            return out + self._br.flush() if flush else out
+        out = self._gz.compress(data)
+        return out + self._gz.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._br.process(data) + self._br.finish()
+        return self._gz.compress(data) + self._gz.flush(zlib.Z_FINISH)
+
+
+def compress(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 4) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    """Compress responses the client accepts, once they are worth it."""
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = DEFAULT_MINIMUM_SIZE,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        excluded_content_types: Sequence[str] = EXCLUDED_CONTENT_TYPES,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.excluded = tuple(excluded_content_types)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(_header(scope.get("headers", []), b"accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[dict] = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_compressed(message) -> None:
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                content_type = (_header(headers, b"content-type") or b"").decode("latin-1")
+                passthrough = (
+                    _header(headers, b"content-encoding") is not None
+                    or content_type.startswith(self.excluded)
+                    or message["status"] in (204, 304)
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if start is not None:
+                headers = _add_vary(list(start.get("headers", [])), b"Accept-Encoding")
+                if not more and len(body) < self.minimum_size:
+                    await send(dict(start, headers=headers))
+                    await send(message)
+                    passthrough = True
+                    return
+                headers = _set_header(headers, b"content-encoding", encoding.encode("ascii"))
+                if more:
+                    compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                    headers = [(k, v) for k, v in headers if k != b"content-length"]
+                    await send(dict(start, headers=headers))
+                    start = None
+                else:
+                    body = compress(body, encoding, self.gzip_level, self.brotli_quality)
+                    headers = _set_header(headers, b"content-length", str(len(body)).encode("ascii"))
+                    await send(dict(start, headers=headers))
+                    await send({"type": "http.response.body", "body": body})
+                    passthrough = True
+                    return
+            if more:
+                await send({"type": "http.response.body", "body": compressor.compress(body, flush=True), "more_body": True})
+            else:
+                await send({"type": "http.response.body", "body": compressor.finish(body)})
+
+        await self.app(scope, receive, send_compressed)
+
+
+class CachedResponse(NamedTuple):
+    status: int
+    headers: Headers
+    body: bytes
+    etag: bytes
+    expires: float
+
+
+class ResponseCache:
+    """LRU of complete responses bounded by total body size, with per-entry TTL."""
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple, now: Optional[float] = None) -> Optional[CachedResponse]:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires <= now:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Tuple, entry: CachedResponse) -> None:
+        if len(entry.body) > self.max_bytes // 4:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self.size += len(entry.body)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: Tuple) -> None:
+        self.size -= len(self._entries.pop(key).body)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def parse_cache_routes(value: Optional[str]) -> List[Tuple[str, float]]:
+    """Parse ``"/products=60,/catalog=300"`` into ``(path prefix, ttl seconds)`` pairs."""
+    routes = []
+    for item in (value or "").split(","):
+        prefix, _, ttl = item.strip().partition("=")
+        if prefix:
+            routes.append((prefix.strip(), float(ttl) if ttl.strip() else 60.0))
+    # Longest prefix first, so specific routes override general ones
+    return sorted(routes, key=lambda route: len(route[0]), reverse=True)
+
+
+def etag_for(body: bytes) -> bytes:
+    return b'"' + hashlib.blake2b(body, digest_size=16).hexdigest().encode("ascii") + b'"'
+
+
+def if_none_match(header: Optional[bytes], etag: bytes) -> bool:
+    if not header:
+        return False
+    if header.strip() == b"*":
+        return True
+    return any(tag.strip().lstrip(b"W/") == etag for tag in header.split(b","))
+
+
+class HTTPCacheMiddleware:
+    """Strong ETags, conditional ``GET`` and a TTL cache for configured routes."""
+
+    def __init__(
+        self,
+        app,
+        routes: Iterable[Tuple[str, float]] = (),
+        cache: Optional[ResponseCache] = None,
+    ) -> None:
+        self.app = app
+        self.routes = sorted(routes, key=lambda route: len(route[0]), reverse=True)
+        self.cache = cache if cache is not None else ResponseCache()
+
+    def _ttl(self, path: str) -> Optional[float]:
+        for prefix, ttl in self.routes:
+            if path.startswith(prefix):
+                return ttl if ttl > 0 else None
+        return None
+
+    @staticmethod
+    def _key(scope) -> Tuple:
+        headers = scope.get("headers", [])
+        credentials = hashlib.blake2b(digest_size=16)
+        for name in CREDENTIAL_HEADERS:
+            credentials.update(name + b"=" + (_header(headers, name) or b"") + b"\n")
+        return (
+            scope["path"],
+            scope.get("query_string", b""),
+            negotiate_encoding(_header(headers, b"accept-encoding")),
+            credentials.digest(),
+        )
+
+    @staticmethod
+    async def _send_entry(send, entry: CachedResponse, request_headers: Headers) -> None:
+        if if_none_match(_header(request_headers, b"if-none-match"), entry.etag):
+            headers = [(k, v) for k, v in entry.headers if k not in _BODY_HEADERS]
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send({"type": "http.response.start", "status": entry.status, "headers": entry.headers})
+        await send({"type": "http.response.body", "body": entry.body})
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        request_headers = scope.get("headers", [])
+        ttl = self._ttl(scope["path"])
+        key = self._key(scope) if ttl is not None else None
+        if key is not None:
+            entry = self.cache.get(key)
+            if entry is not None:
+                await self._send_entry(send, entry, request_headers)
+                return
+
+        start: Optional[dict] = None
+        passthrough = False
+
+        async def send_with_etag(message) -> None:
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                if message["status"] != 200:
+                    passthrough = True
+                    await send(message)
+                else:
+                    start = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+            if message.get("more_body", False):
+                # Streamed responses are neither tagged nor cached
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+            body = message.get("body", b"")
+            headers = list(start.get("headers", []))
+            etag = _header(headers, b"etag")
+            if etag is None:
+                etag = etag_for(body)
+                headers.append((b"etag", etag))
+            cache_control = (_header(headers, b"cache-control") or b"").lower()
+            entry = CachedResponse(200, headers, body, etag, time.monotonic() + (ttl or 0.0))
+            if key is not None and b"no-store" not in cache_control:
+                self.cache.put(key, entry)
+            await self._send_entry(send, entry, request_headers)
+
+        await self.app(scope, receive, send_with_etag)
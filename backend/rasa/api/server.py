@@ -0,0 +1,387 @@
+"""Production launcher for the API: a pre-forking uvicorn supervisor.
+
+The supervisor binds the listening socket once, optionally imports the app
+before forking (so workers share its memory copy-on-write and start in
+milliseconds), and keeps ``workers`` uvicorn processes serving that socket.
+
+* Worker count defaults to the CPUs this process may actually use: the
+  scheduler affinity mask, capped by the cgroup CPU quota (v1 or v2) so a
+  container limited to 2 CPUs on a 64-core host runs 2 workers, not 64.
+* uvloop and httptools are used when installed, with asyncio/h11 fallbacks.
+* Each worker exits after ``max_requests`` plus a random jitter of up to
+  ``max_requests_jitter`` requests, so slow leaks are recycled without all
+  workers restarting at once. Exited workers are replaced immediately.
+* ``SIGHUP`` starts a new generation of workers and only asks the old ones
+  to finish their in-flight requests and exit once the new ones accept
+  connections; the socket never closes, so reloads drop no connections.
+  ``SIGTTIN``/``SIGTTOU`` add or remove a worker; ``SIGTERM``/``SIGINT``
+  shut down gracefully.
+
+Run with ``python -m backend.rasa.api.server`` or
+``scripts/libexec/run/run.py``; POSIX only.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import math
+import os
+import random
+import select
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List, Optional, Set
+
+import uvicorn
+from uvicorn.importer import import_from_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_APP = "backend.rasa.api.main:app"
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+
+# ---------------------------------------------------------------------------
+# Sizing
+# ---------------------------------------------------------------------------
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_limit(root: str = CGROUP_ROOT) -> Optional[float]:
+    """CPUs allowed by the cgroup CPU quota, or ``None`` when unlimited."""
+    cpu_max = _read(os.path.join(root, "cpu.max"))
+    if cpu_max:
+        quota, _, period = cpu_max.partition(" ")
+        if quota != "max" and period:
+            return int(quota) / int(period)
+        return None
+    for directory in ("cpu", "cpu,cpuacct"):
+        quota = _read(os.path.join(root, directory, "cpu.cfs_quota_us"))
+        period = _read(os.path.join(root, directory, "cpu.cfs_period_us"))
+        if quota and period and int(quota) > 0:
+            return int(quota) / int(period)
+    return None
+
+
+def available_cpus(root: str = CGROUP_ROOT) -> int:
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    limit = cgroup_cpu_limit(root)
+    if limit is not None:
+        cpus = min(cpus, max(1, math.ceil(limit)))
+    return max(1, cpus)
+
+
+def default_workers(root: str = CGROUP_ROOT) -> int:
+    """``WEB_CONCURRENCY`` if set, otherwise one async worker per usable CPU."""
+    configured = os.getenv("WEB_CONCURRENCY")
+    return int(configured) if configured else available_cpus(root)
+
+
+def _available(module: str) -> bool:
+    try:
+        __import__(module)
+    except ImportError:
+        return False
+    return True
+
+
+def event_loop_impl() -> str:
+    return "uvloop" if _available("uvloop") else "asyncio"
+
+
+def http_impl() -> str:
+    return "httptools" if _available("httptools") else "h11"
+
+
+def max_requests_for_worker(max_requests: int, jitter: int, rng: Optional[random.Random] = None) -> Optional[int]:
+    """Request budget for one worker; ``None`` when recycling is disabled."""
+    if max_requests <= 0:
+        return None
+    return max_requests + (rng or random).randint(0, max(0, jitter))
+
+
+# ---------------------------------------------------------------------------
+# Workers
+# ---------------------------------------------------------------------------
+class _NotifyingServer(uvicorn.Server):
+    """uvicorn server that tells the supervisor once it accepts connections."""
+
+    def __init__(self, config: uvicorn.Config, ready_fd: int) -> None:
+        super().__init__(config)
+        self.ready_fd = ready_fd
+
+    async def startup(self, sockets=None) -> None:
+        await super().startup(sockets=sockets)
+        if self.started:
+            os.write(self.ready_fd, b"1")
+            os.close(self.ready_fd)
+
+
+class Supervisor:
+    """Pre-forks uvicorn workers sharing one listening socket."""
+
+    SIGNALS = (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU, signal.SIGCHLD)
+
+    def __init__(
+        self,
+        app: str = DEFAULT_APP,
+        host: str = "0.0.0.0",
+        port: int = 8000,
+        workers: Optional[int] = None,
+        preload: bool = True,
+        max_requests: int = 0,
+        max_requests_jitter: int = 0,
+        graceful_timeout: float = 30.0,
+        backlog: int = 2048,
+        keep_alive: int = 5,
+        log_level: str = "info",
+        access_log: bool = False,
+        loop: Optional[str] = None,
+        http: Optional[str] = None,
+    ) -> None:
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers or default_workers()
+        self.preload = preload
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.backlog = backlog
+        self.keep_alive = keep_alive
+        self.log_level = log_level
+        self.access_log = access_log
+        self.loop = loop or event_loop_impl()
+        self.http = http or http_impl()
+        self.socket: Optional[socket.socket] = None
+        self._app_object = None
+        self._children: Dict[int, int] = {}  # pid -> generation
+        self._ready_pipes: Dict[int, int] = {}  # read fd -> pid
+        self._ready: Set[int] = set()
+        self._retiring: Dict[int, float] = {}  # pid -> kill deadline
+        self._generation = 0
+        self._signals: List[int] = []
+        self._wakeup_r, self._wakeup_w = os.pipe()
+
+    # -- setup -------------------------------------------------------------
+    def bind(self) -> socket.socket:
+        family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(self.backlog)
+        sock.set_inheritable(True)
+        self.port = sock.getsockname()[1]
+        self.socket = sock
+        return sock
+
+    def _config(self) -> uvicorn.Config:
+        return uvicorn.Config(
+            self._app_object if self._app_object is not None else self.app,
+            loop=self.loop,
+            http=self.http,
+            # Bot replies are tiny; per-connection zlib state is not worth it
+            ws_per_message_deflate=False,
+            backlog=self.backlog,
+            timeout_keep_alive=self.keep_alive,
+            timeout_graceful_shutdown=self.graceful_timeout,
+            limit_max_requests=max_requests_for_worker(self.max_requests, self.max_requests_jitter),
+            log_level=self.log_level,
+            access_log=self.access_log,
+            lifespan="on",
+        )
+
+    # -- workers -----------------------------------------------------------
+    def spawn(self) -> int:
+        ready_r, ready_w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_r)
+            self._run_worker(ready_w)
+        os.close(ready_w)
+        self._children[pid] = self._generation
+        self._ready_pipes[ready_r] = pid
+        return pid
+
+    def _run_worker(self, ready_fd: int) -> None:
+        code = 0
+        try:
+            for signum in self.SIGNALS:
+                signal.signal(signum, signal.SIG_DFL)
+            for fd in [self._wakeup_r, self._wakeup_w, *self._ready_pipes]:
+                os.close(fd)
+            random.seed()
+            _NotifyingServer(self._config(), ready_fd).run(sockets=[self.socket])
+        except BaseException:
+            logger.exception("Worker %s crashed", os.getpid())
+            code = 1
+        finally:
+            os._exit(code)
+
+    def _current(self) -> List[int]:
+        return [pid for pid, gen in self._children.items() if gen == self._generation and pid not in self._retiring]
+
+    def _retire(self, pid: int) -> None:
+        if pid in self._children and pid not in self._retiring:
+            self._retiring[pid] = time.monotonic() + self.graceful_timeout + 5
+            self._kill(pid, signal.SIGTERM)
+
+    @staticmethod
+    def _kill(pid: int, signum: int) -> None:
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def _reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            self._children.pop(pid, None)
+            retired = self._retiring.pop(pid, None) is not None
+            self._ready.discard(pid)
+            if not retired and os.WIFEXITED(status) and os.WEXITSTATUS(status) != 0:
+                logger.warning("Worker %s exited with status %s", pid, os.WEXITSTATUS(status))
+
+    def _read_ready(self, fds: List[int]) -> None:
+        for fd in fds:
+            pid = self._ready_pipes.pop(fd)
+            if os.read(fd, 1):
+                self._ready.add(pid)
+            os.close(fd)
+
+    # -- control -----------------------------------------------------------
+    def _on_signal(self, signum, frame) -> None:
+        self._signals.append(signum)
+        os.write(self._wakeup_w, b"\0")
+
+    def reload(self) -> None:
+        """Start a fresh generation; the old one retires once it is serving."""
+        self._generation += 1
+        if not self.preload:
+            logger.info("Reloading: new workers will import %s", self.app)
+        for _ in range(self.workers):
+            self.spawn()
+
+    def _handle_signals(self) -> bool:
+        while self._signals:
+            signum = self._signals.pop(0)
+            if signum in (signal.SIGTERM, signal.SIGINT):
+                return False
+            if signum == signal.SIGHUP:
+                self.reload()
+            elif signum == signal.SIGTTIN:
+                self.workers += 1
+            elif signum == signal.SIGTTOU and self.workers > 1:
+                self.workers -= 1
+                current = self._current()
+                if len(current) > self.workers:
+                    self._retire(current[0])
+        return True
+
+    def _maintain(self) -> None:
+        current = self._current()
+        for _ in range(self.workers - len(current)):
+            self.spawn()
+        # Retire earlier generations once the whole current one is serving
+        if all(pid in self._ready for pid in self._current()):
+            for pid, generation in list(self._children.items()):
+                if generation < self._generation:
+                    self._retire(pid)
+        now = time.monotonic()
+        for pid, deadline in list(self._retiring.items()):
+            if now > deadline:
+                self._kill(pid, signal.SIGKILL)
+
+    def serve(self) -> None:
+        if self.socket is None:
+            self.bind()
+        if self.preload:
+            self._app_object = import_from_string(self.app)
+        for signum in self.SIGNALS:
+            signal.signal(signum, self._on_signal)
+        logger.info(
+            "Serving %s on %s:%s with %s workers (loop=%s, http=%s, preload=%s)",
+            self.app, self.host, self.port, self.workers, self.loop, self.http, self.preload,
+        )
+        try:
+            while self._handle_signals():
+                self._reap()
+                self._maintain()
+                readable, _, _ = select.select([self._wakeup_r] + list(self._ready_pipes), [], [], 1.0)
+                if self._wakeup_r in readable:
+                    os.read(self._wakeup_r, 1024)
+                    readable.remove(self._wakeup_r)
+                self._read_ready(readable)
+        finally:
+            self.shutdown()
+
+    def shutdown(self) -> None:
+        for pid in list(self._children):
+            self._retire(pid)
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self._children and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.05)
+        for pid in list(self._children):
+            self._kill(pid, signal.SIGKILL)
+        self._reap()
+        if self.socket is not None:
+            self.socket.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run the Customer Care API in production.")
+    parser.add_argument("--app", default=os.getenv("API_APP", DEFAULT_APP))
+    parser.add_argument("--host", default=os.getenv("API_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=None, help="default: usable CPUs or WEB_CONCURRENCY")
+    parser.add_argument("--no-preload", dest="preload", action="store_false", default=os.getenv("API_PRELOAD", "1") != "0",
+                        help="import the app in each worker, so SIGHUP also reloads code")
+    parser.add_argument("--max-requests", type=int, default=int(os.getenv("MAX_REQUESTS", "0")))
+    parser.add_argument("--max-requests-jitter", type=int, default=int(os.getenv("MAX_REQUESTS_JITTER", "0")))
+    parser.add_argument("--graceful-timeout", type=float, default=float(os.getenv("GRACEFUL_TIMEOUT", "30")))
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--keep-alive", type=int, default=int(os.getenv("KEEP_ALIVE", "5")))
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info"))
+    parser.add_argument("--access-log", action="store_true")
+    parser.add_argument("--loop", choices=["uvloop", "asyncio"], default=None, help="default: uvloop when installed")
+    parser.add_argument("--http", choices=["httptools", "h11"], default=None, help="default: httptools when installed")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s [%(process)d] %(levelname)s %(message)s")
+    Supervisor(
+        app=args.app,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        preload=args.preload,
+        max_requests=args.max_requests,
+        max_requests_jitter=args.max_requests_jitter,
+        graceful_timeout=args.graceful_timeout,
+        backlog=args.backlog,
+        keep_alive=args.keep_alive,
+        log_level=args.log_level,
+        access_log=args.access_log,
+        loop=args.loop,
+        http=args.http,
+    ).serve()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
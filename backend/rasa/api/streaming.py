@@ -0,0 +1,90 @@
+"""Relaying streamed bot replies to WebSocket and Server-Sent Events clients.
+
+Replies are pulled from Rasa one at a time and only after the client has
+accepted the previous one, so a slow client slows down reading from Rasa
+rather than growing a buffer in the API process. A client that does not
+accept a reply within ``send_timeout`` seconds is treated as stuck and
+disconnected with :class:`SlowConsumer`.
+
+Idle connections cost one suspended coroutine each: nothing is scheduled
+for a WebSocket until the client sends its next message. Serve with
+``--ws-per-message-deflate false``: bot replies are too small to gain from
+compression, and the zlib state would otherwise double the memory held by
+every idle connection (see ``benchmarks/bench_streaming.py``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict
+
+from .chat import RasaError, RasaOverloaded, RasaTimeout
+
+DEFAULT_SEND_TIMEOUT = 10.0
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # Keep reverse proxies such as nginx from buffering the stream
+    "X-Accel-Buffering": "no",
+}
+
+
+class SlowConsumer(Exception):
+    """Raised when a client does not accept a reply within the send timeout."""
+
+
+def error_status(exc: RasaError) -> int:
+    """HTTP status matching a gateway error, as used by ``/chat``."""
+    if isinstance(exc, RasaOverloaded):
+        return 503
+    if isinstance(exc, RasaTimeout):
+        return 504
+    return 502
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode("utf-8")
+
+
+async def relay(
+    replies: AsyncIterator[Dict[str, Any]],
+    send: Callable[[Dict[str, Any]], Awaitable[None]],
+    send_timeout: float = DEFAULT_SEND_TIMEOUT,
+) -> int:
+    """Send every reply through ``send`` as soon as it arrives.
+
+    Returns the number of replies sent. Raises :class:`SlowConsumer` when a
+    send does not complete in time; Rasa errors propagate unchanged.
+    """
+    count = 0
+    try:
+        async for reply in replies:
+            try:
+                await asyncio.wait_for(send(reply), send_timeout)
+            except asyncio.TimeoutError:
+                raise SlowConsumer(f"Client did not accept a reply within {send_timeout}s.")
+            count += 1
+    finally:
+        # Release the Rasa connection and concurrency slot right away
+        await replies.aclose()
+    return count
+
+
+async def sse_events(replies: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """Encode replies as ``message`` events, ending with ``done`` or ``error``.
+
+    The ASGI server applies backpressure by not resuming this generator
+    until the previous chunk has been written to the client.
+    """
+    count = 0
+    try:
+        async for reply in replies:
+            yield sse_event("message", reply)
+            count += 1
+    except RasaError as exc:
+        yield sse_event("error", {"status": error_status(exc), "detail": str(exc)})
+        return
+    finally:
+        await replies.aclose()
+    yield sse_event("done", {"count": count})
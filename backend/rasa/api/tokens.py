@@ -0,0 +1,228 @@
+"""HMAC-signed JSON Web Tokens with key rotation and a verified-token cache.
+
+Tokens are compact JWS strings (``header.payload.signature``) signed with
+HS256/384/512 using only the standard library. Each token carries the ``kid``
+of the key that signed it; :class:`KeyRing` signs with the newest key and
+still accepts tokens signed by the previous ones, so a secret can be rotated
+without logging everybody out.
+
+Verifying a token means decoding two base64 segments, computing an HMAC and
+parsing JSON claims. Clients send the same token on every request, so
+:class:`TokenManager` remembers the claims of tokens it has already verified
+in an LRU keyed by the token's SHA-256 digest. Entries never outlive the
+token's ``exp`` claim, and rotating keys clears the cache.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+_DIGESTS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+
+DEFAULT_CACHE_SIZE = 10_000
+
+
+class TokenError(Exception):
+    """Raised when a token is malformed, forged or expired."""
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def key_id(secret: str) -> str:
+    """Stable identifier of a secret that does not reveal it."""
+    return hashlib.sha256(secret.encode("utf-8")).hexdigest()[:12]
+
+
+class KeyRing:
+    """Signing secrets, newest first; all of them are accepted for verification."""
+
+    def __init__(self, values: Sequence[str]) -> None:
+        if not values:
+            raise ValueError("KeyRing needs at least one secret")
+        self._keys: "OrderedDict[str, bytes]" = OrderedDict(
+            (key_id(s), s.encode("utf-8")) for s in values
+        )
+
+    @classmethod
+    def from_env(cls) -> "KeyRing":
+        """Build from ``JWT_SECRET`` and the comma separated ``JWT_PREVIOUS_SECRETS``."""
+        current = os.getenv("JWT_SECRET")
+        if not current:
+            logger.warning("JWT_SECRET is not set; using a random secret, tokens will not survive a restart.")
+            current = secrets.token_urlsafe(32)
+        previous = [s.strip() for s in os.getenv("JWT_PREVIOUS_SECRETS", "").split(",") if s.strip()]
+        return cls([current] + previous)
+
+    @property
+    def current(self) -> Tuple[str, bytes]:
+        return next(iter(self._keys.items()))
+
+    def get(self, kid: Optional[str]) -> Optional[bytes]:
+        return self._keys.get(kid) if kid else None
+
+    def rotate(self, new_secret: str, keep: int = 1) -> None:
+        """Make ``new_secret`` the signing key, keeping ``keep`` previous keys."""
+        old = list(self._keys.items())[:keep]
+        self._keys = OrderedDict([(key_id(new_secret), new_secret.encode("utf-8"))] + old)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class VerifiedTokenCache:
+    """LRU of verified claims keyed by token digest and bounded by expiry."""
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: bytes, now: float) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            claims = self._entries.get(key)
+            if claims is None:
+                return None
+            if claims["exp"] <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return claims
+
+    def put(self, key: bytes, claims: Dict[str, Any]) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = claims
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class TokenManager:
+    """Issues and verifies access tokens.
+
+    Args:
+        keys: Signing keys; the first one signs new tokens.
+        algorithm: ``HS256``, ``HS384`` or ``HS512``.
+        expire_seconds: Lifetime of issued tokens.
+        cache_size: Verified tokens remembered; ``0`` disables the cache.
+        leeway: Seconds of clock skew tolerated when checking ``exp``.
+    """
+
+    def __init__(
+        self,
+        keys: KeyRing,
+        algorithm: str = "HS256",
+        expire_seconds: int = 3600,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        leeway: int = 0,
+    ) -> None:
+        if algorithm not in _DIGESTS:
+            raise ValueError(f"Unsupported JWT algorithm: {algorithm}")
+        self.keys = keys
+        self.algorithm = algorithm
+        self.expire_seconds = expire_seconds
+        self.leeway = leeway
+        self.cache = VerifiedTokenCache(cache_size)
+        self._digest = _DIGESTS[algorithm]
+
+    def _sign(self, signing_input: bytes, key: bytes) -> bytes:
+        return hmac.new(key, signing_input, self._digest).digest()
+
+    def issue(self, user: Dict[str, Any], now: Optional[float] = None) -> str:
+        now = int(time.time() if now is None else now)
+        kid, key = self.keys.current
+        header = {"alg": self.algorithm, "typ": "JWT", "kid": kid}
+        claims = {
+            "sub": user["id"],
+            "email": user["email"],
+            "name": user.get("name"),
+            "role": user.get("role", "user"),
+            "iat": now,
+            "exp": now + self.expire_seconds,
+        }
+        signing_input = (
+            _b64encode(json.dumps(header, separators=(",", ":")).encode("utf-8"))
+            + "."
+            + _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+        ).encode("ascii")
+        return signing_input.decode("ascii") + "." + _b64encode(self._sign(signing_input, key))
+
+    def _verify_uncached(self, token: str, now: float) -> Dict[str, Any]:
+        try:
+            header_b64, payload_b64, signature_b64 = token.split(".")
+            signing_input = f"{header_b64}.{payload_b64}".encode("ascii")
+            header = json.loads(_b64decode(header_b64))
+            signature = _b64decode(signature_b64)
+        except (ValueError, TypeError):
+            raise TokenError("Malformed token.")
+        if not isinstance(header, dict) or header.get("alg") != self.algorithm:
+            raise TokenError("Unexpected token algorithm.")
+        kid = header.get("kid")
+        key = self.keys.get(kid) if isinstance(kid, str) else None
+        if key is None:
+            raise TokenError("Unknown signing key.")
+        expected = self._sign(signing_input, key)
+        if not hmac.compare_digest(signature, expected):
+            raise TokenError("Invalid token signature.")
+        try:
+            claims = json.loads(_b64decode(payload_b64))
+        except (ValueError, TypeError):
+            raise TokenError("Malformed token.")
+        if not isinstance(claims, dict) or not isinstance(claims.get("exp"), (int, float)) or "sub" not in claims:
+            raise TokenError("Missing token claims.")
+        if claims["exp"] + self.leeway <= now:
+            raise TokenError("Token has expired.")
+        return claims
+
+    def verify(self, token: str, now: Optional[float] = None) -> Dict[str, Any]:
+        """Return the claims of ``token`` or raise :class:`TokenError`."""
+        now = time.time() if now is None else now
+        digest = hashlib.sha256(token.encode("utf-8")).digest()
+        claims = self.cache.get(digest, now - self.leeway)
+        if claims is not None:
+            return claims
+        claims = self._verify_uncached(token, now)
+        self.cache.put(digest, claims)
+        return claims
+
+    def rotate(self, new_secret: str, keep: int = 1) -> None:
+        """Sign with ``new_secret`` from now on; drops cached verifications."""
+        self.keys.rotate(new_secret, keep)
+        self.cache.clear()
+
+
+def bearer_token(authorization: Optional[str]) -> Optional[str]:
+    """Extract the token from an ``Authorization: Bearer`` header."""
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
+        raise TokenError("Expected a Bearer token.")
+    return token.strip()
+
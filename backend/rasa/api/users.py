@@ -0,0 +1,72 @@
+"""Local SQLite user store for the auth API."""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+
+class UserExistsError(Exception):
+    """Raised when registering an email address that is already taken."""
+
+
+class UserStore:
+    """Users keyed by a case-insensitive unique email address."""
+
+    def __init__(self, db_path: str) -> None:
+        self.db_path = db_path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS users (
+                    id TEXT PRIMARY KEY,
+                    email TEXT NOT NULL UNIQUE COLLATE NOCASE,
+                    name TEXT,
+                    password_hash TEXT NOT NULL,
+                    role TEXT NOT NULL DEFAULT 'user',
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread; FastAPI runs blocking calls in a threadpool
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def create(self, name: str, email: str, password_hash: str, role: str = "user") -> Dict[str, Any]:
+        user = {
+            "id": uuid.uuid4().hex,
+            "email": email,
+            "name": name,
+            "password_hash": password_hash,
+            "role": role,
+            "created_at": time.time(),
+        }
+        try:
+            with self._connection() as conn:
+                conn.execute(
+                    "INSERT INTO users (id, email, name, password_hash, role, created_at) "
+                    "VALUES (:id, :email, :name, :password_hash, :role, :created_at)",
+                    user,
+                )
+        except sqlite3.IntegrityError:
+            raise UserExistsError(email)
+        return user
+
+    def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute("SELECT * FROM users WHERE email = ?", (email,)).fetchone()
+        return dict(row) if row else None
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute("SELECT * FROM users WHERE id = ?", (user_id,)).fetchone()
+        return dict(row) if row else None
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Per-request cost of bearer token authentication.
+
+Measures ``TokenManager.verify`` with and without the verified-token cache,
+then the latency of ``GET /me`` without a token, with a token and the cache
+disabled, and with a token served from the cache. ``--tokens`` distinct
+tokens are cycled through so the cache sees a realistic working set.
+
+    python benchmarks/bench_auth.py --requests 5000 --tokens 1000
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+# The benchmark deliberately exceeds the default per-client limits
+os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+
+from backend.rasa.api import main  # noqa: E402
+from backend.rasa.api.tokens import KeyRing, TokenManager  # noqa: E402
+
+
+def make_tokens(manager, count):
+    return [
+        manager.issue({"id": f"user-{i}", "email": f"user{i}@example.com", "name": "Bench"})
+        for i in range(count)
+    ]
+
+
+def bench_verify(cache_size, count, requests):
+    manager = TokenManager(KeyRing(["bench-secret", "previous-secret"]), cache_size=cache_size)
+    tokens = make_tokens(manager, count)
+    start = time.perf_counter()
+    for i in range(requests):
+        manager.verify(tokens[i % count])
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+async def bench_me(tokens, requests):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        headers = [{"Authorization": f"Bearer {t}"} for t in tokens] or [{}]
+        start = time.perf_counter()
+        for i in range(requests):
+            response = await client.get("/me", headers=headers[i % len(headers)])
+            response.raise_for_status()
+        return (time.perf_counter() - start) / requests * 1e6
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--tokens", type=int, default=1000)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    print("TokenManager.verify")
+    for label, cache_size in (("uncached", 0), ("cached", args.tokens)):
+        print(f"  {label:<10} {bench_verify(cache_size, args.tokens, args.requests * 10):8.2f} us/token")
+
+    print("GET /me")
+    no_token = asyncio.run(bench_me([], args.requests))
+    print(f"  {'no token':<10} {no_token:8.1f} us/request")
+    for label, cache_size in (("uncached", 0), ("cached", args.tokens)):
+        main.tokens = TokenManager(KeyRing(["bench-secret"]), cache_size=cache_size)
+        elapsed = asyncio.run(bench_me(make_tokens(main.tokens, args.tokens), args.requests))
+        print(f"  {label:<10} {elapsed:8.1f} us/request ({elapsed - no_token:+.1f} us auth overhead)")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Conversation details tab: every row versus one server-side page.
+
+Builds ``--count`` synthetic conversations spread over ``--days`` days and
+times, for a range covering most of the data,
+
+* what the tab did before: a display row for every conversation in range
+  and a select box label for each of them,
+* a first query (filter and sort), a search (building the id indexes) and
+  another one, a later page of a memoized query, and decoding the first
+  chunk of the selected conversation.
+
+    python benchmarks/bench_browser.py --count 200000 --days 365
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from dashboard import browser  # noqa: E402
+from dashboard.columnar import open_table  # noqa: E402
+from dashboard.metrics import ConversationMetrics  # noqa: E402
+from dashboard.synthetic import learn_from_files, write_dataset  # noqa: E402
+from dashboard.visualization import CHUNK_SIZE, PAGE_SIZE  # noqa: E402
+
+SOURCE = os.path.join(ROOT, "backend", "rasa", "tests", "rasa_conversations.json")
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+
+def every_row(engine, first, last):
+    rows = engine.select(first, last)
+    details = engine.conversations.iloc[rows]
+    duration = details["duration"]
+    frame = pd.DataFrame({
+        "ID": np.arange(1, len(rows) + 1),
+        "User": details["user_id"].astype(object).to_numpy(),
+        "Time": details["time"].to_numpy(),
+        "Duration": np.where(duration < 60, duration.map("{:.1f} sec".format),
+                             (duration / 60).map("{:.1f} min".format)),
+        "Messages": details["num_user_messages"].to_numpy(),
+        "Rating": details["rating"].astype(object).where(details["rating"].notna(), "N/A").to_numpy(),
+    })
+    labels = [f"Conversation {x+1}" for x in range(len(rows))]
+    return frame, labels
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=200000)
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    model = learn_from_files([SOURCE])
+    start = datetime(2025, 1, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "conversations.json")
+        write_dataset(model, path, args.count, seed=0, start_date=start, days=args.days, workers=1)
+        table = open_table(path)
+        engine = ConversationMetrics(table)
+        tiers = [(table, engine)]
+        first, last = (start + timedelta(days=10)).date(), (start + timedelta(days=args.days - 10)).date()
+        print(f"{len(table)} conversations, {table.num_messages} messages, {args.days} days")
+
+        before, (frame, _) = timed(lambda: every_row(engine, first, last))
+        default, _ = timed(lambda: browser.query(tiers, first, last).page(0, PAGE_SIZE))
+        sort, results = timed(lambda: browser.query(tiers, first, last, sort="User", descending=True))
+        prefix = table.string("conversations", "user_id", 0)[:-2]
+        search, found = timed(lambda: browser.query(tiers, first, last, search=prefix))
+        again, _ = timed(lambda: browser.query(tiers, first, last, search=prefix[:-1]))
+        page, _ = timed(lambda: browser.query(tiers, first, last, sort="User", descending=True).page(100, PAGE_SIZE))
+        table_, _, row = results.locate(100 * PAGE_SIZE)
+        viewer, _ = timed(lambda: table_.conversation(row, 0, CHUNK_SIZE))
+
+    print(f"every row ({len(frame)}) + labels:   {before * 1e3:8.1f}ms")
+    print(f"first page, time order:        {default * 1e3:8.1f}ms")
+    print(f"sort by user, descending:      {sort * 1e3:8.1f}ms")
+    print(f"search {prefix!r} ({len(found)} hits): {search * 1e3:8.1f}ms")
+    print(f"search again, index built:     {again * 1e3:8.1f}ms")
+    print(f"page 101 of a memoized query:  {page * 1e3:8.1f}ms")
+    print(f"first chunk of a conversation: {viewer * 1e3:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Pooled keep-alive forwarding to Rasa versus a connection per message.
+
+Starts a stub Rasa REST webhook on localhost (optionally adding ``--delay``
+seconds of bot latency) and sends ``--messages`` messages at
+``--concurrency`` through :class:`RasaClient`, through the same client with
+keep-alive disabled (a new TCP connection per message, which is what
+``web-interface/server.js`` does today), and through a fresh client per
+message.
+
+    python benchmarks/bench_chat_proxy.py --messages 2000 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from backend.rasa.api.chat import WEBHOOK_PATH, RasaClient  # noqa: E402
+
+
+def serve_stub(delay, ready, connections):
+    """Minimal asyncio HTTP/1.1 server standing in for Rasa's webhook."""
+
+    async def handle(reader, writer):
+        with connections.get_lock():
+            connections.value += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                headers = dict(
+                    line.split(":", 1) for line in head.decode("latin-1").split("\r\n")[1:] if ":" in line
+                )
+                headers = {k.strip().lower(): v.strip() for k, v in headers.items()}
+                payload = json.loads(await reader.readexactly(int(headers.get("content-length", 0))))
+                if delay:
+                    await asyncio.sleep(delay)
+                body = json.dumps([{"recipient_id": payload["sender"], "text": "ok"}]).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(body)}\r\n\r\n".encode()
+                    + body
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0, backlog=1024)
+        ready.put(server.sockets[0].getsockname()[1])
+        await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+def start_stub(delay):
+    """Run the stub in its own process so it does not share our GIL."""
+    ready = multiprocessing.Queue()
+    connections = multiprocessing.Value("i", 0)
+    process = multiprocessing.Process(target=serve_stub, args=(delay, ready, connections), daemon=True)
+    process.start()
+    return process, ready.get(timeout=10), connections
+
+
+async def run(send, messages, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            await send(f"user-{i % 100}", "hello")
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(messages)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return messages / elapsed, latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.99)] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--delay", type=float, default=0.0)
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    process, port, connections = start_stub(args.delay)
+    url = f"http://127.0.0.1:{port}"
+
+    async def pooled():
+        rasa = RasaClient(url, max_concurrency=args.concurrency)
+        try:
+            return await run(rasa.send, args.messages, args.concurrency)
+        finally:
+            await rasa.aclose()
+
+    async def no_keepalive():
+        rasa = RasaClient(url, max_keepalive=0, max_concurrency=args.concurrency)
+        try:
+            return await run(rasa.send, args.messages, args.concurrency)
+        finally:
+            await rasa.aclose()
+
+    async def per_request():
+        async def send(sender, message):
+            async with httpx.AsyncClient(base_url=url) as client:
+                response = await client.post(WEBHOOK_PATH, json={"sender": sender, "message": message})
+                response.raise_for_status()
+                return response.json()
+
+        return await run(send, args.messages, args.concurrency)
+
+    print(f"{'client':<14} {'msg/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'connections':>12}")
+    for label, scenario in (("pooled", pooled), ("no keep-alive", no_keepalive), ("per-request", per_request)):
+        before = connections.value
+        rate, p50, p99 = asyncio.run(scenario())
+        print(f"{label:<14} {rate:>9.1f} {p50:>8.2f} {p99:>8.2f} {connections.value - before:>12}")
+    process.terminate()
+
+
+if __name__ == "__main__":
+    main()
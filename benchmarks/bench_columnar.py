@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Cold and warm load times of the columnar conversation cache.
+
+Writes ``--count`` synthetic conversations as an export and as a
+tracker-store dump, then times for each
+
+* parsing the JSON without the cache (what every process restart used to do),
+* the first ``open_table`` (parse, hash and write the ``.npy`` cache),
+* a warm ``open_table`` (stat, read the manifest and memory-map the columns),
+* a warm open plus a scan of every message timestamp column, and
+* a warm open after ``touch`` (same size, new mtime: the file is re-hashed).
+
+    python benchmarks/bench_columnar.py --count 100000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from dashboard.columnar import open_table  # noqa: E402
+from dashboard.data_loader import iter_conversation_data  # noqa: E402
+from dashboard.synthetic import learn_from_files, write_dataset  # noqa: E402
+
+SOURCE = os.path.join(ROOT, "backend", "rasa", "tests", "rasa_conversations.json")
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100000)
+    args = parser.parse_args()
+
+    model = learn_from_files([SOURCE])
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'format':>14} {'MB':>7} {'messages':>9} {'parse s':>8} {'build s':>8} "
+              f"{'warm ms':>8} {'scan ms':>8} {'touched s':>10} {'cache MB':>9}")
+        for fmt in ("conversations", "tracker"):
+            path = os.path.join(tmp, f"{fmt}.json")
+            size = write_dataset(model, path, args.count, seed=0, fmt=fmt, workers=1) / 1e6
+            parse, _ = timed(lambda: sum(1 for _ in iter_conversation_data(path)))
+            build, table = timed(lambda: open_table(path))
+            warm, table = timed(lambda: open_table(path))
+            scan, _ = timed(lambda: float(open_table(path).messages["timestamp"].max()))
+            os.utime(path)
+            touched, _ = timed(lambda: open_table(path))
+            cache_dir = path + ".columns"
+            cache_mb = sum(os.path.getsize(os.path.join(cache_dir, f)) for f in os.listdir(cache_dir)) / 1e6
+            print(f"{fmt:>14} {size:>7.1f} {table.num_messages:>9} {parse:>8.2f} {build:>8.2f} "
+                  f"{warm * 1e3:>8.1f} {scan * 1e3:>8.1f} {touched:>10.2f} {cache_mb:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
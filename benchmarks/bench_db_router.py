@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Throughput of routed order lookups as the number of store shards grows.
+
+A fixed set of orders is spread over 1, 2, 4, ... SQLite shard files. Client
+threads look up random orders of random stores for a fixed time, once with
+the store known (routed to one shard) and once with an unknown store (fanned
+out to every shard). Caches are disabled so every lookup reaches SQLite.
+
+    python benchmarks/bench_db_router.py --orders 200000 --threads 8
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend", "rasa"))
+
+from actions.db_router import DatabaseRouter  # noqa: E402
+
+
+def build_shards(directory, shard_count, orders):
+    shards = {}
+    for s in range(shard_count):
+        path = os.path.join(directory, f"store_{shard_count}_{s}.db")
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "CREATE TABLE SalesOrderHeader (SalesOrderID INTEGER PRIMARY KEY, OrderDate TEXT, "
+            "Status INTEGER, ShipDate TEXT, TotalDue REAL, ModifiedDate TEXT)"
+        )
+        conn.executemany(
+            "INSERT INTO SalesOrderHeader VALUES (?, '2024-01-01', 5, NULL, 10.0, '2024-01-01')",
+            ((order_id,) for order_id in range(s, orders, shard_count)),
+        )
+        conn.commit()
+        conn.close()
+        shards[f"store_{s}"] = path
+    return shards
+
+
+def run(router, shard_count, orders, threads, seconds, routed):
+    done = [0] * threads
+    stop = threading.Event()
+
+    def worker(i):
+        rng = random.Random(i)
+        while not stop.is_set():
+            order_id = rng.randrange(orders)
+            store = f"store_{order_id % shard_count}" if routed else None
+            assert router.find_order(order_id, store) is not None
+            done[i] += 1
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in pool:
+        t.join()
+    return sum(done) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=100000)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(f"{'shards':>6} {'routed ops/s':>14} {'fan-out ops/s':>15}")
+    with tempfile.TemporaryDirectory() as directory:
+        for shard_count in args.shards:
+            router = DatabaseRouter(
+                build_shards(directory, shard_count, args.orders), pool_size=args.pool_size, cache_ttl=0.0
+            )
+            for shard in router.shards.values():
+                shard.orders.maxsize = 0
+            try:
+                routed = run(router, shard_count, args.orders, args.threads, args.seconds, True)
+                fanned = run(router, shard_count, args.orders, args.threads, args.seconds, False)
+            finally:
+                router.close()
+            print(f"{shard_count:>6} {routed:>14.0f} {fanned:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
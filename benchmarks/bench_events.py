@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Sustained ingest rate of the conversation event store.
+
+Generates ``--events`` Rasa-style events as NDJSON and appends them
+
+* directly through ``EventStore.append_lines`` in batches of ``--batch``, and
+* end to end through ``POST /events`` on a single uvicorn worker (one core)
+  started in a subprocess, ``--per-request`` events per request, with an
+  ``Idempotency-Key`` on every request,
+
+then reports events per second and the latency of a sender/time-range read.
+
+    python benchmarks/bench_events.py --events 500000
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from backend.rasa.api.events import EventStore  # noqa: E402
+
+T0 = 1_749_945_600.0
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def make_lines(n, senders, seed=0):
+    rng = random.Random(seed)
+    kinds = ["user", "bot", "action", "slot"]
+    lines = []
+    for i in range(n):
+        kind = kinds[i % 4]
+        event = {
+            "event": kind,
+            "sender_id": f"user-{rng.randrange(senders)}",
+            # Spread over three days so several partitions are written
+            "timestamp": T0 + i * (3 * 86400.0 / n),
+        }
+        if kind in ("user", "bot"):
+            event["text"] = "Where is my order %d?" % rng.randrange(100000)
+        if kind == "user":
+            event["parse_data"] = {"intent": {"name": "check_order_status", "confidence": round(rng.random(), 3)}}
+        if kind == "action":
+            event["name"] = "action_check_order_status"
+        lines.append(json.dumps(event, separators=(",", ":")))
+    return lines
+
+
+def bench_store(lines, batch):
+    with tempfile.TemporaryDirectory() as root:
+        store = EventStore(root)
+        started = time.perf_counter()
+        for i in range(0, len(lines), batch):
+            store.append_lines(lines[i:i + batch])
+        elapsed = time.perf_counter() - started
+        started = time.perf_counter()
+        page = store.query(start=T0 + 86400, end=T0 + 2 * 86400, sender_id="user-7", limit=1000)
+        read_ms = (time.perf_counter() - started) * 1000
+        store.close()
+    return elapsed, len(page.events), read_ms
+
+
+def bench_http(lines, per_request):
+    port = free_port()
+    with tempfile.TemporaryDirectory() as root:
+        env = dict(os.environ, EVENT_STORE_DIR=root, RATE_LIMIT_ENABLED="0", JWT_SECRET="bench-events")
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "backend.rasa.api.main:app", "--port", str(port),
+             "--log-level", "warning", "--no-access-log", "--loop", "auto", "--http", "auto"],
+            cwd=ROOT, env=env,
+        )
+        try:
+            url = f"http://127.0.0.1:{port}"
+            with httpx.Client(base_url=url, timeout=60.0) as client:
+                for _ in range(200):
+                    try:
+                        client.get("/events", params={"limit": 1})
+                        break
+                    except httpx.HTTPError:
+                        time.sleep(0.05)
+                bodies = [
+                    ("\n".join(lines[i:i + per_request]) + "\n").encode("utf-8")
+                    for i in range(0, len(lines), per_request)
+                ]
+                headers = {"Content-Type": "application/x-ndjson"}
+                accepted = 0
+                started = time.perf_counter()
+                for n, body in enumerate(bodies):
+                    response = client.post("/events", content=body, headers=dict(headers, **{"Idempotency-Key": f"b{n}"}))
+                    accepted += response.json()["accepted"]
+                elapsed = time.perf_counter() - started
+                # Replaying the first request inserts nothing
+                replay = client.post("/events", content=bodies[0], headers=dict(headers, **{"Idempotency-Key": "b0"})).json()
+                started = time.perf_counter()
+                page = client.get(
+                    "/conversations/user-7/events", params={"start": T0 + 86400, "end": T0 + 2 * 86400}
+                ).json()
+                read_ms = (time.perf_counter() - started) * 1000
+        finally:
+            server.terminate()
+            server.wait()
+    return elapsed, accepted, replay, len(page["events"]), read_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=300_000)
+    parser.add_argument("--senders", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=5000)
+    parser.add_argument("--per-request", type=int, default=10_000)
+    args = parser.parse_args()
+
+    lines = make_lines(args.events, args.senders)
+    size_mb = sum(len(line) + 1 for line in lines) / 1e6
+    print(f"{args.events} events, {size_mb:.1f} MB of NDJSON, {args.senders} senders")
+
+    elapsed, found, read_ms = bench_store(lines, args.batch)
+    print(f"store.append_lines: {args.events / elapsed:>9.0f} events/s  "
+          f"(sender/day read: {found} events in {read_ms:.1f} ms)")
+
+    elapsed, accepted, replay, found, read_ms = bench_http(lines, args.per_request)
+    print(f"POST /events:       {accepted / elapsed:>9.0f} events/s  "
+          f"(replay: {replay['accepted']} accepted, {replay['duplicates']} duplicates; "
+          f"sender/day read: {found} events in {read_ms:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Live refresh cost: polling the log tail versus reloading the whole log.
+
+Writes an NDJSON log of ``--count`` synthetic conversations, opens a
+``LiveStore`` on it, then ``--polls`` times appends ``--delta``
+conversations and times
+
+* ``LiveStore.poll`` (read the tail, build the segment, update the rollup),
+* a full reload: rebuild the columnar table and its rollup from scratch,
+
+plus a poll when nothing was appended (one ``stat``).
+
+    python benchmarks/bench_live.py --count 200000 --delta 500
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from dashboard.columnar import open_table  # noqa: E402
+from dashboard.live import LiveStore  # noqa: E402
+from dashboard.rollups import DailyRollup  # noqa: E402
+from dashboard.synthetic import learn_from_files, write_dataset  # noqa: E402
+
+SOURCE = os.path.join(ROOT, "backend", "rasa", "tests", "rasa_conversations.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=200000)
+    parser.add_argument("--delta", type=int, default=500)
+    parser.add_argument("--polls", type=int, default=5)
+    args = parser.parse_args()
+
+    model = learn_from_files([SOURCE])
+    start = datetime(2025, 1, 1)
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "log.ndjson")
+        write_dataset(model, path, args.count, seed=0, ndjson=True, start_date=start, days=90, workers=1)
+        store = LiveStore(path)
+
+        poll_times, reload_times = [], []
+        for n in range(args.polls):
+            with open(path, "a") as f:
+                for i in range(args.delta):
+                    conv = model.generate(rng, args.count + n * args.delta + i, start.timestamp() + 90 * 86400)
+                    f.write(json.dumps(conv) + "\n")
+            started = time.perf_counter()
+            added = store.poll()
+            poll_times.append(time.perf_counter() - started)
+            assert added == args.delta
+
+            started = time.perf_counter()
+            DailyRollup.from_table(open_table(path, cache_dir=os.path.join(tmp, "reload"), rebuild=True))
+            reload_times.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        store.poll()
+        idle = time.perf_counter() - started
+
+    print(f"{len(store)} conversations after {args.polls} polls of {args.delta}, {len(store.segments)} segments")
+    print(f"poll with new lines:   {sum(poll_times) / len(poll_times) * 1e3:8.1f}ms")
+    print(f"full reload:           {sum(reload_times) / len(reload_times) * 1e3:8.1f}ms")
+    print(f"poll, nothing new:     {idle * 1e6:8.1f}us")
+
+
+if __name__ == "__main__":
+    main()
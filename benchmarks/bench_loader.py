@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Time and peak memory of the dashboard conversation loader.
+
+Writes ``--count`` synthetic conversations (learned from the recorded test
+conversations) as a ``{"conversations": [...]}`` export and as a tracker-store
+``events`` dump, then loads each file in a fresh subprocess
+
+* with ``json.load`` (``load_conversation_data(streaming=False)``),
+* with the incremental parser (``load_conversation_data()``), and
+* by only iterating ``iter_conversation_data`` without keeping the results,
+
+and reports wall time and the growth of peak RSS caused by the load.
+
+    python benchmarks/bench_loader.py --count 100000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from dashboard.synthetic import learn_from_files, write_dataset  # noqa: E402
+
+SOURCE = os.path.join(ROOT, "backend", "rasa", "tests", "rasa_conversations.json")
+
+CHILD = """
+import json, resource, sys, time
+sys.path.insert(0, sys.argv[1])
+from dashboard.data_loader import iter_conversation_data, load_conversation_data
+mode, path = sys.argv[2], sys.argv[3]
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+started = time.perf_counter()
+if mode == "iterate":
+    count = sum(1 for _ in iter_conversation_data(path))
+else:
+    count = len(load_conversation_data(custom_path=path, streaming=mode == "streaming"))
+elapsed = time.perf_counter() - started
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"count": count, "seconds": elapsed, "peak_mb": (after - before) / 1024}))
+"""
+
+
+def measure(mode, path):
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, ROOT, mode, path], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100000)
+    args = parser.parse_args()
+
+    model = learn_from_files([SOURCE])
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'format':>14} {'MB':>7} {'mode':>10} {'conversations':>14} {'seconds':>8} {'peak RSS +MB':>13}")
+        for fmt in ("conversations", "tracker"):
+            path = os.path.join(tmp, f"{fmt}.json")
+            size = write_dataset(model, path, args.count, seed=0, fmt=fmt, workers=1) / 1e6
+            for mode in ("json.load", "streaming", "iterate"):
+                result = measure(mode, path)
+                print(f"{fmt:>14} {size:>7.1f} {mode:>10} {result['count']:>14} "
+                      f"{result['seconds']:>8.2f} {result['peak_mb']:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
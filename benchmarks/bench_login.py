@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Login throughput and ``/me`` latency during a login burst.
+
+Registers one user, then fires concurrent ``/login`` requests while a second
+task polls ``/me`` and records its latency. The run is repeated with hashing
+inline on the event loop (``--workers 0``) and in the process pool, which
+shows how much the hash would otherwise stall unrelated requests.
+
+    python benchmarks/bench_login.py --logins 200 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+# The benchmark deliberately exceeds the default per-client limits
+os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+
+from backend.rasa.api import main  # noqa: E402
+from backend.rasa.api.passwords import PasswordHasher  # noqa: E402
+from backend.rasa.api.users import UserStore  # noqa: E402
+
+CREDENTIALS = {"email": "bench@example.com", "password": "correct horse battery staple"}
+
+
+async def run(workers, logins, concurrency, directory):
+    users = UserStore(os.path.join(directory, f"users_{workers}.db"))
+    # Every simulated client gets its own address, so only the global bound applies
+    hasher = PasswordHasher(workers=workers, max_per_client=logins, max_pending=concurrency)
+    main.app.dependency_overrides[main.get_user_store] = lambda: users
+    main.app.dependency_overrides[main.get_password_hasher] = lambda: hasher
+    transport = httpx.ASGITransport(app=main.app)
+    latencies = []
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.post("/register", json={"name": "Bench", **CREDENTIALS})
+            response.raise_for_status()
+            done = asyncio.Event()
+
+            async def poll_me():
+                while not done.is_set():
+                    start = time.perf_counter()
+                    await client.get("/me")
+                    latencies.append(time.perf_counter() - start)
+                    await asyncio.sleep(0.005)
+
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def login():
+                async with semaphore:
+                    response = await client.post("/login", json=CREDENTIALS)
+                    response.raise_for_status()
+
+            poller = asyncio.create_task(poll_me())
+            start = time.perf_counter()
+            await asyncio.gather(*(login() for _ in range(logins)))
+            elapsed = time.perf_counter() - start
+            done.set()
+            await poller
+    finally:
+        main.app.dependency_overrides.clear()
+        hasher.shutdown()
+    return logins / elapsed, len(latencies), statistics.median(latencies) * 1000, max(latencies) * 1000
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, max(1, (os.cpu_count() or 2) // 2)])
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    # Blocked polls show up as fewer /me samples and a high worst case
+    print(f"{'workers':>8} {'logins/s':>10} {'/me calls':>10} {'/me p50 ms':>11} {'/me max ms':>11}")
+    with tempfile.TemporaryDirectory() as directory:
+        for workers in args.workers:
+            rate, calls, p50, worst = asyncio.run(run(workers, args.logins, args.concurrency, directory))
+            print(f"{workers:>8} {rate:>10.1f} {calls:>10} {p50:>11.2f} {worst:>11.2f}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Overhead of the event-loop lag monitor and the blocking-call detector.
+
+Runs a loop-bound workload (many short tasks yielding to the loop) with the
+monitor off and on, and times sqlite3 queries and ``open()`` calls with the
+debug-mode detector off and on, from a worker thread (the normal case for
+sync handlers) and from the loop thread (where every call is flagged).
+
+    python benchmarks/bench_loopmonitor.py --tasks 20000
+"""
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from backend.rasa.api.loopmonitor import BlockingCallDetector, LoopMonitor  # noqa: E402
+
+
+async def loop_workload(tasks, monitor):
+    if monitor is not None:
+        monitor.start()
+    started = time.perf_counter()
+
+    async def task():
+        for _ in range(10):
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(task() for _ in range(tasks)))
+    elapsed = time.perf_counter() - started
+    if monitor is not None:
+        await monitor.stop()
+    return elapsed
+
+
+def io_workload(path, rounds):
+    conn = sqlite3.connect(os.path.join(path, "bench.db"))
+    started = time.perf_counter()
+    for _ in range(rounds):
+        conn.execute("SELECT 1").fetchone()
+        with open(os.path.join(path, "bench.txt"), "w"):
+            pass
+    conn.close()
+    return (time.perf_counter() - started) / rounds
+
+
+async def io_on_loop(path, rounds):
+    return io_workload(path, rounds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5000)
+    args = parser.parse_args()
+
+    off = asyncio.run(loop_workload(args.tasks, None))
+    on = asyncio.run(loop_workload(args.tasks, LoopMonitor(interval=0.1, block_threshold=0.25)))
+    print(f"{args.tasks} tasks x 10 switches: monitor off {off:.3f}s, on {on:.3f}s ({(on / off - 1) * 100:+.1f}%)")
+
+    with tempfile.TemporaryDirectory() as path:
+        baseline = io_workload(path, args.rounds)
+        detector = BlockingCallDetector().install()
+        try:
+            threaded = io_workload(path, args.rounds)
+            flagged = asyncio.run(io_on_loop(path, args.rounds))
+        finally:
+            detector.uninstall()
+    print(f"query + open() per round (us): detector off {baseline * 1e6:.1f}, "
+          f"on/worker thread {threaded * 1e6:.1f}, on/loop thread {flagged * 1e6:.1f}")
+    print(f"distinct blocking call sites flagged: {len(detector.snapshot())}")
+
+
+if __name__ == "__main__":
+    main()
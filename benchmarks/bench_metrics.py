@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Dashboard metrics: per-conversation Python loops versus the vectorized engine.
+
+Builds a tracker-store dump of ``--count`` synthetic conversations (about
+ten messages each with actions, so the default exceeds a million messages),
+opens it through the columnar cache and times one dashboard rerun:
+
+* loops: the former ``analytics_dashboard.py`` code over conversation dicts
+  (timestamp conversion and date filter, ``num_user_messages``, daily
+  ``Counter``, top user messages, top actions);
+* engine: ``metrics_for`` (built once per data version, timed separately)
+  followed by ``select``, ``summary``, ``daily_counts``,
+  ``top_user_messages`` and ``top_actions``.
+
+    python benchmarks/bench_metrics.py --count 250000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from dashboard.columnar import open_table  # noqa: E402
+from dashboard.metrics import metrics_for  # noqa: E402
+from dashboard.synthetic import learn_from_files, write_dataset  # noqa: E402
+
+SOURCE = os.path.join(ROOT, "backend", "rasa", "tests", "rasa_conversations.json")
+
+
+def loops(conversations, start_date, end_date):
+    for conv in conversations:
+        if "timestamp" in conv and not isinstance(conv["timestamp"], datetime):
+            conv["timestamp"] = datetime.fromtimestamp(conv["timestamp"])
+    filtered = [c for c in conversations if "timestamp" in c and start_date <= c["timestamp"].date() <= end_date]
+    for conv in filtered:
+        conv["num_user_messages"] = len([m for m in conv["messages"] if m.get("type") == "user"])
+    avg = sum(c["num_user_messages"] for c in filtered) / max(1, len(filtered))
+    days = Counter(c["timestamp"].date() for c in filtered)
+    texts = Counter(m["text"] for c in filtered for m in c["messages"] if m["type"] == "user").most_common(10)
+    actions = Counter(
+        m["action"] for c in filtered for m in c["messages"] if m["type"] == "action" and "action" in m
+    ).most_common(10)
+    return len(filtered), avg, days, texts, actions
+
+
+def engine_rerun(metrics, start_date, end_date):
+    mask = metrics.select(start_date, end_date)
+    return (metrics.summary(mask), metrics.daily_counts(mask), metrics.top_user_messages(mask),
+            metrics.top_actions(mask))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=250000)
+    parser.add_argument("--reruns", type=int, default=3)
+    args = parser.parse_args()
+
+    model = learn_from_files([SOURCE])
+    start = datetime(2025, 3, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "trackers.json")
+        write_dataset(model, path, args.count, seed=0, fmt="tracker", start_date=start, days=30)
+        table = open_table(path)
+        print(f"{len(table)} conversations, {table.num_messages} messages")
+        start_date, end_date = (start + timedelta(days=5)).date(), (start + timedelta(days=25)).date()
+
+        conversations = table.to_conversations()
+        started = time.perf_counter()
+        for _ in range(args.reruns):
+            expected = loops(conversations, start_date, end_date)
+        loop_time = (time.perf_counter() - started) / args.reruns
+        del conversations
+
+        started = time.perf_counter()
+        metrics = metrics_for(table)
+        build_time = time.perf_counter() - started
+        started = time.perf_counter()
+        for _ in range(args.reruns):
+            summary, _, texts, actions = engine_rerun(metrics, start_date, end_date)
+        engine_time = (time.perf_counter() - started) / args.reruns
+        assert summary["total"] == expected[0]
+        assert list(texts["Count"]) == [count for _, count in expected[3]]
+        assert list(actions["Count"]) == [count for _, count in expected[4]]
+
+    print(f"loops per rerun:        {loop_time:8.3f}s")
+    print(f"engine build (once):    {build_time:8.3f}s")
+    print(f"engine per rerun:       {engine_time:8.3f}s  ({loop_time / engine_time:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
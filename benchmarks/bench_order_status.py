@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Per-order cost of bulk order status lookups by batch size.
+
+Builds an AdventureWorks-style ``SalesOrderHeader`` with ``--orders`` rows
+and resolves batches of 1 to 10,000 random mixed-format references (ids,
+``SO`` numbers and ``PO`` numbers) with
+
+* ``per-order``: one query per reference, as ``ActionTrackOrder`` does;
+* ``IN``: ``fetch_orders`` with chunked ``IN (...)`` queries;
+* ``temp``: ``fetch_orders`` joining a temporary key table;
+* ``API``: ``POST /orders/status`` end to end (in-process ASGI client,
+  order cache disabled), including JSON encoding of the NDJSON stream.
+
+    python benchmarks/bench_order_status.py --orders 200000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from backend.rasa.actions.db_router import DatabaseRouter  # noqa: E402
+from backend.rasa.actions.order_lookup import (  # noqa: E402
+    KEY_COLUMNS,
+    ensure_lookup_indexes,
+    fetch_orders,
+    group_keys,
+    parse_order_key,
+)
+from backend.rasa.api import main as api  # noqa: E402
+
+FIRST_ID = 71774
+
+
+def build_db(path, orders):
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE SalesOrderHeader (SalesOrderID INTEGER PRIMARY KEY, OrderDate DATETIME NOT NULL, "
+        "DueDate DATETIME, ShipDate DATETIME, Status INTEGER NOT NULL, SalesOrderNumber TEXT UNIQUE NOT NULL, "
+        "PurchaseOrderNumber INTEGER NULL, CustomerID INTEGER, TotalDue INTEGER NOT NULL, ModifiedDate DATETIME)"
+    )
+    rng = random.Random(0)
+    conn.executemany(
+        "INSERT INTO SalesOrderHeader VALUES (?, '2008-06-01 00:00:00.000', '2008-06-13 00:00:00.000', "
+        "'2008-06-08 00:00:00.000', ?, ?, ?, ?, ?, '2008-06-08 00:00:00.000')",
+        (
+            (i, rng.choice([1, 2, 5]), f"SO{i}", f"PO{rng.randrange(10 ** 10)}", rng.randrange(30000), rng.random() * 5000)
+            for i in range(FIRST_ID, FIRST_ID + orders)
+        ),
+    )
+    conn.commit()
+    ensure_lookup_indexes(conn)
+    purchase_orders = [row[0] for row in conn.execute("SELECT PurchaseOrderNumber FROM SalesOrderHeader")]
+    conn.close()
+    return purchase_orders
+
+
+def make_batch(rng, size, orders, purchase_orders):
+    keys = []
+    for _ in range(size):
+        i = rng.randrange(orders)
+        kind = rng.random()
+        if kind < 0.5:
+            keys.append(FIRST_ID + i)
+        elif kind < 0.9:
+            keys.append(f"SO{FIRST_ID + i}")
+        else:
+            keys.append(purchase_orders[i])
+    return keys
+
+
+def per_order(conn, keys):
+    for key in keys:
+        kind, value = parse_order_key(key)
+        conn.execute(
+            f"SELECT SalesOrderID, OrderDate, Status, ShipDate, TotalDue FROM SalesOrderHeader "
+            f"WHERE [{KEY_COLUMNS[kind]}] = ?",
+            (value,),
+        ).fetchone()
+
+
+def bulk(conn, keys, threshold):
+    groups = group_keys(parse_order_key(key) for key in keys)
+    for kind, values in groups.items():
+        fetch_orders(conn, kind, values, temp_table_threshold=threshold)
+
+
+def timed(fn, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - started) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=200_000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 1000, 5000, 10000])
+    parser.add_argument("--budget", type=float, default=0.5, help="seconds spent per measurement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "orders.db")
+        purchase_orders = build_db(path, args.orders)
+        conn = sqlite3.connect(path)
+        router = DatabaseRouter({"default": path}, cache_ttl=0.0)
+        router.shards["default"].orders.maxsize = 0
+        api.app.dependency_overrides[api.get_order_router] = lambda: router
+        api.app.dependency_overrides[api.require_user] = lambda: {"id": "bench", "role": "agent"}
+        client = TestClient(api.app)
+        rng = random.Random(1)
+
+        print(f"{'batch':>6} {'per-order':>10} {'IN':>8} {'temp':>8} {'API':>8}   (microseconds per order)")
+        for size in args.sizes:
+            keys = make_batch(rng, size, args.orders, purchase_orders)
+            rounds = max(1, int(args.budget / max(size * 20e-6, 1e-4)))
+            results = [
+                timed(lambda: per_order(conn, keys), rounds),
+                timed(lambda: bulk(conn, keys, threshold=10 ** 9), rounds),
+                timed(lambda: bulk(conn, keys, threshold=0), rounds),
+                timed(lambda: client.post("/orders/status", json={"orders": keys}).content, rounds),
+            ]
+            print(f"{size:>6} " + " ".join(f"{r / size * 1e6:>8.1f}" for r in results[:1]) + "  "
+                  + " ".join(f"{r / size * 1e6:>8.1f}" for r in results[1:]))
+        router.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Overhead of the rate limiting middleware and memory under key churn.
+
+Calls a trivial ASGI app directly (no HTTP stack) with and without
+``RateLimitMiddleware`` so the difference is the limiter's own cost, using
+``--clients`` distinct client addresses. Then pushes ``--keys`` distinct keys
+through a ``LocalBackend`` bounded to ``--max-keys`` and reports how many
+buckets and how much memory remain.
+
+    python benchmarks/bench_ratelimit.py --requests 200000 --keys 2000000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from backend.rasa.api.ratelimit import LocalBackend, RateLimitMiddleware, RateLimitRule, SQLiteBackend  # noqa: E402
+
+
+async def endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def drive(app, requests, clients):
+    scopes = [
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/login",
+            "client": (f"10.0.{i // 256}.{i % 256}", 5000),
+            "headers": [(b"authorization", f"Bearer h.p.sig{i}".encode())],
+        }
+        for i in range(clients)
+    ]
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for i in range(requests):
+        await app(scopes[i % clients], receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument("--keys", type=int, default=1_000_000)
+    parser.add_argument("--max-keys", type=int, default=100_000)
+    args = parser.parse_args()
+
+    # Generous limits so every request takes the allow path
+    rules = [RateLimitRule.parse(scope, "1000000/s") for scope in ("ip", "user", "route")]
+    baseline = asyncio.run(drive(endpoint, args.requests, args.clients))
+    print(f"{'no middleware':<22} {baseline:8.2f} us/request")
+    with tempfile.TemporaryDirectory() as directory:
+        backends = [
+            ("local, 3 rules", LocalBackend()),
+            ("sqlite, 3 rules", SQLiteBackend(os.path.join(directory, "limits.db"))),
+        ]
+        for label, backend in backends:
+            requests = args.requests if isinstance(backend, LocalBackend) else args.requests // 20
+            elapsed = asyncio.run(drive(RateLimitMiddleware(endpoint, rules, backend), requests, args.clients))
+            print(f"{label:<22} {elapsed:8.2f} us/request ({elapsed - baseline:+.2f} us overhead)")
+            backend.close()
+
+    tracemalloc.start()
+    backend = LocalBackend(max_keys=args.max_keys)
+    start = time.perf_counter()
+    for i in range(args.keys):
+        backend.acquire(f"ip:{i}", 10.0, 20.0)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    print(
+        f"{args.keys} distinct keys: {len(backend)} buckets kept, "
+        f"{current / 1e6:.1f} MB current, {peak / 1e6:.1f} MB peak, {elapsed / args.keys * 1e6:.2f} us/acquire"
+    )
+
+
+if __name__ == "__main__":
+    main()
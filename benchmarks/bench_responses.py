@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Bytes on the wire and CPU per response of the API response layer.
+
+Drives the ASGI app in-process (no sockets, so only server-side CPU is
+measured) with catalog, product and event-page requests and reports:
+
+* serialisation CPU of the payloads with ``json.dumps`` (FastAPI's default
+  ``JSONResponse``) versus :func:`responses.dumps` (orjson when installed);
+* body size as identity, gzip and, when the ``brotli`` package is
+  installed, brotli;
+* CPU per request for a cache miss (cache disabled), a cache hit and a
+  conditional request answered with 304.
+
+    python benchmarks/bench_responses.py --rounds 200
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+os.environ.setdefault("JWT_SECRET", "bench-responses")
+
+from backend.rasa.api import main as api  # noqa: E402
+from backend.rasa.api import responses  # noqa: E402
+from backend.rasa.api.events import EventStore  # noqa: E402
+
+
+async def request(app, path, query=b"", headers=()):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query, "root_path": "",
+        "headers": [(b"host", b"bench")] + list(headers), "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    sent = {"status": None, "headers": [], "body": b""}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            sent["status"], sent["headers"] = message["status"], message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            sent["body"] += message.get("body", b"")
+
+    await app(scope, receive, send)
+    return sent
+
+
+def cpu_per_call(fn, rounds):
+    started = time.process_time()
+    for _ in range(rounds):
+        fn()
+    return (time.process_time() - started) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+    loop = asyncio.new_event_loop()
+    run = loop.run_until_complete
+
+    with tempfile.TemporaryDirectory() as root:
+        store = EventStore(root)
+        store.append(
+            {"event": "user" if i % 2 else "bot", "sender_id": f"user-{i % 50}", "timestamp": 1_749_945_600.0 + i,
+             "text": "Where is my order SO71774?", "parse_data": {"intent": {"name": "check_order_status", "confidence": 0.97}}}
+            for i in range(5000)
+        )
+        api.app.dependency_overrides[api.get_event_store] = lambda: store
+        targets = [
+            ("catalog", "/products", b"limit=300"),
+            ("product", "/products/680", b""),
+            ("categories", "/categories", b""),
+            ("events", "/events", b"limit=1000"),
+        ]
+
+        print("Serialisation CPU per payload (us)")
+        print(f"{'payload':>10} {'json.dumps':>11} {'responses.dumps':>16}")
+        for name, path, query in targets:
+            body = run(request(api.app, path, query, [(b"accept-encoding", b"identity")]))["body"]
+            payload = json.loads(body)
+            stdlib = cpu_per_call(lambda: json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode(), args.rounds)
+            fast = cpu_per_call(lambda: responses.dumps(payload), args.rounds)
+            print(f"{name:>10} {stdlib * 1e6:>11.1f} {fast * 1e6:>16.1f}")
+
+        encodings = ["identity", "gzip"] + (["br"] if responses.brotli is not None else [])
+        print("\nBytes on the wire")
+        print(f"{'payload':>10} " + " ".join(f"{e:>9}" for e in encodings))
+        for name, path, query in targets:
+            sizes = [len(run(request(api.app, path, query, [(b"accept-encoding", e.encode())]))["body"]) for e in encodings]
+            print(f"{name:>10} " + " ".join(f"{s:>9}" for s in sizes))
+
+        print("\nCPU per request with gzip (us)")
+        print(f"{'payload':>10} {'uncached':>9} {'cache hit':>10} {'304':>7}")
+        gzip_headers = [(b"accept-encoding", b"gzip")]
+        for name, path, query in targets:
+            cache_layer = api.app.middleware_stack  # built on the first request
+            while not isinstance(cache_layer, responses.HTTPCacheMiddleware):
+                cache_layer = cache_layer.app
+            saved = cache_layer.routes
+            cache_layer.routes = []
+            uncached = cpu_per_call(lambda: run(request(api.app, path, query, gzip_headers)), args.rounds)
+            cache_layer.routes = [(path, 3600.0)]
+            etag = dict(run(request(api.app, path, query, gzip_headers))["headers"])[b"etag"]
+            hit = cpu_per_call(lambda: run(request(api.app, path, query, gzip_headers)), args.rounds)
+            conditional = cpu_per_call(
+                lambda: run(request(api.app, path, query, gzip_headers + [(b"if-none-match", etag)])), args.rounds
+            )
+            cache_layer.routes = saved
+            print(f"{name:>10} {uncached * 1e6:>9.0f} {hit * 1e6:>10.0f} {conditional * 1e6:>7.0f}")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
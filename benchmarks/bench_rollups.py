@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Dashboard charts from daily rollups versus raw messages.
+
+Builds ``--count`` synthetic conversations spread over ``--days`` days and
+times
+
+* rollup build over the whole table and an incremental ``add_table`` of a
+  ``--delta`` sized batch (what arriving data costs),
+* one chart rerun (summary, conversations by day, top messages, top
+  actions) from the raw-message engine and from the rollup, for a range
+  covering most of the data.
+
+    python benchmarks/bench_rollups.py --count 200000 --days 365
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from dashboard.columnar import open_table, table_from_records  # noqa: E402
+from dashboard.metrics import ConversationMetrics  # noqa: E402
+from dashboard.rollups import DailyRollup  # noqa: E402
+from dashboard.synthetic import learn_from_files, write_dataset  # noqa: E402
+
+SOURCE = os.path.join(ROOT, "backend", "rasa", "tests", "rasa_conversations.json")
+
+
+def timed(fn, repeat=1):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - started) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=200000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--delta", type=int, default=1000)
+    parser.add_argument("--reruns", type=int, default=5)
+    args = parser.parse_args()
+
+    model = learn_from_files([SOURCE])
+    start = datetime(2025, 1, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "conversations.json")
+        write_dataset(model, path, args.count, seed=0, start_date=start, days=args.days, workers=1)
+        table = open_table(path)
+        print(f"{len(table)} conversations, {table.num_messages} messages, {args.days} days")
+
+        build, rollup = timed(lambda: DailyRollup.from_table(table))
+        rng, latest = random.Random(1), start.timestamp() + (args.days - 1) * 86400
+        delta = table_from_records(model.generate(rng, args.count + i, latest + rng.random() * 86400)
+                                   for i in range(args.delta))
+        add, _ = timed(lambda: rollup.add_table(delta))
+        engine = ConversationMetrics(table)
+        first, last = (start + timedelta(days=10)).date(), (start + timedelta(days=args.days - 10)).date()
+
+        def raw():
+            rows = engine.select(first, last)
+            return (engine.summary(rows), engine.daily_counts(rows), engine.top_user_messages(rows),
+                    engine.top_actions(rows))
+
+        def rolled():
+            return (rollup.summary(first, last), rollup.daily_counts(first, last),
+                    rollup.top_user_messages(first, last), rollup.top_actions(first, last))
+
+        raw_time, _ = timed(raw, args.reruns)
+        rollup_time, _ = timed(rolled, args.reruns)
+
+    print(f"rollup build:              {build:8.3f}s  ({len(rollup)} day rows)")
+    print(f"add {args.delta:>6} conversations:    {add * 1e3:8.1f}ms")
+    print(f"charts from raw messages:  {raw_time * 1e3:8.1f}ms")
+    print(f"charts from rollup:        {rollup_time * 1e3:8.1f}ms  ({raw_time / rollup_time:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Top-k over date ranges: exact daily counts versus per-day Space-Saving sketches.
+
+Builds a table of ``--count`` conversations over ``--days`` days whose user
+messages are drawn from a Zipf distribution over ``--distinct`` texts (the
+long tail of free-text utterances), then for the exact rollup and for
+sketches with ``--error`` compares
+
+* build time and the memory held by the per-day text counts,
+* top-10 query time over a 90-day range,
+* recall of the exact top 10 and the largest error of the reported counts.
+
+    python benchmarks/bench_sketches.py --count 500000 --distinct 2000000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from dashboard.columnar import ConversationTable, StringDictionary  # noqa: E402
+from dashboard.rollups import DailyRollup  # noqa: E402
+from dashboard.time_index import local_midnight  # noqa: E402
+
+START = date(2025, 1, 1)
+
+
+def make_table(count, per_conversation, distinct, days, seed=0):
+    rng = np.random.default_rng(seed)
+    n = count * per_conversation
+    missing = np.full(count, -1, dtype=np.int32)
+    nan = np.full(count, np.nan)
+    conversations = {
+        "conversation_id": missing, "user_id": missing, "comments": missing,
+        "timestamp": local_midnight(START) + rng.uniform(0, days * 86400, count),
+        "start": nan, "end": nan, "rating": nan,
+        "duration": rng.exponential(60, count),
+        "message_start": np.arange(count + 1, dtype=np.int64) * per_conversation,
+    }
+    texts = (rng.zipf(1.2, n) - 1) % distinct
+    messages = {
+        "conversation": np.repeat(np.arange(count, dtype=np.int32), per_conversation),
+        "type": np.zeros(n, dtype=np.int8),
+        "text": texts.astype(np.int32),
+        "action": np.full(n, -1, dtype=np.int32),
+        "intent": np.full(n, -1, dtype=np.int32),
+        "confidence": np.full(n, np.nan),
+        "timestamp": np.full(n, np.nan),
+    }
+    empty = StringDictionary.from_strings([])
+    strings = {
+        "conversation_id": empty, "user_id": empty, "comments": empty, "action": empty, "intent": empty,
+        "text": StringDictionary.from_strings([f"utterance {i}" for i in range(distinct)]),
+    }
+    return ConversationTable(conversations, messages, strings)
+
+
+def text_bytes(rollup):
+    counts = rollup.counts["text"]
+    if hasattr(counts, "sketches"):
+        arrays = sum(s.keys.nbytes + s.counts.nbytes + s.errors.nbytes for s in counts.sketches.values())
+        return arrays + sum(sys.getsizeof(name) for name in counts.names.values()) + sys.getsizeof(counts.names)
+    strings = counts.vocabulary.values
+    return (counts.keys.nbytes + counts.counts.nbytes + sum(sys.getsizeof(s) for s in strings)
+            + sys.getsizeof(counts.vocabulary.codes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=500000)
+    parser.add_argument("--per-conversation", type=int, default=4)
+    parser.add_argument("--distinct", type=int, default=2000000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--error", type=float, default=0.001)
+    args = parser.parse_args()
+
+    table = make_table(args.count, args.per_conversation, args.distinct, args.days)
+    first, last = START + timedelta(days=100), START + timedelta(days=189)
+    print(f"{table.num_messages} user messages, {args.distinct} possible texts, {args.days} days")
+    print(f"{'mode':>14} {'build s':>8} {'text MB':>8} {'top-10 ms':>10} {'recall':>7} {'max error':>10}")
+    exact_top = None
+    for label, error in (("exact", 0), (f"error={args.error}", args.error)):
+        started = time.perf_counter()
+        rollup = DailyRollup.from_table(table, error=error)
+        build = time.perf_counter() - started
+        started = time.perf_counter()
+        values, counts, _ = rollup.top("text", first, last, n=10)
+        query = time.perf_counter() - started
+        if exact_top is None:
+            exact_top = dict(zip(*rollup.top("text", first, last, n=args.distinct)[:2]))
+        expected = sorted(exact_top, key=exact_top.get, reverse=True)[:10]
+        recall = len(set(values) & set(expected)) / 10
+        worst = max(int(count) - exact_top[value] for value, count in zip(values, counts))
+        print(f"{label:>14} {build:>8.2f} {text_bytes(rollup) / 1e6:>8.1f} {query * 1e3:>10.1f} "
+              f"{recall:>7.0%} {worst:>10}")
+
+
+if __name__ == "__main__":
+    main()
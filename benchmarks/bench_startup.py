@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Startup and reload time of the production launcher.
+
+Launches ``backend/rasa/api/server.py`` in a subprocess for every
+combination of preload on/off, worker count and event loop/HTTP parser, and
+measures the time from ``exec`` until every worker answers ``GET /me`` (all
+workers are considered up once the supervisor's children all have a
+listening, serving uvicorn). It then sends ``SIGHUP`` while a client keeps
+requesting, and reports how long the old generation took to be replaced and
+whether any request failed during the reload (a GET that hits a kept-alive
+connection just as its old worker closes it is retried once, like HTTP
+clients do).
+
+    python benchmarks/bench_startup.py --workers 1 2 4 --rounds 3
+"""
+
+import argparse
+import itertools
+import logging
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from backend.rasa.api.server import event_loop_impl, http_impl  # noqa: E402
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def children(pid):
+    out = subprocess.run(["pgrep", "-P", str(pid)], capture_output=True, text=True).stdout
+    return set(out.split())
+
+
+def wait_serving(client, url, process, workers, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"launcher exited with {process.returncode}")
+        try:
+            if client.get(url).status_code == 200 and len(children(process.pid)) >= workers:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.005)
+    raise RuntimeError("launcher did not start in time")
+
+
+def get(client, url):
+    # A retiring worker closes its idle keep-alive connections; a request
+    # racing with that close is retried once, as HTTP clients do for
+    # idempotent requests on a reused connection
+    try:
+        return client.get(url).status_code
+    except (httpx.ReadError, httpx.RemoteProtocolError):
+        return client.get(url).status_code
+
+
+def run_once(workers, preload, loop, http):
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/me"
+    cmd = [
+        sys.executable, "-m", "backend.rasa.api.server", "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--loop", loop, "--http", http, "--log-level", "warning",
+    ]
+    if not preload:
+        cmd.append("--no-preload")
+    env = dict(os.environ, RATE_LIMIT_ENABLED="0", JWT_SECRET="bench-startup")
+    with httpx.Client(timeout=5.0) as client:
+        started = time.perf_counter()
+        process = subprocess.Popen(cmd, cwd=ROOT, env=env)
+        try:
+            wait_serving(client, url, process, workers)
+            startup = time.perf_counter() - started
+
+            failures = []
+            stop = threading.Event()
+
+            def hammer():
+                with httpx.Client(timeout=5.0) as c:
+                    while not stop.is_set():
+                        try:
+                            status = get(c, url)
+                        except httpx.HTTPError:
+                            status = None
+                        if status != 200:
+                            failures.append(1)
+
+            thread = threading.Thread(target=hammer)
+            thread.start()
+            before = children(process.pid)
+            started = time.perf_counter()
+            process.send_signal(signal.SIGHUP)
+            while children(process.pid) & before or len(children(process.pid)) < workers:
+                time.sleep(0.005)
+            reload = time.perf_counter() - started
+            stop.set()
+            thread.join()
+        finally:
+            process.send_signal(signal.SIGTERM)
+            process.wait(timeout=60)
+    return startup, reload, len(failures)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    loops = ["asyncio"] + (["uvloop"] if event_loop_impl() == "uvloop" else [])
+    https = ["h11"] + (["httptools"] if http_impl() == "httptools" else [])
+    print(f"{'workers':>7} {'preload':>7} {'loop':>8} {'http':>9} {'startup ms':>11} {'reload ms':>10} {'failed':>6}")
+    for workers, preload, loop, http in itertools.product(args.workers, [True, False], loops, https):
+        results = [run_once(workers, preload, loop, http) for _ in range(args.rounds)]
+        startup = statistics.median(r[0] for r in results) * 1000
+        reload = statistics.median(r[1] for r in results) * 1000
+        failed = sum(r[2] for r in results)
+        print(f"{workers:>7} {str(preload):>7} {loop:>8} {http:>9} {startup:>11.0f} {reload:>10.0f} {failed:>6}")
+
+
+if __name__ == "__main__":
+    main()
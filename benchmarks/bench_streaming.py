@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""Memory per idle chat WebSocket and time to first bot message.
+
+Starts a stub Rasa server that streams ``--replies`` replies ``--gap``
+seconds apart (as a multi-message action would) and the API under uvicorn,
+both in subprocesses. Then:
+
+* compares time-to-first-message and time-to-last-message of ``/chat``
+  (one REST round trip) with ``/chat/stream`` (SSE) and ``/chat/ws``;
+* opens ``--connections`` idle WebSockets in steps and reports the API
+  process' resident memory per connection.
+
+    python benchmarks/bench_streaming.py --connections 5000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import websockets
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+STUB = """
+import asyncio, json, sys
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+REPLIES, GAP = int(sys.argv[2]), float(sys.argv[3])
+
+async def webhook(request):
+    payload = await request.json()
+
+    async def replies():
+        for i in range(REPLIES):
+            await asyncio.sleep(GAP)
+            yield {"recipient_id": payload["sender"], "text": f"reply {i}"}
+
+    if request.query_params.get("stream") == "true":
+        async def lines():
+            async for reply in replies():
+                yield json.dumps(reply) + "\\n"
+        return StreamingResponse(lines(), media_type="application/json")
+    return JSONResponse([reply async for reply in replies()])
+
+app = Starlette(routes=[Route("/webhooks/rest/webhook", webhook, methods=["POST"])])
+uvicorn.run(app, host="127.0.0.1", port=int(sys.argv[1]), log_level="warning")
+"""
+
+
+def wait_for_port(port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Nothing listening on port {port}")
+
+
+def rss_kb(pid):
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+async def latency(api, transport, rounds):
+    firsts, lasts = [], []
+    async with httpx.AsyncClient(base_url=api, timeout=60) as client:
+        for _ in range(rounds):
+            start = time.perf_counter()
+            first = None
+            if transport == "rest":
+                (await client.post("/chat", json={"message": "hi"})).raise_for_status()
+            elif transport == "sse":
+                async with client.stream("POST", "/chat/stream", json={"message": "hi"}) as response:
+                    async for line in response.aiter_lines():
+                        if line == "event: message" and first is None:
+                            first = time.perf_counter() - start
+            else:
+                async with websockets.connect(api.replace("http", "ws") + "/chat/ws") as ws:
+                    start = time.perf_counter()
+                    await ws.send(json.dumps({"message": "hi"}))
+                    while True:
+                        frame = json.loads(await ws.recv())
+                        if frame["type"] == "message" and first is None:
+                            first = time.perf_counter() - start
+                        if frame["type"] != "message":
+                            break
+            last = time.perf_counter() - start
+            firsts.append(last if first is None else first)
+            lasts.append(last)
+    return sum(firsts) / rounds * 1000, sum(lasts) / rounds * 1000
+
+
+async def idle_connections(api, pid, total, step):
+    url = api.replace("http", "ws") + "/chat/ws"
+    baseline = rss_kb(pid)
+    sockets = []
+    print(f"{'connections':>12} {'RSS MB':>8} {'KB/conn':>8}")
+    print(f"{0:>12} {baseline / 1024:>8.1f} {'':>8}")
+    try:
+        while len(sockets) < total:
+            batch = min(step, total - len(sockets))
+            sockets += await asyncio.gather(
+                *(websockets.connect(url, ping_interval=None, max_queue=1) for _ in range(batch))
+            )
+            await asyncio.sleep(0.5)
+            rss = rss_kb(pid)
+            print(f"{len(sockets):>12} {rss / 1024:>8.1f} {(rss - baseline) / len(sockets):>8.1f}")
+    finally:
+        await asyncio.gather(*(ws.close() for ws in sockets), return_exceptions=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=2000)
+    parser.add_argument("--step", type=int, default=500)
+    parser.add_argument("--replies", type=int, default=3)
+    parser.add_argument("--gap", type=float, default=0.2)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--ws", default="websockets-sansio", help="uvicorn WebSocket implementation")
+    # Each compressed connection holds zlib state on both directions, which
+    # dominates idle memory; bot messages are too small to benefit
+    parser.add_argument("--deflate", action="store_true", help="enable permessage-deflate")
+    args = parser.parse_args()
+
+    stub_port, api_port = free_port(), free_port()
+    env = dict(
+        os.environ, RASA_URL=f"http://127.0.0.1:{stub_port}", RATE_LIMIT_ENABLED="0", PYTHONPATH=ROOT
+    )
+    stub = subprocess.Popen([sys.executable, "-c", STUB, str(stub_port), str(args.replies), str(args.gap)])
+    api = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.rasa.api.main:app", "--port", str(api_port),
+         "--log-level", "warning", "--ws", args.ws, "--backlog", "4096",
+         "--ws-per-message-deflate", str(args.deflate).lower()],
+        cwd=ROOT, env=env,
+    )
+    try:
+        wait_for_port(stub_port)
+        wait_for_port(api_port)
+        base = f"http://127.0.0.1:{api_port}"
+        print(f"{args.replies} replies, {args.gap * 1000:.0f} ms apart")
+        print(f"{'transport':<10} {'first ms':>9} {'last ms':>9}")
+        for transport in ("rest", "sse", "ws"):
+            first, last = asyncio.run(latency(base, transport, args.rounds))
+            print(f"{transport:<10} {first:>9.1f} {last:>9.1f}")
+        print()
+        asyncio.run(idle_connections(base, api.pid, args.connections, args.step))
+    finally:
+        api.terminate()
+        stub.terminate()
+        api.wait()
+        stub.wait()
+
+
+if __name__ == "__main__":
+    main()
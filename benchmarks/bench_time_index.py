@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Date-range filtering: timestamp scan versus the time-sorted index.
+
+For each size, random start timestamps over one year are filtered to a
+three-month range with
+
+* scan: the dashboards' former loop, ``datetime.fromtimestamp(ts).date()``
+  per conversation (skipped above ``--scan-limit``),
+* mask: a vectorized comparison over the float epoch column,
+* index: ``TimeIndex.dates`` (two binary searches, returns a view), first
+  call and memoized repeat.
+
+    python benchmarks/bench_time_index.py --sizes 10000,1000000,10000000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from dashboard.time_index import TimeIndex, local_midnight  # noqa: E402
+
+
+def timed(fn, repeat=1):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - started) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000,10000000")
+    parser.add_argument("--scan-limit", type=int, default=1000000)
+    args = parser.parse_args()
+
+    start, end = date(2025, 3, 10), date(2025, 6, 9)
+    lo, hi = local_midnight(start), local_midnight(end + timedelta(days=1))
+    print(f"{'conversations':>13} {'selected':>9} {'scan ms':>9} {'mask ms':>8} {'build ms':>9} "
+          f"{'index us':>9} {'memo us':>8}")
+    for size in map(int, args.sizes.split(",")):
+        epoch = local_midnight(date(2025, 1, 1)) + np.random.default_rng(0).uniform(0, 365 * 86400, size)
+        if size <= args.scan_limit:
+            values = epoch.tolist()
+            scan, _ = timed(lambda: [i for i, ts in enumerate(values)
+                                     if start <= datetime.fromtimestamp(ts).date() <= end])
+            scan = f"{scan * 1e3:9.1f}"
+        else:
+            scan = f"{'-':>9}"
+        mask, expected = timed(lambda: np.flatnonzero((epoch >= lo) & (epoch < hi)), repeat=5)
+        build, index = timed(lambda: TimeIndex(epoch))
+        first, rows = timed(lambda: index.dates(start, end))
+        memo, _ = timed(lambda: index.dates(start, end), repeat=100)
+        assert len(rows) == len(expected)
+        print(f"{size:>13} {len(rows):>9} {scan} {mask * 1e3:>8.1f} {build * 1e3:>9.0f} "
+              f"{first * 1e6:>9.1f} {memo * 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
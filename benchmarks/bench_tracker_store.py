@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Dashboard queries pushed down into a SQL tracker store versus loading it.
+
+Fills a SQLite tracker store (Rasa's ``events`` table) with ``--count``
+synthetic conversations over ``--days`` days, then times a dashboard
+refresh (summary, conversations by day, top messages, top actions) for a
+one-week range and for the whole range:
+
+* pushed down: ``SQLTrackerSource`` aggregate queries, with its indexes
+  (created after filling the store, as on an existing one),
+* loaded: streaming every tracker into a ``ConversationTable`` and
+  building the daily rollup from it, as a dump of the store would be read,
+
+and how long streaming the week's conversations into a table takes.
+
+    python benchmarks/bench_tracker_store.py --count 50000 --days 365
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from dashboard.columnar import table_from_records  # noqa: E402
+from dashboard.rollups import DailyRollup  # noqa: E402
+from dashboard.synthetic import learn_from_files, write_dataset  # noqa: E402
+from dashboard.tracker_store import INDEXES, SQLTrackerSource, insert_trackers, metadata  # noqa: E402
+
+SOURCE = os.path.join(ROOT, "backend", "rasa", "tests", "rasa_conversations.json")
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+
+def refresh(charts, first, last):
+    return (charts.summary(first, last), charts.daily_counts(first, last),
+            charts.top_user_messages(first, last), charts.top_actions(first, last))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=50000)
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    model = learn_from_files([SOURCE])
+    start = datetime(2025, 1, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        dump = os.path.join(tmp, "trackers.json")
+        write_dataset(model, dump, args.count, seed=0, fmt="tracker", start_date=start, days=args.days, workers=1)
+        url = f"sqlite:///{os.path.join(tmp, 'tracker.db')}"
+        engine = sa.create_engine(url)
+        metadata.create_all(engine)
+        # Index the filled table, as on an existing store
+        for index in INDEXES:
+            index.drop(engine)
+        with open(dump) as f, engine.begin() as connection:
+            num_events = insert_trackers(connection, json.load(f).items())
+        os.remove(dump)
+        index_time, source = timed(lambda: SQLTrackerSource(url, create=True))
+        print(f"{args.count} conversations, {num_events} events, {args.days} days")
+
+        everything = (start.date(), (start + timedelta(days=args.days)).date())
+        week = ((start + timedelta(days=100)).date(), (start + timedelta(days=106)).date())
+        results = []
+        for label, (first, last) in (("one week", week), ("all days", everything)):
+            pushed, _ = timed(lambda: refresh(source, first, last))
+            source.poll()
+            source._results.clear()
+            loaded, _ = timed(lambda: refresh(DailyRollup.from_table(
+                table_from_records(trackers=source.iter_trackers(*everything))), first, last))
+            results.append((label, pushed, loaded))
+        stream, table = timed(lambda: source.table(*week))
+
+    print(f"create indexes:              {index_time:8.3f}s")
+    for label, pushed, loaded in results:
+        print(f"{label}: pushed down      {pushed * 1e3:8.1f}ms")
+        print(f"{label}: load + rollup    {loaded * 1e3:8.1f}ms  ({loaded / pushed:.0f}x slower)")
+    print(f"stream one week's table:     {stream * 1e3:8.1f}ms  ({len(table)} conversations)")
+
+
+if __name__ == "__main__":
+    main()
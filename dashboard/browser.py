@@ -0,0 +1,172 @@
+"""Server-side paging, sorting and search of the conversations in a date range.
+
+A :func:`query` over the dashboard's ``(table, metrics)`` tiers returns
+:class:`Results`: the matching conversations as ``(tier, row)`` positions,
+in display order. Only the page on screen is turned into a DataFrame
+(:meth:`Results.page`) and only the conversation being viewed is decoded
+from the columns (:meth:`Results.locate` and ``ConversationTable.conversation``),
+so the browser never receives more than one page, however many
+conversations the range holds.
+
+ID/user search goes through the sorted id index of each tier
+(``ConversationMetrics.rows_with_prefix``), sorting through
+``ConversationMetrics.sort_key``. Results are memoized per query, so
+turning a page costs only that page.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Sort choices offered by the dashboard, to ``ConversationMetrics.conversations`` columns
+SORT_COLUMNS = {
+    "Time": "time",
+    "ID": "conversation_id",
+    "User": "user_id",
+    "Duration": "duration",
+    "Messages": "num_user_messages",
+    "Rating": "rating",
+}
+PAGE_COLUMNS = ["#", "ID", "User", "Time", "Duration", "Messages", "Rating"]
+STRING_SORTS = ("conversation_id", "user_id")
+
+_RESULTS = OrderedDict()
+MAX_RESULTS = 4
+
+
+class Results:
+    """Conversations matching a query, in display order.
+
+    Attributes:
+        tiers: The ``(table, metrics)`` tiers queried.
+        tier_of: Tier of each position.
+        rows: Row of each position in its tier's table.
+    """
+
+    def __init__(self, tiers, tier_of, rows):
+        self.tiers = tiers
+        self.tier_of = tier_of
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def num_pages(self, size):
+        return max(1, -(-len(self) // size))
+
+    def locate(self, position):
+        """``(table, metrics, row)`` of the conversation at ``position``."""
+        table, metrics = self.tiers[self.tier_of[position]]
+        return table, metrics, int(self.rows[position])
+
+    def page(self, number, size):
+        """Table rows for page ``number`` (from 0) of ``size`` conversations."""
+        positions = np.arange(number * size, min((number + 1) * size, len(self)))
+        parts = []
+        for tier in np.unique(self.tier_of[positions]).tolist():
+            mine = positions[self.tier_of[positions] == tier]
+            details = self.tiers[tier][1].conversations.iloc[self.rows[mine]]
+            parts.append(details.set_axis(mine))
+        if not parts:
+            return pd.DataFrame(columns=PAGE_COLUMNS)
+        details = pd.concat(parts).sort_index()
+        duration = details["duration"]
+        return pd.DataFrame(
+            {
+                "#": positions + 1,
+                "ID": details["conversation_id"].astype(object).to_numpy(),
+                "User": details["user_id"].astype(object).to_numpy(),
+                "Time": details["time"].to_numpy(),
+                "Duration": np.where(
+                    duration < 60,
+                    duration.map("{:.1f} sec".format),
+                    (duration / 60).map("{:.1f} min".format),
+                ),
+                "Messages": details["num_user_messages"].to_numpy(),
+                "Rating": details["rating"].astype(object).where(details["rating"].notna(), "N/A").to_numpy(),
+            }
+        )
+
+
+def _matching(metrics, rows, search):
+    """``rows`` whose conversation or user id starts with ``search``, order kept."""
+    match = np.zeros(len(metrics), dtype=bool)
+    for column in STRING_SORTS:
+        match[metrics.rows_with_prefix(column, search)] = True
+    return rows[match[rows]]
+
+
+def _string_keys(tiers, selected, column):
+    """Sort keys of the ``selected`` rows of each tier by a string column, comparable across tiers.
+
+    Each tier ranks its own values. Values of the largest tier get even keys
+    ``2 * rank``; values of the other tiers are placed between them with
+    binary searches, so only the small tiers' values are compared as strings.
+    """
+    metrics = [m for _, m in tiers]
+    if len(tiers) == 1:
+        return [metrics[0].sort_key(column)[selected[0]]]
+    names = [m.sorted_values(column) for m in metrics]
+    largest = max(range(len(tiers)), key=lambda t: len(names[t]))
+    base = names[largest]
+    others = np.unique(np.concatenate([n for t, n in enumerate(names) if t != largest] + [np.empty(0, dtype=object)]))
+    at = np.searchsorted(base, others)
+    equal = at < len(base)
+    equal[equal] = base[at[equal]] == others[equal]
+    # A value missing from the largest tier falls in the odd gap before its
+    # insertion point; several in one gap keep their order by a fraction
+    other_keys = np.where(equal, 2.0 * at, 2.0 * at - 1 + np.arange(len(others)) / (len(others) + 1))
+    keys = []
+    for t, m in enumerate(metrics):
+        ranks = m.sort_key(column)[selected[t]]
+        if t == largest:
+            keys.append(2 * ranks)
+            continue
+        value_keys = np.append(other_keys[np.searchsorted(others, names[t])], np.inf)
+        keys.append(value_keys[np.where(np.isinf(ranks), len(names[t]), ranks).astype(np.int64)])
+    return keys
+
+
+def query(tiers, start_date, end_date, search="", sort="Time", descending=False):
+    """Conversations of ``tiers`` started between the dates, optionally searched and sorted.
+
+    Args:
+        tiers: ``(table, metrics)`` pairs, as the dashboards load them
+        start_date, end_date: Inclusive local date range
+        search: Prefix of a conversation or user id; empty matches all
+        sort: Key of :data:`SORT_COLUMNS`
+        descending: Largest first; missing values stay last either way
+
+    Returns:
+        :class:`Results`, shared by identical queries on the same tiers.
+    """
+    search = search.strip()
+    key = (tuple(metrics for _, metrics in tiers), start_date, end_date, search, sort, descending)
+    results = _RESULTS.get(key)
+    if results is not None:
+        _RESULTS.move_to_end(key)
+        return results
+
+    # Each tier's rows in the range come back in time order
+    selected = [metrics.select(start_date, end_date) for _, metrics in tiers]
+    if search:
+        selected = [_matching(metrics, rows, search) for (_, metrics), rows in zip(tiers, selected)]
+    tier_of = np.repeat(np.arange(len(tiers)), [len(rows) for rows in selected])
+    rows = np.concatenate(selected) if selected else np.empty(0, dtype=np.int64)
+    if sort != "Time" or descending or len(tiers) > 1:
+        column = SORT_COLUMNS[sort]
+        if column in STRING_SORTS:
+            keys = _string_keys(tiers, selected, column)
+        else:
+            keys = [metrics.sort_key(column)[rows] for (_, metrics), rows in zip(tiers, selected)]
+        keys = np.concatenate(keys) if keys else np.empty(0)
+        if descending:
+            keys = np.where(np.isinf(keys), np.inf, -keys)
+        order = np.argsort(keys, kind="stable")
+        tier_of, rows = tier_of[order], rows[order]
+
+    results = _RESULTS[key] = Results(list(tiers), tier_of, rows)
+    while len(_RESULTS) > MAX_RESULTS:
+        _RESULTS.popitem(last=False)
+    return results
@@ -0,0 +1,527 @@
+"""Columnar form of a conversation dump, cached on disk next to the source.
+
+Parsing a multi-gigabyte dump takes minutes and ``st.cache_data`` only lasts
+as long as the Streamlit process. :func:`open_table` parses the source once
+(incrementally, see ``json_stream``), stores the result as NumPy ``.npy``
+files in ``<source>.columns/`` and memory-maps them on later loads, which
+takes milliseconds whatever the size of the dump.
+
+The cache is keyed by the source's size, modification time and BLAKE2b
+content hash. A changed size rebuilds it; a changed mtime with the same size
+(a copy or ``touch``) re-hashes the file and only rebuilds if the content
+differs. A build reads only the bytes the source had when it was stat'ed,
+and of an NDJSON log only its complete lines, so a log that is still being
+appended to can be followed from :attr:`ConversationTable.source_size`.
+
+A :class:`ConversationTable` holds one row per conversation and one row per
+message. Message rows are ordered by conversation, ``message_start`` gives
+each conversation's first row (CSR style). String columns are dictionary
+encoded: an int32 code per row (``-1`` for missing) into a
+:class:`StringDictionary` stored as UTF-8 bytes plus offsets.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .json_stream import NDJSON_SUFFIXES, complete_size, iter_records
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+CACHE_SUFFIX = ".columns"
+HASH_CHUNK = 1 << 20
+
+MESSAGE_TYPES = ("user", "bot", "action", "other")
+_TYPE_CODES = {name: code for code, name in enumerate(MESSAGE_TYPES)}
+
+CONVERSATION_COLUMNS = ("conversation_id", "user_id", "timestamp", "start", "end", "duration",
+                        "rating", "comments", "message_start")
+MESSAGE_COLUMNS = ("conversation", "type", "text", "action", "intent", "confidence", "timestamp")
+STRING_COLUMNS = {
+    ("conversations", "conversation_id"): "conversation_id",
+    ("conversations", "user_id"): "user_id",
+    ("conversations", "comments"): "comments",
+    ("messages", "text"): "text",
+    ("messages", "action"): "action",
+    ("messages", "intent"): "intent",
+}
+
+
+def to_epoch(value):
+    """Epoch seconds for a numeric or ISO-8601 timestamp, NaN if unusable."""
+    if isinstance(value, bool) or value is None:
+        return np.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        return np.nan
+
+
+class StringDictionary:
+    """Distinct strings of a column as UTF-8 bytes plus int64 offsets."""
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+        self._values = None
+
+    @classmethod
+    def from_strings(cls, strings):
+        encoded = [s.encode("utf-8") for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return cls(offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, code):
+        if self._values is not None:
+            return self._values[code]
+        return bytes(self.data[self.offsets[code]:self.offsets[code + 1]]).decode("utf-8")
+
+    def to_list(self):
+        """All strings, decoded once and kept."""
+        if self._values is None:
+            blob = self.data.tobytes()
+            bounds = self.offsets.tolist()
+            self._values = [blob[a:b].decode("utf-8") for a, b in zip(bounds, bounds[1:])]
+        return self._values
+
+
+def _float_column(values):
+    """float64 array of ``values``; non-numeric entries parse as timestamps or NaN."""
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.array([to_epoch(v) for v in values], dtype=np.float64)
+
+
+def _encode(values):
+    """Dictionary-encode strings: int32 codes (``-1`` for ``None``) and the dictionary."""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+    return codes.astype(np.int32), StringDictionary.from_strings(str(v) for v in uniques)
+
+
+class _Builder:
+    """Collects raw column values while records stream in; encodes them at the end."""
+
+    def __init__(self):
+        self.conversations = {name: [] for name in ("conversation_id", "user_id", "timestamp", "duration",
+                                                    "rating", "comments")}
+        self.message_start = [0]
+        self.messages = {name: [] for name in MESSAGE_COLUMNS}
+
+    def _end_conversation(self, conversation_id, user_id, timestamp, duration, feedback):
+        c = self.conversations
+        c["conversation_id"].append(conversation_id)
+        c["user_id"].append(user_id)
+        c["timestamp"].append(timestamp)
+        c["duration"].append(duration if isinstance(duration, (int, float)) and not isinstance(duration, bool)
+                             else None)
+        feedback = feedback if isinstance(feedback, dict) else {}
+        rating = feedback.get("rating")
+        c["rating"].append(rating if isinstance(rating, (int, float)) else None)
+        c["comments"].append(feedback.get("comments") or None)
+        self.message_start.append(len(self.messages["type"]))
+
+    def add_export(self, index, conv):
+        if not isinstance(conv, dict):
+            return
+        m = self.messages
+        conv_row = len(self.message_start) - 1
+        # Bound appends: this loop runs once per message of the dump
+        rows, types, texts, actions = m["conversation"].append, m["type"].append, m["text"].append, m["action"].append
+        intents, confidences, timestamps = m["intent"].append, m["confidence"].append, m["timestamp"].append
+        for msg in conv.get("messages") or []:
+            if not isinstance(msg, dict):
+                continue
+            get = msg.get
+            intent = get("intent")
+            if isinstance(intent, dict):
+                intent = intent.get("name")
+            rows(conv_row)
+            types(get("type") or get("role"))
+            text = get("text")
+            texts(get("content") if text is None else text)
+            actions(get("action"))
+            intents(intent)
+            confidences(get("confidence"))
+            timestamps(get("timestamp"))
+        user_id = conv.get("user_id", conv.get("sender_id"))
+        self._end_conversation(conv.get("conversation_id", user_id if user_id is not None else index), user_id,
+                               conv.get("timestamp"), conv.get("duration"), conv.get("feedback"))
+
+    def add_tracker(self, key, tracker):
+        m = self.messages
+        conv_row = len(self.message_start) - 1
+        for event in tracker.get("events") or []:
+            if not isinstance(event, dict):
+                continue
+            kind = event.get("event")
+            if kind == "user":
+                intent = (event.get("parse_data") or {}).get("intent") or {}
+                text, action = event.get("text", ""), None
+                name, confidence = intent.get("name"), intent.get("confidence")
+            elif kind == "bot":
+                text, action, name, confidence = event.get("text", ""), None, None, None
+            elif kind == "action":
+                # Action events carry their name as text, as in the dashboard loaders
+                text = action = event.get("name", "")
+                name = confidence = None
+            else:
+                continue
+            m["conversation"].append(conv_row)
+            m["type"].append(kind)
+            m["text"].append(text)
+            m["action"].append(action)
+            m["intent"].append(name)
+            m["confidence"].append(confidence)
+            m["timestamp"].append(event.get("timestamp"))
+        self._end_conversation(key, tracker.get("sender_id", "unknown"), tracker.get("latest_event_time"),
+                               tracker.get("duration"), tracker.get("feedback"))
+
+    def __len__(self):
+        return len(self.message_start) - 1
+
+    def table(self):
+        c, m = self.conversations, self.messages
+        strings = {}
+        messages = {
+            "conversation": np.array(m["conversation"], dtype=np.int32),
+            "type": np.array([_TYPE_CODES.get(t, _TYPE_CODES["other"]) for t in m["type"]], dtype=np.int8),
+            "confidence": _float_column([v if isinstance(v, (int, float)) else None for v in m["confidence"]]),
+            "timestamp": _float_column(m["timestamp"]),
+        }
+        for name in ("text", "action", "intent"):
+            messages[name], strings[name] = _encode(m[name])
+
+        bounds = np.array(self.message_start, dtype=np.int64)
+        start = np.full(len(self), np.nan)
+        end = np.full(len(self), np.nan)
+        times = messages["timestamp"]
+        has_messages = bounds[1:] > bounds[:-1]
+        if has_messages.any():
+            # NaN-aware per-conversation min/max over the message rows
+            lo = np.where(np.isnan(times), np.inf, times)
+            hi = np.where(np.isnan(times), -np.inf, times)
+            starts = bounds[:-1][has_messages]
+            start[has_messages] = np.minimum.reduceat(lo, starts)
+            end[has_messages] = np.maximum.reduceat(hi, starts)
+            start[np.isinf(start)] = np.nan
+            end[np.isinf(end)] = np.nan
+        duration = _float_column(c["duration"])
+        missing = np.isnan(duration)
+        duration[missing] = np.nan_to_num(end - start)[missing]
+
+        conversations = {
+            "timestamp": _float_column(c["timestamp"]),
+            "start": start,
+            "end": end,
+            "duration": duration,
+            "rating": _float_column(c["rating"]),
+            "message_start": bounds,
+        }
+        for name in ("conversation_id", "user_id", "comments"):
+            conversations[name], strings[name] = _encode(c[name])
+        return ConversationTable(conversations, messages, strings)
+
+
+class ConversationTable:
+    """Conversations and their messages as NumPy columns.
+
+    Attributes:
+        conversations: Column name to array, one row per conversation.
+        messages: Column name to array, one row per message.
+        strings: Dictionary name to :class:`StringDictionary`.
+        version: Content hash of the source, identifying this data version
+            (``None`` when built without :func:`open_table`).
+        source_size: Bytes of the source the table holds (``None`` when
+            built without :func:`open_table`).
+    """
+
+    def __init__(self, conversations, messages, strings, version=None):
+        self.conversations = conversations
+        self.messages = messages
+        self.strings = strings
+        self.version = version
+        self.source_size = None
+
+    def __len__(self):
+        return len(self.conversations["conversation_id"])
+
+    @property
+    def num_messages(self):
+        return len(self.messages["type"])
+
+    def string(self, table, column, row):
+        """Decoded value of a dictionary-encoded cell, ``None`` if missing."""
+        code = int(getattr(self, table)[column][row])
+        return None if code < 0 else self.strings[STRING_COLUMNS[(table, column)]][code]
+
+    def message_count(self, row):
+        bounds = self.conversations["message_start"]
+        return int(bounds[row + 1]) - int(bounds[row])
+
+    def _messages(self, row, start, stop):
+        m = self.messages
+        first = int(self.conversations["message_start"][row])
+        begin, end, _ = slice(start, stop).indices(self.message_count(row))
+        messages = []
+        for i in range(first + begin, first + max(begin, end)):
+            msg = {"type": MESSAGE_TYPES[m["type"][i]], "text": self.string("messages", "text", i) or ""}
+            for key in ("action", "intent"):
+                value = self.string("messages", key, i)
+                if value is not None:
+                    msg[key] = value
+            for key in ("confidence", "timestamp"):
+                value = float(m[key][i])
+                if value == value:
+                    msg[key] = value
+            messages.append(msg)
+        return messages
+
+    def conversation(self, row, start=0, stop=None):
+        """Rebuild one conversation as an export-style dict.
+
+        ``start``/``stop`` limit ``messages`` to that slice of the conversation,
+        so a viewer can decode a long history a chunk at a time.
+        """
+        return self._conversation_dict(row, self._messages(row, start, stop))
+
+    def _conversation_dict(self, row, messages):
+        c = self.conversations
+        conv = {
+            "conversation_id": self.string("conversations", "conversation_id", row),
+            "user_id": self.string("conversations", "user_id", row),
+            "messages": messages,
+            "duration": float(c["duration"][row]),
+        }
+        timestamp = float(c["timestamp"][row])
+        if timestamp != timestamp:
+            timestamp = float(c["start"][row])
+        if timestamp == timestamp:
+            conv["timestamp"] = timestamp
+        feedback = {}
+        rating = float(c["rating"][row])
+        if rating == rating:
+            feedback["rating"] = rating
+        comments = self.string("conversations", "comments", row)
+        if comments:
+            feedback["comments"] = comments
+        if feedback:
+            conv["feedback"] = feedback
+        return conv
+
+    def to_conversations(self):
+        """All conversations as export-style dicts (see :meth:`conversation`)."""
+        m = self.messages
+        types = [MESSAGE_TYPES[t] for t in m["type"].tolist()]
+        texts = self.strings["text"].to_list()
+        actions = self.strings["action"].to_list()
+        intents = self.strings["intent"].to_list()
+        text_codes, action_codes, intent_codes = m["text"].tolist(), m["action"].tolist(), m["intent"].tolist()
+        confidences, timestamps = m["confidence"].tolist(), m["timestamp"].tolist()
+        bounds = self.conversations["message_start"].tolist()
+        conversations = []
+        for row in range(len(self)):
+            messages = []
+            for i in range(bounds[row], bounds[row + 1]):
+                msg = {"type": types[i], "text": texts[text_codes[i]] if text_codes[i] >= 0 else ""}
+                if action_codes[i] >= 0:
+                    msg["action"] = actions[action_codes[i]]
+                if intent_codes[i] >= 0:
+                    msg["intent"] = intents[intent_codes[i]]
+                if confidences[i] == confidences[i]:
+                    msg["confidence"] = confidences[i]
+                if timestamps[i] == timestamps[i]:
+                    msg["timestamp"] = timestamps[i]
+                messages.append(msg)
+            conversations.append(self._conversation_dict(row, messages))
+        return conversations
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for table in ("conversations", "messages"):
+            for name, values in getattr(self, table).items():
+                np.save(os.path.join(directory, f"{table}.{name}.npy"), values)
+        for name, dictionary in self.strings.items():
+            np.save(os.path.join(directory, f"strings.{name}.offsets.npy"), dictionary.offsets)
+            np.save(os.path.join(directory, f"strings.{name}.data.npy"), dictionary.data)
+
+    @classmethod
+    def load(cls, directory, mmap=True, version=None):
+        def read(name):
+            path = os.path.join(directory, name + ".npy")
+            try:
+                return np.load(path, mmap_mode="r" if mmap else None)
+            except ValueError:
+                # Empty arrays cannot be memory-mapped
+                return np.load(path)
+
+        conversations = {name: read(f"conversations.{name}") for name in CONVERSATION_COLUMNS}
+        messages = {name: read(f"messages.{name}") for name in MESSAGE_COLUMNS}
+        strings = {
+            name: StringDictionary(read(f"strings.{name}.offsets"), read(f"strings.{name}.data"))
+            for name in set(STRING_COLUMNS.values())
+        }
+        return cls(conversations, messages, strings, version)
+
+
+def build_table(path, size=None):
+    """Parse the dump at ``path`` into a :class:`ConversationTable`.
+
+    Follows the dashboard loaders: a ``conversations`` array wins over
+    tracker entries, and a top-level list is read as export conversations.
+
+    Args:
+        size: Parse only the first ``size`` bytes of an uncompressed dump
+    """
+    export, trackers = _Builder(), _Builder()
+    seen_export = False
+    for kind, key, value in iter_records(path, size=size):
+        if kind == "conversation":
+            seen_export = True
+            if key is None:
+                for index, conv in enumerate(value if isinstance(value, list) else []):
+                    export.add_export(index, conv)
+            else:
+                export.add_export(key, value)
+        elif kind == "item":
+            export.add_export(key, value)
+        elif kind == "entry" and not seen_export and isinstance(value, dict) and "events" in value:
+            trackers.add_tracker(key, value)
+    return (export if seen_export or not len(trackers.conversations["user_id"]) else trackers).table()
+
+
+def table_from_records(conversations=(), trackers=()):
+    """Build a :class:`ConversationTable` from records already in memory.
+
+    Args:
+        conversations: Export-style conversation dicts
+        trackers: ``(sender_id, tracker)`` pairs of tracker-store dicts
+    """
+    builder = _Builder()
+    for index, conv in enumerate(conversations):
+        builder.add_export(index, conv)
+    for key, tracker in trackers:
+        builder.add_tracker(key, tracker)
+    return builder.table()
+
+
+def content_hash(path, size=None):
+    """Hash of ``path``, or of its first ``size`` bytes."""
+    digest = hashlib.blake2b(digest_size=20)
+    remaining = float("inf") if size is None else size
+    with open(path, "rb") as f:
+        while remaining > 0:
+            chunk = f.read(int(min(HASH_CHUNK, remaining)))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def cache_dir_for(path):
+    return os.path.abspath(path) + CACHE_SUFFIX
+
+
+def _read_manifest(directory):
+    try:
+        with open(os.path.join(directory, "manifest.json"), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(directory, manifest):
+    tmp = os.path.join(directory, f"manifest.json.{os.getpid()}")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, os.path.join(directory, "manifest.json"))
+
+
+def _fresh_manifest(directory, stat):
+    """The cache manifest if it matches the source; re-stamps it if only the mtime moved."""
+    manifest = _read_manifest(directory)
+    if not manifest or manifest.get("version") != FORMAT_VERSION or manifest.get("size") != stat.st_size:
+        return None
+    if manifest.get("mtime_ns") == stat.st_mtime_ns:
+        return manifest
+    if manifest.get("hash") != content_hash(manifest["source"], stat.st_size):
+        return None
+    manifest["mtime_ns"] = stat.st_mtime_ns
+    try:
+        _write_manifest(directory, manifest)
+    except OSError:
+        pass
+    return manifest
+
+
+def _store(table, directory, manifest):
+    """Write the cache to a sibling directory and swap it in."""
+    tmp = f"{directory}.tmp-{os.getpid()}"
+    old = f"{directory}.old-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    table.save(tmp)
+    _write_manifest(tmp, manifest)
+    if os.path.exists(directory):
+        # Processes that still map the old files keep reading them
+        os.rename(directory, old)
+    os.rename(tmp, directory)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def open_table(path, cache_dir=None, rebuild=False):
+    """Memory-mapped :class:`ConversationTable` for ``path``, building the cache if stale.
+
+    Args:
+        path: Conversation dump (any format ``json_stream`` reads).
+        cache_dir: Cache directory; defaults to ``<path>.columns``.
+        rebuild: Ignore an existing cache.
+
+    Raises:
+        OSError: The source cannot be read.
+        json.JSONDecodeError: The source is malformed.
+    """
+    path = os.path.abspath(path)
+    directory = cache_dir or cache_dir_for(path)
+    stat = os.stat(path)
+    manifest = None if rebuild else _fresh_manifest(directory, stat)
+    if manifest is not None:
+        try:
+            return _load(directory, manifest)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Rebuilding unreadable conversation cache {directory}: {e}")
+
+    # Appended data is left out, and so is the line a log writer is in the middle of
+    consumed = complete_size(path, stat.st_size) if path.endswith(NDJSON_SUFFIXES) else stat.st_size
+    manifest = {"version": FORMAT_VERSION, "source": path, "size": stat.st_size, "consumed": consumed,
+                "mtime_ns": stat.st_mtime_ns, "hash": content_hash(path, stat.st_size)}
+    table = build_table(path, consumed)
+    table.version, table.source_size = manifest["hash"], consumed
+    manifest.update(conversations=len(table), messages=table.num_messages)
+    try:
+        _store(table, directory, manifest)
+    except OSError as e:
+        logger.warning(f"Could not write conversation cache {directory}: {e}")
+        return table
+    return _load(directory, manifest)
+
+
+def _load(directory, manifest):
+    table = ConversationTable.load(directory, version=manifest["hash"])
+    table.source_size = manifest.get("consumed", manifest["size"])
+    return table
@@ -2,6 +2,7 @@ import streamlit as st
 from datetime import datetime, timedelta
 from . import data_loader
 from . import visualization
+from .browser import query
 
 st.set_page_config(
     page_title="Customer Care AI Analytics",
@@ -22,29 +23,15 @@ end_date = st.sidebar.date_input("End Date", today)
 if start_date > end_date:
     st.error("Error: End date must be after start date")
 
-conversations = data_loader.load_conversation_data()
-
-# Filter conversations by date range if timestamps are available
-if conversations:
-    def parse_timestamp(ts):
-        if isinstance(ts, (int, float)):
-            # Assume UNIX timestamp
-            return datetime.fromtimestamp(ts)
-        try:
-            return datetime.fromisoformat(str(ts))
-        except Exception:
-            return today  # fallback
-
-    filtered_conversations = [
-        conv for conv in conversations
-        if "timestamp" in conv and start_date <= parse_timestamp(conv["timestamp"]).date() <= end_date
-    ]
-else:
-    filtered_conversations = []
-
-visualization.show_conversation_table(filtered_conversations)
-visualization.show_conversation_viewer(filtered_conversations)
+# Filter conversations by date range: two binary searches over the index of
+# start timestamps, memoized per date range and data version; the table and
+# viewer then only build the page on screen and the selected conversation
+engine = data_loader.load_engine()
 
+controls = visualization.conversation_controls()
+results = engine.conversations(start_date, end_date, *controls) if engine else query([], start_date, end_date)
+positions = visualization.show_conversation_table(results)
+visualization.show_conversation_viewer(results, positions)
 
 
 st.sidebar.markdown("---")
@@ -3,7 +3,142 @@ import os
 import streamlit as st
 from datetime import datetime
 
-def load_conversation_data(custom_path=None):
+from .columnar import open_table
+from .engine import display_name, engine_for, is_database_url
+from .json_stream import NDJSON_SUFFIXES, iter_records
+
+
+def _tracker_conversation(tracker_data):
+    events = tracker_data.get("events", [])
+    sender_id = tracker_data.get("sender_id", "unknown")
+    messages = []
+    for event in events:
+        if event.get("event") == "user":
+            messages.append({
+                "type": "user",
+                "text": event.get("text", "")
+            })
+        elif event.get("event") == "bot":
+            messages.append({
+                "type": "bot",
+                "text": event.get("text", "")
+            })
+        elif event.get("event") == "action":
+            messages.append({
+                "type": "action",
+                "text": event.get("name", "")
+            })
+    return {
+        "user_id": sender_id,
+        "messages": messages,
+        "timestamp": tracker_data.get("latest_event_time", datetime.now()),
+        "duration": tracker_data.get("duration", 0),
+        "feedback": tracker_data.get("feedback", {}),
+    }
+
+
+def iter_conversation_data(path):
+    """Yield the conversations in ``path`` one at a time.
+
+    The file is parsed incrementally (see ``json_stream``), so peak memory is
+    one raw conversation or tracker rather than the whole document. Tracker
+    entries are converted the same way as by ``load_conversation_data``.
+    """
+    for kind, key, value in iter_records(path):
+        if kind == "conversation":
+            if key is None:
+                # "conversations" held something other than an array
+                if isinstance(value, list):
+                    yield from value
+            else:
+                yield value
+        elif kind == "entry" and isinstance(value, dict) and "events" in value:
+            yield _tracker_conversation(value)
+
+
+def _candidate_paths(custom_path=None):
+    possible_paths = [
+        custom_path,
+        os.environ.get("CONVERSATION_DATA_PATH"),
+        os.path.join(os.getcwd(), "data/rasa_conversations.json"),
+        os.path.join(os.getcwd(), "rasa_conversations.json"),
+        "/Users/umitarslan/customer-care-ai/backend/data/rasa_conversations.json",
+        os.path.expanduser("~/customer-care-ai/backend/data/rasa_conversations.json"),
+    ]
+    return [p for p in possible_paths if p]
+
+
+def _cache_enabled(cache):
+    if cache is None:
+        return os.environ.get("CONVERSATION_CACHE", "0") == "1"
+    return cache
+
+
+def load_conversation_table(custom_path=None):
+    """Load the conversation data as a memory-mapped ``ConversationTable``.
+
+    Paths are tried in the same order as ``load_conversation_data``. The
+    columnar cache next to the source is built on first use and rebuilt
+    whenever the source changes.
+
+    Returns:
+        ``ConversationTable``, or ``None`` if no source could be loaded
+    """
+    errors = []
+    for path in _candidate_paths(custom_path):
+        try:
+            table = open_table(path)
+            st.sidebar.success(f"✅ Loaded data from: {os.path.basename(path)}")
+            return table
+        except FileNotFoundError:
+            errors.append(f"File not found: {path}")
+        except json.JSONDecodeError:
+            errors.append(f"Invalid JSON in: {path}")
+        except Exception as e:
+            errors.append(f"Error loading {path}: {str(e)}")
+    st.sidebar.error("⚠️ Failed to load conversation data!")
+    for err in errors[:3]:
+        st.sidebar.error(err)
+    return None
+
+
+def load_engine(live=False, custom_path=None):
+    """Open the dashboard's data as an ``AnalyticsEngine`` (see ``dashboard/engine.py``).
+
+    The tracker store at ``TRACKER_STORE_URL`` is used when set (and no
+    ``custom_path`` is given); otherwise paths are tried in the same order
+    as ``load_conversation_data``, a directory being read file by file.
+    With ``live`` only uncompressed NDJSON logs and tracker stores can be
+    followed.
+
+    Returns:
+        ``AnalyticsEngine``, or ``None`` if no source could be opened
+    """
+    url = os.environ.get("TRACKER_STORE_URL")
+    sources = [url] if url and not custom_path else _candidate_paths(custom_path)
+    errors = []
+    for source in sources:
+        if live and not is_database_url(source) and not source.endswith(NDJSON_SUFFIXES):
+            errors.append(f"Not an NDJSON log: {source}")
+            continue
+        try:
+            engine = engine_for(source, live)
+        except FileNotFoundError:
+            errors.append(f"File not found: {source}")
+        except json.JSONDecodeError:
+            errors.append(f"Invalid JSON in: {source}")
+        except Exception as e:
+            errors.append(f"Error loading {display_name(source)}: {str(e)}")
+        else:
+            st.sidebar.success(f"✅ {'Following' if live else 'Loaded data from'}: {display_name(source)}")
+            return engine
+    st.sidebar.error("⚠️ Failed to load conversation data!")
+    for err in errors[:3]:
+        st.sidebar.error(err)
+    return None
+
+
+def load_conversation_data(custom_path=None, streaming=True, cache=None):
     """Load and process the conversation data.
 
     This function dynamically locates and loads conversation data using the following
@@ -15,23 +150,31 @@ def load_conversation_data(custom_path=None):
 
     Args:
         custom_path: Optional custom path to the conversation data file
+        streaming: Parse the file incrementally (see ``json_stream``) instead
+            of loading the whole document with ``json.load``
+        cache: Read conversations from the columnar cache next to the file
+            (see ``columnar``), building it if missing or stale. Faster, but
+            only the fields the dashboards use come back, with numeric
+            ratings and epoch timestamps. Defaults to the
+            ``CONVERSATION_CACHE`` environment variable (off unless ``1``)
 
     Returns:
-        List of conversation data dictionaries
+        List of conversation data dictionaries, as stored in the file unless
+        read from the cache
     """
-    possible_paths = [
-        custom_path,
-        os.environ.get("CONVERSATION_DATA_PATH"),
-        os.path.join(os.getcwd(), "data/rasa_conversations.json"),
-        os.path.join(os.getcwd(), "rasa_conversations.json"),
-        "/Users/umitarslan/customer-care-ai/backend/data/rasa_conversations.json",
-        os.path.expanduser("~/customer-care-ai/backend/data/rasa_conversations.json"),
-    ]
-    valid_paths = [p for p in possible_paths if p]
+    valid_paths = _candidate_paths(custom_path)
     data = None
     errors = []
     for path in valid_paths:
         try:
+            if _cache_enabled(cache):
+                conversations = open_table(path).to_conversations()
+                st.sidebar.success(f"✅ Loaded data from: {os.path.basename(path)}")
+                return conversations
+            if streaming:
+                conversations = list(iter_conversation_data(path))
+                st.sidebar.success(f"✅ Loaded data from: {os.path.basename(path)}")
+                return conversations
             with open(path, "r") as f:
                 data = json.load(f)
                 st.sidebar.success(f"✅ Loaded data from: {os.path.basename(path)}")
@@ -55,35 +198,9 @@ def load_conversation_data(custom_path=None):
     if isinstance(data, dict) and any(
         "events" in val for val in data.values() if isinstance(val, dict)
     ):
-        conversations = []
-        for tracker_id, tracker_data in data.items():
-            if not isinstance(tracker_data, dict) or "events" not in tracker_data:
-                continue
-            events = tracker_data.get("events", [])
-            sender_id = tracker_data.get("sender_id", "unknown")
-            messages = []
-            for event in events:
-                if event.get("event") == "user":
-                    messages.append({
-                        "type": "user",
-                        "text": event.get("text", "")
-                    })
-                elif event.get("event") == "bot":
-                    messages.append({
-                        "type": "bot",
-                        "text": event.get("text", "")
-                    })
-                elif event.get("event") == "action":
-                    messages.append({
-                        "type": "action",
-                        "text": event.get("name", "")
-                    })
-            conversations.append({
-                "user_id": sender_id,
-                "messages": messages,
-                "timestamp": tracker_data.get("latest_event_time", datetime.now()),
-                "duration": tracker_data.get("duration", 0),
-                "feedback": tracker_data.get("feedback", {}),
-            })
-        return conversations
+        return [
+            _tracker_conversation(tracker_data)
+            for tracker_data in data.values()
+            if isinstance(tracker_data, dict) and "events" in tracker_data
+        ]
     return []
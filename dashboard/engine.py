@@ -0,0 +1,315 @@
+"""Headless conversation analytics: the dashboard's numbers without Streamlit.
+
+:class:`AnalyticsEngine` opens conversation data and computes, for a date
+range, everything the dashboard shows: the key metrics, conversations per
+day, top user messages, actions and intents, the duration histogram and
+the conversation details table. The data can be
+
+* a conversation dump in any format ``json_stream`` reads,
+* a directory of dumps, read as one table per file,
+* an NDJSON log followed for appended conversations (``dashboard/live.py``),
+* a SQLAlchemy URL of a Rasa SQL tracker store (``dashboard/tracker_store.py``).
+
+:meth:`AnalyticsEngine.report` collects the numbers into a :class:`Report`
+that is written as JSON or as CSV files. Nightly jobs can precompute reports
+from the command line, and the Streamlit dashboards only render what the
+engine returns.
+
+Usage:
+    python -m dashboard.engine data/rasa_conversations.json --start 2025-06-01 --end 2025-06-30
+    python -m dashboard.engine data/ --days 7 --format csv --output reports/
+    python -m dashboard.engine sqlite:///tracker.db --conversations --output report.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import sqlalchemy as sa
+
+from .browser import SORT_COLUMNS, query
+from .columnar import open_table
+from .json_stream import NDJSON_SUFFIXES
+from .live import live_store_for
+from .metrics import ConversationMetrics, metrics_for
+from .rollups import DailyRollup, rollup_for, topk_error
+from .tracker_store import tracker_store_for
+
+DATA_SUFFIXES = tuple(suffix + gz for suffix in (".json",) + NDJSON_SUFFIXES for gz in ("", ".gz"))
+DEFAULT_DAYS = 30
+FORMATS = ("json", "csv")
+
+_ENGINES = OrderedDict()
+MAX_ENGINES = 2
+
+
+def is_database_url(source):
+    return "://" in source
+
+
+def display_name(source):
+    """File name of a dump, or a tracker store URL without its password."""
+    if is_database_url(source):
+        return sa.engine.make_url(source).render_as_string(hide_password=True)
+    return os.path.basename(os.path.normpath(source))
+
+
+def data_files(directory):
+    """Conversation dumps under ``directory``, sorted, skipping columnar caches."""
+    files = []
+    for root, dirs, names in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if not d.endswith(".columns"))
+        files += [os.path.join(root, name) for name in sorted(names) if name.endswith(DATA_SUFFIXES)]
+    return files
+
+
+class _Tables:
+    """Fixed tables, from a file or a directory, with one rollup over all of them."""
+
+    def __init__(self, tables):
+        tables = [table for table in tables if len(table)]
+        if len(tables) == 1:
+            # Shared with every other view of the same file
+            self._tiers = [(tables[0], metrics_for(tables[0]))]
+            self.rollup = rollup_for(tables[0])
+        else:
+            self._tiers = [(table, ConversationMetrics(table)) for table in tables]
+            self.rollup = DailyRollup(topk_error())
+            for table in tables:
+                self.rollup.add_table(table)
+
+    def __len__(self):
+        return sum(len(table) for table, _ in self._tiers)
+
+    def poll(self):
+        return 0
+
+    def tiers(self):
+        return self._tiers
+
+
+class AnalyticsEngine:
+    """Dashboard analytics over one data source.
+
+    Args:
+        source: Tables of a file or directory, a ``LiveStore`` or a
+            ``SQLTrackerSource``; see :meth:`open`
+    """
+
+    def __init__(self, source):
+        self.source = source
+
+    @classmethod
+    def open(cls, source, live=False):
+        """Engine for a dump, a directory of dumps or a tracker store URL.
+
+        Args:
+            source: Path or SQLAlchemy URL
+            live: Follow an NDJSON log for appended conversations
+
+        Raises:
+            FileNotFoundError: ``source`` is neither a file nor a directory.
+            ValueError: Live updates for something else than an NDJSON log.
+        """
+        if is_database_url(source):
+            return cls(tracker_store_for(source, create=os.environ.get("TRACKER_STORE_CREATE_INDEXES", "0") == "1"))
+        if live:
+            return cls(live_store_for(source))
+        if os.path.isdir(source):
+            return cls(_Tables([open_table(path) for path in data_files(source)]))
+        return cls(_Tables([open_table(source)]))
+
+    def __len__(self):
+        """Conversations in the whole source."""
+        return len(self.source)
+
+    def poll(self):
+        """Pick up new data of a live log or tracker store; returns how much arrived."""
+        return self.source.poll()
+
+    @property
+    def charts(self):
+        """Rollup answering the range aggregates (the tracker store answers them itself)."""
+        return getattr(self.source, "rollup", self.source)
+
+    def tiers(self, start_date, end_date):
+        """``(table, metrics)`` pairs holding at least the conversations of the range."""
+        if hasattr(self.source, "rollup"):
+            return self.source.tiers()
+        return self.source.tiers(start_date, end_date)
+
+    def summary(self, start_date, end_date):
+        """Key metrics of the range, with ``all_conversations`` in the source."""
+        return dict(self.charts.summary(start_date, end_date), all_conversations=len(self))
+
+    def daily_counts(self, start_date, end_date):
+        return self.charts.daily_counts(start_date, end_date)
+
+    def duration_histogram(self, start_date, end_date):
+        return self.charts.duration_histogram(start_date, end_date)
+
+    def top_user_messages(self, start_date, end_date, n=10):
+        return self.charts.top_user_messages(start_date, end_date, n)
+
+    def top_actions(self, start_date, end_date, n=10):
+        return self.charts.top_actions(start_date, end_date, n)
+
+    def top_intents(self, start_date, end_date, n=10):
+        return self.charts.top_intents(start_date, end_date, n)
+
+    def conversations(self, start_date, end_date, search="", sort="Time", descending=False):
+        """Conversations of the range as ``browser.Results``, for paging through."""
+        return query(self.tiers(start_date, end_date), start_date, end_date, search, sort, descending)
+
+    def report(self, start_date, end_date, n=10, conversations=False, **browse):
+        """Everything the dashboard shows for the range.
+
+        Args:
+            n: Rows of each top-k table
+            conversations: Include the conversation details table (one row
+                per conversation in range)
+            browse: ``search``/``sort``/``descending`` for that table
+        """
+        tables = OrderedDict([
+            ("daily_counts", self.daily_counts(start_date, end_date)),
+            ("top_user_messages", self.top_user_messages(start_date, end_date, n)),
+            ("top_actions", self.top_actions(start_date, end_date, n)),
+            ("top_intents", self.top_intents(start_date, end_date, n)),
+            ("duration_histogram", self.duration_histogram(start_date, end_date)),
+        ])
+        if conversations:
+            results = self.conversations(start_date, end_date, **browse)
+            tables["conversations"] = results.page(0, max(1, len(results)))
+        return Report(start_date, end_date, self.summary(start_date, end_date), tables)
+
+
+def engine_for(source, live=False):
+    """Engine for ``source``, reused while its data is unchanged.
+
+    Dumps are reopened on every call, which only checks their columnar
+    caches (see ``columnar.open_table``), and a changed file gets a new
+    engine. Live logs and tracker stores keep one engine; :meth:`~AnalyticsEngine.poll`
+    picks up their new data.
+    """
+    if is_database_url(source) or live:
+        key, tables = (source, live), None
+    else:
+        files = data_files(source) if os.path.isdir(source) else [source]
+        tables = [open_table(path) for path in files]
+        key = (source, tuple(table.version for table in tables))
+    engine = _ENGINES.get(key)
+    if engine is None:
+        engine = AnalyticsEngine.open(source, live) if tables is None else AnalyticsEngine(_Tables(tables))
+        _ENGINES[key] = engine
+        while len(_ENGINES) > MAX_ENGINES:
+            _ENGINES.popitem(last=False)
+    else:
+        _ENGINES.move_to_end(key)
+    return engine
+
+
+def _json_value(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (date, datetime, pd.Timestamp)):
+        return value.isoformat()
+    if value is pd.NaT:
+        return None
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+class Report:
+    """Numbers of one date range, as computed by :meth:`AnalyticsEngine.report`.
+
+    Attributes:
+        summary: Key metrics (``total``, ``avg_user_messages``, ``avg_duration``,
+            ``has_feedback``, ``all_conversations``).
+        tables: Name to DataFrame: the data behind each chart and table.
+    """
+
+    def __init__(self, start_date, end_date, summary, tables):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.summary = summary
+        self.tables = tables
+
+    def to_dict(self):
+        return {
+            "start_date": self.start_date.isoformat(),
+            "end_date": self.end_date.isoformat(),
+            "summary": self.summary,
+            "tables": {name: frame.astype(object).where(frame.notna(), None).to_dict("records")
+                       for name, frame in self.tables.items()},
+        }
+
+    def to_json(self, f):
+        json.dump(self.to_dict(), f, default=_json_value, indent=2)
+        f.write("\n")
+
+    def to_csv(self, directory):
+        """Write ``summary.csv`` and ``<table>.csv`` files; returns their paths."""
+        os.makedirs(directory, exist_ok=True)
+        summary = dict(start_date=self.start_date.isoformat(), end_date=self.end_date.isoformat(), **self.summary)
+        frames = OrderedDict([("summary", pd.DataFrame([summary]))])
+        frames.update(self.tables)
+        paths = []
+        for name, frame in frames.items():
+            path = os.path.join(directory, f"{name}.csv")
+            frame.to_csv(path, index=False)
+            paths.append(path)
+        return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="Conversation dump, directory of dumps or tracker store URL")
+    parser.add_argument("--start", type=date.fromisoformat, help="First day (default: --days days ending with --end)")
+    parser.add_argument("--end", type=date.fromisoformat, help="Last day (default: today)")
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS,
+                        help="Days in the range, including --end, when --start is not given")
+    parser.add_argument("--top", type=int, default=10, help="Rows of each top-k table")
+    parser.add_argument("--conversations", action="store_true", help="Include one row per conversation")
+    parser.add_argument("--search", default="", help="Conversation or user ID prefix for --conversations")
+    parser.add_argument("--sort", choices=list(SORT_COLUMNS), default="Time")
+    parser.add_argument("--descending", action="store_true")
+    parser.add_argument("--format", choices=FORMATS, default="json")
+    parser.add_argument("--output", "-o", help="JSON file (default: stdout) or CSV directory")
+    args = parser.parse_args(argv)
+    if args.format == "csv" and not args.output:
+        parser.error("--format csv needs --output DIRECTORY")
+    if args.days < 1:
+        parser.error("--days must be at least 1")
+
+    end = args.end or date.today()
+    start = args.start or end - timedelta(days=args.days - 1)
+    started = time.perf_counter()
+    try:
+        engine = AnalyticsEngine.open(args.source)
+    except (OSError, ValueError, sa.exc.SQLAlchemyError) as e:
+        # Database errors carry the statement; the driver's message is enough
+        parser.error(f"cannot read {display_name(args.source)}: {getattr(e, 'orig', None) or e}")
+    report = engine.report(start, end, n=args.top, conversations=args.conversations,
+                           search=args.search, sort=args.sort, descending=args.descending)
+    if args.format == "csv":
+        written = report.to_csv(args.output)
+    elif args.output:
+        with open(args.output, "w") as f:
+            report.to_json(f)
+        written = [args.output]
+    else:
+        report.to_json(sys.stdout)
+        written = []
+    print(f"{report.summary['total']} of {len(engine)} conversations from {start} to {end} "
+          f"in {time.perf_counter() - started:.1f}s" + (f": {', '.join(written)}" if written else ""),
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+"""Incremental reader for large conversation dumps.
+
+Tracker dumps run to gigabytes, so ``json.load`` (plus the converted copy
+built from it) does not fit in the dashboard container. :func:`iter_records`
+walks the top level of a document in ijson fashion and decodes one record at
+a time with the C decoder (``json.JSONDecoder.raw_decode``) from a sliding
+text buffer. Peak memory is one record plus the read buffer:
+
+* ``{"conversations": [conv, ...]}`` yields ``("conversation", index, conv)``
+  for every array element;
+* ``{"<tracker id>": {...tracker...}, ...}`` (TinyDB / Rasa tracker-store
+  layout) yields ``("entry", key, value)`` for every top-level member;
+* a top-level array yields ``("item", index, value)``.
+
+A ``"conversations"`` member that is not an array is yielded whole as
+``("conversation", None, value)``. Files ending in ``.ndjson`` or ``.jsonl``
+hold one record per line: trackers (records with ``events``) come out as
+``entry`` keyed by their ``sender_id``, everything else as ``conversation``.
+A last line that is neither terminated nor valid JSON is still being written
+to the log and ends the records. A ``.gz`` suffix is decompressed on the fly.
+"""
+
+import gzip
+import io
+import json
+
+CHUNK_SIZE = 1 << 18
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+
+_WHITESPACE = " \t\n\r"
+_NUMBER_CHARS = "0123456789.eE+-"
+# Longest token the decoder rejects at its start when it is cut off
+_MAX_PARTIAL_TOKEN = len("-Infinity")
+
+
+class _Reader:
+    """Text buffer over a file that decodes one JSON value at a time."""
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size):
+        if self.pos:
+            # Drop what was consumed so the buffer holds at most one record
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        chunk = self.f.read(size)
+        if chunk:
+            self.buf += chunk
+        else:
+            self.eof = True
+        return bool(chunk)
+
+    def peek(self):
+        """Next non-whitespace character, or ``""`` at the end of input."""
+        while True:
+            buf, pos = self.buf, self.pos
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill(self.chunk_size):
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise self._error(f"Expecting {char!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                # Only a value cut off by the end of the buffer is worth more
+                # input; anything else is malformed and more would not help.
+                # Read at least as much again so long records cost amortised
+                # linear time.
+                if (
+                    self.eof
+                    or not self._truncated(e)
+                    or not self._fill(max(self.chunk_size, len(self.buf) - self.pos))
+                ):
+                    raise
+                continue
+            # A number cut off by the end of the buffer decodes as its prefix
+            if (
+                not self.eof
+                and isinstance(value, (int, float))
+                and (end == len(self.buf) or self.buf[end] in _NUMBER_CHARS)
+                and self._fill(self.chunk_size)
+            ):
+                continue
+            self.pos = end
+            return value
+
+    def _truncated(self, error):
+        return (
+            error.msg.startswith("Unterminated string")
+            or len(self.buf) - error.pos < _MAX_PARTIAL_TOKEN
+        )
+
+    def _error(self, message):
+        return json.JSONDecodeError(message, self.buf, self.pos)
+
+
+def _iter_members(reader):
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.pos += 1
+        return
+    while True:
+        key = reader.value()
+        if not isinstance(key, str):
+            raise reader._error("Expecting property name enclosed in double quotes")
+        reader.expect(":")
+        yield key
+        separator = reader.peek()
+        reader.pos += 1
+        if separator == "}":
+            return
+        if separator != ",":
+            raise reader._error("Expecting ',' delimiter")
+
+
+def _iter_elements(reader):
+    reader.expect("[")
+    if reader.peek() == "]":
+        reader.pos += 1
+        return
+    index = 0
+    while True:
+        yield index, reader.value()
+        index += 1
+        separator = reader.peek()
+        reader.pos += 1
+        if separator == "]":
+            return
+        if separator != ",":
+            raise reader._error("Expecting ',' delimiter")
+
+
+def _iter_document(f, chunk_size):
+    reader = _Reader(f, chunk_size)
+    first = reader.peek()
+    if first == "[":
+        for index, value in _iter_elements(reader):
+            yield "item", index, value
+    elif first == "{":
+        for key in _iter_members(reader):
+            if key == "conversations":
+                if reader.peek() == "[":
+                    for index, conv in _iter_elements(reader):
+                        yield "conversation", index, conv
+                else:
+                    yield "conversation", None, reader.value()
+            else:
+                yield "entry", key, reader.value()
+    else:
+        # Scalars are valid JSON documents, but carry no records
+        reader.value()
+    if reader.peek():
+        raise reader._error("Extra data")
+
+
+def _partial(line):
+    """Whether an unterminated last line is still being written (it does not parse yet)."""
+    if not line.strip():
+        return False
+    try:
+        json.loads(line)
+    except ValueError:
+        return True
+    return False
+
+
+def _iter_lines(f):
+    for index, line in enumerate(f):
+        if not line.strip():
+            continue
+        if not line.endswith("\n") and _partial(line):
+            return
+        record = json.loads(line)
+        if isinstance(record, dict) and "events" in record:
+            yield "entry", record.get("sender_id", str(index)), record
+        else:
+            yield "conversation", index, record
+
+
+class _Prefix(io.RawIOBase):
+    """The first ``size`` bytes of a binary file, however much it has grown since."""
+
+    def __init__(self, f, size):
+        self.f = f
+        self.remaining = size
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        count = self.f.readinto(memoryview(b)[:self.remaining])
+        self.remaining -= count
+        return count
+
+    def close(self):
+        self.f.close()
+        super().close()
+
+
+def open_text(path, size=None):
+    """Open ``path`` for reading as UTF-8 text, decompressing ``.gz`` files.
+
+    Args:
+        size: Read only this many bytes of an uncompressed file
+    """
+    if str(path).endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    if size is None:
+        return open(path, "r", encoding="utf-8")
+    return io.TextIOWrapper(io.BufferedReader(_Prefix(open(path, "rb"), size)), encoding="utf-8")
+
+
+def complete_size(path, size):
+    """Bytes of the first ``size`` of an NDJSON log up to its last complete record.
+
+    This is where :func:`iter_records` stops, so a log that is being
+    appended to can be followed from there.
+    """
+    with open(path, "rb") as f:
+        start = size
+        while True:
+            # Look back from the end for the last newline
+            start = max(0, start - CHUNK_SIZE)
+            f.seek(start)
+            data = f.read(size - start)
+            newline = data.rfind(b"\n")
+            if newline >= 0 or start == 0:
+                break
+    last = data[newline + 1:].decode("utf-8", "replace")
+    return start + newline + 1 if _partial(last) else size
+
+
+def iter_records(path, chunk_size=CHUNK_SIZE, size=None):
+    """Yield ``(kind, key, value)`` records of a conversation dump one at a time.
+
+    Args:
+        size: Read only the first ``size`` bytes of an uncompressed file,
+            e.g. what it held when it was stat'ed
+
+    Raises:
+        json.JSONDecodeError: The document is malformed; records before the
+            error have already been yielded.
+    """
+    name = str(path)
+    if name.endswith(".gz"):
+        name = name[:-3]
+    with open_text(path, size) as f:
+        if name.endswith(NDJSON_SUFFIXES):
+            yield from _iter_lines(f)
+        else:
+            yield from _iter_document(f, chunk_size)
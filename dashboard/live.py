@@ -0,0 +1,197 @@
+"""Live ingestion of an append-only NDJSON conversation log.
+
+:class:`NDJSONTail` remembers a byte-offset watermark into the log and only
+reads what was appended after it, up to the last complete line, so a writer
+caught mid-line is picked up on the next poll. It reads at most
+``TAIL_CHUNK`` bytes at a time. Each line is one finished conversation: an
+export-style conversation or a tracker-store entry.
+
+:class:`LiveStore` starts from the columnar cache of the log (see
+``columnar.open_table``), which holds the complete lines the log had when it
+was built, and tails the log from there. Every chunk of new conversations
+goes into a small segment table. Segments of similar size are merged, so there are
+only ever a few of them. The daily rollup is updated with each new segment
+only. A refresh therefore costs what was appended, not a rebuild of the
+log. Dashboards query the base table and the segments as a list of
+``(table, metrics)`` tiers.
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from .columnar import open_table, table_from_records
+from .json_stream import NDJSON_SUFFIXES
+from .metrics import ConversationMetrics, metrics_for
+from .rollups import DailyRollup, topk_error
+
+logger = logging.getLogger(__name__)
+
+_STORES = OrderedDict()
+MAX_STORES = 2
+TAIL_CHUNK = 16 << 20
+
+
+class SourceReset(Exception):
+    """The log was truncated or replaced; the watermark no longer applies."""
+
+
+class NDJSONTail:
+    """Records appended to an NDJSON file after a byte-offset watermark.
+
+    Args:
+        path: NDJSON file (``.ndjson``/``.jsonl``, not compressed)
+        offset: Watermark: bytes of the file already ingested
+    """
+
+    def __init__(self, path, offset=0):
+        self.path = path
+        self.offset = offset
+        self.skipped = 0
+        self._inode = None
+
+    def read(self, max_bytes=TAIL_CHUNK):
+        """Complete records appended since the watermark, advancing it past them.
+
+        Reads about ``max_bytes`` at most (more only to finish a longer line);
+        call again while the watermark moves to read the rest.
+
+        Raises:
+            SourceReset: The file shrank below the watermark or was replaced.
+        """
+        stat = os.stat(self.path)
+        if self._inode is None:
+            self._inode = stat.st_ino
+        if stat.st_ino != self._inode or stat.st_size < self.offset:
+            raise SourceReset(self.path)
+        if stat.st_size == self.offset:
+            return []
+        data, end = b"", 0
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            # A line without its newline is still being written
+            while not end and self.offset + len(data) < stat.st_size:
+                chunk = f.read(min(max_bytes, stat.st_size - self.offset - len(data)))
+                if not chunk:
+                    break
+                data += chunk
+                end = data.rfind(b"\n") + 1
+        records = []
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                self.skipped += 1
+                continue
+            if isinstance(record, dict):
+                records.append(record)
+        self.offset += end
+        return records
+
+
+def _split_records(records):
+    conversations, trackers = [], []
+    for record in records:
+        if "events" in record:
+            trackers.append((record.get("sender_id", "unknown"), record))
+        elif "messages" in record:
+            conversations.append(record)
+    return conversations, trackers
+
+
+class _Segment:
+    def __init__(self, records):
+        self.records = records
+        self.table = table_from_records(*_split_records(records))
+        self.metrics = ConversationMetrics(self.table)
+
+    def __len__(self):
+        return len(self.table)
+
+
+class LiveStore:
+    """Conversations of an NDJSON log, kept current by :meth:`poll`.
+
+    Attributes:
+        base: Table of the log as it was cached when the store was opened.
+        segments: Conversations appended since, newest last.
+        rollup: :class:`~dashboard.rollups.DailyRollup` over base and segments.
+        version: Changes whenever a poll adds conversations.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        if not self.path.endswith(NDJSON_SUFFIXES):
+            raise ValueError(f"Live updates need an uncompressed NDJSON log, not {path}")
+        self._lock = threading.Lock()
+        self._open()
+
+    def _open(self):
+        try:
+            self.base = open_table(self.path)
+            offset = self.base.source_size
+        except ValueError as e:
+            # A malformed line: ingest the log by tailing it, skipping bad lines
+            logger.warning(f"Tailing {self.path} from the start: {e}")
+            self.base, offset = table_from_records(), 0
+        self.tail = NDJSONTail(self.path, offset)
+        self.segments = []
+        self.rollup = DailyRollup.from_table(self.base, topk_error())
+        self.version = f"{self.base.version}@{offset}"
+
+    def __len__(self):
+        return len(self.base) + sum(len(segment) for segment in self.segments)
+
+    def poll(self):
+        """Ingest records appended since the last poll; returns how many conversations were added."""
+        with self._lock:
+            added = 0
+            while True:
+                offset = self.tail.offset
+                try:
+                    records = self.tail.read()
+                except SourceReset:
+                    logger.warning(f"{self.path} was truncated or replaced; reloading it")
+                    self._open()
+                    return len(self)
+                if self.tail.offset == offset:
+                    break
+                added += self._add(records)
+            if added:
+                self.version = f"{self.base.version}@{self.tail.offset}"
+            return added
+
+    def _add(self, records):
+        segment = _Segment(records)
+        if not len(segment):
+            return 0
+        self.rollup.add_table(segment.table)
+        self.segments.append(segment)
+        # Merge segments of similar size, like a binary counter
+        while len(self.segments) > 1 and len(self.segments[-2]) <= len(self.segments[-1]):
+            newest = self.segments.pop()
+            self.segments[-1] = _Segment(self.segments[-1].records + newest.records)
+        return len(segment)
+
+    def tiers(self):
+        """``(table, metrics)`` for the base table and every segment."""
+        with self._lock:
+            tiers = [(self.base, metrics_for(self.base))] if len(self.base) else []
+            return tiers + [(segment.table, segment.metrics) for segment in self.segments]
+
+
+def live_store_for(path):
+    """Store tailing ``path``, shared by every session of the process."""
+    key = os.path.abspath(path)
+    store = _STORES.get(key)
+    if store is None:
+        store = _STORES[key] = LiveStore(path)
+        while len(_STORES) > MAX_STORES:
+            _STORES.popitem(last=False)
+    else:
+        _STORES.move_to_end(key)
+    return store
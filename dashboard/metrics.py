@@ -0,0 +1,221 @@
+"""Vectorized conversation metrics over one flattened messages DataFrame.
+
+:class:`ConversationMetrics` turns a ``ConversationTable`` into two frames
+once per data version:
+
+* ``messages``: one row per message with ``conversation`` (row number in
+  ``conversations``), ``type``, ``text`` and ``action`` (categoricals built
+  straight from the table's dictionary codes) and ``ts`` (epoch seconds);
+* ``conversations``: one row per conversation with the ids, ``time`` (local
+  datetime), ``duration``, ``rating`` and per-type message counts
+  from a single ``groupby``.
+
+Dashboard views then select conversation rows through the table's
+:class:`~dashboard.time_index.TimeIndex` and get every metric from
+``groupby``/``bincount`` over the selection, instead of Python loops over
+``conv["messages"]`` on every rerun.
+:func:`metrics_for` keeps the engine of the current data version so
+Streamlit reruns reuse it.
+"""
+
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .columnar import MESSAGE_TYPES
+from .time_index import index_for
+
+_ENGINES = OrderedDict()
+MAX_ENGINES = 2
+OFFSET_STEP = 900
+
+
+def _categorical(codes, dictionary):
+    return pd.Categorical.from_codes(np.asarray(codes), categories=pd.Index(dictionary.to_list(), dtype=object),
+                                     validate=False)
+
+
+def local_times(epoch):
+    """Naive local datetimes for epoch seconds, as ``datetime.fromtimestamp`` gives."""
+    epoch = np.asarray(epoch, dtype=np.float64)
+    # UTC offsets only change at DST transitions, which fall on quarter hours:
+    # look each distinct quarter hour up once instead of every timestamp
+    quarters = np.floor(epoch / OFFSET_STEP)
+    valid = ~np.isnan(quarters)
+    distinct, inverse = np.unique(quarters[valid], return_inverse=True)
+    offsets = np.array([time.localtime(q * OFFSET_STEP).tm_gmtoff for q in distinct], dtype=np.float64)
+    # Whole seconds plus the fraction rounded half-even to microseconds, like CPython
+    seconds = np.floor(epoch)
+    micros = np.full(len(epoch), np.iinfo(np.int64).min)
+    micros[valid] = ((seconds[valid] + offsets[inverse]) * 1e6 + np.round((epoch - seconds)[valid] * 1e6)).astype(np.int64)
+    return pd.Series(micros.view("datetime64[us]").astype("datetime64[ns]"))
+
+
+def messages_frame(table):
+    """One row per message: conversation, type, text, action, ts."""
+    m = table.messages
+    return pd.DataFrame({
+        "conversation": np.asarray(m["conversation"]),
+        "type": pd.Categorical.from_codes(np.asarray(m["type"]), categories=list(MESSAGE_TYPES)),
+        "text": _categorical(m["text"], table.strings["text"]),
+        "action": _categorical(m["action"], table.strings["action"]),
+        "ts": np.asarray(m["timestamp"]),
+    })
+
+
+def conversations_frame(table, messages):
+    """One row per conversation, with per-type message counts from ``messages``."""
+    c = table.conversations
+    epoch = np.asarray(c["timestamp"])
+    epoch = np.where(np.isnan(epoch), np.asarray(c["start"]), epoch)
+    frame = pd.DataFrame({
+        "conversation_id": _categorical(c["conversation_id"], table.strings["conversation_id"]),
+        "user_id": _categorical(c["user_id"], table.strings["user_id"]),
+        "epoch": epoch,
+        "duration": np.asarray(c["duration"]),
+        "rating": np.asarray(c["rating"]),
+        "has_feedback": ~np.isnan(np.asarray(c["rating"])) | (np.asarray(c["comments"]) >= 0),
+    })
+    frame["time"] = local_times(epoch)
+    counts = (
+        messages.groupby(["conversation", "type"], observed=False).size()
+        .unstack("type", fill_value=0)
+        .reindex(index=range(len(frame)), fill_value=0)
+    )
+    for kind, column in (("user", "num_user_messages"), ("bot", "num_bot_messages"), ("action", "num_actions")):
+        frame[column] = counts[kind].to_numpy() if kind in counts else 0
+    frame["num_messages"] = np.diff(np.asarray(c["message_start"]))
+    return frame
+
+
+class ConversationMetrics:
+    """Dashboard metrics for one data version of a ``ConversationTable``."""
+
+    def __init__(self, table):
+        self.table = table
+        self.version = table.version
+        self.messages = messages_frame(table)
+        self.conversations = conversations_frame(table, self.messages)
+        self.index = index_for(table)
+        # Plain arrays for the per-rerun queries
+        self._days = self.conversations["time"].to_numpy().astype("datetime64[D]")
+        m = self.messages
+        self._message_conversation = m["conversation"].to_numpy()
+        self._message_type = m["type"].cat.codes.to_numpy()
+        self._search = {}
+        self._sort_keys = {}
+
+    def __len__(self):
+        return len(self.conversations)
+
+    def select(self, start_date, end_date):
+        """Rows of conversations whose local date is in ``[start_date, end_date]``, in time order."""
+        return self.index.dates(start_date, end_date)
+
+    def _string_index(self, column):
+        """Sorted distinct values of an id column, their codes, and the rows of each code.
+
+        Built on first use. Rows of code ``c`` are ``rows[bounds[c]:bounds[c + 1]]``.
+        """
+        index = self._search.get(column)
+        if index is None:
+            values = self.conversations[column].cat
+            categories = values.categories.to_numpy(dtype=object)
+            order = np.argsort(categories)
+            codes = values.codes.to_numpy()
+            rows = np.argsort(codes, kind="stable")
+            # Missing values (code -1) sort first and belong to no code
+            bounds = np.searchsorted(codes[rows], np.arange(len(categories) + 1))
+            index = self._search[column] = (categories[order], order, rows, bounds)
+        return index
+
+    def sorted_values(self, column):
+        """Distinct values of ``conversation_id`` or ``user_id``, sorted."""
+        return self._string_index(column)[0]
+
+    def rows_with_prefix(self, column, prefix):
+        """Rows whose ``conversation_id`` or ``user_id`` starts with ``prefix``, in row order."""
+        names, order, rows, bounds = self._string_index(column)
+        # Values with the prefix are contiguous in sorted order
+        lo = np.searchsorted(names, prefix, side="left")
+        hi = np.searchsorted(names, prefix + "\U0010ffff", side="left")
+        if lo == hi:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate([rows[bounds[c]:bounds[c + 1]] for c in order[lo:hi].tolist()]))
+
+    def sort_key(self, column):
+        """Per-row float values ordering conversations by ``column``, missing values last.
+
+        ``time`` sorts by epoch; ``conversation_id`` and ``user_id`` by the
+        value's position in :meth:`sorted_values`.
+        """
+        key = self._sort_keys.get(column)
+        if key is None:
+            if column in ("conversation_id", "user_id"):
+                order = self._string_index(column)[1]
+                ranks = np.empty(len(order) + 1, dtype=np.float64)
+                ranks[order] = np.arange(len(order))
+                ranks[-1] = np.nan
+                key = ranks[self.conversations[column].cat.codes.to_numpy()]
+            elif column == "time":
+                key = self.conversations["epoch"].to_numpy(dtype=np.float64)
+            else:
+                key = self.conversations[column].to_numpy(dtype=np.float64)
+            key = self._sort_keys[column] = np.where(np.isnan(key), np.inf, key)
+        return key
+
+    def _top(self, rows, kind, column, n):
+        """``n`` most frequent values of a categorical message column among ``kind`` messages."""
+        values = self.messages[column].cat
+        mask = np.zeros(len(self), dtype=bool)
+        mask[rows] = True
+        selected = (self._message_type == MESSAGE_TYPES.index(kind)) & mask[self._message_conversation]
+        codes = values.codes.to_numpy()[selected]
+        counts = np.bincount(codes[codes >= 0], minlength=len(values.categories))
+        # Stable: ties keep first-seen order, like Counter.most_common
+        order = np.argsort(-counts, kind="stable")[:n]
+        order = order[counts[order] > 0]
+        return values.categories[order].astype(object), counts[order]
+
+    def summary(self, rows):
+        selected = self.conversations.iloc[rows]
+        return {
+            "total": len(rows),
+            "avg_user_messages": float(selected["num_user_messages"].mean()) if len(selected) else 0.0,
+            "avg_duration": float(selected["duration"].mean()) if len(selected) else 0.0,
+            "has_feedback": bool(selected["has_feedback"].any()),
+        }
+
+    def daily_counts(self, rows):
+        """Conversations per day as a ``date``/``count`` frame sorted by date."""
+        days, counts = np.unique(self._days[rows], return_counts=True)
+        return pd.DataFrame({"date": days.astype(object), "count": counts})
+
+    def top_user_messages(self, rows, n=10):
+        texts, counts = self._top(rows, "user", "text", n)
+        return pd.DataFrame({"Message": texts, "Count": counts})
+
+    def top_actions(self, rows, n=10):
+        actions, counts = self._top(rows, "action", "action", n)
+        return pd.DataFrame({"Action": actions, "Count": counts})
+
+
+def metrics_for(table):
+    """Engine for ``table``, reused while its data version is unchanged.
+
+    Tables without a version (not from ``columnar.open_table``) get a new one
+    every time.
+    """
+    if table.version is None:
+        return ConversationMetrics(table)
+    key = table.version
+    engine = _ENGINES.get(key)
+    if engine is None:
+        engine = _ENGINES[key] = ConversationMetrics(table)
+        while len(_ENGINES) > MAX_ENGINES:
+            _ENGINES.popitem(last=False)
+    else:
+        _ENGINES.move_to_end(key)
+    return engine
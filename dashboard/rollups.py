@@ -0,0 +1,316 @@
+"""Daily rollups of conversation metrics, maintained incrementally.
+
+:class:`DailyRollup` keeps per-day aggregates of everything the dashboard
+charts: conversation, message and feedback counts, duration sums and a
+duration histogram (dense, one row per day) and per-day counts of user
+message texts, actions and intents. A conversation and all of its messages
+count on the local date it started, the same date the dashboard filters on.
+
+Value counts are exact by default (sparse ``(day, value)`` pairs), so their
+memory grows with the number of distinct utterances. With ``error`` set,
+each day keeps a :class:`~dashboard.sketches.SpaceSaving` sketch of
+``1 / error`` counters instead, and top-k over a range merges the sketches
+of its days. Estimates are then within ``error`` times the number of
+messages in the range. A day stays exact while it has fewer distinct
+values than the sketch has counters.
+
+:meth:`DailyRollup.add_table` folds a batch of conversations into the
+rollup. Only the days present in the batch are touched, so new data costs
+what the batch costs, never a rescan of what came before. Queries for a
+date range then sum a slice of day rows instead of scanning raw messages.
+"""
+
+import os
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .columnar import MESSAGE_TYPES
+from .metrics import local_times
+from .sketches import SpaceSaving, error_capacity, hash_strings, merge
+
+_ROLLUPS = OrderedDict()
+MAX_ROLLUPS = 2
+
+# Upper bounds (seconds) of the duration histogram buckets; the last bucket is open
+DURATION_BUCKETS = (10, 30, 60, 120, 300, 600, 1800, 3600)
+COLUMNS = ("conversations", "messages", "user_messages", "bot_messages", "actions", "feedback", "duration")
+CATEGORIES = {"text": "user", "action": "action", "intent": "user"}
+
+_USER, _BOT, _ACTION = (MESSAGE_TYPES.index(kind) for kind in ("user", "bot", "action"))
+_CODE_BITS = 32
+_MISSING_DAY = -(1 << 62)
+
+
+def day_number(day):
+    """Days since 1970-01-01 for a ``date``."""
+    return int(np.datetime64(day, "D").astype(np.int64))
+
+
+def conversation_days(table):
+    """Local start day number per conversation row (``_MISSING_DAY`` if unknown)."""
+    c = table.conversations
+    epoch = np.asarray(c["timestamp"])
+    epoch = np.where(np.isnan(epoch), np.asarray(c["start"]), epoch)
+    days = local_times(epoch).to_numpy().astype("datetime64[D]")
+    return np.where(np.isnat(days), _MISSING_DAY, days.astype(np.int64))
+
+
+class _Vocabulary:
+    """Strings seen by a rollup, coded in first-seen order across batches."""
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def map(self, strings):
+        """Rollup codes for the entries of a batch's string dictionary."""
+        codes = np.empty(len(strings), dtype=np.int64)
+        for i, value in enumerate(strings):
+            code = self.codes.get(value)
+            if code is None:
+                code = self.codes[value] = len(self.values)
+                self.values.append(value)
+            codes[i] = code
+        return codes
+
+
+def topk_error():
+    """Error bound of the dashboard's top-k sketches; 0 keeps exact counts."""
+    return float(os.environ.get("DASHBOARD_TOPK_ERROR", "0"))
+
+
+class _DayCounts:
+    """Exact per-day counts of one string column, sorted by ``(day, code)``."""
+
+    def __init__(self):
+        self.keys = np.empty(0, dtype=np.int64)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.vocabulary = _Vocabulary()
+
+    def add(self, days, codes, strings):
+        """Count values ``strings[codes]`` on ``days``."""
+        codes = self.vocabulary.map(strings)[codes]
+        keys, counts = np.unique((days << _CODE_BITS) | codes, return_counts=True)
+        pos = np.searchsorted(self.keys, keys)
+        found = pos < len(self.keys)
+        found[found] = self.keys[pos[found]] == keys[found]
+        self.counts[pos[found]] += counts[found]
+        self.keys = np.insert(self.keys, pos[~found], keys[~found])
+        self.counts = np.insert(self.counts, pos[~found], counts[~found])
+
+    def top(self, first, last, n):
+        """``(values, counts, errors)`` of the ``n`` most frequent values over days ``first..last``."""
+        lo = np.searchsorted(self.keys, first << _CODE_BITS)
+        hi = np.searchsorted(self.keys, (last + 1) << _CODE_BITS)
+        codes = self.keys[lo:hi] & ((1 << _CODE_BITS) - 1)
+        counts = np.bincount(codes, weights=self.counts[lo:hi], minlength=len(self.vocabulary)).astype(np.int64)
+        # Stable: ties keep first-seen order, like Counter.most_common
+        order = np.argsort(-counts, kind="stable")[:n]
+        order = order[counts[order] > 0]
+        values = [self.vocabulary.values[code] for code in order]
+        return values, counts[order], np.zeros(len(order), dtype=np.int64)
+
+
+class _DaySketches:
+    """Per-day Space-Saving sketches of one string column, keyed by string hash."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.sketches = {}
+        # Strings of the keys currently held by some sketch
+        self.names = {}
+
+    def __len__(self):
+        return sum(len(sketch) for sketch in self.sketches.values())
+
+    def add(self, days, codes, strings):
+        hashes = hash_strings(strings)
+        keys = hashes[codes]
+        order = np.argsort(days, kind="stable")
+        days, keys = days[order], keys[order]
+        batch_days, starts = np.unique(days, return_index=True)
+        touched = []
+        for day, part in zip(batch_days.tolist(), np.split(keys, starts[1:])):
+            sketch = self.sketches.get(day)
+            if sketch is None:
+                sketch = self.sketches[day] = SpaceSaving(self.capacity)
+            sketch.update(part)
+            touched.append(sketch.keys)
+        kept = np.isin(hashes, np.concatenate(touched)) if touched else np.zeros(len(hashes), dtype=bool)
+        self.names.update(zip(hashes[kept].tolist(), (strings[i] for i in np.flatnonzero(kept))))
+        if len(self.names) > 2 * len(self):
+            held = set(np.concatenate([s.keys for s in self.sketches.values()]).tolist())
+            self.names = {key: name for key, name in self.names.items() if key in held}
+
+    def top(self, first, last, n):
+        """``(values, counts, errors)`` of the ``n`` largest estimates over days ``first..last``."""
+        merged = merge([s for day, s in self.sketches.items() if first <= day <= last], self.capacity)
+        keys, counts, errors = merged.top(n)
+        return [self.names[key] for key in keys.tolist()], counts, errors
+
+
+class DailyRollup:
+    """Per-day aggregates of conversations, updated batch by batch.
+
+    Args:
+        error: Bound of top-k estimates relative to the messages in range;
+            0 keeps exact counts
+    """
+
+    def __init__(self, error=0):
+        self.days = np.empty(0, dtype=np.int64)
+        self.totals = {name: np.empty(0, dtype=np.float64 if name == "duration" else np.int64)
+                       for name in COLUMNS}
+        self.histogram = np.empty((0, len(DURATION_BUCKETS) + 1), dtype=np.int64)
+        self.error = error
+        self.counts = {name: _DaySketches(error_capacity(error)) if error else _DayCounts()
+                       for name in CATEGORIES}
+        self.version = None
+
+    @classmethod
+    def from_table(cls, table, error=0):
+        rollup = cls(error)
+        rollup.add_table(table)
+        rollup.version = table.version
+        return rollup
+
+    def __len__(self):
+        return len(self.days)
+
+    def add_table(self, table):
+        """Fold every conversation of ``table`` into the rollup."""
+        conv_days = conversation_days(table)
+        known = conv_days != _MISSING_DAY
+        batch_days, inverse = np.unique(conv_days[known], return_inverse=True)
+        if not len(batch_days):
+            return
+
+        m = table.messages
+        message_days = conv_days[np.asarray(m["conversation"])]
+        types = np.asarray(m["type"])
+        in_day = message_days != _MISSING_DAY
+        c = table.conversations
+        duration = np.nan_to_num(np.asarray(c["duration"])[known])
+        feedback = (~np.isnan(np.asarray(c["rating"])) | (np.asarray(c["comments"]) >= 0))[known]
+        per_type = np.bincount(np.asarray(m["conversation"])[in_day] * len(MESSAGE_TYPES) + types[in_day],
+                               minlength=len(table) * len(MESSAGE_TYPES)).reshape(len(table), -1)[known]
+
+        def per_day(values):
+            return np.bincount(inverse, weights=values, minlength=len(batch_days))
+
+        delta = {
+            "conversations": np.bincount(inverse, minlength=len(batch_days)),
+            "messages": per_day(per_type.sum(axis=1)),
+            "user_messages": per_day(per_type[:, _USER]),
+            "bot_messages": per_day(per_type[:, _BOT]),
+            "actions": per_day(per_type[:, _ACTION]),
+            "feedback": per_day(feedback),
+            "duration": per_day(duration),
+        }
+        buckets = np.searchsorted(DURATION_BUCKETS, duration, side="left")
+        histogram = np.zeros((len(batch_days), len(DURATION_BUCKETS) + 1), dtype=np.int64)
+        np.add.at(histogram, (inverse, buckets), 1)
+        self._add_days(batch_days, delta, histogram)
+
+        for name, kind in CATEGORIES.items():
+            codes = np.asarray(m[name])
+            rows = in_day & (types == MESSAGE_TYPES.index(kind)) & (codes >= 0)
+            self.counts[name].add(message_days[rows], codes[rows], table.strings[name].to_list())
+
+    def _add_days(self, days, delta, histogram):
+        pos = np.searchsorted(self.days, days)
+        new = pos >= len(self.days)
+        new[~new] = self.days[pos[~new]] != days[~new]
+        if new.any():
+            at = pos[new]
+            self.days = np.insert(self.days, at, days[new])
+            for name, column in self.totals.items():
+                self.totals[name] = np.insert(column, at, 0)
+            self.histogram = np.insert(self.histogram, at, 0, axis=0)
+            pos = np.searchsorted(self.days, days)
+        for name, values in delta.items():
+            self.totals[name][pos] += values.astype(self.totals[name].dtype)
+        self.histogram[pos] += histogram
+
+    def _slice(self, start_date, end_date):
+        lo = np.searchsorted(self.days, day_number(start_date))
+        hi = np.searchsorted(self.days, day_number(end_date), side="right")
+        return slice(lo, hi)
+
+    def daily(self, start_date, end_date):
+        """One row per day with conversations in ``[start_date, end_date]``."""
+        rows = self._slice(start_date, end_date)
+        frame = pd.DataFrame({name: column[rows] for name, column in self.totals.items()})
+        frame.insert(0, "date", self.days[rows].astype("datetime64[D]").astype(object))
+        return frame
+
+    def daily_counts(self, start_date, end_date):
+        """Conversations per day as a ``date``/``count`` frame sorted by date."""
+        daily = self.daily(start_date, end_date)
+        return pd.DataFrame({"date": daily["date"], "count": daily["conversations"]})
+
+    def summary(self, start_date, end_date):
+        rows = self._slice(start_date, end_date)
+        total = int(self.totals["conversations"][rows].sum())
+        return {
+            "total": total,
+            "avg_user_messages": float(self.totals["user_messages"][rows].sum() / total) if total else 0.0,
+            "avg_duration": float(self.totals["duration"][rows].sum() / total) if total else 0.0,
+            "has_feedback": bool(self.totals["feedback"][rows].sum()),
+        }
+
+    def duration_histogram(self, start_date, end_date):
+        """Conversations per duration bucket, labelled by upper bound in seconds."""
+        counts = self.histogram[self._slice(start_date, end_date)].sum(axis=0)
+        labels = [f"<= {bound}s" for bound in DURATION_BUCKETS] + [f"> {DURATION_BUCKETS[-1]}s"]
+        return pd.DataFrame({"Duration": labels, "Count": counts})
+
+    def top(self, name, start_date, end_date, n=10):
+        """``(values, counts, errors)`` of the ``n`` most frequent ``text``/``action``/``intent`` values.
+
+        Counts are exact (``errors`` all 0) unless the rollup keeps
+        sketches, where they may overestimate by up to ``errors``.
+        """
+        if start_date > end_date:
+            return pd.Index([], dtype=object), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        values, counts, errors = self.counts[name].top(day_number(start_date), day_number(end_date), n)
+        return pd.Index(values, dtype=object), counts, errors
+
+    def _top_frame(self, name, column, start_date, end_date, n):
+        values, counts, errors = self.top(name, start_date, end_date, n)
+        frame = pd.DataFrame({column: values, "Count": counts})
+        frame.attrs["max_error"] = int(errors.max()) if len(errors) else 0
+        return frame
+
+    def top_user_messages(self, start_date, end_date, n=10):
+        return self._top_frame("text", "Message", start_date, end_date, n)
+
+    def top_actions(self, start_date, end_date, n=10):
+        return self._top_frame("action", "Action", start_date, end_date, n)
+
+    def top_intents(self, start_date, end_date, n=10):
+        return self._top_frame("intent", "Intent", start_date, end_date, n)
+
+
+def rollup_for(table):
+    """Rollup of ``table``, reused while its data version is unchanged.
+
+    Tables without a version (not from ``columnar.open_table``) get a new one
+    every time.
+    """
+    if table.version is None:
+        return DailyRollup.from_table(table, topk_error())
+    key = table.version
+    rollup = _ROLLUPS.get(key)
+    if rollup is None:
+        rollup = _ROLLUPS[key] = DailyRollup.from_table(table, topk_error())
+        while len(_ROLLUPS) > MAX_ROLLUPS:
+            _ROLLUPS.popitem(last=False)
+    else:
+        _ROLLUPS.move_to_end(key)
+    return rollup
@@ -0,0 +1,119 @@
+"""Space-Saving heavy-hitter sketches for top-k over date ranges.
+
+A :class:`SpaceSaving` sketch keeps at most ``capacity`` counters. Each
+counter is a 64-bit item key with an over-estimated count and the most
+that estimate can be off by. For a stream of total weight ``N``:
+
+* ``count - error <= true count <= count``,
+* ``error <= N / capacity``, so every item whose true count exceeds
+  ``N / capacity`` is in the sketch.
+
+While a sketch has seen no more distinct items than its capacity it is
+exact.
+
+Sketches are mergeable with the same bound over the combined stream (the
+parallel Space-Saving merge: a key missing from a sketch that has dropped
+counters counts as that sketch's smallest counter). :func:`merge`
+combines any number of them at once with NumPy, which is how per-day
+sketches answer a date range. Updates are batches of pre-aggregated
+``(key, weight)`` pairs, merged in the same way.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+
+def error_capacity(error):
+    """Counters needed so that estimates are within ``error`` times the stream weight."""
+    if not 0 < error < 1:
+        raise ValueError(f"error must be in (0, 1), got {error}")
+    return math.ceil(1 / error)
+
+
+def hash_strings(values):
+    """64-bit keys for strings, stable across processes."""
+    return pd.util.hash_array(np.asarray(values, dtype=object), categorize=False)
+
+
+class SpaceSaving:
+    """Space-Saving summary of weighted 64-bit keys.
+
+    Args:
+        capacity: Maximum number of counters kept
+    """
+
+    __slots__ = ("capacity", "keys", "counts", "errors", "total", "saturated")
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.errors = np.empty(0, dtype=np.int64)
+        self.total = 0
+        # Whether a counter was ever dropped; until then the sketch is exact
+        self.saturated = False
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def floor(self):
+        """Upper bound of the count of any key not in the sketch."""
+        return int(self.counts.min()) if self.saturated else 0
+
+    @property
+    def exact(self):
+        return not self.saturated and not self.errors.any()
+
+    def update(self, keys, weights=None):
+        """Add occurrences of ``keys`` (repeated keys allowed) with optional integer weights."""
+        keys = np.asarray(keys, dtype=np.uint64)
+        if not len(keys):
+            return
+        if weights is None:
+            keys, weights = np.unique(keys, return_counts=True)
+        batch = SpaceSaving(self.capacity)
+        batch.keys, batch.counts = keys, np.asarray(weights, dtype=np.int64)
+        batch.errors = np.zeros(len(keys), dtype=np.int64)
+        batch.total = int(batch.counts.sum())
+        merged = merge([self, batch], self.capacity)
+        self.keys, self.counts, self.errors = merged.keys, merged.counts, merged.errors
+        self.total, self.saturated = merged.total, merged.saturated
+
+    def top(self, n):
+        """``(keys, counts, errors)`` of the ``n`` largest counters, largest first."""
+        order = np.lexsort((self.keys, -self.counts))[:n]
+        return self.keys[order], self.counts[order], self.errors[order]
+
+    def estimate(self, key):
+        """``(count, error)`` for one key."""
+        hit = np.flatnonzero(self.keys == np.uint64(key))
+        if len(hit):
+            return int(self.counts[hit[0]]), int(self.errors[hit[0]])
+        return self.floor, self.floor
+
+
+def merge(sketches, capacity):
+    """One sketch of at most ``capacity`` counters summarizing all of ``sketches``."""
+    merged = SpaceSaving(capacity)
+    sketches = [s for s in sketches if len(s)]
+    if not sketches:
+        return merged
+    floors = np.array([s.floor for s in sketches], dtype=np.int64)
+    keys = np.concatenate([s.keys for s in sketches])
+    sizes = [len(s) for s in sketches]
+    # A key missing from a sketch counts as that sketch's floor, in count and error
+    counts = np.concatenate([s.counts for s in sketches]) - np.repeat(floors, sizes)
+    errors = np.concatenate([s.errors for s in sketches]) - np.repeat(floors, sizes)
+    merged.keys, inverse = np.unique(keys, return_inverse=True)
+    merged.counts = np.bincount(inverse, weights=counts).astype(np.int64) + floors.sum()
+    merged.errors = np.bincount(inverse, weights=errors).astype(np.int64) + floors.sum()
+    merged.total = sum(s.total for s in sketches)
+    merged.saturated = any(s.saturated for s in sketches)
+    if len(merged.keys) > capacity:
+        merged.saturated = True
+        keep = np.sort(np.lexsort((merged.keys, -merged.counts))[:capacity])
+        merged.keys, merged.counts, merged.errors = merged.keys[keep], merged.counts[keep], merged.errors[keep]
+    return merged
@@ -0,0 +1,434 @@
+"""Synthetic conversation generator for analytics and load testing.
+
+A small statistical model is learned from recorded conversations (and,
+optionally, ``domain.yml`` and the NLU training data): a Markov chain over
+user intents, the bot actions that answered each intent, the texts seen for
+every intent and action, conversation lengths, reply gaps, channels and
+ratings. The model then emits any number of realistic conversations either in
+the ``{"conversations": [...]}`` export format or in the Rasa tracker-store
+``events`` format, as a JSON document or as NDJSON, optionally gzipped.
+
+Generation is split into fixed-size shards that are produced (and
+compressed) in parallel worker processes and written in order, so memory stays
+flat and a given ``--seed`` and ``--start-date`` yield identical output for any
+number of workers.
+
+Usage:
+    python -m dashboard.synthetic backend/rasa/tests/rasa_conversations.json \\
+        --domain backend/rasa/domain.yml --nlu backend/rasa/data/nlu.yml \\
+        --count 1000000 --format tracker --ndjson --output /tmp/trackers.ndjson.gz
+"""
+
+import argparse
+import bisect
+import gzip
+import itertools
+import json
+import os
+import random
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from multiprocessing import Pool
+
+FORMATS = ("conversations", "tracker")
+DEFAULT_SHARD_SIZE = 5000
+END = "__end__"
+
+_ENTITY_ANNOTATION = re.compile(r"\[([^\]]+)\](?:\([^)]*\)|\{[^}]*\})")
+
+
+class _Distribution:
+    """Weighted categorical distribution with O(log n) sampling."""
+
+    def __init__(self, counts):
+        items = [(k, w) for k, w in counts.items() if w > 0]
+        self.values = [k for k, _ in items]
+        self.cum_weights = list(itertools.accumulate(w for _, w in items))
+
+    def __bool__(self):
+        return bool(self.values)
+
+    def sample(self, rng):
+        x = rng.random() * self.cum_weights[-1]
+        return self.values[bisect.bisect_right(self.cum_weights, x)]
+
+
+def _load_yaml(path):
+    import yaml
+
+    with open(path, "r") as f:
+        return yaml.safe_load(f) or {}
+
+
+def _messages_from_events(events):
+    """Flatten tracker-store events into export-style messages."""
+    messages = []
+    last_action = None
+    for event in events:
+        event_type = event.get("event")
+        if event_type == "user":
+            intent = (event.get("parse_data") or {}).get("intent") or {}
+            messages.append({
+                "type": "user",
+                "text": event.get("text", ""),
+                "timestamp": event.get("timestamp"),
+                "intent": intent.get("name"),
+                "confidence": intent.get("confidence"),
+            })
+        elif event_type == "action":
+            last_action = event.get("name")
+        elif event_type == "bot":
+            messages.append({
+                "type": "bot",
+                "text": event.get("text", ""),
+                "timestamp": event.get("timestamp"),
+                "action": last_action,
+            })
+    return messages
+
+
+def iter_recorded_conversations(data):
+    """Yield export-style conversations from either supported JSON layout."""
+    if isinstance(data, list):
+        data = {"conversations": data}
+    for conv in data.get("conversations", []):
+        yield conv
+    tables = [data] + [v for v in data.values() if isinstance(v, dict)]
+    for table in tables:
+        for key, tracker in table.items():
+            if isinstance(tracker, dict) and isinstance(tracker.get("events"), list):
+                yield {
+                    "user_id": tracker.get("sender_id", key),
+                    "messages": _messages_from_events(tracker["events"]),
+                }
+
+
+class ConversationModel:
+    """Distributions learned from recorded conversations."""
+
+    def __init__(self, transitions, replies, user_texts, action_texts,
+                 turns, gaps, channels, languages, ratings):
+        self.transitions = transitions
+        self.replies = replies
+        self.user_texts = user_texts
+        self.action_texts = action_texts
+        self.turns = turns
+        self.gaps = gaps
+        self.channels = channels
+        self.languages = languages
+        self.ratings = ratings
+        self._compile()
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.pop("_compiled", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._compile()
+
+    def _compile(self):
+        self._compiled = {
+            "transitions": {k: _Distribution(v) for k, v in self.transitions.items()},
+            "replies": {k: _Distribution(v) for k, v in self.replies.items()},
+            "turns": _Distribution(self.turns),
+            "channels": _Distribution(self.channels),
+            "languages": _Distribution(self.languages),
+            "ratings": _Distribution(self.ratings),
+        }
+
+    @classmethod
+    def learn(cls, conversations, domain=None, nlu=None, smoothing=0.05):
+        """Learn a model from export-style ``conversations``.
+
+        Intents and responses declared in ``domain`` but never seen in the
+        recordings get a small ``smoothing`` weight so the generated data
+        covers the whole domain; ``nlu`` training examples enrich user texts.
+        """
+        transitions = defaultdict(Counter)
+        replies = defaultdict(Counter)
+        user_texts = defaultdict(list)
+        action_texts = defaultdict(list)
+        turns, channels, languages, ratings = Counter(), Counter(), Counter(), Counter()
+        gaps = []
+
+        for conv in conversations:
+            messages = conv.get("messages", [])
+            previous = None
+            intent = None
+            n_user = 0
+            last_ts = None
+            for msg in messages:
+                ts = msg.get("timestamp")
+                if isinstance(ts, (int, float)) and isinstance(last_ts, (int, float)) and ts >= last_ts:
+                    gaps.append(ts - last_ts)
+                last_ts = ts if isinstance(ts, (int, float)) else last_ts
+                if msg.get("type") == "user" and msg.get("intent"):
+                    intent = msg["intent"]
+                    transitions[previous][intent] += 1
+                    if msg.get("text") and msg["text"] not in user_texts[intent]:
+                        user_texts[intent].append(msg["text"])
+                    previous = intent
+                    n_user += 1
+                elif msg.get("type") == "bot" and intent and msg.get("action"):
+                    replies[intent][msg["action"]] += 1
+                    if msg.get("text") and msg["text"] not in action_texts[msg["action"]]:
+                        action_texts[msg["action"]].append(msg["text"])
+            if n_user:
+                transitions[previous][END] += 1
+                turns[n_user] += 1
+            metadata = conv.get("metadata") or {}
+            channels[metadata.get("channel", "rest")] += 1
+            languages[metadata.get("language", "en")] += 1
+            rating = (conv.get("feedback") or {}).get("rating")
+            if rating is not None:
+                ratings[rating] += 1
+
+        domain = domain or {}
+        responses = domain.get("responses") or {}
+        for action, variants in responses.items():
+            for variant in variants or []:
+                text = variant.get("text") if isinstance(variant, dict) else None
+                if text and text not in action_texts[action]:
+                    action_texts[action].append(text)
+
+        for block in (nlu or {}).get("nlu", []) or []:
+            intent = block.get("intent")
+            if not intent:
+                continue
+            for line in (block.get("examples") or "").splitlines():
+                text = _ENTITY_ANNOTATION.sub(r"\1", line.strip().lstrip("- ").strip())
+                if text and text not in user_texts[intent]:
+                    user_texts[intent].append(text)
+
+        # Give unseen domain intents a small share of every transition
+        for intent in domain.get("intents") or []:
+            name = intent if isinstance(intent, str) else next(iter(intent))
+            for state in list(transitions):
+                row = transitions[state]
+                if name not in row:
+                    row[name] = max(row.values()) * smoothing
+            if not replies.get(name):
+                utter = f"utter_{name}"
+                if utter in responses:
+                    replies[name][utter] = 1
+
+        return cls(
+            transitions={k: dict(v) for k, v in transitions.items()},
+            replies={k: dict(v) for k, v in replies.items()},
+            user_texts=dict(user_texts),
+            action_texts=dict(action_texts),
+            turns=dict(turns) or {3: 1},
+            gaps=sorted(gaps) or [5.0],
+            channels=dict(channels),
+            languages=dict(languages),
+            ratings=dict(ratings) or {5: 1},
+        )
+
+    def generate(self, rng, index, start_time):
+        """Generate one export-style conversation starting at ``start_time``."""
+        c = self._compiled
+        max_turns = c["turns"].sample(rng)
+        ts = start_time
+        messages = []
+        state = None
+        for _ in range(max_turns):
+            chain = c["transitions"].get(state) or c["transitions"].get(None)
+            intent = chain.sample(rng)
+            if intent == END:
+                break
+            texts = self.user_texts.get(intent) or [intent.replace("_", " ")]
+            messages.append({
+                "type": "user",
+                "text": rng.choice(texts),
+                "timestamp": round(ts, 4),
+                "intent": intent,
+                "confidence": round(0.6 + rng.random() * 0.4, 4),
+            })
+            reply = c["replies"].get(intent)
+            if reply:
+                ts += rng.choice(self.gaps)
+                action = reply.sample(rng)
+                texts = self.action_texts.get(action) or [action]
+                messages.append({
+                    "type": "bot",
+                    "text": rng.choice(texts),
+                    "timestamp": round(ts, 4),
+                    "action": action,
+                })
+            ts += rng.choice(self.gaps)
+            state = intent
+        if not messages:
+            messages.append({"type": "user", "text": "hello", "timestamp": round(start_time, 4),
+                             "intent": "greet", "confidence": 1.0})
+        duration = messages[-1]["timestamp"] - messages[0]["timestamp"]
+        rating = c["ratings"].sample(rng)
+        return {
+            "conversation_id": f"syn{index:010d}",
+            "timestamp": round(start_time, 4),
+            "user_id": f"user_{rng.randrange(1, 10 ** 6):06d}",
+            "duration": round(duration, 3),
+            "num_turns": sum(1 for m in messages if m["type"] == "user"),
+            "messages": messages,
+            "feedback": {"rating": rating, "resolved": rating >= 3},
+            "metadata": {
+                "channel": c["channels"].sample(rng),
+                "language": c["languages"].sample(rng),
+            },
+        }
+
+
+def to_tracker(conversation):
+    """Convert an export-style conversation into a tracker-store entry."""
+    ts = conversation["timestamp"]
+    events = [
+        {"event": "action", "timestamp": ts, "name": "action_session_start"},
+        {"event": "session_started", "timestamp": ts},
+        {"event": "action", "timestamp": ts, "name": "action_listen"},
+    ]
+    latest_message = {}
+    for msg in conversation["messages"]:
+        if msg["type"] == "user":
+            latest_message = {
+                "intent": {"name": msg["intent"], "confidence": msg["confidence"]},
+                "entities": [],
+                "text": msg["text"],
+            }
+            events.append({"event": "user", "timestamp": msg["timestamp"], "text": msg["text"],
+                           "parse_data": latest_message})
+        else:
+            events.append({"event": "action", "timestamp": msg["timestamp"], "name": msg["action"]})
+            events.append({"event": "bot", "timestamp": msg["timestamp"], "text": msg["text"]})
+            events.append({"event": "action", "timestamp": msg["timestamp"], "name": "action_listen"})
+    return {
+        "sender_id": conversation["conversation_id"],
+        "slots": {},
+        "latest_message": latest_message,
+        "latest_event_time": events[-1]["timestamp"],
+        "followup_action": None,
+        "paused": False,
+        "events": events,
+        "latest_input_channel": conversation["metadata"]["channel"],
+        "active_loop": {},
+        "latest_action_name": "action_listen",
+    }
+
+
+def generate_shard(model, shard_index, offset, count, seed, start_ts, span_seconds,
+                   fmt="conversations", ndjson=False, compress=False):
+    """Serialize one shard of ``count`` conversations, numbered from ``offset``.
+
+    Shards are seeded from ``(seed, shard_index)`` so the output does not
+    depend on how shards are spread over processes. With ``compress`` every
+    shard is an independent gzip member; concatenated members form a valid
+    gzip stream.
+    """
+    rng = random.Random(f"{seed}:{shard_index}")
+    parts = []
+    for i in range(count):
+        conv = model.generate(rng, offset + i, start_ts + rng.random() * span_seconds)
+        record = to_tracker(conv) if fmt == "tracker" else conv
+        if ndjson:
+            parts.append(json.dumps(record, separators=(",", ":")) + "\n")
+        elif fmt == "tracker":
+            parts.append(json.dumps(record["sender_id"]) + ":" + json.dumps(record, separators=(",", ":")))
+        else:
+            parts.append(json.dumps(record, separators=(",", ":")))
+    if ndjson:
+        payload = "".join(parts)
+    else:
+        payload = ("" if offset == 0 else ",\n") + ",\n".join(parts)
+    data = payload.encode("utf-8")
+    return gzip.compress(data, compresslevel=6) if compress else data
+
+
+def _generate_shard_star(args):
+    return generate_shard(*args)
+
+
+def write_dataset(model, output, count, seed=0, fmt="conversations", ndjson=False,
+                  compress=None, workers=None, shard_size=DEFAULT_SHARD_SIZE,
+                  start_date=None, days=30):
+    """Stream ``count`` synthetic conversations to ``output``; returns bytes written."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {FORMATS}")
+    if compress is None:
+        compress = output.endswith(".gz")
+    start_date = start_date or (datetime.now() - timedelta(days=days))
+    start_ts = start_date.timestamp()
+    span = days * 86400.0
+
+    shards = [
+        (model, i, offset, min(shard_size, count - offset), seed, start_ts, span, fmt, ndjson, compress)
+        for i, offset in enumerate(range(0, count, shard_size))
+    ]
+
+    def wrap(text):
+        data = text.encode("utf-8")
+        return gzip.compress(data) if compress else data
+
+    written = 0
+    workers = workers or os.cpu_count() or 1
+    with open(output, "wb") as out:
+        if not ndjson:
+            written += out.write(wrap('{"conversations":[\n' if fmt == "conversations" else "{\n"))
+        if workers <= 1 or len(shards) <= 1:
+            for chunk in map(_generate_shard_star, shards):
+                written += out.write(chunk)
+        else:
+            with Pool(workers) as pool:
+                for chunk in pool.imap(_generate_shard_star, shards):
+                    written += out.write(chunk)
+        if not ndjson:
+            written += out.write(wrap("\n]}\n" if fmt == "conversations" else "\n}\n"))
+    return written
+
+
+def learn_from_files(paths, domain_path=None, nlu_path=None):
+    """Learn a :class:`ConversationModel` from recorded JSON files."""
+    conversations = []
+    for path in paths:
+        with open(path, "r") as f:
+            conversations.extend(iter_recorded_conversations(json.load(f)))
+    domain = _load_yaml(domain_path) if domain_path else None
+    nlu = _load_yaml(nlu_path) if nlu_path else None
+    return ConversationModel.learn(conversations, domain=domain, nlu=nlu)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic Rasa conversations.")
+    parser.add_argument("sources", nargs="+", help="Recorded conversation JSON files to learn from")
+    parser.add_argument("--domain", help="domain.yml providing intents and response texts")
+    parser.add_argument("--nlu", help="NLU training data providing user texts")
+    parser.add_argument("--output", "-o", required=True, help="Output file (.gz compresses)")
+    parser.add_argument("--count", "-n", type=int, default=100000)
+    parser.add_argument("--format", choices=FORMATS, default="conversations")
+    parser.add_argument("--ndjson", action="store_true", help="One JSON record per line")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE)
+    parser.add_argument("--days", type=int, default=30, help="Spread start times over N days")
+    parser.add_argument("--start-date", type=datetime.fromisoformat, default=None,
+                        help="First day of the window (default: N days ago); fix it for reproducible output")
+    args = parser.parse_args(argv)
+
+    model = learn_from_files(args.sources, args.domain, args.nlu)
+    start = time.perf_counter()
+    written = write_dataset(
+        model, args.output, args.count, seed=args.seed, fmt=args.format, ndjson=args.ndjson,
+        workers=args.workers, shard_size=args.shard_size, start_date=args.start_date, days=args.days,
+    )
+    elapsed = time.perf_counter() - start
+    print(
+        f"Wrote {args.count} conversations ({written / 1e6:.1f} MB) to {args.output} "
+        f"in {elapsed:.1f}s ({args.count / max(elapsed, 1e-9):.0f} conversations/s)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
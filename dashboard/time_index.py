@@ -0,0 +1,103 @@
+"""Conversation index sorted by start time, for date-range filters.
+
+:class:`TimeIndex` keeps the conversation rows of a ``ConversationTable``
+ordered by their int64 start epoch (the conversation timestamp, or its first
+message when there is none). A date filter is then two binary searches
+over ``starts`` and returns ``order[lo:hi]``, a view of the index instead of
+a scan of every conversation.
+
+Ranges are memoized per index, and :func:`index_for` keeps one index per
+data version, so Streamlit reruns with the same sidebar dates are free.
+"""
+
+import math
+from collections import OrderedDict
+from datetime import datetime, time, timedelta
+
+import numpy as np
+
+_INDEXES = OrderedDict()
+MAX_INDEXES = 2
+MAX_RANGES = 64
+
+
+def local_midnight(day):
+    """Epoch seconds of local midnight at the start of ``day``."""
+    return datetime.combine(day, time()).timestamp()
+
+
+class TimeIndex:
+    """Conversation rows sorted by start epoch.
+
+    Args:
+        epoch: Start time per conversation row in epoch seconds (NaN if unknown)
+        version: Data version the epochs were read from
+    """
+
+    def __init__(self, epoch, version=None):
+        epoch = np.asarray(epoch, dtype=np.float64)
+        rows = np.flatnonzero(~np.isnan(epoch))
+        # Flooring keeps comparisons against whole-second bounds exact
+        seconds = np.floor(epoch[rows]).astype(np.int64)
+        ordering = np.argsort(seconds, kind="stable")
+        self.order = rows[ordering]
+        self.starts = seconds[ordering]
+        self.version = version
+        self._ranges = OrderedDict()
+
+    @classmethod
+    def from_table(cls, table):
+        c = table.conversations
+        epoch = np.asarray(c["timestamp"])
+        epoch = np.where(np.isnan(epoch), np.asarray(c["start"]), epoch)
+        return cls(epoch, table.version)
+
+    def __len__(self):
+        return len(self.order)
+
+    def between(self, start, stop):
+        """Rows starting in ``[start, stop)`` epoch seconds, in time order."""
+        # Integer bounds: a float needle would cast all of ``starts`` to float
+        lo = np.searchsorted(self.starts, np.int64(math.ceil(start)), side="left")
+        hi = np.searchsorted(self.starts, np.int64(math.ceil(stop)), side="left")
+        return self.order[lo:hi]
+
+    def dates(self, start_date, end_date):
+        """Rows whose local start date is in ``[start_date, end_date]``.
+
+        Returns:
+            Read-only int64 view of ``order``, sorted by start time
+        """
+        key = (start_date, end_date)
+        rows = self._ranges.get(key)
+        if rows is not None:
+            self._ranges.move_to_end(key)
+            return rows
+        if start_date > end_date:
+            rows = self.order[:0]
+        else:
+            rows = self.between(local_midnight(start_date), local_midnight(end_date + timedelta(days=1)))
+        rows.flags.writeable = False
+        self._ranges[key] = rows
+        while len(self._ranges) > MAX_RANGES:
+            self._ranges.popitem(last=False)
+        return rows
+
+
+def index_for(table):
+    """Index for ``table``, reused while its data version is unchanged.
+
+    Tables without a version (not from ``columnar.open_table``) get a new one
+    every time.
+    """
+    if table.version is None:
+        return TimeIndex.from_table(table)
+    key = table.version
+    index = _INDEXES.get(key)
+    if index is None:
+        index = _INDEXES[key] = TimeIndex.from_table(table)
+        while len(_INDEXES) > MAX_INDEXES:
+            _INDEXES.popitem(last=False)
+    else:
+        _INDEXES.move_to_end(key)
+    return index
@@ -0,0 +1,375 @@
+"""Dashboard data straight from a Rasa SQL tracker store.
+
+Rasa's ``SQLTrackerStore`` keeps one row per event in an ``events`` table:
+``sender_id``, ``type_name``, ``timestamp``, ``intent_name``,
+``action_name`` and the event itself as JSON in ``data``.
+:class:`SQLTrackerSource` answers the dashboard's questions with SQL
+instead of exporting the store to a JSON dump first:
+
+* charts and key metrics (:meth:`~SQLTrackerSource.summary`,
+  :meth:`~SQLTrackerSource.daily_counts`, top user messages, actions and
+  intents, the duration histogram) are ``GROUP BY`` queries that return
+  only aggregates. It answers the same methods as
+  :class:`~dashboard.rollups.DailyRollup`, so the dashboard can use it in
+  the rollup's place;
+* the conversation table and viewer get a ``ConversationTable`` of the
+  date range only, built from events streamed with a server-side cursor.
+
+A conversation is one ``sender_id``, as in tracker-store dumps. Its time is
+its latest event (``latest_event_time``), its duration spans its user, bot
+and action events. A date range selects senders with an event in range,
+using an index on ``timestamp``, then keeps those whose latest event is in
+range, using an index on ``(sender_id, timestamp)``. See
+:func:`create_indexes`.
+
+The largest event id is the data version: :meth:`~SQLTrackerSource.poll`
+checks it, and query results are memoized until it moves.
+"""
+
+import json
+import logging
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import sqlalchemy as sa
+
+from .columnar import table_from_records
+from .metrics import OFFSET_STEP, ConversationMetrics, local_times
+from .rollups import DURATION_BUCKETS
+from .time_index import local_midnight
+
+logger = logging.getLogger(__name__)
+
+_SOURCES = OrderedDict()
+MAX_SOURCES = 2
+MAX_RESULTS = 32
+# Events fetched per round trip while streaming conversations
+STREAM_BATCH = 5000
+MESSAGE_EVENTS = ("user", "bot", "action")
+# Date ranges spanning at least this fraction of the store's events scan the
+# covering index once instead of seeking each sender with an event in range
+WIDE_RANGE = 0.5
+
+metadata = sa.MetaData()
+# Columns of Rasa's SQLTrackerStore ``events`` table
+events = sa.Table(
+    "events",
+    metadata,
+    sa.Column("id", sa.Integer, sa.Sequence("events_id_seq"), primary_key=True),
+    sa.Column("sender_id", sa.String(255), nullable=False, index=True),
+    sa.Column("type_name", sa.String(255), nullable=False),
+    sa.Column("timestamp", sa.Float),
+    sa.Column("intent_name", sa.String(255)),
+    sa.Column("action_name", sa.String(255)),
+    sa.Column("data", sa.Text),
+)
+INDEXES = (
+    sa.Index("ix_events_timestamp", events.c.timestamp),
+    # Covers the per-conversation aggregates: no table reads while grouping
+    sa.Index("ix_events_sender_id_timestamp_type_name", events.c.sender_id, events.c.timestamp,
+             events.c.type_name),
+)
+
+
+def create_indexes(engine):
+    """Create the indexes the dashboard's range queries use, if missing."""
+    for index in INDEXES:
+        index.create(engine, checkfirst=True)
+
+
+def missing_indexes(engine):
+    existing = {index["name"] for index in sa.inspect(engine).get_indexes("events")}
+    return [index.name for index in INDEXES if index.name not in existing]
+
+
+def insert_trackers(connection, trackers):
+    """Write ``(sender_id, tracker)`` pairs as rows of ``events``, as Rasa's SQLTrackerStore does."""
+    rows = []
+    for sender_id, tracker in trackers:
+        for event in tracker.get("events") or []:
+            intent = ((event.get("parse_data") or {}).get("intent") or {}).get("name")
+            rows.append({
+                "sender_id": sender_id,
+                "type_name": event.get("event"),
+                "timestamp": event.get("timestamp"),
+                "intent_name": intent,
+                "action_name": event.get("name"),
+                "data": json.dumps(event),
+            })
+    if rows:
+        connection.execute(events.insert(), rows)
+    return len(rows)
+
+
+def _json_text(dialect, column, key):
+    """Dialect-specific SQL for the string at ``key`` of a JSON text column."""
+    if dialect == "postgresql":
+        return sa.func.json_extract_path_text(sa.cast(column, sa.JSON), key)
+    if dialect in ("mysql", "mariadb"):
+        return sa.func.json_unquote(sa.func.json_extract(column, f"$.{key}"))
+    return sa.func.json_extract(column, f"$.{key}")
+
+
+def _quarter_hour(dialect, epoch):
+    """Quarter hours since the epoch; SQLite has no ``floor`` before 3.35."""
+    if dialect == "sqlite":
+        return sa.cast(epoch / OFFSET_STEP, sa.Integer)
+    return sa.func.floor(epoch / OFFSET_STEP)
+
+
+class SQLTrackerSource:
+    """Conversations of a Rasa SQL tracker store, queried in the database.
+
+    Args:
+        url: SQLAlchemy database URL of the tracker store
+        create: Create the dashboard's indexes (see :func:`create_indexes`)
+            instead of only warning when they are missing
+    """
+
+    def __init__(self, url, create=False):
+        self.url = url
+        self.engine = sa.create_engine(url)
+        self._dialect = self.engine.dialect.name
+        self._lock = threading.Lock()
+        self._results = OrderedDict()
+        if create:
+            create_indexes(self.engine)
+        else:
+            missing = missing_indexes(self.engine)
+            if missing:
+                logger.warning(f"Tracker store has no {', '.join(missing)}; date range queries will scan "
+                               f"the events table (set TRACKER_STORE_CREATE_INDEXES=1 to create them)")
+        self.version = None
+        self.poll()
+
+    def poll(self):
+        """Check for new events; returns how many ids were added since the last poll."""
+        with self.engine.connect() as connection:
+            latest = connection.execute(sa.select(sa.func.max(events.c.id))).scalar() or 0
+        with self._lock:
+            previous, self.version = self.version or 0, latest
+            if latest != previous:
+                self._results.clear()
+        # Fewer ids than before: the store was emptied and refilled
+        return latest - previous if latest >= previous else latest
+
+    def _memoized(self, key, compute):
+        with self._lock:
+            key = (self.version,) + key
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key]
+        value = compute()
+        with self._lock:
+            self._results[key] = value
+            while len(self._results) > MAX_RESULTS:
+                self._results.popitem(last=False)
+        return value
+
+    def _query(self, statement):
+        with self.engine.connect() as connection:
+            return connection.execute(statement).all()
+
+    def __len__(self):
+        return self._memoized(("len",), lambda: self._query(
+            sa.select(sa.func.count(sa.distinct(events.c.sender_id))))[0][0])
+
+    def _span(self):
+        """Timestamps of the first and last events: both ends of the timestamp index."""
+        ts = events.c.timestamp
+        return self._memoized(("span",), lambda: tuple(self._query(sa.select(sa.func.min(ts), sa.func.max(ts)))[0]))
+
+    def _range(self, start_date, end_date):
+        """``(lo, hi, everything, wide)`` for a date range: epoch bounds, whether
+        it holds every event, and whether it spans most of them."""
+        lo, hi = local_midnight(start_date), local_midnight(end_date + timedelta(days=1))
+        first, last = self._span()
+        if first is None:
+            return lo, hi, False, False
+        everything = lo <= first and last < hi
+        return lo, hi, everything, everything or hi - lo >= WIDE_RANGE * (last - first)
+
+    def conversations_query(self, start_date, end_date, details=True):
+        """Subquery with one row per conversation of the date range.
+
+        Columns: ``sender_id``, ``latest`` (time of the latest event) and,
+        with ``details``, ``duration`` (first to last message) and
+        ``user_messages``.
+        """
+        lo, hi, _, wide = self._range(start_date, end_date)
+        ts, kind = events.c.timestamp, events.c.type_name
+        columns = [events.c.sender_id, sa.func.max(ts).label("latest")]
+        if details:
+            message_ts = sa.case((kind.in_(MESSAGE_EVENTS), ts))
+            columns += [
+                sa.func.coalesce(sa.func.max(message_ts) - sa.func.min(message_ts), 0).label("duration"),
+                sa.func.sum(sa.case((kind == "user", 1), else_=0)).label("user_messages"),
+            ]
+        statement = (
+            sa.select(*columns)
+            .group_by(events.c.sender_id)
+            .having(sa.and_(sa.func.max(ts) >= lo, sa.func.max(ts) < hi))
+        )
+        if not wide:
+            # Only senders with an event in range can have their latest there
+            statement = statement.where(events.c.sender_id.in_(sa.select(events.c.sender_id).where(ts >= lo, ts < hi)))
+        return statement.subquery("conversations")
+
+    def _senders(self, start_date, end_date):
+        """Filter of events to the conversations of the range (none if it holds every event)."""
+        if self._range(start_date, end_date)[2]:
+            return sa.true()
+        conversations = self.conversations_query(start_date, end_date, details=False)
+        return events.c.sender_id.in_(sa.select(conversations.c.sender_id))
+
+    def summary(self, start_date, end_date):
+        def compute():
+            conversations = self.conversations_query(start_date, end_date)
+            total, user_messages, duration = self._query(sa.select(
+                sa.func.count(), sa.func.sum(conversations.c.user_messages), sa.func.sum(conversations.c.duration),
+            ))[0]
+            return {
+                "total": total,
+                "avg_user_messages": float(user_messages / total) if total else 0.0,
+                "avg_duration": float(duration / total) if total else 0.0,
+                # Feedback is not part of the events table
+                "has_feedback": False,
+            }
+
+        return self._memoized(("summary", start_date, end_date), compute)
+
+    def daily_counts(self, start_date, end_date):
+        """Conversations per local day as a ``date``/``count`` frame sorted by date."""
+        def compute():
+            conversations = self.conversations_query(start_date, end_date, details=False)
+            # UTC offsets are constant within a quarter hour: count per quarter
+            # hour in SQL, then map each quarter to its local date
+            quarter = _quarter_hour(self._dialect, conversations.c.latest).label("quarter")
+            rows = self._query(sa.select(quarter, sa.func.count()).group_by(quarter))
+            quarters = np.array([row[0] for row in rows], dtype=np.float64)
+            counts = np.array([row[1] for row in rows], dtype=np.int64)
+            days = local_times(quarters * OFFSET_STEP).to_numpy().astype("datetime64[D]")
+            dates, inverse = np.unique(days, return_inverse=True)
+            return pd.DataFrame({
+                "date": dates.astype(object),
+                "count": np.bincount(inverse, weights=counts, minlength=len(dates)).astype(np.int64),
+            })
+
+        return self._memoized(("daily", start_date, end_date), compute)
+
+    def duration_histogram(self, start_date, end_date):
+        """Conversations per duration bucket, labelled by upper bound in seconds."""
+        def compute():
+            conversations = self.conversations_query(start_date, end_date)
+            duration = conversations.c.duration
+            bucket = sa.case(*[(duration <= bound, i) for i, bound in enumerate(DURATION_BUCKETS)],
+                             else_=len(DURATION_BUCKETS)).label("bucket")
+            counts = np.zeros(len(DURATION_BUCKETS) + 1, dtype=np.int64)
+            for index, count in self._query(sa.select(bucket, sa.func.count()).group_by(bucket)):
+                counts[index] = count
+            labels = [f"<= {bound}s" for bound in DURATION_BUCKETS] + [f"> {DURATION_BUCKETS[-1]}s"]
+            return pd.DataFrame({"Duration": labels, "Count": counts})
+
+        return self._memoized(("durations", start_date, end_date), compute)
+
+    def top(self, name, start_date, end_date, n=10):
+        """``(values, counts, errors)`` of the ``n`` most frequent ``text``/``action``/``intent`` values.
+
+        Counts are exact; ``errors`` is all zeros, as for an exact rollup.
+        """
+        def compute():
+            kind, value = {
+                "text": ("user", _json_text(self._dialect, events.c.data, "text")),
+                "action": ("action", events.c.action_name),
+                "intent": ("user", events.c.intent_name),
+            }[name]
+            value = value.label("value")
+            count = sa.func.count().label("count")
+            rows = self._query(
+                sa.select(value, count)
+                .where(self._senders(start_date, end_date), events.c.type_name == kind, value.isnot(None))
+                .group_by(value)
+                .order_by(count.desc(), value)
+                .limit(n)
+            )
+            counts = np.array([row[1] for row in rows], dtype=np.int64)
+            return pd.Index([row[0] for row in rows], dtype=object), counts, np.zeros(len(rows), dtype=np.int64)
+
+        if start_date > end_date:
+            return pd.Index([], dtype=object), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return self._memoized(("top", name, start_date, end_date, n), compute)
+
+    def _top_frame(self, name, column, start_date, end_date, n):
+        values, counts, _ = self.top(name, start_date, end_date, n)
+        frame = pd.DataFrame({column: values, "Count": counts})
+        frame.attrs["max_error"] = 0
+        return frame
+
+    def top_user_messages(self, start_date, end_date, n=10):
+        return self._top_frame("text", "Message", start_date, end_date, n)
+
+    def top_actions(self, start_date, end_date, n=10):
+        return self._top_frame("action", "Action", start_date, end_date, n)
+
+    def top_intents(self, start_date, end_date, n=10):
+        return self._top_frame("intent", "Intent", start_date, end_date, n)
+
+    def iter_trackers(self, start_date, end_date):
+        """Yield ``(sender_id, tracker)`` for each conversation of the range.
+
+        Events are read in ``sender_id`` order through a server-side cursor,
+        so only one batch of rows is held at a time.
+        """
+        statement = (
+            sa.select(events.c.sender_id, events.c.data)
+            .where(self._senders(start_date, end_date))
+            .order_by(events.c.sender_id, events.c.id)
+        )
+        sender, tracker = None, None
+        with self.engine.connect() as connection:
+            result = connection.execution_options(stream_results=True).execute(statement)
+            for rows in result.partitions(STREAM_BATCH):
+                for sender_id, data in rows:
+                    if sender_id != sender:
+                        if tracker is not None:
+                            yield sender, tracker
+                        sender, tracker = sender_id, {"sender_id": sender_id, "events": []}
+                    event = json.loads(data) if data else {}
+                    tracker["events"].append(event)
+                    timestamp = event.get("timestamp")
+                    if isinstance(timestamp, (int, float)):
+                        tracker["latest_event_time"] = max(tracker.get("latest_event_time", timestamp), timestamp)
+        if tracker is not None:
+            yield sender, tracker
+
+    def table(self, start_date, end_date):
+        """``ConversationTable`` of the conversations in the range."""
+        def compute():
+            table = table_from_records(trackers=self.iter_trackers(start_date, end_date))
+            table.version = f"{self.url}@{self.version}:{start_date}:{end_date}"
+            return table
+
+        return self._memoized(("table", start_date, end_date), compute)
+
+    def tiers(self, start_date, end_date):
+        """``(table, metrics)`` of the range, for the conversation browser."""
+        def compute():
+            table = self.table(start_date, end_date)
+            return [(table, ConversationMetrics(table))] if len(table) else []
+
+        return self._memoized(("tiers", start_date, end_date), compute)
+
+
+def tracker_store_for(url, create=False):
+    """Source for the tracker store at ``url``, shared by every session of the process."""
+    source = _SOURCES.get(url)
+    if source is None:
+        source = _SOURCES[url] = SQLTrackerSource(url, create)
+        while len(_SOURCES) > MAX_SOURCES:
+            _SOURCES.popitem(last=False)
+    else:
+        _SOURCES.move_to_end(url)
+    return source
@@ -1,60 +1,94 @@
 import streamlit as st
-import pandas as pd
-import altair as alt
-from datetime import datetime
-
-def show_conversation_table(conversations):
-    table_data = []
-    for i, conv in enumerate(conversations):
-        table_data.append({
-            "ID": f"c{i+1}",
-            "User": conv.get("user_id", "Unknown User"),
-            "Timestamp": conv.get("timestamp", datetime.now()),
-            "Duration": conv.get("duration", 0),
-            "Num Messages": len(conv.get("messages", [])),
-        })
-    conv_df = pd.DataFrame(table_data)
-    st.dataframe(conv_df, use_container_width=True)
-
-def show_conversation_viewer(conversations):
+
+from .browser import SORT_COLUMNS
+
+PAGE_SIZE = 50
+# Messages rendered per st.markdown call, and per "Show more" click
+CHUNK_SIZE = 50
+MESSAGE_LABELS = {"user": "User", "bot": "Bot", "action": "Action"}
+
+
+def conversation_controls(key="conversations"):
+    """Search and sort widgets; returns ``(search, sort, descending)`` for ``browser.query``."""
+    col1, col2, col3 = st.columns([3, 2, 1])
+    search = col1.text_input("Search conversation or user ID", key=f"{key}_search")
+    sort = col2.selectbox("Sort by", list(SORT_COLUMNS), key=f"{key}_sort")
+    descending = col3.checkbox("Descending", key=f"{key}_descending")
+    return search, sort, descending
+
+
+def show_conversation_table(results, page_size=PAGE_SIZE, key="conversations"):
+    """One page of ``results``; returns the positions on it."""
+    if not len(results):
+        st.info("No conversations found in the selected date range.")
+        return range(0)
+    pages = results.num_pages(page_size)
+    page_key = f"{key}_page"
+    # The results may have shrunk since the page was chosen
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key=page_key)
+    st.caption(f"{len(results)} conversations")
+    st.dataframe(results.page(page - 1, page_size), use_container_width=True, hide_index=True)
+    return range((page - 1) * page_size, min(page * page_size, len(results)))
+
+
+def _show_more(shown_key, chunk_size):
+    st.session_state[shown_key] += chunk_size
+
+
+def show_conversation_viewer(results, positions, key="conversations", chunk_size=CHUNK_SIZE):
+    """Viewer for one conversation of the current page, decoded when selected."""
     st.subheader("Conversation Viewer")
-    if not conversations:
+    if not len(positions):
         st.info("No conversations found in the selected date range.")
         return
-    conv_ids = [f"c{i+1}" for i in range(len(conversations))]
-    conv_map = dict(zip(conv_ids, range(len(conversations))))
-    selected_id = st.selectbox(
+    position = st.selectbox(
         "Select conversation to view:",
-        conv_ids,
-        format_func=lambda x: f"Conversation {conv_map[x]+1}",
+        positions,
+        format_func=lambda x: f"Conversation {x+1}",
+        key=f"{key}_viewer",
     )
-    if selected_id and selected_id in conv_map:
-        selected_index = conv_map[selected_id]
-        if 0 <= selected_index < len(conversations):
-            selected_conv = conversations[selected_index]
-            user_id = selected_conv.get("user_id", selected_conv.get("sender_id", "Unknown User"))
-            st.write(f"User: {user_id}")
-            timestamp = selected_conv.get("timestamp", datetime.now())
-            st.write(f"Time: {timestamp}")
-            duration = selected_conv.get("duration", 0)
-            duration_display = (
-                f"{duration:.1f} seconds" if duration < 60 else f"{duration/60:.1f} minutes"
-            )
-            st.write(f"Duration: {duration_display}")
-            if "feedback" in selected_conv:
-                st.write(f"Rating: {selected_conv['feedback'].get('rating', 'N/A')}/5")
-                if "comments" in selected_conv["feedback"] and selected_conv["feedback"]["comments"]:
-                    st.write(f"Comments: {selected_conv['feedback']['comments']}")
-            st.write("### Conversation History")
-            if "messages" in selected_conv:
-                for msg in selected_conv["messages"]:
-                    msg_type = msg.get("type", msg.get("role", ""))
-                    msg_text = msg.get("text", msg.get("content", ""))
-                    if msg_type == "user" or msg_type == "human":
-                        st.markdown(f"**User:** {msg_text}")
-                    elif msg_type == "bot" or msg_type == "assistant":
-                        st.markdown(f"**Bot:** {msg_text}")
-                    elif msg_type == "action":
-                        st.markdown(f"**Action:** {msg_text}")
-            else:
-                st.info("No message history available for this conversation")
+    if position is None:
+        return
+    table, metrics, row = results.locate(position)
+
+    # Start from the first chunk whenever another conversation is selected
+    shown_key, viewing_key = f"{key}_shown", f"{key}_viewing"
+    if st.session_state.get(viewing_key) != (table.version, id(table), row):
+        st.session_state[viewing_key] = (table.version, id(table), row)
+        st.session_state[shown_key] = chunk_size
+    shown = st.session_state[shown_key]
+    selected_conv = table.conversation(row, 0, shown)
+    total = table.message_count(row)
+
+    st.write(f"User: {selected_conv.get('user_id') or 'Unknown User'}")
+    st.write(f"Time: {metrics.conversations['time'].iloc[row]}")
+    duration = selected_conv.get("duration", 0)
+    duration_display = f"{duration:.1f} seconds" if duration < 60 else f"{duration/60:.1f} minutes"
+    st.write(f"Duration: {duration_display}")
+    if "feedback" in selected_conv:
+        st.write(f"Rating: {selected_conv['feedback'].get('rating', 'N/A')}/5")
+        if selected_conv["feedback"].get("comments"):
+            st.write(f"Comments: {selected_conv['feedback']['comments']}")
+
+    st.write("### Conversation History")
+    messages = selected_conv["messages"]
+    if not messages:
+        st.info("No message history available for this conversation")
+        return
+    for start in range(0, len(messages), chunk_size):
+        lines = [
+            f"**{MESSAGE_LABELS[msg['type']]}:** {msg['text']}"
+            for msg in messages[start:start + chunk_size]
+            if msg["type"] in MESSAGE_LABELS
+        ]
+        if lines:
+            st.markdown("\n\n".join(lines))
+    if shown < total:
+        st.button(
+            f"Show more ({total - shown} messages left)",
+            on_click=_show_more,
+            args=(shown_key, chunk_size),
+            key=f"{key}_more",
+        )
@@ -1,15 +1,22 @@
 #!/usr/bin/env python3
 """
-Docker entry point for the Customer Care AI application.
-This script serves as the main entry point for the Docker container.
+Docker entry point for the Customer Care AI API.
+
+Starts the FastAPI app (``backend.rasa.api.main:app``) under the pre-forking
+launcher in ``backend/rasa/api/server.py``: workers sized from usable CPUs
+and cgroup limits, uvloop/httptools when installed, preloaded app, graceful
+worker recycling and zero-downtime reloads on SIGHUP. It listens on
+``API_PORT`` (default 8000) so it does not clash with Rasa on 5005; see
+``--help`` for all options.
 """
-import uvicorn
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from backend.rasa.api.server import main  # noqa: E402
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "backend.api.main:app",
-        host="0.0.0.0",
-        port=5005,  # Matches the PORT environment variable in Dockerfile
-        reload=False,  # Disable auto-reload in production
-        workers=4,
-    )
+    main()
@@ -1,7 +1,48 @@
 import os
 import sys
+from datetime import datetime
+
+import pytest
 
 # Ensure project root is on sys.path
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
+
+from dashboard.columnar import open_table  # noqa: E402
+from dashboard.synthetic import learn_from_files, write_dataset  # noqa: E402
+
+RASA_DIR = os.path.join(PROJECT_ROOT, "backend", "rasa")
+SAMPLE_CONVERSATIONS = os.path.join(RASA_DIR, "tests", "rasa_conversations.json")
+SYNTHETIC_START = datetime(2025, 3, 1)
+
+
+@pytest.fixture(scope="session")
+def model():
+    """Synthetic conversation model learnt from the sample conversations."""
+    return learn_from_files([SAMPLE_CONVERSATIONS])
+
+
+@pytest.fixture(scope="session")
+def write_conversations(model, tmp_path_factory):
+    """``write(count, seed, path=None, **options)`` writes a synthetic dump and returns its path.
+
+    Conversations start on 2025-03-01 and span 20 days unless ``start_date``
+    and ``days`` say otherwise; other options go to ``write_dataset``.
+    ``path`` defaults to a new temporary file.
+    """
+    def write(count, seed, path=None, **options):
+        if path is None:
+            name = "conversations.ndjson" if options.get("ndjson") else "conversations.json"
+            path = tmp_path_factory.mktemp("synthetic") / name
+        options = dict({"workers": 1, "start_date": SYNTHETIC_START, "days": 20}, **options)
+        write_dataset(model, str(path), count, seed=seed, **options)
+        return str(path)
+
+    return write
+
+
+@pytest.fixture(scope="session", params=["conversations", "tracker"])
+def table(request, write_conversations):
+    """500 synthetic conversations as a ``ConversationTable``, read from each dump format."""
+    return open_table(write_conversations(500, seed=5, fmt=request.param, shard_size=200))
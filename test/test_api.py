@@ -1,6 +1,6 @@
 from fastapi.testclient import TestClient
 
-from backend.api.main import app
+from backend.rasa.api.main import app
 
 
 def test_me_endpoint_returns_anonymous():
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.rasa.api import main
+from backend.rasa.api.passwords import (
+    SCHEME_PBKDF2,
+    HashingRateLimited,
+    PasswordHasher,
+    hash_password,
+    verify_password,
+)
+from backend.rasa.api.users import UserStore
+
+
+@pytest.fixture
+def client(tmp_path):
+    users = UserStore(str(tmp_path / "users.db"))
+    hasher = PasswordHasher(workers=1, scrypt_n=2 ** 8)
+    main.app.dependency_overrides[main.get_user_store] = lambda: users
+    main.app.dependency_overrides[main.get_password_hasher] = lambda: hasher
+    yield TestClient(main.app)
+    main.app.dependency_overrides.clear()
+    hasher.shutdown()
+
+
+def test_register_then_login(client):
+    response = client.post(
+        "/register", json={"name": "Ada", "email": "ada@example.com", "password": "s3cret-pass"}
+    )
+    assert response.status_code == 201
+    assert response.json()["token_type"] == "bearer"
+
+    response = client.post("/login", json={"email": "ADA@example.com", "password": "s3cret-pass"})
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    me = client.get("/me", headers={"Authorization": f"Bearer {token}"}).json()
+    assert me["email"] == "ada@example.com"
+    assert me["name"] == "Ada"
+
+
+def test_duplicate_registration_is_rejected(client):
+    payload = {"name": "Ada", "email": "ada@example.com", "password": "s3cret-pass"}
+    assert client.post("/register", json=payload).status_code == 201
+    assert client.post("/register", json=payload).status_code == 409
+
+
+def test_login_rejects_bad_credentials(client):
+    client.post("/register", json={"name": "Ada", "email": "ada@example.com", "password": "right"})
+    assert client.post("/login", json={"email": "ada@example.com", "password": "wrong"}).status_code == 401
+    assert client.post("/login", json={"email": "nobody@example.com", "password": "x"}).status_code == 401
+
+
+def test_rate_limited_hashing_returns_429(tmp_path):
+    class BusyHasher:
+        async def verify(self, *args):
+            raise HashingRateLimited("testclient")
+
+    main.app.dependency_overrides[main.get_user_store] = lambda: UserStore(str(tmp_path / "u.db"))
+    main.app.dependency_overrides[main.get_password_hasher] = lambda: BusyHasher()
+    try:
+        response = TestClient(main.app).post("/login", json={"email": "a@example.com", "password": "x"})
+    finally:
+        main.app.dependency_overrides.clear()
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "1"
+
+
+@pytest.mark.parametrize("scheme", ["scrypt", SCHEME_PBKDF2])
+def test_hash_round_trip(scheme):
+    encoded = hash_password("pw", scheme=scheme, scrypt_n=2 ** 8, pbkdf2_iterations=1000)
+    assert encoded.startswith(scheme + "$")
+    assert verify_password("pw", encoded)
+    assert not verify_password("other", encoded)
+    assert not verify_password("pw", "garbage")
+
+
+def test_per_client_limit_rejects_extra_concurrent_jobs():
+    hasher = PasswordHasher(workers=1, max_per_client=1)
+
+    async def burst():
+        return await asyncio.gather(
+            hasher.hash("a", client="1.2.3.4"),
+            hasher.hash("b", client="1.2.3.4"),
+            hasher.hash("c", client="5.6.7.8"),
+            return_exceptions=True,
+        )
+
+    try:
+        first, second, other = asyncio.run(burst())
+    finally:
+        hasher.shutdown()
+    assert first.startswith("scrypt$")
+    assert isinstance(second, HashingRateLimited)
+    assert other.startswith("scrypt$")
@@ -0,0 +1,89 @@
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+
+from dashboard import browser
+from dashboard.columnar import table_from_records
+from dashboard.metrics import ConversationMetrics
+
+START, END = date(2025, 3, 3), date(2025, 3, 15)
+
+
+@pytest.fixture(scope="module")
+def tiers(table):
+    return [(table, ConversationMetrics(table))]
+
+
+@pytest.fixture(scope="module")
+def split_tiers(table):
+    # Same conversations as a large base table and a small appended segment
+    conversations = table.to_conversations()
+    parts = (conversations[:420], conversations[420:])
+    return [(t, ConversationMetrics(t)) for t in (table_from_records(part) for part in parts)]
+
+
+def _in_range(table):
+    return [(row, c) for row, c in enumerate(table.to_conversations())
+            if START <= datetime.fromtimestamp(c["timestamp"]).date() <= END]
+
+
+def _values(results, column):
+    return [results.locate(p)[1].conversations[column].iloc[results.locate(p)[2]] for p in range(len(results))]
+
+
+def test_pages_cover_the_range_in_time_order(table, tiers):
+    results = browser.query(tiers, START, END)
+    assert results.rows.tolist() == tiers[0][1].select(START, END).tolist()
+
+    pages = [results.page(number, 40) for number in range(results.num_pages(40))]
+    assert [len(page) for page in pages[:-1]] == [40] * (len(pages) - 1)
+    assert 0 < len(pages[-1]) <= 40
+    frame = np.concatenate([page["ID"].to_numpy() for page in pages])
+    expected = [table.string("conversations", "conversation_id", row) for row in results.rows.tolist()]
+    assert frame.tolist() == expected
+    assert pages[1]["#"].tolist() == list(range(41, 81))
+    assert list(pages[0].columns) == browser.PAGE_COLUMNS
+    assert len(results.page(results.num_pages(40), 40)) == 0
+
+
+@pytest.mark.parametrize("column", ["conversation_id", "user_id"])
+def test_search_matches_id_prefixes(table, tiers, column):
+    conversations = _in_range(table)
+    value = conversations[len(conversations) // 2][1][column]
+    for prefix in (value, value[:len(value) // 2], value[:1], "no-such-id"):
+        expected = sorted(row for row, c in conversations
+                          if c["conversation_id"].startswith(prefix) or (c["user_id"] or "").startswith(prefix))
+        results = browser.query(tiers, START, END, search=f" {prefix} ")
+        assert sorted(results.rows.tolist()) == expected
+
+
+@pytest.mark.parametrize("sort", list(browser.SORT_COLUMNS))
+@pytest.mark.parametrize("descending", [False, True])
+def test_sort_orders_every_tier_together(tiers, split_tiers, sort, descending):
+    column = browser.SORT_COLUMNS[sort]
+    for layout in (tiers, split_tiers):
+        results = browser.query(layout, START, END, sort=sort, descending=descending)
+        assert len(results) == len(browser.query(tiers, START, END))
+        values = _values(results, column)
+        present = [v for v in values if v == v and v is not None]
+        # Missing values come last whichever the direction
+        assert values[:len(present)] == present
+        assert present == sorted(present, reverse=descending)
+
+
+def test_queries_are_memoized(tiers):
+    results = browser.query(tiers, START, END, search="a", sort="User")
+    assert browser.query(tiers, START, END, search="a", sort="User") is results
+    assert browser.query(tiers, START, END, search="a", sort="ID") is not results
+
+
+def test_conversation_slices(table):
+    row = int(np.argmax(np.diff(table.conversations["message_start"])))
+    full = table.conversation(row)
+    assert table.message_count(row) == len(full["messages"]) > 3
+    assert table.conversation(row, 0, 2)["messages"] == full["messages"][:2]
+    assert table.conversation(row, 2)["messages"] == full["messages"][2:]
+    assert table.conversation(row, 5, 2)["messages"] == []
+    assert {k: v for k, v in table.conversation(row, 0, 0).items() if k != "messages"} == \
+        {k: v for k, v in full.items() if k != "messages"}
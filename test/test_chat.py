@@ -0,0 +1,177 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from backend.rasa.api import main
+from backend.rasa.api.chat import RasaClient, RasaOverloaded
+from backend.rasa.api.streaming import SlowConsumer, relay
+
+
+class StubRasaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.payloads.append(payload)
+        if self.path.endswith("?stream=true"):
+            self._stream(payload)
+            return
+        if payload["message"] == "slow":
+            time.sleep(0.5)
+        status = 500 if payload["message"] == "boom" else 200
+        body = json.dumps([{"recipient_id": payload["sender"], "text": f"echo: {payload['message']}"}]).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, payload):
+        # Like Rasa's REST channel: one JSON line per message, written as uttered
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i in range(3):
+            if i == 1:
+                # Hold back the rest until the test has seen the first reply
+                self.server.release.wait(5)
+            line = json.dumps({"recipient_id": payload["sender"], "text": f"{payload['message']} {i}"}) + "\n"
+            self.wfile.write(f"{len(line):x}\r\n{line}\r\n".encode())
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_rasa():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubRasaHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.payloads = []
+    server.release = threading.Event()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _client(rasa):
+    main.app.dependency_overrides[main.get_rasa_client] = lambda: rasa
+    return TestClient(main.app)
+
+
+@pytest.fixture(autouse=True)
+def clear_overrides():
+    yield
+    main.app.dependency_overrides.clear()
+
+
+def test_chat_is_proxied_over_kept_alive_connections(stub_rasa):
+    client = _client(RasaClient(f"http://127.0.0.1:{stub_rasa.server_port}", pool_shards=2))
+    with client:
+        for i in range(8):
+            response = client.post("/chat", json={"message": f"hi {i}", "sender": "s1", "metadata": {"a": 1}})
+            assert response.status_code == 200
+            assert response.json() == {"sender": "s1", "messages": [{"recipient_id": "s1", "text": f"echo: hi {i}"}]}
+    # One connection per pool shard, reused for every message
+    assert stub_rasa.connections == 2
+    assert stub_rasa.payloads[0] == {"sender": "s1", "message": "hi 0", "metadata": {"a": 1}}
+
+
+def test_authenticated_users_chat_as_themselves(stub_rasa):
+    client = _client(RasaClient(f"http://127.0.0.1:{stub_rasa.server_port}"))
+    token = main.tokens.issue({"id": "user-7", "email": "u7@example.com"})
+    response = client.post(
+        "/chat", json={"message": "hello", "sender": "someone-else"}, headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.json()["sender"] == "user-7"
+
+
+def test_upstream_failures_map_to_gateway_errors(stub_rasa):
+    client = _client(RasaClient(f"http://127.0.0.1:{stub_rasa.server_port}", timeout=0.1))
+    assert client.post("/chat", json={"message": "boom"}).status_code == 502
+    assert client.post("/chat", json={"message": "slow"}).status_code == 504
+    assert client.post("/chat", json={"message": "  "}).status_code == 400
+
+
+def test_unreachable_rasa_returns_502():
+    client = _client(RasaClient("http://127.0.0.1:9", connect_timeout=0.5))
+    assert client.post("/chat", json={"message": "hi"}).status_code == 502
+
+
+def test_concurrency_is_bounded(stub_rasa):
+    rasa = RasaClient(f"http://127.0.0.1:{stub_rasa.server_port}", max_concurrency=1, queue_timeout=0.1)
+
+    async def burst():
+        try:
+            return await asyncio.gather(rasa.send("a", "slow"), rasa.send("b", "fast"), return_exceptions=True)
+        finally:
+            await rasa.aclose()
+
+    slow, rejected = asyncio.run(burst())
+    assert slow[0]["text"] == "echo: slow"
+    assert isinstance(rejected, RasaOverloaded)
+
+
+def test_websocket_streams_each_reply_before_the_next_is_produced(stub_rasa):
+    client = _client(RasaClient(f"http://127.0.0.1:{stub_rasa.server_port}"))
+    with client.websocket_connect("/chat/ws") as ws:
+        ws.send_json({"message": "hi", "sender": "s1"})
+        first = ws.receive_json()
+        assert first == {"type": "message", "message": {"recipient_id": "s1", "text": "hi 0"}}
+        stub_rasa.release.set()
+        assert ws.receive_json()["message"]["text"] == "hi 1"
+        assert ws.receive_json()["message"]["text"] == "hi 2"
+        assert ws.receive_json() == {"type": "done", "count": 3}
+        ws.send_json({"message": ""})
+        assert ws.receive_json()["status"] == 400
+
+
+def test_websocket_rejects_invalid_tokens(stub_rasa):
+    client = _client(RasaClient(f"http://127.0.0.1:{stub_rasa.server_port}"))
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with client.websocket_connect("/chat/ws?token=garbage") as ws:
+            ws.receive_json()
+    assert exc.value.code == 1008
+
+
+def test_websocket_reports_upstream_errors():
+    client = _client(RasaClient("http://127.0.0.1:9", connect_timeout=0.5))
+    with client.websocket_connect("/chat/ws") as ws:
+        ws.send_json({"message": "hi"})
+        assert ws.receive_json()["status"] == 502
+
+
+def test_server_sent_events(stub_rasa):
+    stub_rasa.release.set()
+    client = _client(RasaClient(f"http://127.0.0.1:{stub_rasa.server_port}"))
+    with client.stream("POST", "/chat/stream", json={"message": "hi", "sender": "s1"}) as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [line for line in response.iter_lines() if line.startswith("event:")]
+    assert events == ["event: message"] * 3 + ["event: done"]
+
+
+def test_slow_consumers_are_disconnected():
+    async def replies():
+        for i in range(3):
+            yield {"text": str(i)}
+
+    async def stuck(reply):
+        await asyncio.sleep(1)
+
+    with pytest.raises(SlowConsumer):
+        asyncio.run(relay(replies(), stuck, send_timeout=0.05))
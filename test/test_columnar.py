@@ -0,0 +1,143 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from dashboard import columnar
+from dashboard.columnar import MESSAGE_TYPES, build_table, open_table
+from dashboard.data_loader import load_conversation_data, load_conversation_table
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "..", "backend", "rasa", "tests", "rasa_conversations.json")
+
+EXPORT = {
+    "conversations": [
+        {"conversation_id": "c1", "user_id": "u1", "timestamp": "2025-06-01T10:00:00", "duration": 30,
+         "feedback": {"rating": 4, "comments": "quick"},
+         "messages": [{"type": "user", "text": "Where is my order?", "timestamp": 1_748_772_000.0,
+                       "intent": "order_status", "confidence": 0.9},
+                      {"type": "bot", "text": "Checking.", "action": "action_check_order_status"}]},
+        {"user_id": "u2", "messages": []},
+    ]
+}
+TRACKERS = {
+    "_default": {
+        "1": {"sender_id": "s1", "latest_event_time": 1_748_772_010.0, "events": [
+            {"event": "action", "name": "action_listen", "timestamp": 1_748_772_000.0},
+            {"event": "user", "text": "hi", "timestamp": 1_748_772_001.0,
+             "parse_data": {"intent": {"name": "greet", "confidence": 0.99}}},
+            {"event": "bot", "text": "Hello!", "timestamp": 1_748_772_004.0},
+        ]},
+    },
+    "2": {"sender_id": "s2", "events": [{"event": "user", "text": "bye", "timestamp": 1_748_772_100.0}]},
+}
+
+
+def write(tmp_path, name, document):
+    path = tmp_path / name
+    path.write_text(json.dumps(document))
+    return str(path)
+
+
+def test_export_conversations_round_trip(tmp_path):
+    table = build_table(write(tmp_path, "export.json", EXPORT))
+    assert len(table) == 2 and table.num_messages == 2
+    first, second = table.to_conversations()
+    assert first["conversation_id"] == "c1" and first["user_id"] == "u1"
+    assert first["feedback"] == {"rating": 4.0, "comments": "quick"}
+    assert first["duration"] == 30.0
+    assert first["messages"][0] == {"type": "user", "text": "Where is my order?", "intent": "order_status",
+                                    "confidence": 0.9, "timestamp": 1_748_772_000.0}
+    assert first["messages"][1] == {"type": "bot", "text": "Checking.", "action": "action_check_order_status"}
+    assert second == {"conversation_id": "u2", "user_id": "u2", "messages": [], "duration": 0.0}
+    assert table.conversation(0) == first
+
+
+def test_tracker_entries_are_flattened(tmp_path):
+    table = build_table(write(tmp_path, "trackers.json", TRACKERS))
+    # Only top-level tracker entries are read, as by the dashboard loaders
+    assert len(table) == 1
+    conv = table.conversation(0)
+    assert conv["user_id"] == "s2" and conv["timestamp"] == 1_748_772_100.0
+    assert table.messages["type"].tolist() == [MESSAGE_TYPES.index("user")]
+
+    table = build_table(write(tmp_path, "default.json", TRACKERS["_default"]))
+    conv = table.conversation(0)
+    assert [(m["type"], m["text"]) for m in conv["messages"]] == [
+        ("action", "action_listen"), ("user", "hi"), ("bot", "Hello!")]
+    assert conv["messages"][1]["intent"] == "greet"
+    assert conv["timestamp"] == 1_748_772_010.0 and conv["duration"] == 4.0
+
+
+def test_conversations_array_wins_over_trackers():
+    table = build_table(SAMPLE)
+    with open(SAMPLE) as f:
+        expected = json.load(f)["conversations"]
+    assert len(table) == len(expected)
+    assert [c["conversation_id"] for c in table.to_conversations()] == [c["conversation_id"] for c in expected]
+
+
+def test_cache_is_memory_mapped_and_reused(tmp_path, monkeypatch):
+    path = write(tmp_path, "export.json", EXPORT)
+    built = open_table(path)
+    assert os.path.isdir(path + ".columns")
+    assert isinstance(built.messages["timestamp"], np.memmap)
+
+    monkeypatch.setattr(columnar, "build_table", lambda *args: pytest.fail("cache was rebuilt"))
+    cached = open_table(path)
+    assert cached.to_conversations() == built.to_conversations()
+
+    # Same bytes, new mtime: re-hashed and re-stamped instead of rebuilt
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    open_table(path)
+    with open(os.path.join(path + ".columns", "manifest.json")) as f:
+        assert json.load(f)["mtime_ns"] == stat.st_mtime_ns + 10**9
+
+
+@pytest.mark.parametrize("change", ["resize", "same_size"])
+def test_cache_is_rebuilt_when_the_source_changes(tmp_path, change):
+    path = write(tmp_path, "export.json", EXPORT)
+    assert open_table(path).string("conversations", "user_id", 0) == "u1"
+    text = open(path).read()
+    text = text.replace('"u1"', '"user-1"' if change == "resize" else '"u9"')
+    with open(path, "w") as f:
+        f.write(text)
+    stat = os.stat(path)
+    if change == "same_size":
+        # Even with an unchanged mtime stamp the content hash catches it
+        manifest_path = os.path.join(path + ".columns", "manifest.json")
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        assert manifest["size"] == stat.st_size
+        manifest["mtime_ns"] -= 1
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f)
+    assert open_table(path).string("conversations", "user_id", 0) == ("user-1" if change == "resize" else "u9")
+
+
+def test_empty_source_and_unwritable_cache(tmp_path):
+    empty = open_table(write(tmp_path, "empty.json", {"conversations": []}))
+    assert len(empty) == 0 and empty.to_conversations() == []
+
+    path = write(tmp_path, "export.json", EXPORT)
+    blocker = tmp_path / "blocker"
+    blocker.write_text("")
+    table = open_table(path, cache_dir=str(blocker / "cache"))
+    assert len(table) == 2
+
+
+def test_loaders_read_through_the_cache(tmp_path, monkeypatch):
+    path = write(tmp_path, "export.json", EXPORT)
+    # The source records, unless the cache is asked for
+    monkeypatch.delenv("CONVERSATION_CACHE", raising=False)
+    assert load_conversation_data(custom_path=path) == EXPORT["conversations"]
+    assert not os.path.exists(path + ".columns")
+    conversations = load_conversation_data(custom_path=path, cache=True)
+    assert [c["user_id"] for c in conversations] == ["u1", "u2"]
+    assert conversations[0]["feedback"]["rating"] == 4.0
+    assert os.path.isdir(path + ".columns")
+    assert len(load_conversation_table(custom_path=path)) == 2
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("CONVERSATION_DATA_PATH", raising=False)
+    assert load_conversation_table(custom_path=str(tmp_path / "missing.json")) is None
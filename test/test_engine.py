@@ -0,0 +1,134 @@
+import io
+import json
+import os
+from datetime import date
+
+import pandas as pd
+import pytest
+import sqlalchemy as sa
+
+from dashboard import engine as engine_module
+from dashboard.columnar import open_table, table_from_records
+from dashboard.engine import AnalyticsEngine, _Tables, data_files, display_name, engine_for, main
+from dashboard.tracker_store import insert_trackers, metadata
+
+RANGES = [(date(2025, 3, 4), date(2025, 3, 12)), (date(2025, 1, 1), date(2025, 12, 31)),
+          (date(2025, 3, 9), date(2025, 3, 2))]
+TABLES = ["daily_counts", "top_user_messages", "top_actions", "top_intents", "duration_histogram"]
+
+
+@pytest.fixture(scope="module")
+def directory(write_conversations, tmp_path_factory):
+    root = tmp_path_factory.mktemp("engine")
+    os.makedirs(root / "older")
+    write_conversations(150, seed=1, path=root / "june.json", days=15)
+    write_conversations(150, seed=2, path=root / "older" / "may.ndjson", ndjson=True, days=15)
+    (root / "notes.txt").write_text("not conversations")
+    return str(root)
+
+
+@pytest.fixture(scope="module")
+def reference(directory):
+    return table_from_records(conversations=[conv for path in data_files(directory)
+                                             for conv in open_table(path).to_conversations()])
+
+
+def test_data_files_skip_caches_and_other_files(directory):
+    open_table(os.path.join(directory, "june.json"))
+    assert [os.path.relpath(path, directory) for path in data_files(directory)] == \
+        ["june.json", os.path.join("older", "may.ndjson")]
+
+
+@pytest.mark.parametrize("start,end", RANGES)
+def test_directory_matches_one_table_of_all_files(directory, reference, start, end):
+    split = AnalyticsEngine.open(directory).report(start, end, conversations=True)
+    whole = AnalyticsEngine(_Tables([reference])).report(start, end, conversations=True)
+    assert split.summary == pytest.approx(whole.summary)
+    assert split.summary["all_conversations"] == 300
+    for name in TABLES:
+        pd.testing.assert_frame_equal(split.tables[name], whole.tables[name], check_dtype=False)
+    conversations = split.tables["conversations"]
+    assert len(conversations) == split.summary["total"]
+    assert sorted(conversations["Time"]) == sorted(whole.tables["conversations"]["Time"])
+    assert conversations["Time"].is_monotonic_increasing
+
+
+def test_report_json_and_csv(directory, tmp_path):
+    start, end = RANGES[0]
+    report = AnalyticsEngine.open(directory).report(start, end, n=3, conversations=True, sort="User")
+    f = io.StringIO()
+    report.to_json(f)
+    data = json.loads(f.getvalue())
+    assert data["start_date"] == "2025-03-04" and data["end_date"] == "2025-03-12"
+    assert data["summary"] == pytest.approx(report.summary)
+    assert list(data["tables"]) == TABLES + ["conversations"]
+    assert len(data["tables"]["top_user_messages"]) == 3
+    assert [row["User"] for row in data["tables"]["conversations"]] == \
+        sorted(row["User"] for row in data["tables"]["conversations"])
+
+    paths = report.to_csv(str(tmp_path / "csv"))
+    assert [os.path.basename(path) for path in paths] == \
+        ["summary.csv"] + [f"{name}.csv" for name in data["tables"]]
+    summary = pd.read_csv(paths[0]).iloc[0]
+    assert summary["total"] == report.summary["total"]
+    assert summary["start_date"] == "2025-03-04"
+    counts = pd.read_csv(os.path.join(tmp_path, "csv", "daily_counts.csv"))
+    assert counts["count"].tolist() == report.tables["daily_counts"]["count"].tolist()
+
+
+def test_main_writes_the_report(directory, tmp_path, capsys):
+    path = os.path.join(directory, "june.json")
+    output = str(tmp_path / "report.json")
+    assert main([path, "--start", "2025-03-01", "--end", "2025-03-31", "--top", "5", "-o", output]) == 0
+    with open(output) as f:
+        data = json.load(f)
+    assert data["summary"]["total"] == data["summary"]["all_conversations"] == 150
+    assert "150 of 150 conversations" in capsys.readouterr().err
+
+    assert main([path, "--end", "2025-03-03", "--days", "2"]) == 0
+    data = json.loads(capsys.readouterr().out)
+    assert data["start_date"] == "2025-03-02"
+    assert sum(row["count"] for row in data["tables"]["daily_counts"]) == data["summary"]["total"]
+
+    with pytest.raises(SystemExit):
+        main([path, "--format", "csv"])
+    capsys.readouterr()
+    with pytest.raises(SystemExit):
+        main([os.path.join(directory, "missing.json")])
+    err = capsys.readouterr().err
+    assert "cannot read" in err and "missing.json" in err and "Traceback" not in err
+
+    # An unopenable database and one without an events table
+    for url in ("sqlite:////nonexistent/dir/x.db", f"sqlite:///{tmp_path / 'empty.db'}"):
+        with pytest.raises(SystemExit):
+            main([url])
+        assert f"cannot read {url}: " in capsys.readouterr().err
+
+
+def test_tracker_store_url_matches_its_dump(write_conversations, tmp_path):
+    dump = write_conversations(100, seed=3, path=tmp_path / "trackers.json", fmt="tracker", days=15)
+    url = f"sqlite:///{tmp_path / 'tracker.db'}"
+    connection_engine = sa.create_engine(url)
+    metadata.create_all(connection_engine)
+    with open(dump) as f, connection_engine.begin() as connection:
+        insert_trackers(connection, json.load(f).items())
+
+    start, end = RANGES[0]
+    store = engine_for(url).report(start, end, conversations=True)
+    file = engine_for(dump).report(start, end, conversations=True)
+    assert store.summary == pytest.approx(dict(file.summary, has_feedback=False))
+    for name in ("daily_counts", "duration_histogram"):
+        pd.testing.assert_frame_equal(store.tables[name], file.tables[name], check_dtype=False)
+    assert sorted(store.tables["conversations"]["ID"]) == sorted(file.tables["conversations"]["ID"])
+    assert display_name("postgresql://rasa:secret@db/rasa") == "postgresql://rasa:***@db/rasa"
+
+
+def test_engine_for_reopens_changed_files(write_conversations, tmp_path, monkeypatch):
+    monkeypatch.setattr(engine_module, "_ENGINES", type(engine_module._ENGINES)())
+    path = write_conversations(20, seed=4, path=tmp_path / "conversations.json", days=5)
+    engine = engine_for(path)
+    assert engine_for(path) is engine
+    write_conversations(30, seed=5, path=path, days=5)
+    assert len(engine_for(path)) == 30
+    with pytest.raises(FileNotFoundError):
+        engine_for(str(tmp_path / "missing.json"))
@@ -0,0 +1,132 @@
+import json
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.rasa.api import main
+from backend.rasa.api.events import EventStore, LineBatcher
+
+DAY = 86400.0
+T0 = 1_749_945_600.0  # 2025-06-15 00:00 UTC
+
+
+def ndjson(events):
+    return "\n".join(json.dumps(e) for e in events) + "\n"
+
+
+def make_events(n, start=T0, step=1.0, senders=3):
+    return [
+        {"event": "user" if i % 2 == 0 else "bot", "sender_id": f"s{i % senders}", "timestamp": start + i * step, "text": f"m{i}"}
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = EventStore(str(tmp_path / "events"))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def client(store, monkeypatch):
+    monkeypatch.setattr(main, "EVENTS_API_KEY", "secret")
+    main.app.dependency_overrides[main.get_event_store] = lambda: store
+    yield TestClient(main.app, headers={"X-API-Key": "secret"})
+    main.app.dependency_overrides.clear()
+
+
+def test_events_are_partitioned_by_utc_day(store):
+    result = store.append(make_events(4, step=DAY / 2))
+    assert result.accepted == 4
+    assert store.partitions() == [date(2025, 6, 15), date(2025, 6, 16)]
+    assert store.count() == 4
+    assert store.count(start=T0 + DAY) == 2
+
+
+def test_idempotency_keys_deduplicate_retries(store):
+    events = make_events(5)
+    assert store.append(events, key_prefix="batch-1").accepted == 5
+    retry = store.append(events, key_prefix="batch-1")
+    assert (retry.accepted, retry.duplicates) == (0, 5)
+    assert store.append(events).accepted == 5  # no key, plain append
+    keyed = [dict(e, idempotency_key="k") for e in events[:2]]
+    assert store.append(keyed).accepted == 1
+    assert store.count() == 11
+
+
+def test_invalid_lines_are_rejected_individually(store):
+    lines = ['{"event": "user", "sender_id": "a", "timestamp": 1750000000}', "not json", '{"event": "user"}', ""]
+    result = store.append_lines(lines)
+    assert result.accepted == 1
+    assert [r["line"] for r in result.rejected] == [2, 3]
+
+
+def test_out_of_range_timestamps_are_rejected(store):
+    valid = make_events(2, step=DAY)
+    lines = [json.dumps(valid[0])] + [
+        json.dumps({"event": "user", "sender_id": "a", "timestamp": t}) for t in (1e20, -1e12)
+    ] + ['{"event": "user", "sender_id": "a", "timestamp": NaN}', json.dumps(valid[1])]
+    result = store.append_lines(lines)
+    assert result.accepted == 2
+    assert [r["line"] for r in result.rejected] == [2, 3, 4]
+    assert store.partitions() == [date(2025, 6, 15), date(2025, 6, 16)]
+
+
+def test_query_paginates_across_partitions(store):
+    store.append(make_events(30, step=DAY / 10))
+    seen, cursor = [], None
+    while True:
+        page = store.query(limit=7, cursor=cursor)
+        seen.extend(json.loads(e)["text"] for e in page.events)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert seen == [f"m{i}" for i in range(30)]
+
+
+def test_query_filters_by_sender_time_and_type(store):
+    store.append(make_events(30))
+    page = store.query(start=T0 + 6, end=T0 + 20, sender_id="s0", event="user")
+    assert [json.loads(e)["text"] for e in page.events] == ["m6", "m12", "m18"]
+
+
+def test_drop_before_removes_old_partitions(store):
+    store.append(make_events(3, step=DAY))
+    assert store.drop_before(date(2025, 6, 17)) == [date(2025, 6, 15), date(2025, 6, 16)]
+    assert store.count() == 1
+
+
+def test_line_batcher_handles_split_lines():
+    batcher = LineBatcher(batch_size=2)
+    assert batcher.feed(b'{"a": 1}\n{"b"') is None
+    assert batcher.feed(b': 2}\n{"c": 3}') == ['{"a": 1}', '{"b": 2}']
+    assert batcher.flush() == ['{"c": 3}']
+    assert batcher.lines_seen == 3
+
+
+def test_ingest_and_read_over_http(client):
+    body = ndjson(make_events(10))
+    headers = {"Content-Type": "application/x-ndjson", "Idempotency-Key": "upload-1"}
+    response = client.post("/events", content=body, headers=headers)
+    assert response.json() == {"accepted": 10, "duplicates": 0, "rejected": []}
+    assert client.post("/events", content=body, headers=headers).json()["duplicates"] == 10
+
+    page = client.get("/events", params={"start": T0 + 2, "limit": 3}).json()
+    assert [e["text"] for e in page["events"]] == ["m2", "m3", "m4"]
+    page = client.get("/events", params={"start": T0 + 2, "limit": 3, "cursor": page["next_cursor"]}).json()
+    assert [e["text"] for e in page["events"]] == ["m5", "m6", "m7"]
+
+    events = client.get("/conversations/s1/events").json()["events"]
+    assert [e["text"] for e in events] == ["m1", "m4", "m7"]
+    assert client.get("/events", params={"cursor": "bogus"}).status_code == 400
+
+
+def test_events_api_key(client, monkeypatch):
+    assert client.get("/events", headers={"X-API-Key": "wrong"}).status_code == 401
+    assert client.get("/events").status_code == 200
+    monkeypatch.setattr(main, "EVENTS_API_KEY", None)
+    assert client.get("/events").status_code == 503
+    assert client.get("/conversations/s1/events").status_code == 503
+    assert client.post("/events", content=ndjson(make_events(1))).status_code == 503
@@ -0,0 +1,132 @@
+import gzip
+import json
+import tracemalloc
+
+import pytest
+
+from dashboard.data_loader import iter_conversation_data, load_conversation_data
+from dashboard.json_stream import complete_size, iter_records
+
+CONVERSATIONS = {
+    "conversations": [
+        {"user_id": f"u{i}", "timestamp": 1_700_000_000 + i, "duration": 12.5,
+         "messages": [{"type": "user", "text": "héllo \"there\" [1,2]"}, {"type": "bot", "text": "hi"}]}
+        for i in range(40)
+    ]
+}
+TRACKERS = {
+    f"t{i}": {"sender_id": f"s{i}", "latest_event_time": 1_700_000_000.25 + i,
+              "events": [{"event": "user", "text": "hi", "timestamp": 1_700_000_000.5},
+                         {"event": "action", "name": "utter_greet"},
+                         {"event": "bot", "text": "hello", "timestamp": 1_700_000_001}]}
+    for i in range(25)
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 20])
+def test_conversations_array_matches_json_load(tmp_path, chunk_size):
+    path = tmp_path / "conversations.json"
+    path.write_text(json.dumps(CONVERSATIONS, indent=2, ensure_ascii=False), encoding="utf-8")
+    records = list(iter_records(str(path), chunk_size=chunk_size))
+    assert {kind for kind, _, _ in records} == {"conversation"}
+    assert [value for _, _, value in records] == CONVERSATIONS["conversations"]
+
+
+@pytest.mark.parametrize("chunk_size", [3, 1 << 20])
+def test_tracker_entries_match_json_load(tmp_path, chunk_size):
+    path = tmp_path / "trackers.json.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(TRACKERS, f)
+    records = list(iter_records(str(path), chunk_size=chunk_size))
+    assert [(kind, key) for kind, key, _ in records] == [("entry", key) for key in TRACKERS]
+    assert dict((key, value) for _, key, value in records) == TRACKERS
+
+
+def test_top_level_array_scalars_and_empty_containers(tmp_path):
+    path = tmp_path / "list.json"
+    path.write_text('[1, 2.5e3, "x", null, {}, []] ')
+    assert [value for _, _, value in iter_records(str(path), chunk_size=2)] == [1, 2.5e3, "x", None, {}, []]
+    path.write_text('{"conversations": [], "other": {}}')
+    assert list(iter_records(str(path))) == [("entry", "other", {})]
+    path.write_text('{"conversations": {"odd": true}}')
+    assert list(iter_records(str(path))) == [("conversation", None, {"odd": True})]
+
+
+def test_ndjson_lines(tmp_path):
+    path = tmp_path / "mixed.ndjson"
+    lines = [CONVERSATIONS["conversations"][0], TRACKERS["t0"]]
+    path.write_text("\n".join(json.dumps(line) for line in lines) + "\n\n")
+    assert list(iter_records(str(path))) == [("conversation", 0, lines[0]), ("entry", "s0", lines[1])]
+
+
+def test_ndjson_stops_before_a_line_being_written(tmp_path):
+    path = tmp_path / "log.ndjson"
+    complete = '{"a": 1}\n{"b": 2}'
+    path.write_text(complete + '\n{"c": ')
+    assert [value for _, _, value in iter_records(str(path))] == [{"a": 1}, {"b": 2}]
+    assert complete_size(str(path), path.stat().st_size) == len(complete) + 1
+    # An unterminated line that parses is complete; the newline may follow
+    path.write_text(complete)
+    assert [value for _, _, value in iter_records(str(path))] == [{"a": 1}, {"b": 2}]
+    assert complete_size(str(path), len(complete)) == len(complete)
+    # Only the first bytes, whatever was appended since
+    path.write_text(complete + '\n{"c": 3}\n')
+    assert [value for _, _, value in iter_records(str(path), size=len(complete) + 4)] == [{"a": 1}, {"b": 2}]
+    assert complete_size(str(path), len(complete) + 4) == len(complete) + 1
+    # A malformed line that is terminated is an error
+    path.write_text('{"a": 1}\n{"b": \n{"c": 3}\n')
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_records(str(path)))
+
+
+@pytest.mark.parametrize("text", ['{"conversations": [{"a": 1} {"b": 2}]}', '{"a": 1} x', '{"a" 1}', '[1, 2'])
+def test_malformed_documents_raise(tmp_path, text):
+    path = tmp_path / "bad.json"
+    path.write_text(text)
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_records(str(path), chunk_size=4))
+
+
+def test_streaming_loader_matches_json_load_loader(tmp_path):
+    for name, document in (("conversations.json", CONVERSATIONS), ("trackers.json", TRACKERS)):
+        path = tmp_path / name
+        path.write_text(json.dumps(document))
+        streamed = load_conversation_data(custom_path=str(path), cache=False)
+        loaded = load_conversation_data(custom_path=str(path), streaming=False, cache=False)
+        assert streamed == loaded and streamed
+    assert load_conversation_data(custom_path=str(tmp_path / "bad.json")) == []
+
+
+def test_peak_memory_is_bounded_by_one_record(tmp_path):
+    path = tmp_path / "big.json"
+    tracker = {"sender_id": "s", "events": [{"event": "user", "text": "x" * 200, "timestamp": 1.0}] * 20}
+    with open(path, "w") as f:
+        f.write("{" + ",".join(f'"t{i}":' + json.dumps(tracker) for i in range(3000)) + "}")
+    size = path.stat().st_size
+    tracemalloc.start()
+    count = sum(1 for _ in iter_records(str(path), chunk_size=64 * 1024))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert count == 3000
+    assert peak < size / 20
+
+
+def test_malformed_record_raises_without_reading_ahead(tmp_path):
+    path = tmp_path / "big.json"
+    tracker = json.dumps({"sender_id": "s", "events": [{"event": "user", "text": "x" * 200}] * 20})
+    with open(path, "w") as f:
+        f.write('{"t0": {"sender_id" "s"}, ' + ",".join(f'"t{i}":' + tracker for i in range(1, 3000)) + "}")
+    tracemalloc.start()
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_records(str(path), chunk_size=64 * 1024))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert peak < path.stat().st_size / 20
+
+
+def test_iter_conversation_data_yields_converted_trackers(tmp_path):
+    path = tmp_path / "trackers.json"
+    path.write_text(json.dumps(TRACKERS))
+    first = next(iter_conversation_data(str(path)))
+    assert first["user_id"] == "s0"
+    assert [m["type"] for m in first["messages"]] == ["user", "action", "bot"]
@@ -0,0 +1,161 @@
+import json
+import os
+import random
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+
+from dashboard import columnar
+from dashboard.columnar import open_table
+from dashboard.live import LiveStore, NDJSONTail, SourceReset
+from dashboard.rollups import DailyRollup
+from dashboard.synthetic import to_tracker
+
+START = datetime(2025, 3, 1)
+
+
+@pytest.fixture
+def log(write_conversations, tmp_path):
+    return write_conversations(200, seed=2, path=tmp_path / "log.ndjson", ndjson=True, days=10)
+
+
+def append(model, path, count, seed, tracker=False):
+    rng = random.Random(seed)
+    with open(path, "a") as f:
+        for i in range(count):
+            conv = model.generate(rng, 10000 * seed + i, START.timestamp() + rng.random() * 20 * 86400)
+            f.write(json.dumps(to_tracker(conv) if tracker else conv) + "\n")
+
+
+def test_tail_reads_complete_lines_only(tmp_path):
+    path = str(tmp_path / "tail.ndjson")
+    with open(path, "w") as f:
+        f.write('{"a": 1}\n\nnot json\n{"b": ')
+    tail = NDJSONTail(path)
+    assert tail.read() == [{"a": 1}]
+    assert tail.skipped == 1
+    assert tail.read() == []
+    with open(path, "a") as f:
+        f.write('2}\n')
+    assert tail.read() == [{"b": 2}]
+    assert tail.offset == os.path.getsize(path)
+
+
+def test_tail_detects_truncation_and_replacement(tmp_path):
+    path = str(tmp_path / "tail.ndjson")
+    with open(path, "w") as f:
+        f.write('{"a": 1}\n{"b": 2}\n')
+    tail = NDJSONTail(path)
+    tail.read()
+    with open(path, "w") as f:
+        f.write('{"c": 3}\n')
+    with pytest.raises(SourceReset):
+        tail.read()
+
+    tail = NDJSONTail(path)
+    tail.read()
+    replacement = str(tmp_path / "new.ndjson")
+    with open(replacement, "w") as f:
+        f.write('{"c": 3}\n{"d": 4}\n')
+    os.replace(replacement, path)
+    with pytest.raises(SourceReset):
+        tail.read()
+
+
+def test_poll_adds_only_appended_conversations(model, log):
+    store = LiveStore(log)
+    assert len(store) == 200 and store.segments == []
+    version = store.version
+    assert store.poll() == 0 and store.version == version
+
+    append(model, log, 30, seed=1)
+    append(model, log, 20, seed=2)
+    assert store.poll() == 50
+    assert len(store) == 250 and store.version != version
+
+    # Same aggregates as a rollup of the whole log built from scratch
+    full = DailyRollup.from_table(open_table(log, rebuild=True))
+    assert store.rollup.days.tolist() == full.days.tolist()
+    for name in full.totals:
+        np.testing.assert_allclose(store.rollup.totals[name], full.totals[name])
+    start, end = date(2025, 3, 1), date(2025, 3, 31)
+    assert store.rollup.summary(start, end) == pytest.approx(full.summary(start, end))
+    assert sum(len(metrics.select(start, end)) for _, metrics in store.tiers()) == 250
+
+
+def test_tracker_lines_are_ingested(model, log):
+    store = LiveStore(log)
+    append(model, log, 20, seed=2, tracker=True)
+    assert store.poll() == 20
+    table = store.segments[-1].table
+    assert table.string("conversations", "conversation_id", 0).startswith("syn")
+    assert store.rollup.summary(date(2025, 3, 1), date(2025, 3, 31))["total"] == 220
+
+
+def test_segments_stay_few(model, log):
+    store = LiveStore(log)
+    for seed in range(1, 41):
+        append(model, log, 3, seed=seed)
+        assert store.poll() == 3
+    assert len(store) == 320
+    assert len(store.segments) <= 7
+    ids = [table.string("conversations", "conversation_id", row)
+           for table, _ in store.tiers() for row in range(len(table))]
+    assert len(set(ids)) == 320
+
+
+def test_truncated_log_is_reloaded(model, log, write_conversations):
+    store = LiveStore(log)
+    append(model, log, 10, seed=1)
+    store.poll()
+    write_conversations(50, seed=3, path=log, ndjson=True, days=10)
+    assert store.poll() == 50
+    assert len(store) == 50 and store.segments == []
+
+
+def test_line_being_written_is_left_to_the_tail(model, log):
+    with open(log, "a") as f:
+        f.write('{"conversation_id": "partial", "mess')
+    store = LiveStore(log)
+    assert len(store.base) == 200
+    assert store.tail.offset == store.base.source_size < os.path.getsize(log)
+    # The cache was written, so a restart does not rebuild it
+    assert LiveStore(log).base.version == store.base.version
+    with open(log, "a") as f:
+        f.write('ages": []}\n')
+    assert store.poll() == 1
+
+
+def test_lines_appended_while_building_are_tailed_once(model, log, monkeypatch):
+    build_table = columnar.build_table
+
+    def appending(path, size=None):
+        append(model, log, 1, seed=100)
+        return build_table(path, size)
+
+    monkeypatch.setattr(columnar, "build_table", appending)
+    store = LiveStore(log)
+    assert len(store.base) == 200
+    assert store.poll() == 1
+    ids = [table.string("conversations", "conversation_id", row)
+           for table, _ in store.tiers() for row in range(len(table))]
+    assert len(ids) == len(set(ids)) == 201
+
+
+def test_tail_reads_in_bounded_chunks(tmp_path):
+    path = str(tmp_path / "tail.ndjson")
+    long = json.dumps({"text": "x" * 100})
+    with open(path, "w") as f:
+        f.write('{"a": 1}\n{"b": 2}\n' + long + "\n")
+    tail = NDJSONTail(path)
+    assert tail.read(max_bytes=12) == [{"a": 1}]
+    assert tail.read(max_bytes=12) == [{"b": 2}]
+    # Longer than a chunk: read on to the end of the line
+    assert tail.read(max_bytes=12) == [json.loads(long)]
+    assert tail.offset == os.path.getsize(path)
+
+
+def test_only_ndjson_logs(tmp_path):
+    with pytest.raises(ValueError):
+        LiveStore(str(tmp_path / "dump.json"))
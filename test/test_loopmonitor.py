@@ -0,0 +1,140 @@
+import asyncio
+import sqlite3
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.rasa.api import main
+from backend.rasa.api.loopmonitor import BlockingCall, BlockingCallDetector, Histogram, LoopMonitor
+
+
+def test_histogram_buckets_are_cumulative():
+    hist = Histogram(buckets=(0.01, 0.1, 1.0))
+    for value in (0.005, 0.05, 0.05, 0.5, 5.0):
+        hist.observe(value)
+    snapshot = hist.snapshot()
+    assert snapshot["buckets"] == {"0.01": 1, "0.1": 3, "1.0": 4, "+Inf": 5}
+    assert snapshot["count"] == 5 and snapshot["max"] == 5.0
+    assert hist.quantile(0.5) == 0.1
+    assert hist.quantile(1.0) == 5.0
+    text = hist.prometheus("lag_seconds", "Lag.")
+    assert 'lag_seconds_bucket{le="+Inf"} 5' in text and "lag_seconds_count 5" in text
+
+
+def blocking_handler():
+    time.sleep(0.3)
+
+
+def test_monitor_captures_stack_of_blocking_code():
+    async def scenario():
+        monitor = LoopMonitor(interval=0.01, block_threshold=0.1)
+        monitor.start()
+        await asyncio.sleep(0.05)
+        blocking_handler()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+        return monitor
+
+    monitor = asyncio.run(scenario())
+    assert not monitor.running
+    assert monitor.lag.count >= 3
+    assert monitor.blocked.count == 1
+    (report,) = monitor.reports
+    assert report.blocked_for >= 0.25
+    assert any("blocking_handler" in line for line in report.stack)
+
+
+def test_monitor_records_no_stalls_on_idle_loop():
+    async def scenario():
+        monitor = LoopMonitor(interval=0.01, block_threshold=0.2)
+        monitor.start()
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+        return monitor
+
+    monitor = asyncio.run(scenario())
+    assert monitor.lag.count > 0
+    assert monitor.blocked.count == 0 and not monitor.reports
+
+
+@pytest.fixture
+def detector():
+    detector = BlockingCallDetector().install()
+    yield detector
+    detector.uninstall()
+
+
+def test_detector_flags_sync_io_on_loop_thread(detector, tmp_path):
+    path = tmp_path / "data.db"
+
+    async def handler():
+        with open(tmp_path / "notes.txt", "w") as f:
+            f.write("x")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE t (x)")
+        conn.cursor().execute("SELECT * FROM t")
+        conn.close()
+        time.sleep(0)
+
+    asyncio.run(handler())
+    events = {site["event"] for site in detector.snapshot()}
+    assert {"open", "sqlite3.connect", "sqlite3.execute", "time.sleep"} <= events
+    assert all("test_loopmonitor.py" in site["site"] for site in detector.snapshot())
+
+
+def test_detector_ignores_threadpool_and_non_blocking_sockets(detector, tmp_path):
+    def work():
+        conn = sqlite3.connect(tmp_path / "data.db")
+        conn.execute("SELECT 1")
+        conn.close()
+
+    async def handler():
+        await asyncio.get_running_loop().run_in_executor(None, work)
+        server = await asyncio.start_server(lambda r, w: w.close(), "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.close()
+        server.close()
+        await server.wait_closed()
+
+    asyncio.run(handler())
+    work()  # no running loop on this thread either
+    assert detector.snapshot() == []
+
+
+def test_detector_raise_mode():
+    detector = BlockingCallDetector("raise").install()
+    try:
+        async def handler():
+            time.sleep(0)
+
+        with pytest.raises(BlockingCall, match="time.sleep"):
+            asyncio.run(handler())
+    finally:
+        detector.uninstall()
+    assert sqlite3.connect(":memory:").__class__ is sqlite3.Connection
+
+
+def test_loop_metrics_endpoint(monkeypatch):
+    monkeypatch.setattr(main, "METRICS_API_KEY", "secret")
+    with TestClient(main.app) as client:
+        assert client.get("/metrics/loop").status_code == 401
+        headers = {"X-API-Key": "secret"}
+        time.sleep(0.2)
+        body = client.get("/metrics/loop", headers=headers).json()
+        assert body["running"] is True
+        assert body["lag_seconds"]["count"] > 0
+        assert body["blocks"] == [] or all("stack" in block for block in body["blocks"])
+        assert body["blocking_calls"] is None
+        text = client.get("/metrics/loop", params={"format": "prometheus"}, headers=headers).text
+        assert "event_loop_lag_seconds_bucket" in text
+        assert client.get("/metrics/loop", params={"format": "xml"}, headers=headers).status_code == 400
+    assert not main.loop_monitor.running
+
+
+def test_loop_metrics_are_not_served_without_a_key(monkeypatch):
+    monkeypatch.setattr(main, "METRICS_API_KEY", None)
+    with TestClient(main.app) as client:
+        assert client.get("/metrics/loop").status_code == 503
+        assert client.get("/metrics/loop", headers={"X-API-Key": ""}).status_code == 503
@@ -0,0 +1,80 @@
+from collections import Counter
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+
+from dashboard.columnar import table_from_records
+from dashboard.metrics import ConversationMetrics, metrics_for
+
+
+def reference(conversations, start, end):
+    """The dashboard's former per-conversation loops."""
+    def day(conv):
+        ts = conv.get("timestamp")
+        return datetime.fromtimestamp(ts).date() if ts is not None else None
+
+    selected = [c for c in conversations if day(c) is not None and start <= day(c) <= end]
+    user_texts = Counter(m["text"] for c in selected for m in c["messages"] if m["type"] == "user")
+    actions = Counter(m["action"] for c in selected for m in c["messages"] if m["type"] == "action" and "action" in m)
+    return {
+        "total": len(selected),
+        "avg_user_messages": np.mean([sum(m["type"] == "user" for m in c["messages"]) for c in selected]),
+        "avg_duration": np.mean([c["duration"] for c in selected]),
+        "days": Counter(day(c) for c in selected),
+        "user_texts": user_texts,
+        "actions": actions,
+    }
+
+
+def test_metrics_match_loop_implementation(table):
+    engine = ConversationMetrics(table)
+    start, end = date(2025, 3, 5), date(2025, 3, 12)
+    expected = reference(table.to_conversations(), start, end)
+    mask = engine.select(start, end)
+    summary = engine.summary(mask)
+
+    assert 0 < summary["total"] == expected["total"] < len(table)
+    assert summary["avg_user_messages"] == pytest.approx(expected["avg_user_messages"])
+    assert summary["avg_duration"] == pytest.approx(expected["avg_duration"])
+    daily = engine.daily_counts(mask)
+    assert dict(zip(daily["date"], daily["count"])) == expected["days"]
+    assert list(daily["date"]) == sorted(expected["days"])
+
+    top = engine.top_user_messages(mask)
+    assert list(top["Count"]) == [count for _, count in expected["user_texts"].most_common(10)]
+    assert all(expected["user_texts"][text] == count for text, count in zip(top["Message"], top["Count"]))
+    actions = engine.top_actions(mask, n=50)
+    assert dict(zip(actions["Action"], actions["Count"])) == dict(expected["actions"])
+
+
+def test_per_conversation_counts(table):
+    engine = ConversationMetrics(table)
+    conversations = table.to_conversations()
+    frame = engine.conversations
+    assert frame["num_user_messages"].tolist() == [
+        sum(m["type"] == "user" for m in c["messages"]) for c in conversations]
+    assert frame["num_actions"].tolist() == [sum(m["type"] == "action" for m in c["messages"]) for c in conversations]
+    assert frame["num_messages"].tolist() == [len(c["messages"]) for c in conversations]
+    assert frame["user_id"].astype(object).tolist() == [c["user_id"] for c in conversations]
+
+
+def test_empty_selection(table):
+    engine = ConversationMetrics(table)
+    mask = engine.select(date(1990, 1, 1), date(1990, 1, 2))
+    assert engine.summary(mask) == {"total": 0, "avg_user_messages": 0.0, "avg_duration": 0.0, "has_feedback": False}
+    assert engine.daily_counts(mask).empty
+    assert engine.top_user_messages(mask).empty and engine.top_actions(mask).empty
+
+
+def test_engine_is_reused_per_data_version(table):
+    engine = metrics_for(table)
+    assert metrics_for(table) is engine
+    table.version, saved = "other-version", table.version
+    try:
+        assert metrics_for(table) is not engine
+    finally:
+        table.version = saved
+    # Ids of collected tables are reused, so tables without a version are not cached
+    built = table_from_records(table.to_conversations()[:5])
+    assert metrics_for(built) is not metrics_for(built)
@@ -0,0 +1,69 @@
+import json
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.rasa.actions.db_router import DatabaseRouter
+from backend.rasa.api import main, orders
+
+
+@pytest.fixture
+def client(tmp_path):
+    path = str(tmp_path / "orders.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE SalesOrderHeader (SalesOrderID INTEGER PRIMARY KEY, OrderDate TEXT, Status INTEGER, "
+        "ShipDate TEXT, TotalDue REAL, SalesOrderNumber TEXT UNIQUE, PurchaseOrderNumber INTEGER)"
+    )
+    conn.executemany(
+        "INSERT INTO SalesOrderHeader VALUES (?, '2024-01-01', ?, NULL, 12.5, ?, ?)",
+        [(i, 5 if i % 2 else 1, f"SO{i}", f"PO{i}0") for i in range(100, 3100)],
+    )
+    conn.commit()
+    conn.close()
+    router = DatabaseRouter({"default": path}, pool_size=2)
+    main.app.dependency_overrides[main.get_order_router] = lambda: router
+    main.app.dependency_overrides[main.require_user] = lambda: {"id": "agent", "role": "agent"}
+    yield TestClient(main.app)
+    main.app.dependency_overrides.clear()
+    router.close()
+
+
+def lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_mixed_keys_are_answered_in_request_order(client):
+    response = client.post("/orders/status", json={"orders": [101, "SO102", "po1030", "nope", 99]})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    result = lines(response)
+    assert [r["key"] for r in result] == [101, "SO102", "po1030", "nope", 99]
+    assert [r["found"] for r in result] == [True, True, True, False, False]
+    assert result[0]["status"] == "shipped" and result[1]["status"] == "in_process"
+    assert result[2]["order"]["SalesOrderID"] == 103
+    assert "error" in result[3] and "error" not in result[4]
+
+
+def test_out_of_range_ids_are_unrecognised(client):
+    result = lines(client.post("/orders/status", json={"orders": [101, "99999999999999999999", 2 ** 64]}))
+    assert [r["found"] for r in result] == [True, False, False]
+    assert all("error" in r for r in result[1:])
+
+
+def test_large_batches_stream_in_chunks(client):
+    keys = [f"SO{i}" for i in range(100, 3100)] + list(range(100, 3100))
+    result = lines(client.post("/orders/status", json={"orders": keys}))
+    assert len(result) == 6000 and all(r["found"] for r in result)
+
+
+def test_batch_limit_and_agent_role(client):
+    too_many = {"orders": list(range(orders.MAX_BATCH + 1))}
+    assert client.post("/orders/status", json=too_many).status_code == 413
+    main.app.dependency_overrides.pop(main.require_user)
+    assert client.post("/orders/status", json={"orders": [101]}).status_code == 401
+    for role, expected in (("user", 403), ("agent", 200), ("admin", 200)):
+        token = main.tokens.issue({"id": f"{role}-1", "email": f"{role}@example.com", "role": role})
+        response = client.post("/orders/status", json={"orders": [101]}, headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == expected
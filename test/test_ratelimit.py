@@ -0,0 +1,137 @@
+import threading
+
+import pytest
+from fastapi import FastAPI, WebSocket
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from backend.rasa.api.ratelimit import (
+    LocalBackend,
+    RateLimitMiddleware,
+    RateLimitRule,
+    SQLiteBackend,
+    parse_rate,
+    rules_from_env,
+)
+
+
+def _app(rules, backend=None):
+    app = FastAPI()
+
+    @app.get("/ping")
+    def ping():
+        return {"ok": True}
+
+    @app.get("/other")
+    def other():
+        return {"ok": True}
+
+    @app.websocket("/ws")
+    async def ws(websocket: WebSocket):
+        await websocket.accept()
+        await websocket.send_json({"ok": True})
+        await websocket.close()
+
+    app.add_middleware(RateLimitMiddleware, rules=rules, backend=backend or LocalBackend())
+    return TestClient(app)
+
+
+def test_parse_rate():
+    assert parse_rate("20/s:40") == (20.0, 40.0)
+    assert parse_rate("120/m") == (2.0, 120.0)
+    with pytest.raises(ValueError):
+        parse_rate("fast")
+
+
+@pytest.mark.parametrize("backend_factory", [LocalBackend, lambda: None])
+def test_bucket_allows_burst_then_refills(tmp_path, backend_factory):
+    backend = backend_factory() or SQLiteBackend(str(tmp_path / "limits.db"))
+    assert [backend.acquire("k", rate=1.0, burst=3, now=100.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert backend.acquire("k", rate=1.0, burst=3, now=100.0) == pytest.approx(1.0)
+    assert backend.acquire("k", rate=1.0, burst=3, now=100.5) == pytest.approx(0.5)
+    assert backend.acquire("k", rate=1.0, burst=3, now=101.5) == 0.0
+    assert backend.acquire("other", rate=1.0, burst=3, now=101.5) == 0.0
+
+
+def test_sqlite_buckets_are_shared_between_backends(tmp_path):
+    path = str(tmp_path / "limits.db")
+    first, second = SQLiteBackend(path), SQLiteBackend(path)
+    assert first.acquire("k", rate=1.0, burst=1, now=10.0) == 0.0
+    assert second.acquire("k", rate=1.0, burst=1, now=10.0) > 0
+
+
+def test_idle_keys_are_evicted():
+    backend = LocalBackend(shards=1)
+    backend.acquire("a", rate=1.0, burst=2, now=0.0)
+    backend.acquire("b", rate=1.0, burst=2, now=1.0)
+    # "a" has been idle long enough to be full again, so it can be dropped
+    backend.acquire("c", rate=1.0, burst=2, now=2.5)
+    assert len(backend) == 2
+
+
+def test_faster_rules_do_not_evict_slower_buckets():
+    backend = LocalBackend(shards=1)
+    assert [backend.acquire("route:a", rate=10 / 60, burst=10, now=0.0) for _ in range(10)] == [0.0] * 10
+    # A 100/s bucket is full again after 0.1s; the exhausted 10/min one is not
+    backend.acquire("ip:b", rate=100.0, burst=10, now=3.0)
+    assert backend.acquire("route:a", rate=10 / 60, burst=10, now=3.0) > 0
+    # Refilled after 60s, so both can go
+    backend.acquire("ip:c", rate=100.0, burst=10, now=64.0)
+    assert len(backend) == 1
+
+
+def test_key_count_is_bounded():
+    backend = LocalBackend(shards=4, max_keys=100)
+    for i in range(10_000):
+        backend.acquire(f"ip:{i}", rate=1.0, burst=5, now=0.0)
+    assert len(backend) <= 100
+
+
+def test_middleware_returns_429_with_retry_after():
+    client = _app([RateLimitRule.parse("ip", "1/m:2")])
+    assert client.get("/ping").status_code == 200
+    assert client.get("/ping").status_code == 200
+    response = client.get("/ping")
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) == 60
+
+
+def test_user_buckets_are_per_token_and_route_rules_per_path():
+    client = _app([RateLimitRule.parse("user", "1/m:1"), RateLimitRule.parse("route", "1/m:1", paths=["/ping"])])
+    assert client.get("/ping", headers={"Authorization": "Bearer a.b.one"}).status_code == 200
+    assert client.get("/other", headers={"Authorization": "Bearer a.b.two"}).status_code == 200
+    assert client.get("/other", headers={"Authorization": "Bearer a.b.two"}).status_code == 429
+    # Route rule only covers /ping; anonymous /other requests are unlimited
+    assert client.get("/ping").status_code == 429
+    assert all(client.get("/other").status_code == 200 for _ in range(5))
+
+
+def test_websocket_handshakes_are_limited():
+    client = _app([RateLimitRule.parse("route", "1/m:1", paths=["/ws"])])
+    with client.websocket_connect("/ws") as ws:
+        assert ws.receive_json() == {"ok": True}
+    with pytest.raises(WebSocketDisconnect) as excinfo:
+        with client.websocket_connect("/ws"):
+            pass
+    assert excinfo.value.code == 1008
+
+
+def test_blocking_backends_run_off_the_event_loop(tmp_path):
+    threads = []
+
+    class Recording(SQLiteBackend):
+        def acquire(self, *args, **kwargs):
+            threads.append(threading.current_thread())
+            return super().acquire(*args, **kwargs)
+
+    client = _app([RateLimitRule.parse("ip", "1/m:1")], Recording(str(tmp_path / "limits.db")))
+    assert client.get("/ping").status_code == 200
+    assert client.get("/ping").status_code == 429
+    # The test client runs the event loop in its portal thread, never a worker thread
+    assert len(threads) == 2 and all(thread.name.startswith("AnyIO worker thread") for thread in threads)
+
+
+def test_rules_from_env():
+    rules = rules_from_env({"RATE_LIMIT_IP": "10/s", "RATE_LIMIT_USER": "", "RATE_LIMIT_ROUTE_PATHS": "/login"})
+    assert [r.scope for r in rules] == ["ip", "route"]
+    assert rules[1].paths == ("/login",)
@@ -0,0 +1,130 @@
+import zlib
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from backend.rasa.api import main, responses
+from backend.rasa.api.responses import (
+    CachedResponse,
+    CompressionMiddleware,
+    HTTPCacheMiddleware,
+    ResponseCache,
+    dumps,
+    negotiate_encoding,
+    parse_cache_routes,
+)
+
+BIG = "x" * 5000
+calls = {"n": 0}
+
+
+def big(request):
+    calls["n"] += 1
+    return PlainTextResponse(BIG + request.query_params.get("v", ""))
+
+
+def small(request):
+    return PlainTextResponse("ok")
+
+
+def image(request):
+    return Response(b"\x89PNG" + b"0" * 4000, media_type="image/png")
+
+
+def stream(request):
+    return StreamingResponse((f'{{"line":{i}}}\n' * 200 for i in range(3)), media_type="application/x-ndjson")
+
+
+@pytest.fixture
+def client():
+    calls["n"] = 0
+    app = Starlette(routes=[Route(p, f) for p, f in [("/big", big), ("/small", small), ("/image", image), ("/stream", stream)]])
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    app.add_middleware(HTTPCacheMiddleware, routes=parse_cache_routes("/big=60"), cache=ResponseCache(1024 * 1024))
+    return TestClient(app)
+
+
+def test_dumps_with_and_without_orjson(monkeypatch):
+    payload = {"a": [1, 2.5, None], "b": "é"}
+    fast = dumps(payload)
+    monkeypatch.setattr(responses, "orjson", None)
+    assert dumps(payload) == fast == '{"a":[1,2.5,null],"b":"é"}'.encode("utf-8")
+
+
+def test_negotiate_encoding_respects_q_values(monkeypatch):
+    monkeypatch.setattr(responses, "brotli", None)
+    assert negotiate_encoding(b"gzip, deflate, br") == "gzip"
+    assert negotiate_encoding(b"gzip;q=0, identity") is None
+    assert negotiate_encoding(b"*") == "gzip"
+    assert negotiate_encoding(None) is None
+    monkeypatch.setattr(responses, "brotli", object())
+    assert negotiate_encoding(b"gzip, br;q=0.5") == "gzip"
+    assert negotiate_encoding(b"gzip;q=0.8, br") == "br"
+
+
+def test_compression_by_size_and_type(client):
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert int(response.headers["content-length"]) < 200
+    assert response.text == BIG
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/image", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/big", headers={"Accept-Encoding": "identity"}).headers
+
+
+def test_streams_are_compressed_incrementally(client):
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert "etag" not in response.headers
+        raw = b"".join(response.iter_raw())
+    assert zlib.decompress(raw, 31).decode().count("\n") == 600
+
+
+def test_etag_and_304(client):
+    first = client.get("/small")
+    etag = first.headers["etag"]
+    assert client.get("/small", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/small", headers={"If-None-Match": f'W/{etag}, "other"'}).status_code == 304
+    assert client.get("/small", headers={"If-None-Match": '"other"'}).status_code == 200
+    gzipped = client.get("/big", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+    assert gzipped != client.get("/big", headers={"Accept-Encoding": "identity"}).headers["etag"]
+
+
+def test_cache_is_keyed_by_params_encoding_and_credentials(client):
+    plain = {"Accept-Encoding": "identity"}
+    for _ in range(3):
+        client.get("/big", params={"v": "1"}, headers=plain)
+    assert calls["n"] == 1
+    client.get("/big", params={"v": "2"}, headers=plain)
+    client.get("/big", params={"v": "1"}, headers={"Accept-Encoding": "gzip"})
+    client.get("/big", params={"v": "1"}, headers=dict(plain, Authorization="Bearer abc"))
+    assert calls["n"] == 4
+    cached = client.get("/big", params={"v": "1"}, headers={"Accept-Encoding": "gzip"})
+    assert calls["n"] == 4
+    assert cached.headers["content-encoding"] == "gzip" and cached.text == BIG + "1"
+
+
+def test_response_cache_ttl_and_size_bound():
+    cache = ResponseCache(max_bytes=400)
+    cache.put(("a",), CachedResponse(200, [], b"1" * 100, b'"a"', expires=10.0))
+    assert cache.get(("a",), now=5.0) is not None
+    assert cache.get(("a",), now=10.0) is None
+    for i in range(5):
+        cache.put((i,), CachedResponse(200, [], b"1" * 100, b'"x"', expires=10.0))
+    assert len(cache) == 4 and cache.size == 400
+    assert cache.get((0,), now=1.0) is None
+
+
+def test_catalog_responses_are_cached_and_conditional():
+    client = TestClient(main.app)
+    main.response_cache.clear()
+    response = client.get("/products", params={"limit": 50}, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200 and response.headers["content-encoding"] == "gzip"
+    assert len(response.json()) == 50
+    again = client.get("/products", params={"limit": 50}, headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["etag"]})
+    assert again.status_code == 304
+    assert main.response_cache.hits >= 1
+    assert client.get("/products/999999").status_code == 404
@@ -0,0 +1,84 @@
+from collections import Counter
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.columnar import table_from_records
+from dashboard.metrics import ConversationMetrics
+from dashboard.rollups import DURATION_BUCKETS, DailyRollup, rollup_for
+
+RANGES = [(date(2025, 3, 4), date(2025, 3, 12)), (date(2025, 3, 1), date(2025, 3, 1)),
+          (date(2025, 1, 1), date(2025, 12, 31))]
+
+
+@pytest.mark.parametrize("start,end", RANGES)
+def test_rollup_matches_raw_metrics(table, start, end):
+    rollup = DailyRollup.from_table(table)
+    engine = ConversationMetrics(table)
+    rows = engine.select(start, end)
+
+    summary, expected = rollup.summary(start, end), engine.summary(rows)
+    assert summary == pytest.approx(expected)
+    pd.testing.assert_frame_equal(rollup.daily_counts(start, end), engine.daily_counts(rows))
+    pd.testing.assert_frame_equal(rollup.top_user_messages(start, end), engine.top_user_messages(rows))
+    pd.testing.assert_frame_equal(rollup.top_actions(start, end, n=50), engine.top_actions(rows, n=50))
+
+
+def test_intents_and_durations(table):
+    rollup = DailyRollup.from_table(table)
+    start, end = RANGES[0]
+    conversations = [c for c in table.to_conversations()
+                     if start <= datetime.fromtimestamp(c["timestamp"]).date() <= end]
+    intents = Counter(m["intent"] for c in conversations for m in c["messages"]
+                      if m["type"] == "user" and "intent" in m)
+    top = rollup.top_intents(start, end, n=100)
+    assert dict(zip(top["Intent"], top["Count"])) == dict(intents)
+
+    histogram = rollup.duration_histogram(start, end)
+    expected = np.bincount(np.searchsorted(DURATION_BUCKETS, [c["duration"] for c in conversations]),
+                           minlength=len(DURATION_BUCKETS) + 1)
+    assert histogram["Count"].tolist() == expected.tolist()
+    daily = rollup.daily(start, end)
+    assert daily["messages"].sum() == sum(len(c["messages"]) for c in conversations)
+
+
+def test_incremental_batches_match_full_build(table):
+    full = DailyRollup.from_table(table)
+    conversations = table.to_conversations()
+    # Batches out of time order, each with its own string dictionaries
+    rollup = DailyRollup()
+    for batch in (conversations[200:], conversations[50:200], conversations[:50]):
+        rollup.add_table(table_from_records(batch))
+
+    assert rollup.days.tolist() == full.days.tolist()
+    for name in full.totals:
+        np.testing.assert_allclose(rollup.totals[name], full.totals[name])
+    assert rollup.histogram.tolist() == full.histogram.tolist()
+    for start, end in RANGES:
+        for name in ("text", "action", "intent"):
+            values, counts, _ = rollup.top(name, start, end, n=1000)
+            expected_values, expected_counts, _ = full.top(name, start, end, n=1000)
+            assert dict(zip(values, counts)) == dict(zip(expected_values, expected_counts))
+
+
+def test_empty_ranges(table):
+    rollup = DailyRollup.from_table(table)
+    assert rollup.summary(date(1990, 1, 1), date(1990, 1, 2))["total"] == 0
+    assert rollup.daily_counts(date(1990, 1, 1), date(1990, 1, 2)).empty
+    assert rollup.top_actions(date(2025, 3, 10), date(2025, 3, 1)).empty
+    assert DailyRollup().summary(date(2025, 3, 1), date(2025, 3, 2))["total"] == 0
+
+
+def test_rollup_is_reused_per_data_version(table):
+    rollup = rollup_for(table)
+    assert rollup_for(table) is rollup
+    table.version, saved = "other-version", table.version
+    try:
+        assert rollup_for(table) is not rollup
+    finally:
+        table.version = saved
+    # Ids of collected tables are reused, so tables without a version are not cached
+    built = table_from_records(table.to_conversations()[:5])
+    assert rollup_for(built) is not rollup_for(built)
@@ -0,0 +1,95 @@
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+from backend.rasa.api import server
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def test_cgroup_v2_quota(tmp_path):
+    _write(str(tmp_path / "cpu.max"), "150000 100000\n")
+    assert server.cgroup_cpu_limit(str(tmp_path)) == 1.5
+    _write(str(tmp_path / "cpu.max"), "max 100000\n")
+    assert server.cgroup_cpu_limit(str(tmp_path)) is None
+
+
+def test_cgroup_v1_quota(tmp_path):
+    _write(str(tmp_path / "cpu,cpuacct" / "cpu.cfs_quota_us"), "200000")
+    _write(str(tmp_path / "cpu,cpuacct" / "cpu.cfs_period_us"), "100000")
+    assert server.cgroup_cpu_limit(str(tmp_path)) == 2.0
+    _write(str(tmp_path / "cpu,cpuacct" / "cpu.cfs_quota_us"), "-1")
+    assert server.cgroup_cpu_limit(str(tmp_path)) is None
+
+
+def test_workers_follow_quota_and_env(tmp_path, monkeypatch):
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    monkeypatch.setattr(server.os, "sched_getaffinity", lambda pid: set(range(64)), raising=False)
+    _write(str(tmp_path / "cpu.max"), "250000 100000")
+    assert server.default_workers(str(tmp_path)) == 3
+    monkeypatch.setenv("WEB_CONCURRENCY", "5")
+    assert server.default_workers(str(tmp_path)) == 5
+
+
+def test_max_requests_jitter():
+    rng = random.Random(1)
+    budgets = {server.max_requests_for_worker(1000, 50, rng) for _ in range(200)}
+    assert min(budgets) >= 1000 and max(budgets) <= 1050 and len(budgets) > 10
+    assert server.max_requests_for_worker(0, 50) is None
+
+
+def _get(port):
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/me", timeout=5) as response:
+        return response.status
+
+
+def _children(pid):
+    out = subprocess.run(["pgrep", "-P", str(pid)], capture_output=True, text=True).stdout
+    return set(out.split())
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="POSIX only")
+def test_reload_replaces_workers_without_failing_requests():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    env = dict(os.environ, RATE_LIMIT_ENABLED="0")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "backend.rasa.api.server", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", "2", "--log-level", "warning", "--graceful-timeout", "5"],
+        cwd=ROOT, env=env,
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                assert _get(port) == 200
+                break
+            except OSError:
+                assert time.monotonic() < deadline, "launcher did not start"
+                time.sleep(0.1)
+        before = _children(process.pid)
+        process.send_signal(signal.SIGHUP)
+        deadline = time.monotonic() + 30
+        while _children(process.pid) & before:
+            assert _get(port) == 200
+            assert time.monotonic() < deadline, "old workers were not retired"
+            time.sleep(0.05)
+        assert len(_children(process.pid)) == 2
+        assert _get(port) == 200
+    finally:
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=30) == 0
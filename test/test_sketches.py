@@ -0,0 +1,109 @@
+from collections import Counter
+from datetime import date
+
+import numpy as np
+import pytest
+
+from dashboard.rollups import DailyRollup
+from dashboard.sketches import SpaceSaving, error_capacity, merge
+
+
+def zipf_days(seed, days=20, size=5000):
+    rng = np.random.default_rng(seed)
+    return [rng.zipf(1.4, size).astype(np.uint64) for _ in range(days)]
+
+
+def check_bounds(sketch, stream, capacity):
+    truth = Counter(stream.tolist())
+    total = len(stream)
+    assert sketch.total == total
+    for key, count, error in zip(sketch.keys.tolist(), sketch.counts.tolist(), sketch.errors.tolist()):
+        assert count - error <= truth[key] <= count
+        assert error <= total / capacity
+    held = set(sketch.keys.tolist())
+    assert all(key in held for key, count in truth.items() if count > total / capacity)
+    return truth
+
+
+@pytest.mark.parametrize("capacity", [20, 100, 500])
+def test_bounds_against_exact_counts(capacity):
+    stream = np.concatenate(zipf_days(capacity))
+    sketch = SpaceSaving(capacity)
+    for part in np.array_split(stream, 13):
+        sketch.update(part)
+    assert len(sketch) <= capacity
+    truth = check_bounds(sketch, stream, capacity)
+    keys, counts, _ = sketch.top(5)
+    assert keys.tolist() == [key for key, _ in truth.most_common(5)]
+
+
+@pytest.mark.parametrize("capacity", [20, 100, 500])
+def test_merged_day_sketches(capacity):
+    days = zipf_days(capacity + 1)
+    sketches = []
+    for stream in days:
+        sketch = SpaceSaving(capacity)
+        sketch.update(stream)
+        sketches.append(sketch)
+    merged = merge(sketches[3:15], capacity)
+    assert len(merged) <= capacity
+    check_bounds(merged, np.concatenate(days[3:15]), capacity)
+
+
+def test_exact_while_within_capacity():
+    stream = np.array([5, 3, 5, 7, 5, 3], dtype=np.uint64)
+    sketch = SpaceSaving(3)
+    sketch.update(stream[:4])
+    sketch.update(stream[4:])
+    assert sketch.exact
+    assert dict(zip(sketch.keys.tolist(), sketch.counts.tolist())) == {5: 3, 3: 2, 7: 1}
+    assert sketch.estimate(9) == (0, 0)
+
+    sketch.update(np.array([9], dtype=np.uint64))
+    assert not sketch.exact and len(sketch) == 3
+    count, error = sketch.estimate(7)
+    assert count - error <= 1 <= count
+
+
+def test_weighted_updates():
+    sketch = SpaceSaving(10)
+    sketch.update([1, 2], weights=[5, 3])
+    sketch.update([2], weights=[4])
+    assert sketch.estimate(2) == (7, 0) and sketch.total == 12
+
+
+def test_error_capacity():
+    assert error_capacity(0.01) == 100
+    with pytest.raises(ValueError):
+        error_capacity(0)
+
+
+def test_rollup_sketches_track_exact_rollup(table):
+    exact = DailyRollup.from_table(table)
+    error = 0.2
+    sketched = DailyRollup.from_table(table, error=error)
+    start, end = date(2025, 3, 3), date(2025, 3, 15)
+    for name in ("text", "action", "intent"):
+        truth = dict(zip(*exact.top(name, start, end, n=10000)[:2]))
+        total = sum(truth.values())
+        values, counts, errors = sketched.top(name, start, end, n=5)
+        for value, count, err in zip(values, counts, errors):
+            assert count - err <= truth[value] <= count <= truth[value] + error * total
+        # Values more frequent than the error bound cannot be missed
+        heavy = {value for value, count in truth.items() if count > error * total}
+        assert heavy <= set(sketched.top(name, start, end, n=10000)[0])
+        sketches = sketched.counts[name]
+        assert all(len(sketch) <= error_capacity(error) for sketch in sketches.sketches.values())
+        assert len(sketches.names) <= 2 * len(sketches)
+
+
+def test_rollup_sketches_are_exact_for_small_data(table):
+    exact = DailyRollup.from_table(table)
+    sketched = DailyRollup.from_table(table, error=0.0001)
+    start, end = date(2025, 3, 1), date(2025, 3, 31)
+    for name in ("text", "action", "intent"):
+        values, counts, errors = sketched.top(name, start, end, n=10000)
+        expected_values, expected_counts, _ = exact.top(name, start, end, n=10000)
+        assert dict(zip(values, counts)) == dict(zip(expected_values, expected_counts))
+        assert not errors.any()
+    assert sketched.top_actions(start, end).attrs["max_error"] == 0
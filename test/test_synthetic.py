@@ -0,0 +1,75 @@
+import gzip
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+from dashboard.data_loader import load_conversation_data
+from dashboard.synthetic import generate_shard, learn_from_files, to_tracker, write_dataset
+
+RASA_DIR = os.path.join(os.path.dirname(__file__), "..", "backend", "rasa")
+SOURCE = os.path.join(RASA_DIR, "tests", "rasa_conversations.json")
+DOMAIN = os.path.join(RASA_DIR, "domain.yml")
+NLU = os.path.join(RASA_DIR, "data", "nlu.yml")
+
+
+@pytest.fixture(scope="module")
+def model():
+    return learn_from_files([SOURCE], DOMAIN, NLU)
+
+
+def test_model_learns_intents_and_domain_responses(model):
+    assert "greet" in model.transitions[None]
+    assert "utter_greet" in model.replies["greet"]
+    # Response variants from domain.yml and NLU examples are both available
+    assert "Hi there! How may I help you?" in model.action_texts["utter_greet"]
+    assert "howdy" in model.user_texts["greet"]
+
+
+def test_generation_is_seeded(model):
+    first = generate_shard(model, 0, 0, 50, seed=7, start_ts=0, span_seconds=86400)
+    again = generate_shard(model, 0, 0, 50, seed=7, start_ts=0, span_seconds=86400)
+    other = generate_shard(model, 0, 0, 50, seed=8, start_ts=0, span_seconds=86400)
+    assert first == again
+    assert first != other
+
+
+def test_conversations_json_round_trip(model, tmp_path):
+    path = tmp_path / "conversations.json.gz"
+    write_dataset(model, str(path), 120, seed=1, shard_size=50, workers=1)
+    with gzip.open(path, "rt") as f:
+        conversations = json.load(f)["conversations"]
+    assert len(conversations) == 120
+    assert [c["conversation_id"] for c in conversations[:2]] == ["syn0000000000", "syn0000000001"]
+    conv = conversations[0]
+    assert conv["messages"][0]["type"] == "user"
+    assert conv["num_turns"] == sum(1 for m in conv["messages"] if m["type"] == "user")
+
+
+def test_output_does_not_depend_on_worker_count(model, tmp_path):
+    serial, parallel = tmp_path / "serial.ndjson", tmp_path / "parallel.ndjson"
+    start = datetime(2025, 1, 1)
+    write_dataset(model, str(serial), 90, seed=3, ndjson=True, shard_size=20, workers=1, start_date=start)
+    write_dataset(model, str(parallel), 90, seed=3, ndjson=True, shard_size=20, workers=2, start_date=start)
+    assert serial.read_bytes() == parallel.read_bytes()
+    assert len(serial.read_text().splitlines()) == 90
+
+
+def test_tracker_format_is_readable_by_dashboard_loader(model, tmp_path):
+    path = tmp_path / "trackers.json"
+    write_dataset(model, str(path), 30, seed=2, fmt="tracker", shard_size=10, workers=1)
+    conversations = load_conversation_data(custom_path=str(path))
+    assert len(conversations) == 30
+    assert all(c["messages"] for c in conversations)
+
+
+def test_to_tracker_emits_action_before_bot_event(model):
+    import random
+
+    conv = model.generate(random.Random(0), 0, 1_700_000_000.0)
+    tracker = to_tracker(conv)
+    names = [e["event"] for e in tracker["events"]]
+    assert names[:3] == ["action", "session_started", "action"]
+    bot_index = names.index("bot")
+    assert tracker["events"][bot_index - 1]["event"] == "action"
@@ -0,0 +1,83 @@
+import binascii
+import sqlite3
+
+from fastapi.testclient import TestClient
+
+from backend.rasa.actions.actions import DB_PATH
+from backend.rasa.api import main
+from backend.rasa.api.thumbnails import ImageCache, ThumbnailStore, etag_matches
+
+PRODUCT_ID = 680
+
+
+def _expected_image(product_id=PRODUCT_ID):
+    conn = sqlite3.connect(DB_PATH)
+    (value,) = conn.execute(
+        "SELECT ThumbNailPhoto FROM Product WHERE ProductID = ?", (product_id,)
+    ).fetchone()
+    conn.close()
+    return binascii.unhexlify(value)
+
+
+def test_thumbnail_is_streamed_with_strong_etag():
+    main.thumbnails.cache = ImageCache()
+    client = TestClient(main.app)
+    response = client.get(f"/products/{PRODUCT_ID}/thumbnail")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/gif"
+    assert response.content == _expected_image()
+    assert response.content.startswith(b"GIF89a")
+    etag = response.headers["etag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+    # The streamed image is now served from the in-memory cache
+    assert len(main.thumbnails.cache) == 1
+    assert client.get(f"/products/{PRODUCT_ID}/thumbnail").content == response.content
+
+
+def test_conditional_get_returns_304():
+    client = TestClient(main.app)
+    etag = client.get(f"/products/{PRODUCT_ID}/thumbnail").headers["etag"]
+    response = client.get(f"/products/{PRODUCT_ID}/thumbnail", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+def test_missing_product_returns_404():
+    client = TestClient(main.app)
+    assert client.get("/products/999999/thumbnail").status_code == 404
+
+
+def test_chunked_reads_without_blobopen_match_blob_reads():
+    store = ThumbnailStore(DB_PATH, chunk_size=101)
+    info = store.info(PRODUCT_ID)
+    assert store.chunk_size == 100
+    conn = sqlite3.connect(DB_PATH)
+
+    class NoBlobOpen:
+        def execute(self, *args):
+            return conn.execute(*args)
+
+    blob_chunks = list(store._read_chunks(conn, info))
+    range_chunks = list(store._read_chunks(NoBlobOpen(), info))
+    conn.close()
+    assert b"".join(blob_chunks) == b"".join(range_chunks)
+    assert binascii.unhexlify(b"".join(range_chunks)) == _expected_image()
+
+
+def test_image_cache_is_bounded_by_bytes():
+    cache = ImageCache(max_bytes=10)
+    cache.put((1, "a"), b"12345")
+    cache.put((2, "b"), b"12345")
+    cache.get((1, "a"))
+    cache.put((3, "c"), b"12345")
+    assert cache.get((2, "b")) is None
+    assert cache.get((1, "a")) == b"12345"
+    assert cache.size <= 10
+
+
+def test_etag_matching():
+    assert etag_matches('"abc", "def"', '"def"')
+    assert etag_matches("*", '"abc"')
+    assert etag_matches('W/"abc"', '"abc"')
+    assert not etag_matches(None, '"abc"')
@@ -0,0 +1,67 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from dashboard.columnar import table_from_records
+from dashboard.time_index import TimeIndex, index_for, local_midnight
+
+
+def test_dates_match_timestamp_scan(table):
+    index = index_for(table)
+    conversations = table.to_conversations()
+    for start, end in [(date(2025, 3, 4), date(2025, 3, 9)), (date(2025, 3, 1), date(2025, 3, 1)),
+                       (date(2025, 2, 1), date(2025, 4, 1))]:
+        rows = index.dates(start, end)
+        expected = [i for i, c in enumerate(conversations)
+                    if "timestamp" in c and start <= datetime.fromtimestamp(c["timestamp"]).date() <= end]
+        assert sorted(rows.tolist()) == expected
+        times = [conversations[row]["timestamp"] for row in rows]
+        assert times == sorted(times)
+
+
+def test_dates_are_memoized_views(table):
+    index = index_for(table)
+    rows = index.dates(date(2025, 3, 2), date(2025, 3, 8))
+    assert index.dates(date(2025, 3, 2), date(2025, 3, 8)) is rows
+    assert np.shares_memory(rows, index.order)
+    assert not rows.flags.writeable
+    assert len(index.dates(date(2025, 3, 8), date(2025, 3, 2))) == 0
+
+
+def test_index_is_reused_per_data_version(table):
+    index = index_for(table)
+    assert index_for(table) is index
+    table.version, saved = "other-version", table.version
+    try:
+        assert index_for(table) is not index
+    finally:
+        table.version = saved
+    # Ids of collected tables are reused, so tables without a version are not cached
+    built = table_from_records(table.to_conversations()[:5])
+    assert index_for(built) is not index_for(built)
+
+
+def test_missing_timestamps_are_not_indexed():
+    index = TimeIndex([30.5, np.nan, 10.0, 20.0, np.nan, 10.9])
+    assert len(index) == 4
+    assert index.order.tolist() == [2, 5, 3, 0]
+    assert index.between(10, 30).tolist() == [2, 5, 3]
+    assert index.between(10.5, 30.5).tolist() == [3, 0]
+
+
+@pytest.mark.parametrize("size", [10**3, 10**5, 10**7])
+def test_scaling(size):
+    rng = np.random.default_rng(size)
+    first = local_midnight(date(2025, 1, 1))
+    epoch = first + rng.uniform(0, 365 * 86400, size)
+    epoch[rng.integers(0, size, size // 100)] = np.nan
+    index = TimeIndex(epoch)
+    assert np.all(np.diff(index.starts) >= 0)
+
+    start, end = date(2025, 3, 10), date(2025, 6, 20)
+    rows = index.dates(start, end)
+    lo, hi = local_midnight(start), local_midnight(end + timedelta(days=1))
+    assert len(rows) == np.count_nonzero((epoch >= lo) & (epoch < hi))
+    assert np.all((epoch[rows] >= lo) & (epoch[rows] < hi))
+    assert np.shares_memory(rows, index.order)
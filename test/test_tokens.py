@@ -0,0 +1,82 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.rasa.api import main
+from backend.rasa.api.tokens import KeyRing, TokenError, TokenManager, bearer_token
+
+USER = {"id": "u1", "email": "ada@example.com", "name": "Ada", "role": "user"}
+
+
+def test_issue_and_verify_round_trip():
+    manager = TokenManager(KeyRing(["secret"]), expire_seconds=60)
+    claims = manager.verify(manager.issue(USER, now=1000), now=1010)
+    assert claims["sub"] == "u1"
+    assert claims["email"] == "ada@example.com"
+    assert claims["exp"] == 1060
+
+
+def test_tampered_and_foreign_tokens_are_rejected():
+    manager = TokenManager(KeyRing(["secret"]))
+    header, payload, signature = manager.issue(USER).split(".")
+    forged = manager.issue({**USER, "role": "admin"}).split(".")[1]
+    with pytest.raises(TokenError):
+        manager.verify(f"{header}.{forged}.{signature}")
+    with pytest.raises(TokenError):
+        manager.verify(TokenManager(KeyRing(["other"])).issue(USER))
+    with pytest.raises(TokenError):
+        manager.verify("not-a-token")
+
+
+def test_expired_tokens_are_rejected_even_when_cached():
+    manager = TokenManager(KeyRing(["secret"]), expire_seconds=60)
+    token = manager.issue(USER, now=1000)
+    manager.verify(token, now=1001)
+    assert len(manager.cache) == 1
+    with pytest.raises(TokenError):
+        manager.verify(token, now=1060)
+    assert len(manager.cache) == 0
+
+
+def test_cache_skips_signature_verification():
+    manager = TokenManager(KeyRing(["secret"]))
+    token = manager.issue(USER)
+    first = manager.verify(token)
+    manager._verify_uncached = None  # any uncached verification would now fail
+    assert manager.verify(token) is first
+
+
+def test_cache_is_bounded():
+    manager = TokenManager(KeyRing(["secret"]), cache_size=2)
+    for i in range(5):
+        manager.verify(manager.issue({**USER, "id": f"u{i}"}))
+    assert len(manager.cache) == 2
+
+
+def test_rotation_keeps_previous_key_valid():
+    manager = TokenManager(KeyRing(["old"]))
+    old_token = manager.issue(USER)
+    manager.rotate("new")
+    new_token = manager.issue(USER)
+    assert manager.verify(old_token)["sub"] == "u1"
+    assert manager.verify(new_token)["sub"] == "u1"
+    manager.rotate("newer")
+    with pytest.raises(TokenError):
+        manager.verify(old_token)
+
+
+def test_bearer_token_parsing():
+    assert bearer_token(None) is None
+    assert bearer_token("Bearer abc") == "abc"
+    with pytest.raises(TokenError):
+        bearer_token("Basic abc")
+
+
+def test_me_returns_token_user_and_rejects_bad_tokens():
+    client = TestClient(main.app)
+    token = main.tokens.issue(USER)
+    response = client.get("/me", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert response.json() == {"id": "u1", "email": "ada@example.com", "name": "Ada", "role": "user"}
+    response = client.get("/me", headers={"Authorization": "Bearer garbage"})
+    assert response.status_code == 401
+    assert response.headers["www-authenticate"] == "Bearer"
@@ -0,0 +1,118 @@
+import json
+import random
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+import sqlalchemy as sa
+
+from dashboard import tracker_store
+from dashboard.columnar import open_table
+from dashboard.rollups import DailyRollup
+from dashboard.synthetic import to_tracker
+from dashboard.time_index import index_for
+from dashboard.tracker_store import SQLTrackerSource, events, insert_trackers, metadata
+
+RANGES = [(date(2025, 3, 4), date(2025, 3, 12)), (date(2025, 3, 1), date(2025, 3, 1)),
+          (date(2025, 1, 1), date(2025, 12, 31)), (date(2025, 3, 9), date(2025, 3, 2))]
+
+
+@pytest.fixture(scope="module")
+def dump(write_conversations):
+    return write_conversations(300, seed=9, fmt="tracker", days=15)
+
+
+def _store(dump, path):
+    url = f"sqlite:///{path}"
+    engine = sa.create_engine(url)
+    metadata.create_all(engine)
+    with open(dump) as f, engine.begin() as connection:
+        insert_trackers(connection, json.load(f).items())
+    return url
+
+
+@pytest.fixture(scope="module")
+def source(dump, tmp_path_factory):
+    return SQLTrackerSource(_store(dump, tmp_path_factory.mktemp("sql") / "tracker.db"), create=True)
+
+
+@pytest.fixture(scope="module")
+def reference(dump):
+    return open_table(dump)
+
+
+@pytest.mark.parametrize("start,end", RANGES)
+def test_pushdown_matches_rollup_of_the_dump(source, reference, start, end):
+    rollup = DailyRollup.from_table(reference)
+    assert source.summary(start, end) == pytest.approx(rollup.summary(start, end))
+    pd.testing.assert_frame_equal(source.daily_counts(start, end), rollup.daily_counts(start, end))
+    pd.testing.assert_frame_equal(source.duration_histogram(start, end), rollup.duration_histogram(start, end))
+    for name in ("text", "action", "intent"):
+        values, counts, errors = source.top(name, start, end, n=1000)
+        expected = rollup.top(name, start, end, n=1000)
+        assert dict(zip(values, counts.tolist())) == dict(zip(expected[0], expected[1].tolist()))
+        assert not errors.any()
+    top = source.top_actions(start, end)
+    assert top["Count"].tolist() == rollup.top_actions(start, end)["Count"].tolist()
+    assert top.attrs["max_error"] == 0
+
+
+@pytest.mark.parametrize("start,end", RANGES[:3])
+def test_table_holds_the_range_only(source, reference, start, end, monkeypatch):
+    # Several round trips per conversation
+    monkeypatch.setattr(tracker_store, "STREAM_BATCH", 7)
+    table = SQLTrackerSource(source.url).table(start, end)
+    expected = [reference.conversation(int(row)) for row in index_for(reference).dates(start, end)]
+    assert sorted(table.to_conversations(), key=lambda c: c["conversation_id"]) == \
+        sorted(expected, key=lambda c: c["conversation_id"])
+    assert len(source) == len(reference)
+
+
+def _plan(source, start, end):
+    conversations = source.conversations_query(start, end)
+    sql = str(sa.select(conversations).compile(source.engine, compile_kwargs={"literal_binds": True}))
+    with source.engine.connect() as connection:
+        return " ".join(str(row) for row in connection.execute(sa.text("EXPLAIN QUERY PLAN " + sql)))
+
+
+def test_range_queries_use_the_indexes(source):
+    # A few days: seek the senders with events in range, then their events
+    plan = _plan(source, date(2025, 3, 4), date(2025, 3, 5))
+    assert "ix_events_timestamp" in plan
+    assert "COVERING INDEX ix_events_sender_id_timestamp_type_name" in plan
+    # Most of the data: one scan of the covering index
+    plan = _plan(source, *RANGES[0])
+    assert "ix_events_timestamp" not in plan
+    assert "COVERING INDEX ix_events_sender_id_timestamp_type_name" in plan
+    assert tracker_store.missing_indexes(source.engine) == []
+
+
+def test_missing_indexes_are_reported_or_created(dump, tmp_path, caplog):
+    url = _store(dump, tmp_path / "tracker.db")
+    engine = sa.create_engine(url)
+    for index in tracker_store.INDEXES:
+        index.drop(engine)
+    SQLTrackerSource(url)
+    assert "ix_events_timestamp, ix_events_sender_id_timestamp_type_name" in caplog.text
+    assert tracker_store.missing_indexes(SQLTrackerSource(url, create=True).engine) == []
+
+
+def test_poll_sees_new_events(model, dump, tmp_path):
+    url = _store(dump, tmp_path / "tracker.db")
+    source = SQLTrackerSource(url)
+    day = date(2025, 3, 20)
+    assert source.poll() == 0
+    assert source.summary(day, day)["total"] == 0
+
+    rng = random.Random(4)
+    conversations = [model.generate(rng, 5000 + i, datetime(2025, 3, 20, 12).timestamp()) for i in range(3)]
+    with source.engine.begin() as connection:
+        added = insert_trackers(connection, [(c["conversation_id"], to_tracker(c)) for c in conversations])
+    assert source.poll() == added
+    assert source.summary(day, day)["total"] == 3
+    assert len(source.tiers(day, day)[0][0]) == 3
+
+    with source.engine.begin() as connection:
+        connection.execute(events.delete())
+    assert source.poll() == 0
+    assert len(source) == 0 and source.tiers(day, day) == []